@@ -1,6 +1,6 @@
 from sentry.api.bases import OrganizationEndpoint
 from sentry.api.bases.organization import OrganizationAuditPermission
-from sentry.api.paginator import DateTimePaginator
+from sentry.api.paginator import DateTimeKeysetPaginator
 from sentry.api.serializers import serialize
 from sentry.models import AuditLogEntry
 
@@ -23,7 +23,7 @@ class OrganizationAuditLogsEndpoint(OrganizationEndpoint):
         return self.paginate(
             request=request,
             queryset=queryset,
-            paginator_cls=DateTimePaginator,
+            paginator_cls=DateTimeKeysetPaginator,
             order_by="-datetime",
             on_results=lambda x: serialize(x, request.user),
         )
@@ -19,7 +19,7 @@ from sentry.api.helpers.group_index import (
     track_slo_response,
     update_groups,
 )
-from sentry.api.paginator import DateTimePaginator, Paginator
+from sentry.api.paginator import DateTimeKeysetPaginator, Paginator
 from sentry.api.serializers import serialize
 from sentry.api.serializers.models.group import StreamGroupSerializerSnuba
 from sentry.api.utils import InvalidParams, get_date_range_from_params
@@ -118,7 +118,7 @@ def inbox_search(
             assigned_or_suggested_filter(owner_search, projects, field_filter="group_id")
         )
 
-    paginator = DateTimePaginator(qs.order_by("date_added"), "-date_added")
+    paginator = DateTimeKeysetPaginator(qs, "-date_added")
     results = paginator.get_result(limit, cursor, count_hits=count_hits, max_hits=max_hits)
 
     # We want to return groups from the endpoint, but have the cursor be related to the
@@ -1,5 +1,6 @@
 import re
-from collections import namedtuple
+import threading
+from collections import OrderedDict, namedtuple
 from dataclasses import asdict, dataclass, field
 from datetime import datetime
 from typing import Any, List, Mapping, NamedTuple, Sequence, Set, Tuple, Union
@@ -28,6 +29,7 @@ from sentry.search.utils import (
     parse_numeric_value,
     parse_percentage,
 )
+from sentry.utils import metrics
 from sentry.utils.compat import filter, map
 from sentry.utils.snuba import is_duration_measurement, is_measurement, is_span_op_breakdown
 from sentry.utils.validators import is_event_id, is_span_id
@@ -465,6 +467,9 @@ class SearchVisitor(NodeVisitor):
             config = SearchConfig()
         self.config = config
         self.params = params if params is not None else {}
+        # Set when the result depends on the current time, e.g. relative
+        # date filters, in which case it must not be cached.
+        self.is_time_dependent = False
 
     @cached_property
     def key_mappings_lookup(self):
@@ -600,6 +605,7 @@ class SearchVisitor(NodeVisitor):
         (search_key, _, value) = children
 
         if self.is_date_key(search_key.name):
+            self.is_time_dependent = True
             try:
                 from_val, to_val = parse_datetime_range(value.text)
             except InvalidQuery as exc:
@@ -783,6 +789,7 @@ class SearchVisitor(NodeVisitor):
         operator = handle_negation(negation, operator)
         is_date_aggregate = any(key in search_key.name for key in self.config.date_keys)
         if is_date_aggregate:
+            self.is_time_dependent = True
             try:
                 from_val, to_val = parse_datetime_range(search_value.text)
             except InvalidQuery as exc:
@@ -915,7 +922,9 @@ class SearchVisitor(NodeVisitor):
         return f'"{value}"'
 
     def visit_search_key(self, node, children):
-        key = children[0]
+        return self._resolve_search_key(children[0])
+
+    def _resolve_search_key(self, key):
         if self.config.allowed_keys and key not in self.config.allowed_keys:
             raise InvalidSearchQuery("Invalid key for this search")
         return SearchKey(self.key_mappings_lookup.get(key, key))
@@ -1070,10 +1079,146 @@ default_config = SearchConfig(
 )
 
 
+# A search term that can only ever be parsed as a plain `key:value` text
+# filter: the value starts with a letter, so it can't be a date, duration,
+# number or list, and it contains no quotes, escapes or parens.
+SIMPLE_FILTER_RE = re.compile(r"(!?)([a-zA-Z0-9_.-]+):([a-zA-Z][^\t\n ()\"\\]*)")
+SIMPLE_FILTER_EXCLUDED_KEYS = frozenset(["has", "is"])
+SIMPLE_FILTER_EXCLUDED_VALUES = frozenset(["true", "false"])
+
+PARSE_CACHE_SIZE = 1000
+
+
+def parse_simple_query(query, visitor):
+    """
+    Parses a query made up only of plain `key:value` text filters without
+    running the grammar, producing the same filters the grammar would.
+
+    Returns None if any term of the query isn't such a filter.
+    """
+    terms = []
+    for token in query.split(" "):
+        if not token:
+            continue
+        match = SIMPLE_FILTER_RE.fullmatch(token)
+        if match is None:
+            return None
+        negation, key, value = match.groups()
+        if key in SIMPLE_FILTER_EXCLUDED_KEYS or value.lower() in SIMPLE_FILTER_EXCLUDED_VALUES:
+            return None
+        terms.append((negation, key, value))
+
+    if not terms:
+        return None
+
+    return [
+        visitor._handle_text_filter(
+            visitor._resolve_search_key(key), "!=" if negation else "=", SearchValue(value)
+        )
+        for negation, key, value in terms
+    ]
+
+
+class ParseCache:
+    """
+    LRU cache of parsed search queries.
+
+    Configs are module level singletons, so they're keyed by identity. Each
+    entry holds a reference to its config, so that the id can't be reused
+    while the entry is alive.
+
+    Parsed terms are made of named tuples, but lists (the result itself,
+    paren groups and `IN` values) are copied on the way out so callers can't
+    modify the cached result.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+
+    def get(self, key, config):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] is not config:
+                return None
+            self.entries.move_to_end(key)
+        return copy_terms(entry[1])
+
+    def set(self, key, config, terms):
+        terms = copy_terms(terms)
+        with self.lock:
+            self.entries[key] = (config, terms)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+def copy_terms(terms):
+    def copy_term(term):
+        if isinstance(term, ParenExpression):
+            return ParenExpression(copy_terms(term.children))
+        if isinstance(term, (SearchFilter, AggregateFilter)) and isinstance(
+            term.value.raw_value, list
+        ):
+            return term._replace(value=SearchValue(list(term.value.raw_value)))
+        return term
+
+    return [copy_term(term) for term in terms]
+
+
+def freeze_params(params):
+    if isinstance(params, dict):
+        return tuple(sorted((key, freeze_params(value)) for key, value in params.items()))
+    if isinstance(params, (list, tuple)):
+        return tuple(freeze_params(value) for value in params)
+    if isinstance(params, (set, frozenset)):
+        return frozenset(freeze_params(value) for value in params)
+    return params
+
+
+def get_parse_cache_key(query, config, params):
+    # Params are only used to resolve aggregate functions.
+    if "(" in query and params:
+        try:
+            params_key = freeze_params(params)
+            hash(params_key)
+        except TypeError:
+            return None
+    else:
+        params_key = None
+    return (query, id(config), params_key)
+
+
+parse_cache = ParseCache(PARSE_CACHE_SIZE)
+
+
 def parse_search_query(query, config=None, params=None) -> Sequence[SearchFilter]:
     if config is None:
         config = default_config
 
+    cache_key = get_parse_cache_key(query, config, params)
+    if cache_key is not None:
+        terms = parse_cache.get(cache_key, config)
+        if terms is not None:
+            metrics.incr("event_search.parse_cache", tags={"result": "hit"}, sample_rate=0.1)
+            return terms
+        metrics.incr("event_search.parse_cache", tags={"result": "miss"}, sample_rate=0.1)
+
+    visitor = SearchVisitor(config, params=params)
+    terms = parse_simple_query(query, visitor)
+    if terms is None:
+        terms = _parse_search_query(query, visitor)
+
+    if cache_key is not None and not visitor.is_time_dependent:
+        parse_cache.set(cache_key, config, terms)
+    return terms
+
+
+def _parse_search_query(query, visitor):
     try:
         tree = event_search_grammar.parse(query)
     except IncompleteParseError as e:
@@ -1086,4 +1231,4 @@ def parse_search_query(query, config=None, params=None) -> Sequence[SearchFilter
                 "This is commonly caused by unmatched parentheses. Enclose any text in double quotes.",
             )
         )
-    return SearchVisitor(config, params=params).visit(tree)
+    return visitor.visit(tree)
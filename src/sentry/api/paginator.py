@@ -1,4 +1,5 @@
 import bisect
+import calendar
 import functools
 import math
 from datetime import datetime
@@ -9,8 +10,12 @@ from django.db.models.functions import Lower
 from django.db.models.sql.datastructures import EmptyResultSet
 from django.utils import timezone
 
+from sentry.utils import metrics
+from sentry.utils.cache import cache
 from sentry.utils.compat import map, zip
 from sentry.utils.cursors import Cursor, CursorResult, build_cursor
+from sentry.utils.hashlib import md5_text
+from sentry.utils.query import estimate_row_count
 
 quote_name = connections["default"].ops.quote_name
 
@@ -218,6 +223,211 @@ class DateTimePaginator(BasePaginator):
         )
 
 
+class KeysetPaginator(BasePaginator):
+    """
+    Paginates by seeking directly to the row a cursor points at, rather than
+    scanning past an offset. Rows are ordered by ``(key, id)`` so every row has
+    a unique position, and pages are fetched with a row comparison like
+    ``(key, id) < (%s, %s)`` which Postgres can satisfy from a composite index
+    regardless of how deep the page is.
+
+    Cursors keep the usual ``value:offset:is_prev`` format, but the offset slot
+    holds the id of the row the cursor was built from instead of a row count.
+
+    Hit counts are taken from the Postgres planner estimate when it shows the
+    result set is larger than ``max_hits``. Only small result sets are counted
+    exactly, and those counts are cached briefly.
+    """
+
+    tiebreaker = "id"
+    hits_cache_ttl = 60
+
+    def get_item_key(self, item, for_prev=False):
+        return getattr(item, self.key)
+
+    def value_from_cursor(self, cursor):
+        return cursor.value
+
+    def _get_column(self, queryset):
+        if self.key in queryset.query.extra:
+            col_query, col_params = queryset.query.extra[self.key]
+            col_params = col_params[:]
+        else:
+            col_query, col_params = quote_name(self.key), []
+
+        col = col_query if "." in col_query else f"{queryset.model._meta.db_table}.{col_query}"
+        return col, col_params
+
+    def build_queryset(self, value, tiebreaker, is_prev):
+        asc = self._is_asc(is_prev)
+        prefix = "" if asc else "-"
+
+        queryset = self.queryset.order_by(f"{prefix}{self.key}", f"{prefix}{self.tiebreaker}")
+
+        if tiebreaker:
+            col, col_params = self._get_column(queryset)
+            tiebreaker_col = f"{queryset.model._meta.db_table}.{quote_name(self.tiebreaker)}"
+            operator = ">" if asc else "<"
+            queryset = queryset.extra(
+                where=[f"({col}, {tiebreaker_col}) {operator} (%s, %s)"],
+                params=col_params + [value, tiebreaker],
+            )
+
+        return queryset
+
+    def _build_cursor(self, item, is_prev, has_results):
+        return Cursor(self.get_item_key(item, for_prev=is_prev), item.id, is_prev, has_results)
+
+    def get_result(self, limit=100, cursor=None, count_hits=False, known_hits=None, max_hits=None):
+        if cursor is None:
+            cursor = Cursor(0, 0, 0)
+
+        limit = min(limit, self.max_limit)
+
+        # A cursor without a tiebreaker id is the initial page.
+        has_position = cursor.offset > 0
+        cursor_value = self.value_from_cursor(cursor) if has_position else None
+
+        queryset = self.build_queryset(
+            cursor_value, cursor.offset if has_position else None, cursor.is_prev
+        )
+
+        if max_hits is None:
+            max_hits = MAX_HITS_LIMIT
+        if count_hits:
+            hits = self.count_hits(max_hits)
+        elif known_hits is not None:
+            hits = known_hits
+        else:
+            hits = None
+
+        # Fetch one extra row to find out whether there's another page in the
+        # direction we're paging.
+        results = list(queryset[: limit + 1])
+        has_more = len(results) > limit
+        results = results[:limit]
+
+        if cursor.is_prev:
+            results.reverse()
+            has_prev, has_next = has_more, has_position
+        else:
+            has_prev, has_next = has_position, has_more
+
+        if results:
+            next_cursor = self._build_cursor(results[-1], False, has_next)
+            prev_cursor = self._build_cursor(results[0], True, has_prev)
+        else:
+            # Nothing past the cursor, so page back from the same position.
+            next_cursor = Cursor(cursor.value, cursor.offset, False, has_next)
+            prev_cursor = Cursor(cursor.value, cursor.offset, True, has_prev)
+
+        if self.on_results:
+            results = self.on_results(results)
+
+        cursor = CursorResult(
+            results=results,
+            next=next_cursor,
+            prev=prev_cursor,
+            hits=hits,
+            max_hits=max_hits if count_hits else None,
+        )
+
+        if self.post_query_filter:
+            cursor.results = self.post_query_filter(cursor.results)
+
+        return cursor
+
+    def estimate_hits(self):
+        """
+        Returns the Postgres planner's row estimate for the queryset, or None
+        if it couldn't be determined.
+        """
+        return estimate_row_count(self.queryset)
+
+    def count_hits(self, max_hits):
+        if not max_hits:
+            return 0
+
+        try:
+            sql, params = self.queryset.query.sql_with_params()
+        except EmptyResultSet:
+            return 0
+
+        cache_key = "paginator:keyset-hits:{}".format(
+            md5_text(sql, repr(params), max_hits).hexdigest()
+        )
+        hits = cache.get(cache_key)
+        if hits is not None:
+            metrics.incr("paginator.keyset.hits", tags={"source": "cache"})
+            return hits
+
+        estimate = self.estimate_hits()
+        if estimate is not None and estimate >= max_hits:
+            metrics.incr("paginator.keyset.hits", tags={"source": "estimate"})
+            hits = max_hits
+        else:
+            metrics.incr("paginator.keyset.hits", tags={"source": "count"})
+            hits = super().count_hits(max_hits)
+
+        cache.set(cache_key, hits, self.hits_cache_ttl)
+        return hits
+
+
+class DateTimeKeysetPaginator(KeysetPaginator):
+    """
+    `KeysetPaginator` for datetime keys. Cursor values are microseconds since
+    the epoch so that the seek predicate matches the stored value exactly.
+
+    Endpoints switched to this from `DateTimePaginator`, whose cursors hold
+    milliseconds and a row offset, and clients may still send those. Any
+    datetime after 1973 is above `legacy_cursor_threshold` in microseconds,
+    and below it in milliseconds until the year 5138, so smaller values are
+    paged with `DateTimePaginator` as before.
+    """
+
+    multiplier = 1000000
+    legacy_cursor_threshold = 10 ** 14
+
+    def is_legacy_cursor(self, cursor):
+        return cursor is not None and 0 < cursor.value < self.legacy_cursor_threshold
+
+    def get_result(self, limit=100, cursor=None, count_hits=False, known_hits=None, max_hits=None):
+        if self.is_legacy_cursor(cursor):
+            metrics.incr("paginator.keyset.legacy_cursor")
+            paginator = DateTimePaginator(
+                self.queryset,
+                order_by=f"-{self.key}" if self.desc else self.key,
+                max_limit=self.max_limit,
+                on_results=self.on_results,
+                post_query_filter=self.post_query_filter,
+            )
+            return paginator.get_result(
+                limit=limit,
+                cursor=cursor,
+                count_hits=count_hits,
+                known_hits=known_hits,
+                max_hits=max_hits,
+            )
+
+        return super().get_result(
+            limit=limit,
+            cursor=cursor,
+            count_hits=count_hits,
+            known_hits=known_hits,
+            max_hits=max_hits,
+        )
+
+    def get_item_key(self, item, for_prev=False):
+        value = getattr(item, self.key)
+        return calendar.timegm(value.utctimetuple()) * self.multiplier + value.microsecond
+
+    def value_from_cursor(self, cursor):
+        seconds, microseconds = divmod(int(cursor.value), self.multiplier)
+        return datetime.utcfromtimestamp(seconds).replace(
+            microsecond=microseconds, tzinfo=timezone.utc
+        )
+
+
 # TODO(dcramer): previous cursors are too complex at the moment for many things
 # and are only useful for polling situations. The OffsetPaginator ignores them
 # entirely and uses standard paging
@@ -14,6 +14,7 @@ from typing import (
 import sentry_sdk
 from django.contrib.auth.models import AnonymousUser
 
+from sentry.utils import metrics
 from sentry.utils.json import JSONData
 
 K = TypeVar("K")
@@ -69,10 +70,15 @@ def serialize(
         else:
             return objects
 
-    with sentry_sdk.start_span(op="serialize", description=type(serializer).__name__) as span:
+    serializer_name = type(serializer).__name__
+    metric_tags = {"serializer": serializer_name}
+
+    with sentry_sdk.start_span(op="serialize", description=serializer_name) as span:
         span.set_data("Object Count", len(objects))
 
-        with sentry_sdk.start_span(op="serialize.get_attrs", description=type(serializer).__name__):
+        with sentry_sdk.start_span(
+            op="serialize.get_attrs", description=serializer_name
+        ), metrics.timer("serializers.get_attrs", tags=metric_tags):
             attrs = serializer.get_attrs(
                 # avoid passing NoneType's to the serializer as they're allowed and
                 # filtered out of serialize()
@@ -81,7 +87,9 @@ def serialize(
                 **kwargs,
             )
 
-        with sentry_sdk.start_span(op="serialize.iterate", description=type(serializer).__name__):
+        with sentry_sdk.start_span(
+            op="serialize.iterate", description=serializer_name
+        ), metrics.timer("serializers.iterate", tags=metric_tags):
             return [serializer(o, attrs=attrs.get(o, {}), user=user, **kwargs) for o in objects]
 
 
@@ -59,7 +59,7 @@ from sentry.utils.cache import cache
 from sentry.utils.compat import zip
 from sentry.utils.hashlib import hash_values
 from sentry.utils.safe import safe_execute
-from sentry.utils.snuba import Dataset, aliased_query, raw_query
+from sentry.utils.snuba import Dataset, aliased_query_params, bulk_raw_query, raw_query
 
 # TODO(jess): remove when snuba is primary backend
 snuba_tsdb = SnubaTSDB(**settings.SENTRY_TSDB_OPTIONS)
@@ -793,9 +793,7 @@ class GroupSerializerSnuba(GroupSerializerBase):
             else []
         )
 
-    def _execute_seen_stats_query(
-        self, item_list, start=None, end=None, conditions=None, environment_ids=None
-    ):
+    def _build_seen_stats_query_params(self, item_list, start=None, end=None, conditions=None):
         project_ids = list({item.project_id for item in item_list})
         group_ids = [item.id for item in item_list]
         aggregations = [
@@ -807,7 +805,7 @@ class GroupSerializerSnuba(GroupSerializerBase):
         filters = {"project_id": project_ids, "group_id": group_ids}
         if self.environment_ids:
             filters["environment"] = self.environment_ids
-        result = aliased_query(
+        return aliased_query_params(
             dataset=Dataset.Events,
             start=start,
             end=end,
@@ -815,8 +813,51 @@ class GroupSerializerSnuba(GroupSerializerBase):
             conditions=conditions,
             filter_keys=filters,
             aggregations=aggregations,
-            referrer="serializers.GroupSerializerSnuba._execute_seen_stats_query",
         )
+
+    def _execute_seen_stats_queries(self, item_list, queries, environment_ids=None):
+        """
+        Runs one seen stats query per entry in `queries` (each a mapping with
+        optional `start`, `end` and `conditions` keys). The Snuba queries are
+        independent of each other, so they're sent as a single bulk request and
+        dispatched concurrently instead of one after the other.
+        """
+        query_params = [
+            self._build_seen_stats_query_params(
+                item_list,
+                start=query.get("start"),
+                end=query.get("end"),
+                conditions=query.get("conditions"),
+            )
+            for query in queries
+        ]
+        results = bulk_raw_query(
+            query_params, referrer="serializers.GroupSerializerSnuba._execute_seen_stats_query"
+        )
+        return [
+            self._build_seen_stats(
+                item_list,
+                result,
+                start=query.get("start"),
+                end=query.get("end"),
+                conditions=query.get("conditions"),
+                environment_ids=environment_ids,
+            )
+            for query, result in zip(queries, results)
+        ]
+
+    def _execute_seen_stats_query(
+        self, item_list, start=None, end=None, conditions=None, environment_ids=None
+    ):
+        return self._execute_seen_stats_queries(
+            item_list,
+            [{"start": start, "end": end, "conditions": conditions}],
+            environment_ids=environment_ids,
+        )[0]
+
+    def _build_seen_stats(
+        self, item_list, result, start=None, end=None, conditions=None, environment_ids=None
+    ):
         seen_data = {
             issue["group_id"]: fix_tag_value_data(
                 dict(filter(lambda key: key[0] != "group_id", issue.items()))
@@ -901,25 +942,30 @@ class StreamGroupSerializerSnuba(GroupSerializerSnuba, GroupStatsMixin):
 
     def _get_seen_stats(self, item_list, user):
         if not self._collapse("stats"):
-            partial_execute_seen_stats_query = functools.partial(
-                self._execute_seen_stats_query,
-                item_list=item_list,
-                environment_ids=self.environment_ids,
-                start=self.start,
-                end=self.end,
-            )
-            time_range_result = partial_execute_seen_stats_query()
-            filtered_result = (
-                partial_execute_seen_stats_query(conditions=self.conditions)
-                if self.conditions and not self._collapse("filtered")
-                else None
+            # Plan all of the seen stats queries up front so that they can be
+            # sent to snuba together rather than serially.
+            queries = {"time_range": {"start": self.start, "end": self.end}}
+            if self.conditions and not self._collapse("filtered"):
+                queries["filtered"] = {
+                    "start": self.start,
+                    "end": self.end,
+                    "conditions": self.conditions,
+                }
+            if not self._collapse("lifetime") and (self.start or self.end):
+                queries["lifetime"] = {}
+
+            results = dict(
+                zip(
+                    queries.keys(),
+                    self._execute_seen_stats_queries(
+                        item_list, list(queries.values()), environment_ids=self.environment_ids
+                    ),
+                )
             )
+            time_range_result = results["time_range"]
+            filtered_result = results.get("filtered")
             if not self._collapse("lifetime"):
-                lifetime_result = (
-                    partial_execute_seen_stats_query(start=None, end=None)
-                    if self.start or self.end
-                    else time_range_result
-                )
+                lifetime_result = results.get("lifetime", time_range_result)
             else:
                 lifetime_result = None
 
@@ -953,6 +999,8 @@ class StreamGroupSerializerSnuba(GroupSerializerSnuba, GroupStatsMixin):
                 attrs = {item: {} for item in item_list}
 
         if self.stats_period and not self._collapse("stats"):
+            # Only the seen stats are batched, see `_get_seen_stats`. The stats
+            # series go through SnubaTSDB one query at a time.
             partial_get_stats = functools.partial(
                 self.get_stats, item_list=item_list, user=user, environment_ids=self.environment_ids
             )
@@ -38,6 +38,25 @@ class BaseCache(local):
     def get(self, key, version=None, raw=False):
         raise NotImplementedError
 
+    def get_many(self, keys, version=None, raw=False):
+        """
+        Returns a mapping of the keys that are present to their values.
+        """
+        results = {}
+        for key in keys:
+            value = self.get(key, version=version, raw=raw)
+            if value is not None:
+                results[key] = value
+        return results
+
+    def set_many(self, items, timeout, version=None, raw=False):
+        for key, value in items:
+            self.set(key, value, timeout, version=version, raw=raw)
+
+    def delete_many(self, keys, version=None):
+        for key in keys:
+            self.delete(key, version=version)
+
     def _mark_transaction(self, op):
         """
         Mark transaction with a tag so we can identify system components that rely
@@ -57,6 +57,48 @@ RedisCache = RbCache
 
 
 class RedisClusterCache(CommonRedisCache):
+    """
+    Cache on a Redis Cluster. Operations on many keys are pipelined, so they
+    take one round trip to each node that holds some of the keys.
+    """
+
     def __init__(self, cluster_id, **options):
         client = redis_clusters.get(cluster_id)
         CommonRedisCache.__init__(self, client=client, **options)
+
+    def get_many(self, keys, version=None, raw=False):
+        pipeline = self.client.pipeline(transaction=False)
+        for key in keys:
+            pipeline.get(self.make_key(key, version=version))
+
+        results = {}
+        for key, value in zip(keys, pipeline.execute()):
+            if value is not None:
+                results[key] = value if raw else json.loads(value)
+
+        self._mark_transaction("get")
+
+        return results
+
+    def set_many(self, items, timeout, version=None, raw=False):
+        pipeline = self.client.pipeline(transaction=False)
+        for key, value in items:
+            key = self.make_key(key, version=version)
+            v = json.dumps(value) if not raw else value
+            if len(v) > self.max_size:
+                raise ValueTooLarge(f"Cache key too large: {key!r} {len(v)!r}")
+            if timeout:
+                pipeline.setex(key, int(timeout), v)
+            else:
+                pipeline.set(key, v)
+        pipeline.execute()
+
+        self._mark_transaction("set")
+
+    def delete_many(self, keys, version=None):
+        pipeline = self.client.pipeline(transaction=False)
+        for key in keys:
+            pipeline.delete(self.make_key(key, version=version))
+        pipeline.execute()
+
+        self._mark_transaction("delete")
@@ -1350,6 +1350,28 @@ SENTRY_DEFAULT_MAX_EVENTS_PER_MINUTE = "90%"
 SENTRY_SNUBA = os.environ.get("SNUBA", "http://127.0.0.1:1218")
 SENTRY_SNUBA_TIMEOUT = 30
 SENTRY_SNUBA_CACHE_TTL_SECONDS = 60
+# Per-referrer overrides for the snuba query cache, keyed by referrer. Each
+# policy may set a `ttl` and a `stale_ttl`, the number of seconds past `ttl`
+# an expired result may still be served while it is refreshed in the
+# background, e.g. {"api.dashboards.widget": {"ttl": 60, "stale_ttl": 300}}.
+SENTRY_SNUBA_CACHE_POLICIES = {}
+# Cached snuba results larger than this many bytes are compressed.
+SENTRY_SNUBA_CACHE_COMPRESSION_THRESHOLD = 16 * 1024
+# How long to wait for another process already running an identical query
+# before running it ourselves.
+SENTRY_SNUBA_CACHE_COALESCE_TIMEOUT = 10
+# Maximum number of queries the async snuba client runs at the same time.
+SENTRY_SNUBA_ASYNC_MAX_CONCURRENCY = 10
+# Per-referrer read timeouts in seconds, overriding SENTRY_SNUBA_TIMEOUT.
+SENTRY_SNUBA_REFERRER_TIMEOUTS = {}
+# Seconds before a hedged read query is sent a second time.
+SENTRY_SNUBA_HEDGE_DELAY = 2
+# Referrers whose Discover facet queries are hedged. Hedging sends a second
+# copy of slow queries, so it's off unless a referrer is listed here.
+SENTRY_SNUBA_HEDGED_REFERRERS = frozenset()
+# Maximum number of hedged copies in flight at a time, per process. Slow
+# queries aren't hedged while this many copies are running.
+SENTRY_SNUBA_MAX_HEDGES_IN_FLIGHT = 4
 
 # Node storage backend
 SENTRY_NODESTORE = "sentry.nodestore.django.DjangoNodeStorage"
@@ -2387,6 +2409,21 @@ SENTRY_REPROCESSING_SYNC_REDIS_CLUSTER = "default"
 # How long can reprocessing take before we start deleting its Redis keys?
 SENTRY_REPROCESSING_SYNC_TTL = 3600 * 24
 
+# Bulk deletions size their statements to take about this many seconds. Set
+# to 0 to keep a fixed statement size.
+SENTRY_DELETIONS_BATCH_TIME_BUDGET = 1.0
+
+# Number of independent relations that a deletion deletes concurrently.
+SENTRY_DELETIONS_CONCURRENCY = 1
+
+# `sentry cleanup` pauses while the streaming replicas of a database are more
+# than this many seconds behind. None disables the check.
+SENTRY_CLEANUP_MAX_REPLICA_LAG = None
+
+# Which cluster is used to coordinate the slices of data exports that are
+# exported in parallel.
+SENTRY_DATA_EXPORT_REDIS_CLUSTER = "default"
+
 # How many events to query for at once while paginating through an entire
 # issue. Note that this needs to be kept in sync with the time-limits on
 # `sentry.tasks.reprocessing2.reprocess_group`. That task is responsible for
@@ -2398,6 +2435,13 @@ SENTRY_REPROCESSING_PAGE_SIZE = 10
 # is about "remaining events" exclusively.
 SENTRY_REPROCESSING_REMAINING_EVENTS_BUF_SIZE = 500
 
+# Into how many time slices the events of an issue are split. The slices are
+# reprocessed in parallel, each one page at a time.
+SENTRY_REPROCESSING_TIME_SLICES = 8
+
+# How many slices are reprocessed at the same time, across all issues.
+SENTRY_REPROCESSING_MAX_CONCURRENT_SLICES = 32
+
 # Which backend to use for RealtimeMetricsStore.
 #
 # Currently, only redis is supported.
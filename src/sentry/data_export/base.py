@@ -5,6 +5,11 @@ MAX_BATCH_SIZE = 8 * 1024 * 1024
 MAX_FRAGMENTS_PER_BATCH = 10
 EXPORTED_ROWS_LIMIT = 10000000
 SNUBA_MAX_RESULTS = 10000
+# Number of count buckets per slice used to balance time sliced exports
+TIME_SLICE_RESOLUTION = 10
+# Blobs of a time slice are ordered in [(index + 1) * stride, (index + 2) * stride)
+SLICE_OFFSET_STRIDE = 2 ** 40
+SLICE_STATE_TTL = 24 * 60 * 60
 DEFAULT_EXPIRATION = timedelta(weeks=4)
 
 
@@ -1,15 +1,21 @@
 import logging
+import math
+
+from dateutil.parser import parse as parse_datetime
 
 from sentry.api.utils import get_date_range_from_params
 from sentry.models import Environment, Group, Project
-from sentry.search.events.fields import get_function_alias
+from sentry.search.events.fields import get_function_alias, is_function
 from sentry.snuba import discover
 from sentry.utils.compat import map
+from sentry.utils.dates import ensure_aware, to_datetime, to_timestamp
 
-from ..base import ExportError
+from ..base import TIME_SLICE_RESOLUTION, ExportError
 
 logger = logging.getLogger(__name__)
 
+SLICEABLE_SORTS = (None, "timestamp", "-timestamp")
+
 
 class DiscoverProcessor:
     """
@@ -38,6 +44,10 @@ class DiscoverProcessor:
         self.equation_aliases = {
             f"equation[{index}]": equation for index, equation in enumerate(equations)
         }
+        self.fields = discover_query["field"]
+        self.equations = equations
+        self.query = discover_query["query"]
+        self.sort = discover_query.get("sort")
         self.data_fn = self.get_data_fn(
             fields=discover_query["field"],
             equations=equations,
@@ -89,10 +99,74 @@ class DiscoverProcessor:
                 auto_fields=True,
                 auto_aggregations=True,
                 use_aggregate_conditions=True,
+                stream=True,
             )
 
         return data_fn
 
+    @property
+    def supports_time_slices(self):
+        """
+        Raw events ordered by time can be split into time ranges that are
+        exported independently and concatenated. Aggregates span the whole
+        range and other sort orders interleave across it, so those queries
+        are paginated by offset.
+        """
+        return (
+            self.sort in SLICEABLE_SORTS
+            and not self.equations
+            and not any(is_function(field) for field in self.fields)
+        )
+
+    @property
+    def slice_descending(self):
+        return self.sort == "-timestamp"
+
+    def get_time_slices(self, slice_count, row_limit):
+        """
+        Splits the query range into at most `slice_count` slices holding
+        roughly the same number of rows, in export order. Each slice is a
+        cursor for `get_slice_rows`.
+        """
+        start, end = to_timestamp(self.start), to_timestamp(self.end)
+        rollup = max(int(math.ceil((end - start) / (slice_count * TIME_SLICE_RESOLUTION))), 1)
+        result = discover.timeseries_query(
+            selected_columns=["count()"],
+            query=self.query,
+            params=self.params,
+            rollup=rollup,
+            referrer="data_export.tasks.discover.slices",
+            zerofill_results=False,
+        )
+        buckets = [(row["time"], row["count"]) for row in result.data["data"] if row["count"]]
+        return split_time_range(
+            start, end, rollup, buckets, slice_count, row_limit, self.slice_descending
+        )
+
+    def get_slice_rows(self, cursor, limit):
+        """
+        Reads the next page of a time slice. The page is ordered by timestamp
+        and event id, so `advance_slice_cursor` can move the cursor past it
+        without a growing offset.
+        """
+        params = dict(
+            self.params, start=to_datetime(cursor["start"]), end=to_datetime(cursor["end"])
+        )
+        fields = self.fields + [field for field in ("timestamp", "id") if field not in self.fields]
+        orderby = ["-timestamp", "-id"] if self.slice_descending else ["timestamp", "id"]
+        result = discover.query(
+            selected_columns=fields,
+            query=self.query,
+            params=params,
+            offset=cursor["offset"],
+            orderby=orderby,
+            limit=limit,
+            referrer="data_export.tasks.discover",
+            auto_fields=True,
+            stream=True,
+        )
+        return list(result["data"])
+
     def handle_fields(self, result_list):
         # Find issue short_id if present
         # (originally in `/api/bases/organization_events.py`)
@@ -119,3 +193,88 @@ class DiscoverProcessor:
                     result[equation] = result.get(equation_alias)
 
         return new_result_list
+
+
+def split_time_range(start, end, rollup, buckets, slice_count, row_limit, descending=False):
+    """
+    Splits [start, end) at bucket boundaries into at most `slice_count`
+    contiguous slices of about the same number of rows, in export order.
+    `buckets` are the (bucket start, row count) pairs of a count timeseries
+    with the given rollup.
+
+    When there are more than `row_limit` rows, every slice is capped at its
+    counted rows so that exactly the first `row_limit` rows are exported.
+    Otherwise slices are only bounded by `row_limit`.
+    """
+    buckets = sorted(buckets, reverse=descending)
+    total = sum(count for _, count in buckets)
+    capped = total > row_limit
+    target = math.ceil(min(total, row_limit) / slice_count)
+
+    slices = []
+    remaining = row_limit
+    bound = end if descending else start
+    rows = 0
+    for index, (time, count) in enumerate(buckets):
+        rows += count
+        last = index == len(buckets) - 1
+        if rows < target and rows < remaining and not last:
+            continue
+
+        if last:
+            edge = start if descending else end
+        elif descending:
+            edge = max(time, start)
+        else:
+            edge = min(time + rollup, end)
+
+        slices.append(
+            {
+                "start": edge if descending else bound,
+                "end": bound if descending else edge,
+                "offset": 0,
+                "limit": min(rows, remaining) if capped else row_limit,
+            }
+        )
+        if rows >= remaining:
+            break
+        remaining -= rows
+        bound = edge
+        rows = 0
+
+    return slices
+
+
+def advance_slice_cursor(cursor, rows, descending=False):
+    """
+    Moves a time slice cursor past `rows`, the last page read from it.
+
+    The bound of the slice is moved up to the timestamp of the last row.
+    Timestamps only have second precision, so rows sharing it are skipped
+    with an offset, which is bounded by the number of rows in one second.
+    """
+    if not rows:
+        return cursor
+
+    last = rows[-1]["timestamp"]
+    ties = 0
+    for row in reversed(rows):
+        if row["timestamp"] != last:
+            break
+        ties += 1
+
+    timestamp = to_timestamp(ensure_aware(parse_datetime(last)))
+    cursor = dict(cursor, limit=cursor["limit"] - len(rows))
+    if descending:
+        bound = min(timestamp + 1, cursor["end"])
+        key = "end"
+    else:
+        bound = timestamp
+        key = "start"
+
+    if bound == cursor[key]:
+        cursor["offset"] += ties
+    else:
+        cursor[key] = bound
+        cursor["offset"] = ties
+    return cursor
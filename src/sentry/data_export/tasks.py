@@ -7,10 +7,12 @@ from hashlib import sha1
 import sentry_sdk
 from celery.exceptions import MaxRetriesExceededError
 from celery.task import current
+from django.conf import settings
 from django.core.files.base import ContentFile
 from django.db import IntegrityError, router
 from django.utils import timezone
 
+from sentry import options
 from sentry.models import (
     DEFAULT_BLOB_SIZE,
     MAX_FILE_SIZE,
@@ -20,7 +22,7 @@ from sentry.models import (
     FileBlobIndex,
 )
 from sentry.tasks.base import instrumented_task
-from sentry.utils import metrics
+from sentry.utils import metrics, redis
 from sentry.utils.db import atomic_transaction
 from sentry.utils.sdk import capture_exception
 
@@ -28,12 +30,14 @@ from .base import (
     EXPORTED_ROWS_LIMIT,
     MAX_BATCH_SIZE,
     MAX_FRAGMENTS_PER_BATCH,
+    SLICE_OFFSET_STRIDE,
+    SLICE_STATE_TTL,
     SNUBA_MAX_RESULTS,
     ExportError,
     ExportQueryType,
 )
 from .models import ExportedData, ExportedDataBlob
-from .processors.discover import DiscoverProcessor
+from .processors.discover import DiscoverProcessor, advance_slice_cursor
 from .processors.issues_by_tag import IssuesByTagProcessor
 from .utils import handle_snuba_errors
 
@@ -101,6 +105,17 @@ def assemble_download(
 
             processor = get_processor(data_export, environment_id)
 
+            slice_count = options.get("data-export.time-slices")
+            if (
+                first_page
+                and slice_count > 1
+                and data_export.query_type == ExportQueryType.DISCOVER
+                and processor.supports_time_slices
+            ):
+                return start_sliced_export(
+                    data_export, processor, slice_count, export_limit, batch_size, export_retries
+                )
+
             with tempfile.TemporaryFile(mode="w+b") as tf:
                 # XXX(python3):
                 #
@@ -206,6 +221,238 @@ def assemble_download(
                 merge_export_blobs.delay(data_export_id)
 
 
+def get_slice_redis_client():
+    return redis.redis_clusters.get(settings.SENTRY_DATA_EXPORT_REDIS_CLUSTER)
+
+
+def get_slice_state_keys(data_export_id):
+    """
+    Returns the keys of the set of slices that are still exporting, the
+    number of those slices, the number of bytes reserved by all slices, and
+    the set of slices that hit the file size limit.
+    """
+    prefix = f"dataexport:{{{data_export_id}}}"
+    return f"{prefix}:pending", f"{prefix}:count", f"{prefix}:bytes", f"{prefix}:truncated"
+
+
+def get_first_truncated_slice(client, truncated_key):
+    truncated = client.zrange(truncated_key, 0, 0)
+    return int(truncated[0]) if truncated else None
+
+
+def start_sliced_export(
+    data_export, processor, slice_count, export_limit, batch_size, export_retries
+):
+    """
+    Splits a Discover export into time slices that are exported in parallel
+    by `assemble_download_slice`. Each slice pages through its rows by
+    timestamp instead of offset, and writes its blobs into its own range of
+    offsets so that `merge_export_blobs` concatenates them in order.
+    """
+    slices = plan_discover_slices(processor, slice_count, export_limit)
+
+    with tempfile.TemporaryFile(mode="w+b") as tf:
+        tfw = codecs.getwriter("utf-8")(tf)
+        csv.DictWriter(tfw, processor.header_fields).writeheader()
+        header_size = tf.tell()
+        tf.seek(0)
+        store_export_chunk_as_blob(data_export, 0, tf)
+
+    metrics.timing("dataexport.slices", len(slices), sample_rate=1.0)
+    if not slices:
+        merge_export_blobs.delay(data_export.id)
+        return
+
+    client = get_slice_redis_client()
+    pending_key, count_key, bytes_key, truncated_key = get_slice_state_keys(data_export.id)
+    client.delete(pending_key, truncated_key)
+    client.sadd(pending_key, *range(len(slices)))
+    client.expire(pending_key, SLICE_STATE_TTL)
+    client.setex(count_key, SLICE_STATE_TTL, len(slices))
+    client.setex(bytes_key, SLICE_STATE_TTL, header_size)
+
+    for slice_index, cursor in enumerate(slices):
+        assemble_download_slice.delay(
+            data_export.id,
+            slice_index,
+            cursor,
+            batch_size=batch_size,
+            export_retries=export_retries,
+        )
+
+
+def abort_sliced_export(data_export_id):
+    # The remaining slices stop once they notice their state is gone.
+    client = get_slice_redis_client()
+    for key in get_slice_state_keys(data_export_id):
+        client.delete(key)
+
+
+@instrumented_task(
+    name="sentry.data_export.tasks.assemble_download_slice",
+    queue="data_export",
+    default_retry_delay=60,
+    max_retries=3,
+    acks_late=True,
+)
+def assemble_download_slice(
+    data_export_id,
+    slice_index,
+    cursor,
+    batch_size=SNUBA_MAX_RESULTS,
+    bytes_written=0,
+    export_retries=3,
+    countdown=60,
+    **kwargs,
+):
+    """
+    Exports one time slice of a Discover export, see `start_sliced_export`.
+
+    Each run stores up to MAX_BATCH_SIZE bytes and reschedules itself with
+    the advanced cursor. The cursor is the checkpoint: a retried run starts
+    over from it and replaces the blobs a previous attempt left behind.
+    """
+    with sentry_sdk.start_span(op="assemble.slice"):
+        try:
+            data_export = ExportedData.objects.get(id=data_export_id)
+        except ExportedData.DoesNotExist as error:
+            logger.exception(error)
+            return
+
+        client = get_slice_redis_client()
+        pending_key, _, bytes_key, truncated_key = get_slice_state_keys(data_export_id)
+        if not client.sismember(pending_key, slice_index):
+            # Either another slice failed and the export was aborted, or this
+            # slice was already completed by a previous attempt.
+            return
+
+        first_truncated = get_first_truncated_slice(client, truncated_key)
+        if first_truncated is not None and first_truncated < slice_index:
+            # An earlier slice hit the file size limit, so nothing this slice
+            # exports would make it into the file.
+            return finish_export_slice(data_export_id, slice_index)
+
+        logger.info(
+            "dataexport.run",
+            extra={"data_export_id": data_export_id, "slice": slice_index, "cursor": cursor},
+        )
+        base_bytes_written = bytes_written
+        done = False
+
+        try:
+            processor = get_processor(data_export, None)
+
+            with tempfile.TemporaryFile(mode="w+b") as tf:
+                tfw = codecs.getwriter("utf-8")(tf)
+                writer = csv.DictWriter(tfw, processor.header_fields, extrasaction="ignore")
+
+                next_cursor = cursor
+                for _ in range(MAX_FRAGMENTS_PER_BATCH):
+                    fragment_row_count = min(batch_size, next_cursor["limit"])
+                    rows = process_discover_slice(processor, next_cursor, fragment_row_count)
+                    next_cursor = advance_slice_cursor(
+                        next_cursor, rows, processor.slice_descending
+                    )
+                    writer.writerows(processor.handle_fields(rows))
+
+                    if len(rows) < fragment_row_count or next_cursor["limit"] <= 0:
+                        done = True
+                        break
+                    if tf.tell() >= MAX_BATCH_SIZE:
+                        break
+
+                size = tf.tell()
+                # Slices share the file size limit, so they reserve their bytes
+                # upfront. Like unsliced exports, the batch exceeding it is
+                # dropped, and the file ends there: the merge leaves out all
+                # slices after the first one that hit the limit.
+                if size and client.incrby(bytes_key, size) >= min(MAX_FILE_SIZE, 2 ** 30):
+                    client.incrby(bytes_key, -size)
+                    client.zadd(truncated_key, {slice_index: slice_index})
+                    client.expire(truncated_key, SLICE_STATE_TTL)
+                    done = True
+                elif size:
+                    base_offset = (slice_index + 1) * SLICE_OFFSET_STRIDE
+                    ExportedDataBlob.objects.filter(
+                        data_export=data_export,
+                        offset__gte=base_offset + bytes_written,
+                        offset__lt=base_offset + SLICE_OFFSET_STRIDE,
+                    ).delete()
+                    tf.seek(0)
+                    try:
+                        bytes_written += store_export_chunk_as_blob(
+                            data_export, bytes_written, tf, base_offset=base_offset
+                        )
+                    except Exception:
+                        # The retry reserves the bytes of the batch again.
+                        client.incrby(bytes_key, -size)
+                        raise
+        except ExportError as error:
+            if error.recoverable and export_retries > 0:
+                assemble_download_slice.apply_async(
+                    args=[data_export_id, slice_index, cursor],
+                    kwargs={
+                        "batch_size": batch_size // 2,
+                        "bytes_written": base_bytes_written,
+                        "export_retries": export_retries - 1,
+                    },
+                    countdown=countdown,
+                )
+            else:
+                abort_sliced_export(data_export_id)
+                return data_export.email_failure(message=str(error))
+        except Exception as error:
+            metrics.incr("dataexport.error", tags={"error": str(error)}, sample_rate=1.0)
+            logger.error(
+                "dataexport.error: %s",
+                str(error),
+                extra={"query": data_export.payload, "org": data_export.organization_id},
+            )
+            capture_exception(error)
+
+            try:
+                current.retry()
+            except MaxRetriesExceededError:
+                abort_sliced_export(data_export_id)
+                metrics.incr(
+                    "dataexport.end",
+                    tags={"success": False, "error": str(error)},
+                    sample_rate=1.0,
+                )
+                return data_export.email_failure(message="Internal processing failure")
+        else:
+            if not done:
+                assemble_download_slice.apply_async(
+                    args=[data_export_id, slice_index, next_cursor],
+                    kwargs={
+                        "batch_size": batch_size,
+                        "bytes_written": bytes_written,
+                        "export_retries": export_retries,
+                    },
+                    countdown=3,
+                )
+            else:
+                finish_export_slice(data_export_id, slice_index)
+
+
+def finish_export_slice(data_export_id, slice_index):
+    client = get_slice_redis_client()
+    pending_key, count_key, bytes_key, truncated_key = get_slice_state_keys(data_export_id)
+    # The last slice to finish merges the export.
+    if not (client.srem(pending_key, slice_index) and client.decr(count_key) == 0):
+        return
+
+    first_truncated = get_first_truncated_slice(client, truncated_key)
+    if first_truncated is not None:
+        # Slice blobs start at `(slice_index + 1) * SLICE_OFFSET_STRIDE`.
+        ExportedDataBlob.objects.filter(
+            data_export_id=data_export_id,
+            offset__gte=(first_truncated + 2) * SLICE_OFFSET_STRIDE,
+        ).delete()
+    metrics.timing("dataexport.file_size", int(client.get(bytes_key)), sample_rate=1.0)
+    merge_export_blobs.delay(data_export_id)
+
+
 def get_processor(data_export, environment_id):
     try:
         if data_export.query_type == ExportQueryType.ISSUES_BY_TAG:
@@ -256,15 +503,29 @@ def process_issues_by_tag(processor, limit, offset):
 
 @handle_snuba_errors(logger)
 def process_discover(processor, limit, offset):
-    raw_data_unicode = processor.data_fn(limit=limit, offset=offset)["data"]
+    # The rows are decoded from the snuba response as they're read, so only the
+    # transformed rows of this batch are held in memory, not the raw response.
+    raw_data_unicode = list(processor.data_fn(limit=limit, offset=offset)["data"])
     return processor.handle_fields(raw_data_unicode)
 
 
+@handle_snuba_errors(logger)
+def plan_discover_slices(processor, slice_count, export_limit):
+    return processor.get_time_slices(slice_count, export_limit)
+
+
+@handle_snuba_errors(logger)
+def process_discover_slice(processor, cursor, limit):
+    return processor.get_slice_rows(cursor, limit)
+
+
 class ExportDataFileTooBig(Exception):
     pass
 
 
-def store_export_chunk_as_blob(data_export, bytes_written, fileobj, blob_size=DEFAULT_BLOB_SIZE):
+def store_export_chunk_as_blob(
+    data_export, bytes_written, fileobj, blob_size=DEFAULT_BLOB_SIZE, base_offset=0
+):
     try:
         with atomic_transaction(
             using=(
@@ -282,7 +543,9 @@ def store_export_chunk_as_blob(data_export, bytes_written, fileobj, blob_size=DE
                 blob_fileobj = ContentFile(contents)
                 blob = FileBlob.from_file(blob_fileobj, logger=logger)
                 ExportedDataBlob.objects.get_or_create(
-                    data_export=data_export, blob_id=blob.id, offset=bytes_written + bytes_offset
+                    data_export=data_export,
+                    blob_id=blob.id,
+                    offset=base_offset + bytes_written + bytes_offset,
                 )
 
                 bytes_offset += blob.size
@@ -1,33 +1,85 @@
 import itertools
+import time
 from datetime import timedelta
 from uuid import uuid4
 
+from django.conf import settings
+from django.core.cache import cache
 from django.db import connections, router
+from django.db.models import Min
 from django.utils import timezone
 
+from sentry.utils import metrics
 from sentry.utils.compat import zip
+from sentry.utils.dates import to_datetime, to_timestamp
+
+MIN_BATCH_SIZE = 100
+MAX_BATCH_SIZE = 100000
+
+# How long completed windows are remembered, so that an interrupted cleanup
+# can resume where it left off.
+WINDOW_PROGRESS_TTL = 24 * 60 * 60
+
+# Longest pause between checks of the replica lag while it's too high.
+MAX_REPLICA_LAG_WAIT = 10
+
+
+def resize_batch(batch_size, duration):
+    """
+    Returns the size of the next delete statement, so that it takes about
+    SENTRY_DELETIONS_BATCH_TIME_BUDGET seconds given that `batch_size` rows
+    took `duration`. Large tables are then deleted in few statements that
+    don't hold locks for long.
+    """
+    budget = settings.SENTRY_DELETIONS_BATCH_TIME_BUDGET
+    if not budget:
+        return batch_size
+    scale = min(max(budget / max(duration, 0.001), 0.5), 2)
+    return int(min(max(batch_size * scale, MIN_BATCH_SIZE), MAX_BATCH_SIZE))
+
+
+def get_replica_lag(using):
+    """
+    Returns how many seconds the slowest streaming replica of the database
+    is behind, or 0 if it has no replicas.
+    """
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            "select coalesce(extract(epoch from max(replay_lag)), 0) from pg_stat_replication"
+        )
+        return float(cursor.fetchone()[0])
 
 
 class BulkDeleteQuery:
-    def __init__(self, model, project_id=None, dtfield=None, days=None, order_by=None):
+    """
+    Deletes the rows of `model` that are older than `days`, or all rows of
+    `project_id`.
+
+    With a `dtfield`, the rows are deleted in time windows of `window`, which
+    bound the range of the index each delete scans. Windows are independent,
+    so `cleanup` deletes them in parallel.
+    """
+
+    DEFAULT_WINDOW = timedelta(days=1)
+
+    def __init__(self, model, project_id=None, dtfield=None, days=None, order_by=None, window=None):
         self.model = model
         self.project_id = int(project_id) if project_id else None
         self.dtfield = dtfield
         self.days = int(days) if days is not None else None
         self.order_by = order_by
+        self.window = window or self.DEFAULT_WINDOW
         self.using = router.db_for_write(model)
 
     def execute(self, chunk_size=10000):
+        if self.dtfield and self.days is not None:
+            for start, end in self.get_windows():
+                self.execute_window(start, end, chunk_size)
+            return
+
         quote_name = connections[self.using].ops.quote_name
 
         where = []
-        if self.dtfield and self.days is not None:
-            where.append(
-                "{} < '{}'::timestamptz".format(
-                    quote_name(self.dtfield),
-                    (timezone.now() - timedelta(days=self.days)).isoformat(),
-                )
-            )
         if self.project_id:
             where.append(f"project_id = {self.project_id}")
 
@@ -72,6 +124,109 @@ class BulkDeleteQuery:
             cursor.execute(query)
             results = cursor.rowcount > 0
 
+    def get_progress_key(self, start, end):
+        return "cleanup:{}:{}:{}:{}:{}".format(
+            self.model._meta.db_table,
+            self.dtfield,
+            self.project_id or "*",
+            int(to_timestamp(start)),
+            int(to_timestamp(end)),
+        )
+
+    def get_windows(self):
+        """
+        Returns the (start, end) windows that hold the rows to delete, oldest
+        first. Windows are aligned to multiples of `window`, so windows that
+        an earlier run completed are recognized and skipped.
+        """
+        cutoff = timezone.now() - timedelta(days=self.days)
+        queryset = self.model._base_manager.using(self.using).filter(
+            **{f"{self.dtfield}__lt": cutoff}
+        )
+        if self.project_id:
+            queryset = queryset.filter(project_id=self.project_id)
+        oldest = queryset.aggregate(oldest=Min(self.dtfield))["oldest"]
+        if oldest is None:
+            return []
+
+        size = self.window.total_seconds()
+        start = to_datetime(to_timestamp(oldest) // size * size)
+        windows = []
+        while start < cutoff:
+            end = min(start + self.window, cutoff)
+            windows.append((start, end))
+            start = end
+
+        completed = cache.get_many([self.get_progress_key(*window) for window in windows])
+        return [window for window in windows if self.get_progress_key(*window) not in completed]
+
+    def wait_for_replicas(self):
+        max_lag = settings.SENTRY_CLEANUP_MAX_REPLICA_LAG
+        if max_lag is None:
+            return
+
+        while True:
+            lag = get_replica_lag(self.using)
+            if lag <= max_lag:
+                return
+            metrics.incr(
+                "cleanup.replica_lag.throttled",
+                tags={"model": self.model.__name__},
+                sample_rate=1.0,
+            )
+            time.sleep(min(lag - max_lag, MAX_REPLICA_LAG_WAIT))
+
+    def execute_window(self, start, end, chunk_size=10000):
+        """
+        Deletes the rows of the window [start, end) in batches sized to the
+        deletion time budget, and records the window as completed. Returns
+        the number of deleted rows.
+        """
+        quote_name = connections[self.using].ops.quote_name
+
+        where = [f"{quote_name(self.dtfield)} >= %s", f"{quote_name(self.dtfield)} < %s"]
+        params = [start, end]
+        if self.project_id:
+            where.append("project_id = %s")
+            params.append(self.project_id)
+
+        query = """
+            delete from {table}
+            where id = any(array(
+                select id
+                from {table}
+                where {where}
+                limit %s
+            ))
+        """.format(
+            table=self.model._meta.db_table,
+            where=" and ".join(where),
+        )
+
+        tags = {"model": self.model.__name__}
+        deleted = 0
+        started = time.monotonic()
+        cursor = connections[self.using].cursor()
+        while True:
+            self.wait_for_replicas()
+            batch_started = time.monotonic()
+            cursor.execute(query, params + [chunk_size])
+            deleted += cursor.rowcount
+            if cursor.rowcount < chunk_size:
+                break
+            chunk_size = resize_batch(chunk_size, time.monotonic() - batch_started)
+
+        duration = time.monotonic() - started
+        metrics.incr("cleanup.rows_deleted", amount=deleted, tags=tags, sample_rate=1.0)
+        metrics.timing("cleanup.window.duration", duration, tags=tags, sample_rate=1.0)
+        if deleted:
+            metrics.timing(
+                "cleanup.throughput", deleted / max(duration, 0.001), tags=tags, sample_rate=1.0
+            )
+
+        cache.set(self.get_progress_key(start, end), 1, WINDOW_PROGRESS_TTL)
+        return deleted
+
     def iterator(self, chunk_size=100, batch_size=100000):
         assert self.days is not None
         assert self.dtfield is not None and self.dtfield == self.order_by
@@ -68,6 +68,11 @@ For example, let's say you want to delete an organization:
 >>> while work:
 >>>    work = task.chunk()
 
+To see what a deletion would remove without deleting anything, do a dry run:
+
+>>> for estimate in deletions.get(model=Organization, query={"id": org.id}).estimate():
+>>>     print(estimate)
+
 The system has a default task implementation to handle Organization which will efficiently cascade
 deletes. This behavior varies based on the input object, as the task can override the behavior for
 it's children.
@@ -76,6 +81,9 @@ For example, when you delete a Group, it will cascade in a more traditional mann
 each child (such as Event). However, when you delete a project, it won't actually cascade to the
 registered Group task. It will instead take a more efficient approach of batch deleting its indirect
 descendants, such as Event, so it can more efficiently bulk delete rows.
+
+Relations deleted with ``BulkModelDeletionTask`` that don't reference each other are deleted
+concurrently, see `sentry.deletions.planner`.
 """
 
 
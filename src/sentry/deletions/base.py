@@ -1,7 +1,9 @@
 import logging
 import re
+import time
 
 from sentry.constants import ObjectStatus
+from sentry.db.deletion import MAX_BATCH_SIZE, MIN_BATCH_SIZE, resize_batch
 from sentry.utils import metrics
 from sentry.utils.query import bulk_delete_objects
 
@@ -126,25 +128,32 @@ class BaseDeletionTask:
             self.delete_instance(instance)
 
     def delete_children(self, relations):
-        # Ideally this runs through the deletion manager
-        for relation in relations:
-            task = self.manager.get(
-                transaction_id=self.transaction_id,
-                actor_id=self.actor_id,
-                task=relation.task,
-                **relation.params,
-            )
+        from sentry.deletions.planner import get_stages, run_stage
 
-            # If we want smaller tasks then this also has to return when has_more is true.
-            # This could significant increase the number of tasks we spawn. Get better estimates
-            # by collecting metrics.
-            has_more = True
-            while has_more:
-                has_more = task.chunk()
-                if has_more:
-                    metrics.incr("deletions.should_spawn", tags={"task": type(task).__name__})
+        # Ideally this runs through the deletion manager
+        for stage in get_stages(self.manager, relations):
+            tasks = [
+                self.manager.get(
+                    transaction_id=self.transaction_id,
+                    actor_id=self.actor_id,
+                    task=relation.task,
+                    **relation.params,
+                )
+                for relation in stage
+            ]
+            run_stage(tasks, self.run_child_task)
         return False
 
+    def run_child_task(self, task):
+        # If we want smaller tasks then this also has to return when has_more is true.
+        # This could significant increase the number of tasks we spawn. Get better estimates
+        # by collecting metrics.
+        has_more = True
+        while has_more:
+            has_more = task.chunk()
+            if has_more:
+                metrics.incr("deletions.should_spawn", tags={"task": type(task).__name__})
+
     def mark_deletion_in_progress(self, instance_list):
         pass
 
@@ -210,6 +219,15 @@ class ModelDeletionTask(BaseDeletionTask):
         # We have more work to do as we didn't run out of rows to delete.
         return True
 
+    def estimate(self):
+        """
+        Dry run of this task. Returns a list of `DeletionEstimate` with the
+        rows this task and its relations would delete, without deleting any.
+        """
+        from sentry.deletions.planner import estimate_deletion
+
+        return estimate_deletion(self)
+
     def delete_instance_bulk(self, instance_list):
         # slow, but ensures Django cascades are handled
         for instance in instance_list:
@@ -259,6 +277,8 @@ class BulkModelDeletionTask(ModelDeletionTask):
     """
 
     DEFAULT_CHUNK_SIZE = 10000
+    MIN_CHUNK_SIZE = MIN_BATCH_SIZE
+    MAX_CHUNK_SIZE = MAX_BATCH_SIZE
 
     def __init__(self, manager, model, query, partition_key=None, **kwargs):
         super().__init__(manager, model, query, **kwargs)
@@ -266,7 +286,14 @@ class BulkModelDeletionTask(ModelDeletionTask):
         self.partition_key = partition_key
 
     def chunk(self):
-        return self.delete_instance_bulk()
+        started = time.monotonic()
+        has_more = self.delete_instance_bulk()
+        if has_more:
+            self.resize_chunk(time.monotonic() - started)
+        return has_more
+
+    def resize_chunk(self, duration):
+        self.chunk_size = resize_batch(self.chunk_size, duration)
 
     def delete_instance_bulk(self):
         try:
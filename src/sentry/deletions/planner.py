@@ -0,0 +1,181 @@
+"""
+Plans how the child relations of a deletion task are deleted.
+
+Relations are deleted in the order their task lists them. Consecutive
+relations that are deleted with set-based statements (``BulkModelDeletionTask``)
+have no children of their own. When their models also don't reference each
+other, the order among them doesn't matter, so they are grouped into a stage
+that is deleted concurrently when ``SENTRY_DELETIONS_CONCURRENCY`` allows it.
+
+The planner also backs the dry-run mode of ``ModelDeletionTask.estimate``,
+which counts the rows a deletion would remove without deleting anything.
+"""
+
+import math
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+from django.conf import settings
+from django.db import connections, router, transaction
+
+from .base import BulkModelDeletionTask, ModelDeletionTask
+
+# Relations below this depth are not sampled when estimating a deletion.
+MAX_ESTIMATE_DEPTH = 4
+
+
+class DeletionEstimate(NamedTuple):
+    name: str
+    task: str
+    depth: int
+    # None when the relation is not backed by a model, e.g. nodestore data.
+    rows: Optional[int]
+    batches: Optional[int]
+    seconds: Optional[float]
+
+
+@lru_cache(maxsize=None)
+def get_related_models(model):
+    """
+    Returns the models that `model` has a foreign key to, or that have one to
+    `model`. Rows of related models can't be deleted independently.
+    """
+    return frozenset(
+        field.related_model
+        for field in model._meta.get_fields()
+        if field.is_relation and field.related_model not in (None, model)
+    )
+
+
+def get_relation_task(manager, relation):
+    if relation.task is not None:
+        return relation.task
+    return manager.tasks.get(relation.params.get("model"), manager.default_task)
+
+
+def is_set_based(manager, relation):
+    return "model" in relation.params and issubclass(
+        get_relation_task(manager, relation), BulkModelDeletionTask
+    )
+
+
+def get_stages(manager, relations):
+    """
+    Groups `relations` into consecutive stages of relations that can be
+    deleted concurrently. Relations that are not set-based form a stage of
+    their own.
+    """
+    stages = []
+    stage_models = None
+    for relation in relations:
+        if not is_set_based(manager, relation):
+            stages.append([relation])
+            stage_models = None
+            continue
+
+        model = relation.params["model"]
+        if (
+            stage_models is not None
+            and model not in stage_models
+            and not get_related_models(model) & stage_models
+        ):
+            stages[-1].append(relation)
+            stage_models.add(model)
+        else:
+            stages.append([relation])
+            stage_models = {model}
+    return stages
+
+
+def can_run_concurrently(tasks):
+    # Other connections don't see what the current transaction has written.
+    return not any(
+        transaction.get_connection(router.db_for_write(task.model)).in_atomic_block
+        for task in tasks
+    )
+
+
+def run_stage(tasks, run_task):
+    concurrency = min(settings.SENTRY_DELETIONS_CONCURRENCY, len(tasks))
+    if concurrency <= 1 or not can_run_concurrently(tasks):
+        for task in tasks:
+            run_task(task)
+        return
+
+    def run_in_thread(task):
+        try:
+            run_task(task)
+        finally:
+            connections.close_all()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(run_in_thread, task) for task in tasks]
+        for future in futures:
+            future.result()
+
+
+def get_relations(task, instance_list):
+    relations = list(task.get_child_relations_bulk(instance_list))
+    relations = task.extend_relations_bulk(relations, instance_list)
+    for instance in instance_list:
+        relations.extend(task.extend_relations(task.get_child_relations(instance), instance))
+    return task.filter_relations(relations)
+
+
+def estimate_deletion(task):
+    """
+    Estimates the rows deleted by `task` and by the relations below them.
+
+    Rows are counted for the task itself. For relations below it, the rows
+    of a single sampled instance are counted and scaled to all instances.
+    Batches are sized to ``SENTRY_DELETIONS_BATCH_TIME_BUDGET``, so the time
+    of each relation is estimated as its number of batches times the budget.
+    """
+    estimates = []
+    _estimate(task, 1, 0, estimates)
+    return estimates
+
+
+def _estimate(task, factor, depth, estimates):
+    queryset = getattr(task.model, task.manager_name).filter(**task.query)
+    rows = queryset.count() * factor
+    batches = math.ceil(rows / task.chunk_size)
+    estimates.append(
+        DeletionEstimate(
+            name=task.model.__name__,
+            task=type(task).__name__,
+            depth=depth,
+            rows=rows,
+            batches=batches,
+            seconds=batches * settings.SENTRY_DELETIONS_BATCH_TIME_BUDGET,
+        )
+    )
+
+    if not rows or isinstance(task, BulkModelDeletionTask) or depth >= MAX_ESTIMATE_DEPTH:
+        return
+
+    sample = list(queryset[:1])
+    if not sample:
+        return
+
+    for relation in get_relations(task, sample):
+        child = task.manager.get(
+            transaction_id=task.transaction_id,
+            actor_id=task.actor_id,
+            task=relation.task,
+            **relation.params,
+        )
+        if isinstance(child, ModelDeletionTask):
+            _estimate(child, rows, depth + 1, estimates)
+        else:
+            estimates.append(
+                DeletionEstimate(
+                    name=type(child).__name__,
+                    task=type(child).__name__,
+                    depth=depth + 1,
+                    rows=None,
+                    batches=None,
+                    seconds=None,
+                )
+            )
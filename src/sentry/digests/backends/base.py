@@ -1,5 +1,6 @@
 import logging
-from typing import TYPE_CHECKING, Any, Iterable, Mapping, Optional
+from contextlib import ExitStack, contextmanager
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, Mapping, Optional, Sequence
 
 from sentry.utils.imports import import_string
 from sentry.utils.services import Service
@@ -15,7 +16,7 @@ def load(options: Mapping[str, str]) -> Any:
     return import_string(options["path"])(**options.get("options", {}))
 
 
-DEFAULT_CODEC = {"path": "sentry.digests.codecs.CompressedPickleCodec"}
+DEFAULT_CODEC = {"path": "sentry.digests.codecs.NotificationCodec"}
 
 
 class InvalidState(Exception):
@@ -58,7 +59,16 @@ class Backend(Service):  # type: ignore
     be transitioned to "waiting" instead.)
     """
 
-    __all__ = ("add", "delete", "digest", "enabled", "maintenance", "schedule", "validate")
+    __all__ = (
+        "add",
+        "delete",
+        "digest",
+        "digest_many",
+        "enabled",
+        "maintenance",
+        "schedule",
+        "validate",
+    )
 
     def __init__(self, **options: Any) -> None:
         # The ``minimum_delay`` option defines the default minimum amount of
@@ -168,6 +178,38 @@ class Backend(Service):  # type: ignore
         """
         raise NotImplementedError
 
+    @contextmanager
+    def digest_many(
+        self, keys: Sequence[str], minimum_delays: Optional[Mapping[str, int]] = None
+    ) -> Iterator[Mapping[str, Sequence["Record"]]]:
+        """
+        Extract records from many timelines for processing.
+
+        This works like ``digest`` for each of the timelines, and the target
+        of the ``as`` clause maps the key of each timeline to its records.
+        Timelines that are not in the ready state, or that are being digested
+        elsewhere, are left out. All digests are closed together when the
+        context manager exits successfully, and none are if it raises.
+
+        The minimum delay of a timeline is looked up by its key in
+        ``minimum_delays``, and defaults to the backend's minimum delay.
+
+        Backends should override this to open the timelines in bulk.
+        """
+        if minimum_delays is None:
+            minimum_delays = {}
+
+        with ExitStack() as stack:
+            digests = {}
+            for key in keys:
+                try:
+                    digests[key] = stack.enter_context(
+                        self.digest(key, minimum_delay=minimum_delays.get(key))
+                    )
+                except InvalidState as error:
+                    logger.info(f"Skipped digest {key}: {error}")
+            yield digests
+
     def schedule(
         self, deadline: float, timestamp: Optional[float] = None
     ) -> Optional[Iterable["ScheduleEntry"]]:
@@ -1,14 +1,17 @@
 import logging
 import time
-from contextlib import contextmanager
-from typing import Any, Iterable, Optional, Tuple
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+from typing import Any, Iterable, Iterator, List, Mapping, MutableMapping, Optional, Sequence, Tuple
 
 from rb.clients import LocalClient
 from redis.exceptions import ResponseError
 
 from sentry.digests import Record, ScheduleEntry
 from sentry.digests.backends.base import Backend, InvalidState
+from sentry.utils import metrics
 from sentry.utils.compat import map
+from sentry.utils.locking import UnableToAcquireLock
 from sentry.utils.locking.backends.redis import RedisLockBackend
 from sentry.utils.locking.lock import Lock
 from sentry.utils.locking.manager import LockManager
@@ -185,6 +188,34 @@ class RedisBackend(Backend):
                     exc_info=True,
                 )
 
+    def _decode_records(self, key: str, response: Any) -> Sequence[Record]:
+        records = map(
+            lambda key__value__timestamp: Record(
+                key__value__timestamp[0].decode("utf-8"),
+                self.codec.decode(key__value__timestamp[1])
+                if key__value__timestamp[1] is not None
+                else None,
+                float(key__value__timestamp[2]),
+            ),
+            response,
+        )
+
+        # If the record value is `None`, this means the record data was
+        # missing (it was presumably evicted by Redis.) These records are not
+        # delivered, but are still returned so that closing the digest
+        # removes them from the timeline.
+        filtered_records = [record for record in records if record.value is not None]
+        if len(records) != len(filtered_records):
+            logger.warning(
+                "Filtered out missing records when fetching digest",
+                extra={
+                    "key": key,
+                    "record_count": len(records),
+                    "filtered_record_count": len(filtered_records),
+                },
+            )
+        return records
+
     @contextmanager
     def digest(
         self, key: str, minimum_delay: Optional[int] = None, timestamp: Optional[float] = None
@@ -216,30 +247,8 @@ class RedisBackend(Backend):
                 else:
                     raise
 
-            records = map(
-                lambda key__value__timestamp: Record(
-                    key__value__timestamp[0].decode("utf-8"),
-                    self.codec.decode(key__value__timestamp[1])
-                    if key__value__timestamp[1] is not None
-                    else None,
-                    float(key__value__timestamp[2]),
-                ),
-                response,
-            )
-
-            # If the record value is `None`, this means the record data was
-            # missing (it was presumably evicted by Redis) so we don't need to
-            # return it here.
+            records = self._decode_records(key, response)
             filtered_records = [record for record in records if record.value is not None]
-            if len(records) != len(filtered_records):
-                logger.warning(
-                    "Filtered out missing records when fetching digest",
-                    extra={
-                        "key": key,
-                        "record_count": len(records),
-                        "filtered_record_count": len(filtered_records),
-                    },
-                )
             yield filtered_records
 
             script(
@@ -249,6 +258,71 @@ class RedisBackend(Backend):
                 + [record.key for record in records],
             )
 
+    @contextmanager
+    def digest_many(
+        self,
+        keys: Sequence[str],
+        minimum_delays: Optional[Mapping[str, int]] = None,
+        timestamp: Optional[float] = None,
+    ) -> Iterator[Mapping[str, Sequence[Record]]]:
+        if minimum_delays is None:
+            minimum_delays = {}
+
+        if timestamp is None:
+            timestamp = time.time()
+
+        router = self.cluster.get_router()
+        with ExitStack() as stack:
+            keys_by_host: MutableMapping[int, List[str]] = defaultdict(list)
+            for key in keys:
+                try:
+                    stack.enter_context(self._get_timeline_lock(key, duration=30).acquire())
+                except UnableToAcquireLock:
+                    logger.info("Skipped digest that is locked", extra={"key": key})
+                    continue
+                keys_by_host[router.get_host_for_key(f"{self.namespace}:t:{key}")].append(key)
+
+            digests: MutableMapping[str, Sequence[Record]] = {}
+            opened: MutableMapping[int, MutableMapping[str, Sequence[Record]]] = {}
+            for host, host_keys in keys_by_host.items():
+                response = script(
+                    self.cluster.get_local_client(host),
+                    ["-"],
+                    [
+                        "DIGEST_OPEN_MANY",
+                        self.namespace,
+                        self.ttl,
+                        timestamp,
+                        self.capacity if self.capacity else -1,
+                    ]
+                    + host_keys,
+                )
+                opened[host] = {}
+                for key, is_ready, records in response:
+                    key = key.decode("utf-8")
+                    if not is_ready:
+                        logger.info("Skipped digest that is not ready", extra={"key": key})
+                        continue
+                    opened[host][key] = self._decode_records(key, records)
+                    digests[key] = [
+                        record for record in opened[host][key] if record.value is not None
+                    ]
+
+            metrics.incr("digests.digest_many.opened", amount=len(digests))
+            yield digests
+
+            for host, host_digests in opened.items():
+                if not host_digests:
+                    continue
+                arguments = ["DIGEST_CLOSE_MANY", self.namespace, self.ttl, timestamp]
+                for key, records in host_digests.items():
+                    minimum_delay = minimum_delays.get(key)
+                    if minimum_delay is None:
+                        minimum_delay = self.minimum_delay
+                    arguments.extend([key, minimum_delay, len(records)])
+                    arguments.extend(record.key for record in records)
+                script(self.cluster.get_local_client(host), ["-"], arguments)
+
     def delete(self, key: str, timestamp: Optional[float] = None) -> None:
         if timestamp is None:
             timestamp = time.time()
@@ -2,6 +2,9 @@ import pickle
 import zlib
 from typing import Any
 
+import msgpack
+import zstandard
+
 
 class Codec:
     def encode(self, value: Any) -> bytes:
@@ -17,3 +20,63 @@ class CompressedPickleCodec(Codec):
 
     def decode(self, value: bytes) -> Any:
         return pickle.loads(zlib.decompress(value))
+
+
+class NotificationCodec(Codec):
+    """
+    Encodes notification records as zstd-compressed msgpack, which is much
+    cheaper to decode than pickle when large digests are delivered.
+
+    Encoded values start with a format version byte. Other values, as well as
+    records written by ``CompressedPickleCodec`` (which start with the zlib
+    header byte), are read with the pickle codec, so switching codecs doesn't
+    lose records that are already stored.
+
+    Notifications are only written in the new format when the
+    ``digests.notification-codec-encode`` option is enabled, so that it can
+    be turned on once every worker is able to read it.
+    """
+
+    FORMAT_V1 = b"\x01"
+
+    def __init__(self) -> None:
+        self.fallback = CompressedPickleCodec()
+
+    def encode(self, value: Any) -> bytes:
+        from sentry import options
+        from sentry.digests.notifications import Notification
+
+        if not isinstance(value, Notification) or not options.get(
+            "digests.notification-codec-encode"
+        ):
+            return self.fallback.encode(value)
+
+        event = value.event
+        payload = {
+            "project_id": event.project_id,
+            "event_id": event.event_id,
+            "group_id": event.group_id,
+            "data": dict(event.data.items()),
+            "rules": list(value.rules),
+        }
+        return self.FORMAT_V1 + zstandard.ZstdCompressor().compress(
+            msgpack.packb(payload, use_bin_type=True)
+        )
+
+    def decode(self, value: bytes) -> Any:
+        if value[:1] != self.FORMAT_V1:
+            return self.fallback.decode(value)
+
+        from sentry.digests.notifications import Notification
+        from sentry.eventstore.models import Event
+
+        payload = msgpack.unpackb(
+            zstandard.ZstdDecompressor().decompress(value[1:]), raw=False, strict_map_key=False
+        )
+        event = Event(
+            payload["project_id"],
+            payload["event_id"],
+            group_id=payload["group_id"],
+            data=payload["data"],
+        )
+        return Notification(event, payload["rules"])
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import copy
 import functools
 import itertools
 import logging
@@ -19,9 +20,9 @@ logger = logging.getLogger("sentry.digests")
 Notification = namedtuple("Notification", "event rules")
 
 
-def split_key(key: str) -> tuple[Project, ActionTargetType, str | None]:
+def parse_key(key: str) -> tuple[int, ActionTargetType, str | None]:
     key_parts = key.split(":", 4)
-    project_id = key_parts[2]
+    project_id = int(key_parts[2])
     # XXX: We transitioned to new style keys (len == 5) a while ago on sentry.io. But
     # on-prem users might transition at any time, so we need to keep this transition
     # code around for a while, maybe indefinitely.
@@ -31,6 +32,11 @@ def split_key(key: str) -> tuple[Project, ActionTargetType, str | None]:
     else:
         target_type = ActionTargetType.ISSUE_OWNERS
         target_identifier = None
+    return project_id, target_type, target_identifier
+
+
+def split_key(key: str) -> tuple[Project, ActionTargetType, str | None]:
+    project_id, target_type, target_identifier = parse_key(key)
     return Project.objects.get(pk=project_id), target_type, target_identifier
 
 
@@ -53,6 +59,53 @@ def event_to_record(event: Event, rules: Sequence[Rule]) -> Record:
 
 
 def fetch_state(project: Project, records: Sequence[Record]) -> Mapping[str, Any]:
+    groups = Group.objects.in_bulk(record.value.event.group_id for record in records)
+    rules = Rule.objects.in_bulk(
+        itertools.chain.from_iterable(record.value.rules for record in records)
+    )
+    return get_state(project, records, groups, rules)
+
+
+def fetch_states(
+    digests: Sequence[tuple[Project, Sequence[Record]]]
+) -> Sequence[Mapping[str, Any] | None]:
+    """
+    Like ``fetch_state`` for many digests, with the groups and rules of all
+    digests fetched at once. The state of digests without records is None.
+    """
+    records = [record for _, digest_records in digests for record in digest_records]
+    groups = Group.objects.in_bulk({record.value.event.group_id for record in records})
+    rules = Rule.objects.in_bulk({rule for record in records for rule in record.value.rules})
+
+    states: list[Mapping[str, Any] | None] = []
+    for project, digest_records in digests:
+        if not digest_records:
+            states.append(None)
+            continue
+
+        # Each digest gets its own copies, since `attach_state` annotates
+        # groups with the counts of the digest's time range.
+        digest_groups = {
+            record.value.event.group_id: copy.copy(groups[record.value.event.group_id])
+            for record in digest_records
+            if record.value.event.group_id in groups
+        }
+        digest_rules = {
+            rule_id: rules[rule_id]
+            for record in digest_records
+            for rule_id in record.value.rules
+            if rule_id in rules
+        }
+        states.append(get_state(project, digest_records, digest_groups, digest_rules))
+    return states
+
+
+def get_state(
+    project: Project,
+    records: Sequence[Record],
+    groups: MutableMapping[int, Group],
+    rules: Mapping[int, Rule],
+) -> Mapping[str, Any]:
     # This reads a little strange, but remember that records are returned in
     # reverse chronological order, and we query the database in chronological
     # order.
@@ -60,13 +113,10 @@ def fetch_state(project: Project, records: Sequence[Record]) -> Mapping[str, Any
     start = records[-1].datetime
     end = records[0].datetime
 
-    groups = Group.objects.in_bulk(record.value.event.group_id for record in records)
     return {
         "project": project,
         "groups": groups,
-        "rules": Rule.objects.in_bulk(
-            itertools.chain.from_iterable(record.value.rules for record in records)
-        ),
+        "rules": rules,
         "event_counts": tsdb.get_sums(tsdb.models.group, list(groups.keys()), start, end),
         "user_counts": tsdb.get_distinct_counts_totals(
             tsdb.models.users_affected_by_group, list(groups.keys()), start, end
@@ -1,5 +1,5 @@
 from datetime import timedelta
-from typing import Any, Optional
+from typing import Any, List, Mapping, Optional, Sequence
 
 import sentry_sdk
 
@@ -40,16 +40,47 @@ class EventProcessingStore:
             self.inner.set(key, event, self.timeout)
             return key
 
+    def store_many(self, events: Sequence[Event], unprocessed: bool = False) -> List[str]:
+        """
+        Stores `events` in a single round trip where the backend allows it,
+        and returns their keys in order.
+        """
+        with sentry_sdk.start_span(op="eventstore.processing.store_many"):
+            keys = [cache_key_for_event(event) for event in events]
+            if unprocessed:
+                keys = [self.__get_unprocessed_key(key) for key in keys]
+            self.inner.set_many(list(zip(keys, events)), self.timeout)
+            return keys
+
     def get(self, key: str, unprocessed: bool = False) -> Optional[Event]:
         with sentry_sdk.start_span(op="eventstore.processing.get"):
             if unprocessed:
                 key = self.__get_unprocessed_key(key)
             return self.inner.get(key)
 
+    def get_many(self, keys: Sequence[str], unprocessed: bool = False) -> Mapping[str, Event]:
+        """
+        Returns the events that are present for `keys`, by key.
+        """
+        with sentry_sdk.start_span(op="eventstore.processing.get_many"):
+            if not unprocessed:
+                return dict(self.inner.get_many(keys))
+
+            inner_keys = {self.__get_unprocessed_key(key): key for key in keys}
+            return {
+                inner_keys[inner_key]: event
+                for inner_key, event in self.inner.get_many(list(inner_keys))
+            }
+
     def delete_by_key(self, key: str) -> None:
         with sentry_sdk.start_span(op="eventstore.processing.delete_by_key"):
-            self.inner.delete(key)
-            self.inner.delete(self.__get_unprocessed_key(key))
+            self.inner.delete_many([key, self.__get_unprocessed_key(key)])
+
+    def delete_many(self, keys: Sequence[str]) -> None:
+        with sentry_sdk.start_span(op="eventstore.processing.delete_many"):
+            self.inner.delete_many(
+                [inner_key for key in keys for inner_key in (key, self.__get_unprocessed_key(key))]
+            )
 
     def delete(self, event: Event) -> None:
         key = cache_key_for_event(event)
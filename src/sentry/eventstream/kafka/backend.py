@@ -10,6 +10,7 @@ from sentry import options
 from sentry.eventstream.kafka.consumer import SynchronizedConsumer
 from sentry.eventstream.kafka.postprocessworker import (
     _CONCURRENCY_OPTION,
+    DispatchTracker,
     ErrorsPostProcessForwarderWorker,
     PostProcessForwarderType,
     PostProcessForwarderWorker,
@@ -17,8 +18,11 @@ from sentry.eventstream.kafka.postprocessworker import (
     _sampled_eventstream_timer,
 )
 from sentry.eventstream.kafka.protocol import (
+    TASK_HEADERS_VERSION,
+    TASK_HEADERS_VERSION_HEADER,
     get_task_kwargs_for_message,
     get_task_kwargs_for_message_from_headers,
+    has_task_headers,
 )
 from sentry.eventstream.snuba import SnubaProtocolEventStream
 from sentry.utils import json, kafka, metrics
@@ -51,11 +55,8 @@ class KafkaEventStream(SnubaProtocolEventStream):
         skip_consume,
     ) -> Mapping[str, str]:
 
-        # HACK: We are putting all this extra information that is required by the
-        # post process forwarder into the headers so we can skip parsing entire json
-        # messages. The post process forwarder is currently bound to a single core.
-        # Once we are able to parallelize the JSON parsing and other transformation
-        # steps being done there we may want to remove this hack.
+        # The post process forwarder dispatches its tasks from these headers alone,
+        # so it doesn't need to decode the JSON body of the message.
         def encode_bool(value: Optional[bool]) -> str:
             if value is None:
                 value = False
@@ -71,25 +72,8 @@ class KafkaEventStream(SnubaProtocolEventStream):
 
         transaction_forwarder = True if event.group_id is None else False
 
-        send_new_headers = options.get("eventstream:kafka-headers")
-
-        if send_new_headers is True:
-            return strip_none_values(
-                {
-                    "Received-Timestamp": str(received_timestamp),
-                    "event_id": str(event.event_id),
-                    "project_id": str(event.project_id),
-                    "group_id": str(event.group_id) if event.group_id is not None else None,
-                    "primary_hash": str(primary_hash) if primary_hash is not None else None,
-                    "is_new": encode_bool(is_new),
-                    "is_new_group_environment": encode_bool(is_new_group_environment),
-                    "is_regression": encode_bool(is_regression),
-                    "skip_consume": encode_bool(skip_consume),
-                    "transaction_forwarder": encode_bool(transaction_forwarder),
-                }
-            )
-        else:
-            return {
+        return strip_none_values(
+            {
                 **super()._get_headers_for_insert(
                     group,
                     event,
@@ -100,8 +84,17 @@ class KafkaEventStream(SnubaProtocolEventStream):
                     received_timestamp,
                     skip_consume,
                 ),
+                "event_id": str(event.event_id),
+                "project_id": str(event.project_id),
+                "group_id": str(event.group_id) if event.group_id is not None else None,
+                "primary_hash": str(primary_hash) if primary_hash is not None else None,
+                "is_new": encode_bool(is_new),
+                "is_new_group_environment": encode_bool(is_new_group_environment),
+                "is_regression": encode_bool(is_regression),
+                "skip_consume": encode_bool(skip_consume),
                 "transaction_forwarder": encode_bool(transaction_forwarder),
             }
+        )
 
     def _send(
         self,
@@ -115,6 +108,7 @@ class KafkaEventStream(SnubaProtocolEventStream):
             headers = {}
         headers["operation"] = _type
         headers["version"] = str(self.EVENT_PROTOCOL_VERSION)
+        headers[TASK_HEADERS_VERSION_HEADER] = str(TASK_HEADERS_VERSION)
 
         # Polling the producer is required to ensure callbacks are fired. This
         # means that the latency between a message being delivered (or failing
@@ -171,16 +165,20 @@ class KafkaEventStream(SnubaProtocolEventStream):
         )
 
         concurrency = options.get(_CONCURRENCY_OPTION)
+        # Offsets are committed as dispatches complete, instead of once per batch.
+        tracker = DispatchTracker()
         logger.info(f"Starting post process forwrader to consume {entity} messages")
         if entity == PostProcessForwarderType.TRANSACTIONS:
-            worker = TransactionsPostProcessForwarderWorker(concurrency=concurrency)
+            worker = TransactionsPostProcessForwarderWorker(
+                concurrency=concurrency, tracker=tracker
+            )
         elif entity == PostProcessForwarderType.ERRORS:
-            worker = ErrorsPostProcessForwarderWorker(concurrency=concurrency)
+            worker = ErrorsPostProcessForwarderWorker(concurrency=concurrency, tracker=tracker)
         else:
             # Default implementation which processes both errors and transactions
             # irrespective of values in the header. This would most likely be the case
             # for development environments.
-            worker = PostProcessForwarderWorker(concurrency=concurrency)
+            worker = PostProcessForwarderWorker(concurrency=concurrency, tracker=tracker)
 
         consumer = BatchingKafkaConsumer(
             topics=self.topic,
@@ -189,6 +187,7 @@ class KafkaEventStream(SnubaProtocolEventStream):
             max_batch_time=commit_batch_timeout_ms,
             consumer=synchronized_consumer,
             commit_on_shutdown=True,
+            delivery_tracker=tracker,
         )
         return consumer
 
@@ -357,7 +356,9 @@ class KafkaEventStream(SnubaProtocolEventStream):
             i = i + 1
             owned_partition_offsets[key] = message.offset() + 1
 
-            use_kafka_headers = options.get("post-process-forwarder:kafka-headers")
+            use_kafka_headers = has_task_headers(message.headers()) or options.get(
+                "post-process-forwarder:kafka-headers"
+            )
 
             if use_kafka_headers is True:
                 try:
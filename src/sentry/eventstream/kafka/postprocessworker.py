@@ -1,19 +1,29 @@
 import logging
 import random
-from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, as_completed, wait
 from contextlib import contextmanager
 from enum import Enum
-from typing import Any, Generator, Mapping, Optional, Sequence
+from typing import Any, Callable, Deque, Generator, List, Mapping, Optional, Sequence, Tuple
+
+from confluent_kafka import TIMESTAMP_NOT_AVAILABLE
 
 from sentry import options
 from sentry.eventstream.kafka.protocol import (
     decode_bool,
     get_task_kwargs_for_message,
     get_task_kwargs_for_message_from_headers,
+    has_task_headers,
 )
 from sentry.tasks.post_process import post_process_group
 from sentry.utils import metrics
-from sentry.utils.batching_kafka_consumer import AbstractBatchWorker
+from sentry.utils.batching_kafka_consumer import (
+    AbstractBatchWorker,
+    DeliveryTracker,
+    SourceOffset,
+)
 from sentry.utils.cache import cache_key_for_event
 
 logger = logging.getLogger(__name__)
@@ -22,7 +32,13 @@ Message = Any
 _DURATION_METRIC = "eventstream.duration"
 _CONCURRENCY_METRIC = "eventstream.concurrency"
 _MESSAGES_METRIC = "eventstream.messages"
+_LAG_METRIC = "eventstream.lag"
 _CONCURRENCY_OPTION = "post-process-forwarder:concurrency"
+_ADAPTIVE_CONCURRENCY_OPTION = "post-process-forwarder:adaptive-concurrency"
+_MIN_CONCURRENCY_OPTION = "post-process-forwarder:min-concurrency"
+_MAX_CONCURRENCY_OPTION = "post-process-forwarder:max-concurrency"
+_TARGET_LAG_OPTION = "post-process-forwarder:target-lag"
+_MAX_DISPATCH_LATENCY_OPTION = "post-process-forwarder:max-dispatch-latency"
 _TRANSACTION_FORWARDER_HEADER = "transaction_forwarder"
 
 
@@ -43,7 +59,11 @@ def _sampled_eventstream_timer(instance: str) -> Generator[None, None, None]:
 
 
 def _get_task_kwargs(message: Message) -> Optional[Mapping[str, Any]]:
-    use_kafka_headers = options.get("post-process-forwarder:kafka-headers")
+    # Only messages produced before the versioned headers were introduced need
+    # their body to be decoded.
+    use_kafka_headers = has_task_headers(message.headers()) or options.get(
+        "post-process-forwarder:kafka-headers"
+    )
 
     if use_kafka_headers:
         try:
@@ -100,50 +120,189 @@ def _get_task_kwargs_and_dispatch(message: Message):
     dispatch_post_process_group_task(**task_kwargs)
 
 
+class DispatchTracker(DeliveryTracker):
+    """
+    Tracks the dispatches that run on the thread pool of a
+    `PostProcessForwarderWorker`, so the `BatchingKafkaConsumer` commits the
+    offsets of a partition as soon as every message up to them has been
+    dispatched, rather than once per batch.
+
+    Dispatches of the same partition may complete out of order, but an offset
+    is never committed before the dispatches of all earlier messages of its
+    partition have succeeded. Completed dispatches are reported on the
+    consumer thread when it polls the tracker.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.__futures: Deque[Tuple[Future, Callable[[Optional[Any]], None]]] = deque()
+
+    def add(self, message: Message, future: Future) -> None:
+        self.__futures.append((future, self.track(SourceOffset.from_message(message))))
+
+    def poll(self, timeout: float = 0.0) -> None:
+        """
+        Reports the dispatches that have completed, waiting up to `timeout`
+        seconds for the first one when none has.
+        """
+        if timeout and self.__futures:
+            wait([future for future, _ in self.__futures], timeout, FIRST_COMPLETED)
+
+        pending: Deque[Tuple[Future, Callable[[Optional[Any]], None]]] = deque()
+        for future, done in self.__futures:
+            if not future.done():
+                pending.append((future, done))
+                continue
+            error = future.exception()
+            if error is not None:
+                logger.error("Could not dispatch post process task", exc_info=error)
+            done(error)
+        self.__futures = pending
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Wait for all outstanding dispatches."""
+        wait([future for future, _ in self.__futures], timeout)
+        self.poll()
+
+    def reset(self) -> None:
+        super().reset()
+        self.__futures.clear()
+
+
+class ConcurrencyController:
+    """
+    Works out how many dispatches the post process forwarder keeps in flight.
+
+    While the consumer lags behind by more than the target, concurrency is
+    increased one step at a time. Once dispatches get slower than allowed on
+    average, the brokers that tasks are dispatched to are saturated and more
+    threads would only add to that, so concurrency is halved. When the
+    consumer has caught up, concurrency is decreased one step at a time.
+
+    The lag is measured from the timestamp of the last consumed message.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.time) -> None:
+        self.clock = clock
+        self.lag: Optional[float] = None
+        self.__lock = threading.Lock()
+        self.__latencies: List[float] = []
+
+    def observe(self, message: Message) -> None:
+        timestamp_type, timestamp = message.timestamp()
+        if timestamp_type != TIMESTAMP_NOT_AVAILABLE and timestamp > 0:
+            self.lag = max(self.clock() - timestamp / 1000.0, 0.0)
+
+    def record_latency(self, seconds: float) -> None:
+        # Called from the threads of the pool.
+        with self.__lock:
+            self.__latencies.append(seconds)
+
+    def get_latency(self) -> Optional[float]:
+        """
+        Returns the average latency of the dispatches that completed since the
+        last call.
+        """
+        with self.__lock:
+            latencies, self.__latencies = self.__latencies, []
+        return sum(latencies) / len(latencies) if latencies else None
+
+    def adjust(self, concurrency: int) -> int:
+        min_concurrency = max(options.get(_MIN_CONCURRENCY_OPTION), 1)
+        max_concurrency = max(options.get(_MAX_CONCURRENCY_OPTION), min_concurrency)
+        latency = self.get_latency()
+
+        if self.lag is not None:
+            metrics.timing(_LAG_METRIC, self.lag)
+
+        if latency is not None and latency > options.get(_MAX_DISPATCH_LATENCY_OPTION):
+            concurrency = concurrency // 2
+        elif self.lag is not None and self.lag > options.get(_TARGET_LAG_OPTION):
+            concurrency += 1
+        elif self.lag is not None and self.lag < options.get(_TARGET_LAG_OPTION) / 2:
+            concurrency -= 1
+
+        return min(max(concurrency, min_concurrency), max_concurrency)
+
+
 class PostProcessForwarderWorker(AbstractBatchWorker):
     """
     Implementation of the AbstractBatchWorker which would be used for post process forwarder.
-    The current implementation creates a thread pool worker based on the concurrency parameter
-    because we want to be able to change the concurrency during runtime. This should be replaced
-    by a thread pool executor once stress tests experiments are over and we start using the
-    CLI arguments to set concurrency.
+    Messages are dispatched on a thread pool. The concurrency is read from options when a batch
+    is flushed, either the fixed `post-process-forwarder:concurrency` or, when
+    `post-process-forwarder:adaptive-concurrency` is set, the one worked out by a
+    `ConcurrencyController`.
+
+    Without a `DispatchTracker`, `flush_batch` waits for every dispatch of the batch. With one,
+    which has to be passed to the `BatchingKafkaConsumer` as well, up to `concurrency` dispatches
+    are kept in flight across batches and the consumer commits offsets as dispatches complete,
+    so a slow dispatch no longer stalls the rest of its batch.
     """
 
-    def __init__(self, concurrency: Optional[int] = 1) -> None:
+    def __init__(
+        self, concurrency: Optional[int] = 1, tracker: Optional[DispatchTracker] = None
+    ) -> None:
         self.__current_concurrency = concurrency
+        self.__tracker = tracker
+        self.__controller = ConcurrencyController()
+        self.__adaptive = options.get(_ADAPTIVE_CONCURRENCY_OPTION)
         logger.info(f"Starting post process forwarder with {concurrency} threads")
         metrics.incr(_CONCURRENCY_METRIC, amount=concurrency)
         self.__executor = ThreadPoolExecutor(max_workers=self.__current_concurrency)
 
+    def __dispatch(self, message: Message) -> None:
+        start = time.time()
+        try:
+            _get_task_kwargs_and_dispatch(message)
+        finally:
+            self.__controller.record_latency(time.time() - start)
+
     def process_message(self, message: Message) -> Optional[Future]:
         """
         Process the message received by the consumer and return the Future associated with the message. The future
         is stored in the batch of batching_kafka_consumer and provided as an argument to flush_batch. If None is
         returned, the batching_kafka_consumer will not add the return value to the batch.
         """
-        return self.__executor.submit(_get_task_kwargs_and_dispatch, message)
+        if self.__adaptive:
+            self.__controller.observe(message)
+
+        if self.__tracker is None:
+            return self.__executor.submit(self.__dispatch, message)
+
+        self.__tracker.poll()
+        while self.__tracker.pending_count >= self.__current_concurrency:
+            self.__tracker.poll(timeout=1.0)
+
+        future = self.__executor.submit(self.__dispatch, message)
+        self.__tracker.add(message, future)
+        return future
 
     def flush_batch(self, batch: Optional[Sequence[Future]]) -> None:
         """
         For all work which was submitted to the thread pool executor, we need to ensure that if an exception was
         raised, then we raise it in the main thread. This is needed so that processing can be stopped in such
-        cases.
+        cases. When dispatches are tracked, errors are raised by the consumer instead, once it gets to commit
+        the offset of the failed message.
         """
-        if batch:
+        if batch and self.__tracker is None:
             for future in as_completed(batch):
                 exc = future.exception()
                 if exc is not None:
                     raise exc
 
-        # Check if the concurrency settings have changed. If yes, then shutdown the existing executor
-        # and create a new one with the new settings
-        new_concurrency = options.get(_CONCURRENCY_OPTION)
+        # Check if the concurrency settings have changed. If yes, then replace the existing executor
+        # with one of the new size. Dispatches that are in flight complete on the threads of the old one.
+        self.__adaptive = options.get(_ADAPTIVE_CONCURRENCY_OPTION)
+        if self.__adaptive:
+            new_concurrency = self.__controller.adjust(self.__current_concurrency)
+        else:
+            new_concurrency = options.get(_CONCURRENCY_OPTION)
         if new_concurrency != self.__current_concurrency:
             logger.info(
                 f"Switching post-process-forwarder from {self.__current_concurrency} to {new_concurrency} worker threads"
             )
             metrics.incr(_CONCURRENCY_METRIC, amount=new_concurrency)
-            self.__executor.shutdown(wait=True)
+            self.__executor.shutdown(wait=False)
             self.__executor = ThreadPoolExecutor(max_workers=new_concurrency)
             self.__current_concurrency = new_concurrency
 
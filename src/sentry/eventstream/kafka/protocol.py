@@ -1,10 +1,17 @@
 import logging
-from typing import Optional, Sequence, Tuple
+from typing import Any, Optional, Sequence, Tuple
 
 from sentry.utils import json, metrics
 
 logger = logging.getLogger(__name__)
 
+# Version of the headers that the event stream sets on every message, so that
+# consumers get the arguments of the post-processing task from the headers
+# without decoding the body. Messages produced before it was introduced only
+# carry them reliably in the body.
+TASK_HEADERS_VERSION = 1
+TASK_HEADERS_VERSION_HEADER = "task_headers_version"
+
 
 class UnexpectedOperation(Exception):
     pass
@@ -125,6 +132,20 @@ def decode_bool(value: bytes) -> bool:
     return bool(int(decode_str(value)))
 
 
+def has_task_headers(headers: Any) -> bool:
+    """
+    Returns whether a message has headers in a version that can be decoded by
+    ``get_task_kwargs_for_message_from_headers``.
+    """
+    try:
+        for key, value in headers:
+            if key == TASK_HEADERS_VERSION_HEADER:
+                return decode_int(value) <= TASK_HEADERS_VERSION
+    except (AssertionError, TypeError, ValueError):
+        pass
+    return False
+
+
 def get_task_kwargs_for_message_from_headers(headers: Sequence[Tuple[str, Optional[bytes]]]):
     """
     Same as get_task_kwargs_for_message but gets the required information from
@@ -1,6 +1,7 @@
 import mimetypes
 import os
 import posixpath
+from functools import partial
 from tempfile import SpooledTemporaryFile
 
 from django.conf import settings
@@ -255,6 +256,20 @@ class GoogleCloudStorage(Storage):
         name = self._normalize_name(clean_name(name))
         return GoogleCloudFile(name, mode, self)
 
+    def read_range(self, name, start, length):
+        """
+        Reads `length` bytes starting at `start` without downloading the
+        whole object.
+        """
+        if length <= 0:
+            return b""
+        name = self._normalize_name(clean_name(name))
+        blob = FancyBlob(self.download_url, name, self.bucket)
+        with metrics.timer("filestore.read_range", instance="gcs"):
+            return try_repeated(
+                partial(blob.download_as_bytes, start=start, end=start + length - 1)
+            )
+
     def _save(self, name, content):
         def _try_upload():
             content.seek(0, os.SEEK_SET)
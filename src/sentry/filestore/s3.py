@@ -245,7 +245,7 @@ class S3Boto3Storage(Storage):
     # XXX: note that this file reads entirely into memory before the first
     # read happens.  This means that it should only be used for small
     # files (eg: see how sentry.models.file works with it through the
-    # ChunkedFileBlobIndexWrapper.
+    # ChunkedFileBlobIndexWrapper, which uses `read_range` instead).
     connection_class = staticmethod(resource)
     connection_service_name = "s3"
     default_content_type = "application/octet-stream"
@@ -489,6 +489,31 @@ class S3Boto3Storage(Storage):
             raise  # Let it bubble up if it was some other error
         return f
 
+    def read_range(self, name, start, length):
+        """
+        Reads `length` bytes starting at `start` with a ranged GET, without
+        downloading the whole object.
+        """
+        if length <= 0:
+            return b""
+        if self.gzip:
+            # Objects may be stored compressed, in which case offsets into the
+            # stored object don't match offsets into the content.
+            with self.open(name) as f:
+                f.seek(start)
+                return f.read(length)
+
+        name = self._normalize_name(self._clean_name(name))
+        with metrics.timer("filestore.read_range", instance="s3"):
+            obj = self.bucket.Object(self._encode_name(name))
+            try:
+                response = obj.get(Range="bytes=%d-%d" % (start, start + length - 1))
+            except self.connection_response_error as err:
+                if err.response["ResponseMetadata"]["HTTPStatusCode"] == 404:
+                    raise OSError("File does not exist: %s" % name)
+                raise
+            return response["Body"].read()
+
     def _save(self, name, content):
         with metrics.timer("filestore.save", instance="s3"):
             cleaned_name = self._clean_name(name)
@@ -85,6 +85,58 @@ class IncidentManager(BaseManager):
 
         return incident
 
+    def get_many_active_incidents(self, alert_rules_and_projects):
+        """
+        Bulk version of `get_active_incident`. Accepts a list of `(alert_rule, project)`
+        pairs and returns a dict mapping `(alert_rule.id, project.id)` to the active
+        incident, or None if there isn't one. Shares the same cache entries.
+        """
+        cache_keys = {
+            self._build_active_incident_cache_key(alert_rule.id, project.id): (
+                alert_rule.id,
+                project.id,
+            )
+            for alert_rule, project in alert_rules_and_projects
+        }
+        cached = cache.get_many(list(cache_keys))
+        results = {}
+        missing = set()
+        for cache_key, key in cache_keys.items():
+            incident = cached.get(cache_key)
+            if incident is None:
+                missing.add(key)
+            else:
+                # A falsey value means we cached that there is no active incident
+                results[key] = incident or None
+
+        if missing:
+            incident_projects = (
+                IncidentProject.objects.filter(
+                    incident__type=IncidentType.ALERT_TRIGGERED.value,
+                    incident__alert_rule_id__in={alert_rule_id for alert_rule_id, _ in missing},
+                    project_id__in={project_id for _, project_id in missing},
+                )
+                .exclude(incident__status=IncidentStatus.CLOSED.value)
+                .select_related("incident")
+                .order_by("-incident__date_added")
+            )
+            found = {}
+            for incident_project in incident_projects:
+                key = (incident_project.incident.alert_rule_id, incident_project.project_id)
+                if key in missing:
+                    found.setdefault(key, incident_project.incident)
+
+            to_cache = {}
+            for key in missing:
+                incident = found.get(key)
+                results[key] = incident
+                to_cache[self._build_active_incident_cache_key(*key)] = (
+                    False if incident is None else incident
+                )
+            cache.set_many(to_cache)
+
+        return results
+
     @classmethod
     def clear_active_incident_cache(cls, instance, **kwargs):
         for project in instance.projects.all():
@@ -316,6 +368,40 @@ class AlertRuleManager(BaseManager):
 
         return alert_rule
 
+    def get_many_for_subscriptions(self, subscriptions):
+        """
+        Bulk version of `get_for_subscription`. Returns a dict mapping subscription id
+        to the associated AlertRule. Subscriptions without an AlertRule are omitted.
+        """
+        cache_keys = {
+            self.__build_subscription_cache_key(subscription.id): subscription
+            for subscription in subscriptions
+        }
+        results = {}
+        missing = []
+        for cache_key, alert_rule in cache.get_many(list(cache_keys)).items():
+            results[cache_keys[cache_key].id] = alert_rule
+        for subscription in cache_keys.values():
+            if subscription.id not in results:
+                missing.append(subscription)
+
+        if missing:
+            alert_rules = {
+                alert_rule.snuba_query_id: alert_rule
+                for alert_rule in AlertRule.objects.filter(
+                    snuba_query_id__in={subscription.snuba_query_id for subscription in missing}
+                )
+            }
+            to_cache = {}
+            for subscription in missing:
+                alert_rule = alert_rules.get(subscription.snuba_query_id)
+                if alert_rule is not None:
+                    results[subscription.id] = alert_rule
+                    to_cache[self.__build_subscription_cache_key(subscription.id)] = alert_rule
+            cache.set_many(to_cache, 3600)
+
+        return results
+
     @classmethod
     def clear_subscription_cache(cls, instance, **kwargs):
         cache.delete(cls.__build_subscription_cache_key(instance.id))
@@ -466,6 +552,38 @@ class AlertRuleTriggerManager(BaseManager):
             cache.set(cache_key, triggers, 3600)
         return triggers
 
+    def get_many_for_alert_rules(self, alert_rules):
+        """
+        Bulk version of `get_for_alert_rule`. Returns a dict mapping alert rule id to
+        the list of its AlertRuleTriggers.
+        """
+        cache_keys = {
+            self._build_trigger_cache_key(alert_rule.id): alert_rule.id
+            for alert_rule in alert_rules
+        }
+        results = {
+            cache_keys[cache_key]: triggers
+            for cache_key, triggers in cache.get_many(list(cache_keys)).items()
+        }
+        missing = [
+            alert_rule_id for alert_rule_id in cache_keys.values() if alert_rule_id not in results
+        ]
+
+        if missing:
+            for alert_rule_id in missing:
+                results[alert_rule_id] = []
+            for trigger in AlertRuleTrigger.objects.filter(alert_rule_id__in=missing):
+                results[trigger.alert_rule_id].append(trigger)
+            cache.set_many(
+                {
+                    self._build_trigger_cache_key(alert_rule_id): results[alert_rule_id]
+                    for alert_rule_id in missing
+                },
+                3600,
+            )
+
+        return results
+
     @classmethod
     def clear_trigger_cache(cls, instance, **kwargs):
         cache.delete(cls._build_trigger_cache_key(instance.alert_rule_id))
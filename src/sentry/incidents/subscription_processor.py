@@ -1,5 +1,6 @@
 import logging
 import operator
+from collections import defaultdict
 from copy import deepcopy
 from datetime import timedelta
 from typing import Optional
@@ -67,21 +68,30 @@ class SubscriptionProcessor:
         AlertRuleThresholdType.BELOW: (operator.lt, operator.gt),
     }
 
-    def __init__(self, subscription):
+    def __init__(self, subscription, alert_rule=None, triggers=None, stats=None):
+        """
+        `alert_rule`, `triggers` and `stats` can be passed in when they've already been
+        fetched in bulk, otherwise they're fetched here.
+        """
         self.subscription = subscription
-        try:
-            self.alert_rule = AlertRule.objects.get_for_subscription(subscription)
-        except AlertRule.DoesNotExist:
-            return
+        if alert_rule is None:
+            try:
+                alert_rule = AlertRule.objects.get_for_subscription(subscription)
+            except AlertRule.DoesNotExist:
+                return
+        self.alert_rule = alert_rule
 
-        self.triggers = AlertRuleTrigger.objects.get_for_alert_rule(self.alert_rule)
-        self.triggers.sort(key=lambda trigger: trigger.alert_threshold)
+        if triggers is None:
+            triggers = AlertRuleTrigger.objects.get_for_alert_rule(self.alert_rule)
+        self.triggers = sorted(triggers, key=lambda trigger: trigger.alert_threshold)
 
+        if stats is None:
+            stats = get_alert_rule_stats(self.alert_rule, self.subscription, self.triggers)
         (
             self.last_update,
             self.trigger_alert_counts,
             self.trigger_resolve_counts,
-        ) = get_alert_rule_stats(self.alert_rule, self.subscription, self.triggers)
+        ) = stats
         self.orig_trigger_alert_counts = deepcopy(self.trigger_alert_counts)
         self.orig_trigger_resolve_counts = deepcopy(self.trigger_resolve_counts)
 
@@ -111,6 +121,10 @@ class SubscriptionProcessor:
             self._incident_triggers = incident_triggers
         return self._incident_triggers
 
+    @incident_triggers.setter
+    def incident_triggers(self, incident_triggers):
+        self._incident_triggers = incident_triggers
+
     def check_trigger_status(self, trigger, status):
         """
         Determines whether a trigger is currently at the specified status
@@ -330,7 +344,41 @@ class SubscriptionProcessor:
                 )
         return aggregation_value
 
+    def has_crossed_threshold(self, aggregation_value, alert_operator, resolve_operator):
+        """
+        Determines whether `aggregation_value` would move any trigger towards firing or
+        resolving. Mirrors the checks made in `process_update`. When it returns False
+        processing the update only resets the trigger counts, so we can skip the
+        transaction entirely.
+        """
+        for trigger in self.triggers:
+            if alert_operator(
+                aggregation_value, trigger.alert_threshold
+            ) and not self.check_trigger_status(trigger, TriggerStatus.ACTIVE):
+                return True
+            if (
+                resolve_operator(aggregation_value, self.calculate_resolve_threshold(trigger))
+                and self.active_incident
+                and self.check_trigger_status(trigger, TriggerStatus.ACTIVE)
+            ):
+                return True
+        return False
+
     def process_update(self, subscription_update):
+        if self.evaluate_update(subscription_update):
+            # We update the rule stats here after we commit the transaction. This guarantees
+            # that we'll never miss an update, since we'll never roll back if the process
+            # is killed here. The trade-off is that we might process an update twice. Mostly
+            # this will have no effect, but if someone manages to close a triggered incident
+            # before the next one then we might alert twice.
+            self.update_alert_rule_stats()
+
+    def evaluate_update(self, subscription_update):
+        """
+        Applies the update to the triggers on the alert rule, firing or resolving them
+        if needed. Doesn't write the updated rule stats.
+        :return: True if the update was processed and the rule stats need to be written.
+        """
         dataset = self.subscription.snuba_query.dataset
         try:
             # Check that the project exists
@@ -388,6 +436,12 @@ class SubscriptionProcessor:
         alert_operator, resolve_operator = self.THRESHOLD_TYPE_OPERATORS[
             AlertRuleThresholdType(self.alert_rule.threshold_type)
         ]
+        if not self.has_crossed_threshold(aggregation_value, alert_operator, resolve_operator):
+            for trigger in self.triggers:
+                self.trigger_alert_counts[trigger.id] = 0
+                self.trigger_resolve_counts[trigger.id] = 0
+            return True
+
         fired_incident_triggers = []
         with transaction.atomic():
             for trigger in self.triggers:
@@ -435,12 +489,7 @@ class SubscriptionProcessor:
             if fired_incident_triggers:
                 self.handle_trigger_actions(fired_incident_triggers, aggregation_value)
 
-        # We update the rule stats here after we commit the transaction. This guarantees
-        # that we'll never miss an update, since we'll never roll back if the process
-        # is killed here. The trade-off is that we might process an update twice. Mostly
-        # this will have no effect, but if someone manages to close a triggered incident
-        # before the next one then we might alert twice.
-        self.update_alert_rule_stats()
+        return True
 
     def calculate_event_date_from_update_date(self, update_date):
         """
@@ -588,9 +637,11 @@ class SubscriptionProcessor:
                     status_method=IncidentStatusMethod.RULE_TRIGGERED,
                 )
 
-    def update_alert_rule_stats(self):
+    def update_alert_rule_stats(self, pipeline=None):
         """
         Updates stats about the alert rule, if they're changed.
+        :param pipeline: An optional redis pipeline to queue the writes on. The caller
+        is responsible for executing it.
         :return:
         """
         updated_trigger_alert_counts = {
@@ -610,9 +661,121 @@ class SubscriptionProcessor:
             self.last_update,
             updated_trigger_alert_counts,
             updated_trigger_resolve_counts,
+            pipeline=pipeline,
         )
 
 
+def process_subscription_updates(updates):
+    """
+    Batch version of `SubscriptionProcessor(subscription).process_update(update)`.
+    Accepts a list of `(subscription_update, subscription)` tuples, in the order they
+    were received.
+
+    Alert rules, triggers, active incidents and incident triggers for every
+    subscription in the batch are fetched with bulk queries, and the rule stats are
+    read and written with a single redis pipeline each. Updates that don't cross a
+    threshold never open a transaction, so the only per-subscription database work
+    left is firing and resolving triggers.
+
+    Since rule stats are only written once the whole batch has been processed, a
+    crash part way through means that the batch might be processed twice. This is
+    the same trade-off `process_update` makes for a single update.
+    :return: A dict mapping subscription id to the `SubscriptionProcessor` used for it
+    """
+    if not updates:
+        return {}
+
+    subscriptions = {}
+    for _, subscription in updates:
+        subscriptions.setdefault(subscription.id, subscription)
+    subscriptions = list(subscriptions.values())
+
+    with metrics.timer("incidents.subscription_processor.batch.prefetch"):
+        projects = {
+            project.id: project
+            for project in Project.objects.get_many_from_cache(
+                list({subscription.project_id for subscription in subscriptions})
+            )
+        }
+        for subscription in subscriptions:
+            project = projects.get(subscription.project_id)
+            if project is not None:
+                subscription.project = project
+
+        alert_rules = AlertRule.objects.get_many_for_subscriptions(subscriptions)
+        triggers = AlertRuleTrigger.objects.get_many_for_alert_rules(
+            list({alert_rule.id: alert_rule for alert_rule in alert_rules.values()}.values())
+        )
+
+        processors = {}
+        rules = []
+        for subscription in subscriptions:
+            alert_rule = alert_rules.get(subscription.id)
+            if alert_rule is None:
+                # Let `evaluate_update` log and skip updates for these subscriptions
+                processors[subscription.id] = SubscriptionProcessor(subscription)
+            else:
+                rules.append((alert_rule, subscription, triggers.get(alert_rule.id, [])))
+
+        for (alert_rule, subscription, rule_triggers), stats in zip(
+            rules, get_many_alert_rule_stats(rules)
+        ):
+            processors[subscription.id] = SubscriptionProcessor(
+                subscription, alert_rule=alert_rule, triggers=rule_triggers, stats=stats
+            )
+
+        prefetch_active_incidents(
+            [
+                processors[subscription.id]
+                for _, subscription, _ in rules
+                if subscription.project_id in projects
+            ]
+        )
+
+    updated = {}
+    for subscription_update, subscription in updates:
+        processor = processors[subscription.id]
+        if processor.evaluate_update(subscription_update):
+            updated[subscription.id] = processor
+
+    if updated:
+        pipeline = get_redis_client().pipeline()
+        for processor in updated.values():
+            processor.update_alert_rule_stats(pipeline=pipeline)
+        pipeline.execute()
+
+    return processors
+
+
+def prefetch_active_incidents(processors):
+    """
+    Fetches the active incident and its incident triggers for each processor in bulk,
+    and sets them on the processor.
+    """
+    if not processors:
+        return
+
+    active_incidents = Incident.objects.get_many_active_incidents(
+        [(processor.alert_rule, processor.subscription.project) for processor in processors]
+    )
+    incident_ids = {incident.id for incident in active_incidents.values() if incident}
+    incident_triggers = defaultdict(dict)
+    if incident_ids:
+        for incident_trigger in IncidentTrigger.objects.filter(
+            incident_id__in=incident_ids
+        ).select_related("alert_rule_trigger"):
+            incident_triggers[incident_trigger.incident_id][
+                incident_trigger.alert_rule_trigger_id
+            ] = incident_trigger
+
+    for processor in processors:
+        incident = active_incidents.get(
+            (processor.alert_rule.id, processor.subscription.project_id)
+        )
+        processor.active_incident = incident
+        processor.incident_triggers = dict(incident_triggers[incident.id]) if incident else {}
+
+
 def build_alert_rule_stat_keys(alert_rule, subscription):
     """
     Builds keys for fetching stats about alert rules
@@ -664,9 +827,32 @@ def get_alert_rule_stats(alert_rule, subscription, triggers):
        trigger id, and the value is an int representing how many consecutive times we
        have triggered the resolve threshold
     """
-    alert_rule_keys = build_alert_rule_stat_keys(alert_rule, subscription)
-    trigger_keys = build_trigger_stat_keys(alert_rule, subscription, triggers)
-    results = get_redis_client().mget(alert_rule_keys + trigger_keys)
+    return get_many_alert_rule_stats([(alert_rule, subscription, triggers)])[0]
+
+
+def get_many_alert_rule_stats(rules):
+    """
+    Bulk version of `get_alert_rule_stats`. Accepts a list of
+    `(alert_rule, subscription, triggers)` tuples and fetches the stats for all of
+    them in a single redis pipeline.
+    :return: A list of stats tuples, in the same order as `rules`.
+    """
+    if not rules:
+        return []
+
+    pipeline = get_redis_client().pipeline()
+    for alert_rule, subscription, triggers in rules:
+        alert_rule_keys = build_alert_rule_stat_keys(alert_rule, subscription)
+        trigger_keys = build_trigger_stat_keys(alert_rule, subscription, triggers)
+        pipeline.mget(alert_rule_keys + trigger_keys)
+
+    return [
+        _parse_alert_rule_stats(triggers, results)
+        for (_, _, triggers), results in zip(rules, pipeline.execute())
+    ]
+
+
+def _parse_alert_rule_stats(triggers, results):
     results = tuple(0 if result is None else int(result) for result in results)
     last_update = to_datetime(results[0])
     trigger_results = results[1:]
@@ -681,11 +867,16 @@ def get_alert_rule_stats(alert_rule, subscription, triggers):
     return last_update, trigger_alert_counts, trigger_resolve_counts
 
 
-def update_alert_rule_stats(alert_rule, subscription, last_update, alert_counts, resolve_counts):
+def update_alert_rule_stats(
+    alert_rule, subscription, last_update, alert_counts, resolve_counts, pipeline=None
+):
     """
     Updates stats about the alert rule, subscription and triggers if they've changed.
+    If `pipeline` is passed the writes are queued on it rather than executed.
     """
-    pipeline = get_redis_client().pipeline()
+    execute = pipeline is None
+    if execute:
+        pipeline = get_redis_client().pipeline()
 
     counts_with_stat_keys = zip(ALERT_RULE_TRIGGER_STAT_KEYS, (alert_counts, resolve_counts))
     for stat_key, trigger_counts in counts_with_stat_keys:
@@ -700,7 +891,8 @@ def update_alert_rule_stats(alert_rule, subscription, last_update, alert_counts,
 
     last_update_key = build_alert_rule_stat_keys(alert_rule, subscription)[0]
     pipeline.set(last_update_key, int(to_timestamp(last_update)), ex=REDIS_TTL)
-    pipeline.execute()
+    if execute:
+        pipeline.execute()
 
 
 def get_redis_client():
@@ -102,7 +102,13 @@ class IngestConsumerWorker(AbstractBatchWorker):
                 projects_to_fetch.add(message["project_id"])
 
                 if message_type == "event":
-                    other_messages.append((self.__process_event, message))
+                    if self.__process_event_executor is not None:
+                        other_messages.append((self.__process_event, message))
+                    elif other_messages and other_messages[-1][0] is process_events:
+                        # Consecutive events are stored in a single round trip.
+                        other_messages[-1][1].append(message)
+                    else:
+                        other_messages.append((process_events, [message]))
                 elif message_type == "attachment_chunk":
                     attachment_chunks.append(message)
                 elif message_type == "attachment":
@@ -320,6 +326,36 @@ def process_event(message: Message, projects: Mapping[int, Project]) -> None:
     return _do_process_event(message, projects)
 
 
+@trace_func(name="ingest_consumer.process_events")
+@metrics.wraps("ingest_consumer.process_events")
+def process_events(messages: Sequence[Message], projects: Mapping[int, Project]) -> None:
+    """
+    Same as ``process_event`` for a run of events, whose payloads are stored
+    in the processing store at once. Processing of each event is resumed in
+    order afterwards.
+    """
+    results = []
+    seen = set()
+    for message in messages:
+        # Duplicates are only recognized by ``_load_event`` once the event
+        # before them has been processed.
+        key = (int(message["project_id"]), message["event_id"])
+        if key in seen:
+            continue
+        seen.add(key)
+
+        result = _load_event(message, projects)
+        if result is not None:
+            results.append(result)
+
+    if not results:
+        return
+
+    cache_keys = event_processing_store.store_many([data for data, _ in results])
+    for (_, callback), cache_key in zip(results, cache_keys):
+        callback(cache_key)
+
+
 def process_event_async(
     executor: ThreadPoolExecutor, message: Message, projects: Mapping[int, Project]
 ) -> Optional["AsyncResult[str]"]:
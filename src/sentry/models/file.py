@@ -3,9 +3,12 @@ import mmap
 import os
 import tempfile
 import time
+from bisect import bisect_right
+from collections import OrderedDict, deque
 from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
 from hashlib import sha1
+from itertools import islice
 from threading import Semaphore
 from uuid import uuid4
 
@@ -38,6 +41,14 @@ UPLOAD_RETRY_TIME = getattr(settings, "SENTRY_UPLOAD_RETRY_TIME", 60)  # 1min
 DEFAULT_BLOB_SIZE = 1024 * 1024  # one mb
 CHUNK_STATE_HEADER = "__state"
 MULTI_BLOB_UPLOAD_CONCURRENCY = 8
+# How many blobs are fetched ahead of the reader when assembling a file
+ASSEMBLE_READAHEAD = 8
+# Reads on a chunked file are done in pages of this size
+READ_PAGE_SIZE = 64 * 1024
+# Upper bound for the read-ahead on sequential reads, in pages
+MAX_READAHEAD_PAGES = 128
+# How many pages each open chunked file keeps around for repeated reads
+READ_CACHE_PAGES = 256
 MAX_FILE_SIZE = 2 ** 31  # 2GB is the maximum offset supported by fileblob
 
 
@@ -81,6 +92,27 @@ def _locked_blob(checksum, logger=nooplogger):
     logger.debug("_locked_blob.end", extra={"checksum": checksum})
 
 
+def _iter_blob_contents(blobs, readahead=ASSEMBLE_READAHEAD):
+    """
+    Yields the contents of each blob in order. Up to `readahead` blobs are
+    fetched concurrently ahead of the consumer, which bounds memory use to
+    roughly `readahead + 1` blobs.
+    """
+
+    def _fetch(blob):
+        with blob.getfile() as f:
+            return f.read()
+
+    blobs = iter(blobs)
+    with ThreadPoolExecutor(max_workers=readahead) as exe:
+        pending = deque(exe.submit(_fetch, blob) for blob in islice(blobs, readahead))
+        while pending:
+            contents = pending.popleft().result()
+            for blob in islice(blobs, 1):
+                pending.append(exe.submit(_fetch, blob))
+            yield contents
+
+
 class AssembleChecksumMismatch(Exception):
     pass
 
@@ -142,20 +174,30 @@ class FileBlob(Model):
         semaphore = Semaphore(value=MULTI_BLOB_UPLOAD_CONCURRENCY)
 
         def _upload_and_pend_chunk(fileobj, size, checksum, lock):
-            logger.debug(
-                "FileBlob.from_files._upload_and_pend_chunk.start",
-                extra={"checksum": checksum, "size": size},
-            )
-            blob = cls(size=size, checksum=checksum)
-            blob.path = cls.generate_unique_path()
-            storage = get_storage()
-            storage.save(blob.path, fileobj)
-            blobs_to_save.append((blob, lock))
-            metrics.timing("filestore.blob-size", size, tags={"function": "from_files"})
-            logger.debug(
-                "FileBlob.from_files._upload_and_pend_chunk.end",
-                extra={"checksum": checksum, "path": blob.path},
-            )
+            try:
+                # Chunks with a reference checksum are verified here rather
+                # than before scheduling, so that hashing runs in parallel
+                # with other uploads.
+                if size is None:
+                    size, actual_checksum = _get_size_and_checksum(fileobj)
+                    if actual_checksum != checksum:
+                        raise OSError("Checksum mismatch")
+                logger.debug(
+                    "FileBlob.from_files._upload_and_pend_chunk.start",
+                    extra={"checksum": checksum, "size": size},
+                )
+                blob = cls(size=size, checksum=checksum)
+                blob.path = cls.generate_unique_path()
+                storage = get_storage()
+                storage.save(blob.path, fileobj)
+                blobs_to_save.append((blob, lock))
+                metrics.timing("filestore.blob-size", size, tags={"function": "from_files"})
+                logger.debug(
+                    "FileBlob.from_files._upload_and_pend_chunk.end",
+                    extra={"checksum": checksum, "path": blob.path},
+                )
+            finally:
+                semaphore.release()
 
         def _ensure_blob_owned(blob):
             if organization is None:
@@ -182,8 +224,12 @@ class FileBlob(Model):
                 _save_blob(blob)
                 lock.__exit__(None, None, None)
                 locks.discard(lock)
-                semaphore.release()
 
+            # Surface upload errors from the worker threads
+            while futures and futures[0].done():
+                futures.popleft().result()
+
+        futures = deque()
         try:
             with ThreadPoolExecutor(max_workers=MULTI_BLOB_UPLOAD_CONCURRENCY) as exe:
                 for fileobj, reference_checksum in files_with_checksums:
@@ -192,14 +238,17 @@ class FileBlob(Model):
                     )
                     _flush_blobs()
 
-                    # Before we go and do something with the files we calculate
-                    # the checksums and compare it against the reference.  This
-                    # also deduplicates duplicates uploaded in the same request.
-                    # This is necessary because we acquire multiple locks in one
-                    # go which would let us deadlock otherwise.
-                    size, checksum = _get_size_and_checksum(fileobj)
-                    if reference_checksum is not None and checksum != reference_checksum:
-                        raise OSError("Checksum mismatch")
+                    # Before we go and do something with the files we need
+                    # their checksums.  This deduplicates duplicates uploaded
+                    # in the same request, which is necessary because we
+                    # acquire multiple locks in one go which would let us
+                    # deadlock otherwise.  If the client sent a reference
+                    # checksum we trust it for now and verify it during the
+                    # upload.
+                    if reference_checksum is not None:
+                        size, checksum = None, reference_checksum
+                    else:
+                        size, checksum = _get_size_and_checksum(fileobj)
                     if checksum in checksums_seen:
                         continue
                     checksums_seen.add(checksum)
@@ -210,6 +259,10 @@ class FileBlob(Model):
                     existing = lock.__enter__()
                     if existing is not None:
                         lock.__exit__(None, None, None)
+                        # Never hand out ownership of a blob based on an
+                        # unverified checksum.
+                        if size is None and _get_size_and_checksum(fileobj)[1] != checksum:
+                            raise OSError("Checksum mismatch")
                         blobs_created.append(existing)
                         _ensure_blob_owned(existing)
                         continue
@@ -225,10 +278,15 @@ class FileBlob(Model):
                     # `_flush_blobs` call will take all those uploaded
                     # blobs and associate them with the database.
                     semaphore.acquire()
-                    exe.submit(_upload_and_pend_chunk(fileobj, size, checksum, lock))
+                    futures.append(
+                        exe.submit(_upload_and_pend_chunk, fileobj, size, checksum, lock)
+                    )
                     logger.debug("FileBlob.from_files.end", extra={"checksum": reference_checksum})
 
+            # All uploads have finished once the executor shut down
             _flush_blobs()
+            while futures:
+                futures.popleft().result()
         finally:
             for lock in locks:
                 try:
@@ -308,6 +366,21 @@ class FileBlob(Model):
         storage = get_storage()
         return storage.open(self.path)
 
+    def read_range(self, start, length):
+        """
+        Reads `length` bytes starting at `start` from this blob. Uses a
+        ranged request if the storage backend supports it, otherwise seeks in
+        the opened file.
+        """
+        assert self.path
+
+        storage = get_storage()
+        if hasattr(storage, "read_range"):
+            return storage.read_range(self.path, start, length)
+        with storage.open(self.path) as f:
+            f.seek(start)
+            return f.read(length)
+
 
 class File(Model):
     __include_in_export__ = False
@@ -415,43 +488,58 @@ class File(Model):
             self.save()
         return results
 
-    def assemble_from_file_blob_ids(self, file_blob_ids, checksum, commit=True):
+    def assemble_from_file_blob_ids(self, file_blob_ids, checksum, commit=True, as_stream=False):
         """
         This creates a file, from file blobs and returns a temp file with the
         contents.
+
+        Blobs are fetched concurrently ahead of the checksum computation. If
+        `as_stream` is set no temp file is written, and a lazy reader over the
+        assembled file is returned instead.
         """
-        tf = tempfile.NamedTemporaryFile()
-        with atomic_transaction(
-            using=(
-                router.db_for_write(FileBlob),
-                router.db_for_write(FileBlobIndex),
-            )
-        ):
-            file_blobs = FileBlob.objects.filter(id__in=file_blob_ids).all()
+        file_blobs = FileBlob.objects.filter(id__in=file_blob_ids).all()
 
-            # Ensure blobs are in the order and duplication as provided
-            blobs_by_id = {blob.id: blob for blob in file_blobs}
-            file_blobs = [blobs_by_id[blob_id] for blob_id in file_blob_ids]
+        # Ensure blobs are in the order and duplication as provided
+        blobs_by_id = {blob.id: blob for blob in file_blobs}
+        file_blobs = [blobs_by_id[blob_id] for blob_id in file_blob_ids]
 
+        tf = None if as_stream else tempfile.NamedTemporaryFile()
+        try:
             new_checksum = sha1(b"")
-            offset = 0
-            for blob in file_blobs:
-                FileBlobIndex.objects.create(file=self, blob=blob, offset=offset)
-                with blob.getfile() as blobfile:
-                    for chunk in blobfile.chunks():
-                        new_checksum.update(chunk)
-                        tf.write(chunk)
-                offset += blob.size
-
-            self.size = offset
-            self.checksum = new_checksum.hexdigest()
+            with metrics.timer("filestore.assemble.stream"):
+                for contents in _iter_blob_contents(file_blobs):
+                    new_checksum.update(contents)
+                    if tf is not None:
+                        tf.write(contents)
 
+            self.size = sum(blob.size for blob in file_blobs)
+            self.checksum = new_checksum.hexdigest()
             if checksum != self.checksum:
                 raise AssembleChecksumMismatch("Checksum mismatch")
 
-        metrics.timing("filestore.file-size", offset)
+            with atomic_transaction(
+                using=(
+                    router.db_for_write(FileBlob),
+                    router.db_for_write(FileBlobIndex),
+                )
+            ):
+                indexes = []
+                offset = 0
+                for blob in file_blobs:
+                    indexes.append(FileBlobIndex(file=self, blob=blob, offset=offset))
+                    offset += blob.size
+                FileBlobIndex.objects.bulk_create(indexes)
+        except Exception:
+            if tf is not None:
+                tf.close()
+            raise
+
+        metrics.timing("filestore.file-size", self.size)
         if commit:
             self.save()
+
+        if tf is None:
+            return self.getfile()
         tf.flush()
         tf.seek(0)
         return tf
@@ -484,11 +572,26 @@ class FileBlobIndex(Model):
 
 
 class ChunkedFileBlobIndexWrapper:
+    """
+    A read-only file object over the blobs of a `File`.
+
+    Unless the file is prefetched, reads are served with range reads against
+    the blob storage, in pages of `READ_PAGE_SIZE`. Recently read pages are
+    kept in a per-file LRU so that repeated reads of the same region (like a
+    zip central directory) don't hit storage again. Sequential reads grow the
+    read-ahead up to `MAX_READAHEAD_PAGES`, any seek elsewhere resets it.
+    """
+
     def __init__(self, indexes, mode=None, prefetch=False, prefetch_to=None, delete=True):
         # eager load from database incase its a queryset
         self._indexes = list(indexes)
+        self._offsets = [idx.offset for idx in self._indexes]
+        self._size = sum(i.blob.size for i in self._indexes)
         self._curfile = None
-        self._curidx = None
+        self._pos = 0
+        self._pages = OrderedDict()
+        self._readahead = 1
+        self._last_read_end = None
         if prefetch:
             self.prefetched = True
             self._prefetch(prefetch_to, delete)
@@ -512,23 +615,9 @@ class ChunkedFileBlobIndexWrapper:
         rv.seek(0)
         return rv
 
-    def _nextidx(self):
-        assert not self.prefetched, "this makes no sense"
-        old_file = self._curfile
-        try:
-            try:
-                self._curidx = next(self._idxiter)
-                self._curfile = self._curidx.blob.getfile()
-            except StopIteration:
-                self._curidx = None
-                self._curfile = None
-        finally:
-            if old_file is not None:
-                old_file.close()
-
     @property
     def size(self):
-        return sum(i.blob.size for i in self._indexes)
+        return self._size
 
     def open(self):
         self.closed = False
@@ -568,7 +657,7 @@ class ChunkedFileBlobIndexWrapper:
         if self._curfile:
             self._curfile.close()
         self._curfile = None
-        self._curidx = None
+        self._pages.clear()
         self.closed = True
 
     def _seek(self, pos):
@@ -580,19 +669,9 @@ class ChunkedFileBlobIndexWrapper:
 
         if pos < 0:
             raise OSError("Invalid argument")
-        if pos == 0 and not self._indexes:
-            # Empty file, there's no seeking to be done.
-            return
-
-        for n, idx in enumerate(self._indexes[::-1]):
-            if idx.offset <= pos:
-                if idx != self._curidx:
-                    self._idxiter = iter(self._indexes[-(n + 1) :])
-                    self._nextidx()
-                break
-        else:
+        if pos > 0 and not self._indexes:
             raise ValueError("Cannot seek to pos")
-        self._curfile.seek(pos - self._curidx.offset)
+        self._pos = pos
 
     def seek(self, pos, whence=io.SEEK_SET):
         if whence == io.SEEK_SET:
@@ -609,9 +688,7 @@ class ChunkedFileBlobIndexWrapper:
             raise ValueError("I/O operation on closed file")
         if self.prefetched:
             return self._curfile.tell()
-        if self._curfile is None:
-            return self.size
-        return self._curidx.offset + self._curfile.tell()
+        return self._pos
 
     def read(self, n=-1):
         if self.closed:
@@ -620,29 +697,81 @@ class ChunkedFileBlobIndexWrapper:
         if self.prefetched:
             return self._curfile.read(n)
 
-        result = bytearray()
-
-        # Read to the end of the file
-        if n < 0:
-            while self._curfile is not None:
-                blob_result = self._curfile.read(32768)
-                if not blob_result:
-                    self._nextidx()
-                else:
-                    result.extend(blob_result)
+        end = self.size if n < 0 else min(self._pos + n, self.size)
+        if self._pos >= end:
+            return b""
 
-        # Read until a certain number of bytes are read
+        if self._pos == self._last_read_end:
+            self._readahead = min(self._readahead * 2, MAX_READAHEAD_PAGES)
         else:
-            while n > 0 and self._curfile is not None:
-                blob_result = self._curfile.read(min(n, 32768))
-                if not blob_result:
-                    self._nextidx()
-                else:
-                    n -= len(blob_result)
-                    result.extend(blob_result)
+            self._readahead = 1
 
+        result = bytearray()
+        while self._pos < end:
+            idx = self._indexes[bisect_right(self._offsets, self._pos) - 1]
+            blob_end = min(end, idx.offset + idx.blob.size)
+            data = self._read_blob(idx.blob, self._pos - idx.offset, blob_end - self._pos)
+            if not data:
+                break
+            result.extend(data)
+            self._pos += len(data)
+
+        self._last_read_end = self._pos
         return bytes(result)
 
+    def _read_blob(self, blob, offset, length):
+        """
+        Reads `length` bytes at `offset` within `blob`, from cached pages
+        where possible.
+        """
+        result = bytearray()
+        end = offset + length
+        while offset < end:
+            page_no = offset // READ_PAGE_SIZE
+            key = (blob.id, page_no)
+            page = self._pages.get(key)
+            if page is not None:
+                self._pages.move_to_end(key)
+                data_start, data = page_no * READ_PAGE_SIZE, page
+            else:
+                data_start, data = self._fetch_pages(blob, page_no, end)
+
+            chunk = data[offset - data_start : end - data_start]
+            if not chunk:
+                break
+            result.extend(chunk)
+            offset += len(chunk)
+        return result
+
+    def _fetch_pages(self, blob, first_page, end):
+        """
+        Fetches a run of pages starting at `first_page` with a single range
+        read. The run covers at least everything up to `end` and the current
+        read-ahead, but stops short of pages that are already cached.
+
+        Returns the offset of the fetched data within the blob, and the data.
+        """
+        last_page = (blob.size - 1) // READ_PAGE_SIZE
+        wanted = max((end - 1) // READ_PAGE_SIZE, first_page + self._readahead - 1)
+        stop = min(wanted, last_page)
+        for page_no in range(first_page + 1, stop + 1):
+            if (blob.id, page_no) in self._pages:
+                stop = page_no - 1
+                break
+
+        data_start = first_page * READ_PAGE_SIZE
+        data_end = min((stop + 1) * READ_PAGE_SIZE, blob.size)
+        data = blob.read_range(data_start, data_end - data_start)
+
+        for page_no in range(first_page, stop + 1):
+            page_start = (page_no - first_page) * READ_PAGE_SIZE
+            self._pages[(blob.id, page_no)] = data[page_start : page_start + READ_PAGE_SIZE]
+            self._pages.move_to_end((blob.id, page_no))
+        while len(self._pages) > READ_CACHE_PAGES:
+            self._pages.popitem(last=False)
+
+        return data_start, data
+
 
 class FileBlobOwner(Model):
     __include_in_export__ = False
@@ -311,6 +311,7 @@ class GroupManager(BaseManager):
     ) -> None:
         """For each groups, update status to `status` and create an Activity."""
         from sentry.models import Activity
+        from sentry.search.snuba import candidates as search_candidates
 
         updated_count = (
             self.filter(id__in=[g.id for g in groups]).exclude(status=status).update(status=status)
@@ -320,6 +321,9 @@ class GroupManager(BaseManager):
                 Activity.objects.create_group_activity(group, activity_type)
                 record_group_history_from_activity_type(group, activity_type)
 
+            for project_id in {group.project_id for group in groups}:
+                search_candidates.invalidate(project_id)
+
     def from_share_id(self, share_id: str) -> Group:
         if not share_id or len(share_id) != 32:
             raise Group.DoesNotExist
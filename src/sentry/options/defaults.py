@@ -218,6 +218,16 @@ register("snuba.search.chunk-growth-rate", default=1.5)
 register("snuba.search.max-chunk-size", default=2000)
 register("snuba.search.max-total-chunk-time-seconds", default=30.0)
 register("snuba.search.hits-sample-size", default=100)
+# Sizes the first chunk of post-filtered searches from Postgres statistics,
+# queries the next chunk while the current one is post-filtered and samples
+# hits while the page is queried.
+register("snuba.search.pipelined-chunks", type=Bool, default=False)
+# Seconds that the groups matching Postgres-only search filters are cached
+# per project. Zero disables the cache.
+register("snuba.search.candidate-cache-ttl", default=0)
+# Filters that match more groups of a project than this are not cached, and
+# are applied in Postgres instead.
+register("snuba.search.max-cached-candidates", default=10000)
 register("snuba.track-outcomes-sample-rate", default=0.0)
 
 # The percentage of tagkeys that we want to cache. Set to 1.0 in order to cache everything, <=0.0 to stop caching
@@ -297,6 +307,20 @@ register("discover2.max_tags_to_combine", default=3, flags=FLAG_PRIORITIZE_DISK)
 # Enables setting a sampling rate when producing the tag facet.
 register("discover2.tags_facet_enable_sampling", default=True, flags=FLAG_PRIORITIZE_DISK)
 
+# Number of time slices that Discover exports of raw events are split into and
+# exported in parallel. Exports are paginated by offset when this is below 2.
+register("data-export.time-slices", default=0, flags=FLAG_PRIORITIZE_DISK)
+
+# Number of digests that are delivered together by one task, which opens their
+# timelines and fetches their groups and rules in bulk. Digests are delivered
+# one per task when this is below 2.
+register("digests.delivery-batch-size", default=0, flags=FLAG_PRIORITIZE_DISK)
+
+# Write digest records in the msgpack format of `NotificationCodec`. Records in
+# that format can be read once every worker runs a version that decodes it,
+# until then records are written with the pickle codec.
+register("digests.notification-codec-encode", default=False, flags=FLAG_PRIORITIZE_DISK)
+
 # Killswitch for datascrubbing after stacktrace processing. Set to False to
 # disable datascrubbers.
 register("processing.can-use-scrubbers", default=True)
@@ -359,13 +383,23 @@ register("processing.use-release-archives-sample-rate", default=0.0)  # unused
 register("relay.static_auth", default={}, flags=FLAG_NOSTORE)
 
 # Write new kafka headers in eventstream
-register("eventstream:kafka-headers", default=False)
+register("eventstream:kafka-headers", default=False)  # unused
 
 # Post process forwarder options
-# Gets data from Kafka headers
+# Gets data from Kafka headers of messages without a task headers version
 register("post-process-forwarder:kafka-headers", default=False)
 # Number of threads to use for post processing
 register("post-process-forwarder:concurrency", default=1)
+# Let the post process forwarder adjust the number of dispatches it keeps in
+# flight, between these bounds, from the lag of the consumer and the latency
+# of the dispatches. The fixed concurrency above is used otherwise.
+register("post-process-forwarder:adaptive-concurrency", default=False)
+register("post-process-forwarder:min-concurrency", default=1)
+register("post-process-forwarder:max-concurrency", default=16)
+# Seconds of consumer lag above which concurrency is increased.
+register("post-process-forwarder:target-lag", default=5.0)
+# Seconds that a dispatch may take on average before concurrency is decreased.
+register("post-process-forwarder:max-dispatch-latency", default=0.5)
 
 # Subscription queries sampling rate
 register("subscriptions-query.sample-rate", default=0.01)
@@ -387,3 +421,11 @@ register("store.save-transactions-ingest-consumer-rate", default=0.0)
 
 # Drop delete_old_primary_hash messages for a particular project.
 register("reprocessing2.drop-delete-old-primary-hash", default=[])
+
+# Sampling of the comparisons between the sessions and the metrics release health
+# backends that are run by the duplex backend, overall and per backend method.
+register("release-health.duplex.sample-rate", default=1.0)
+register("release-health.duplex.sample-rates", default={})
+# Seconds per minute that the duplex backend may spend on comparisons in each
+# process. Comparisons beyond the budget are dropped.
+register("release-health.duplex.overhead-budget", default=60.0)
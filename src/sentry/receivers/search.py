@@ -0,0 +1,52 @@
+from django.db.models.signals import post_delete, post_save
+
+from sentry.models import (
+    Group,
+    GroupAssignee,
+    GroupBookmark,
+    GroupInbox,
+    GroupOwner,
+    GroupSubscription,
+)
+from sentry.search.snuba.candidates import invalidate
+from sentry.signals import (
+    issue_ignored,
+    issue_mark_reviewed,
+    issue_resolved,
+    issue_unignored,
+    issue_unresolved,
+)
+
+
+def invalidate_search_candidates(instance, **kwargs):
+    invalidate(instance.project_id)
+
+
+for model in (Group, GroupAssignee, GroupBookmark, GroupInbox, GroupOwner, GroupSubscription):
+    post_save.connect(
+        invalidate_search_candidates,
+        sender=model,
+        weak=False,
+        dispatch_uid=f"sentry.search.invalidate_candidates.post_save.{model.__name__}",
+    )
+    post_delete.connect(
+        invalidate_search_candidates,
+        sender=model,
+        weak=False,
+        dispatch_uid=f"sentry.search.invalidate_candidates.post_delete.{model.__name__}",
+    )
+
+
+def invalidate_search_candidates_for_project(project, **kwargs):
+    # Status changes that are made with queryset updates only send these.
+    invalidate(project.id)
+
+
+for signal in (
+    issue_ignored,
+    issue_mark_reviewed,
+    issue_resolved,
+    issue_unignored,
+    issue_unresolved,
+):
+    signal.connect(invalidate_search_candidates_for_project, weak=False)
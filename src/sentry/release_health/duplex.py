@@ -1,7 +1,12 @@
 import collections.abc
+import functools
+import random
+import threading
+import time
 from copy import deepcopy
 from datetime import datetime, timedelta, timezone
 from enum import Enum
+from queue import Full
 from typing import (
     TYPE_CHECKING,
     Any,
@@ -18,10 +23,11 @@ from typing import (
 
 import pytz
 from dateutil import parser
-from sentry_sdk import capture_exception, capture_message, push_scope, set_context, set_tag
+from django.db import close_old_connections
+from sentry_sdk import Hub, capture_exception, capture_message, push_scope, set_context, set_tag
 from typing_extensions import Literal
 
-from sentry import features
+from sentry import features, options
 from sentry.models import Organization, Project
 from sentry.release_health.base import (
     CrashFreeBreakdown,
@@ -47,7 +53,9 @@ from sentry.release_health.metrics import MetricsReleaseHealthBackend
 from sentry.release_health.sessions import SessionsReleaseHealthBackend
 from sentry.snuba.sessions import get_rollup_starts_and_buckets
 from sentry.snuba.sessions_v2 import QueryDefinition
+from sentry.utils.concurrent import ThreadedExecutor
 from sentry.utils.metrics import incr, timer
+from sentry.utils.services import build_instance_from_options
 
 DateLike = Union[datetime, str]
 
@@ -437,16 +445,63 @@ def compare_results(
         return [f"invalid schema type={type(schema)} at path:'{path}'"]
 
 
+class OverheadBudget:
+    """
+    Limits the time spent on comparisons to a number of seconds per window,
+    which is read from the ``release-health.duplex.overhead-budget`` option.
+    """
+
+    def __init__(self, window: int = 60):
+        self.window = window
+        self.lock = threading.Lock()
+        self.window_start = time.monotonic()
+        self.spent = 0.0
+
+    def _roll(self, now: float) -> None:
+        if now - self.window_start >= self.window:
+            self.window_start = now
+            self.spent = 0.0
+
+    def has_budget(self) -> bool:
+        with self.lock:
+            self._roll(time.monotonic())
+            return self.spent < options.get("release-health.duplex.overhead-budget")
+
+    def spend(self, duration: float) -> None:
+        with self.lock:
+            self._roll(time.monotonic())
+            self.spent += duration
+
+
 class DuplexReleaseHealthBackend(ReleaseHealthBackend):
+    """
+    Serves results from the sessions backend, and compares a sample of them
+    with the results of the metrics backend.
+
+    Comparisons run on the `executor`, so that they don't add to the latency
+    of the calls. The default executor has a bounded queue, and comparisons
+    that don't fit into it, or into the overhead budget, are dropped.
+    """
+
     DEFAULT_ROLLUP = 60 * 60  # 1h
 
+    DEFAULT_EXECUTOR = {"options": {"worker_count": 2, "maxsize": 50}}
+
     def __init__(
         self,
         metrics_start: datetime,
+        executor: Optional[Mapping[str, Any]] = None,
     ):
         self.sessions = SessionsReleaseHealthBackend()
         self.metrics = MetricsReleaseHealthBackend()
         self.metrics_start = metrics_start
+        self.executor = build_instance_from_options(
+            executor if executor is not None else self.DEFAULT_EXECUTOR,
+            default_constructor=ThreadedExecutor,
+        )
+        self.overhead_budget = OverheadBudget()
+        # Worker threads outlive requests, along with their connections.
+        self.closes_connections = isinstance(self.executor, ThreadedExecutor)
 
     @staticmethod
     def _org_from_projects(projects_list: Sequence[ProjectOrRelease]) -> Optional[Organization]:
@@ -469,6 +524,11 @@ class DuplexReleaseHealthBackend(ReleaseHealthBackend):
     def _org_from_id(org_id: OrganizationId) -> Organization:
         return Organization.objects.get_from_cache(id=org_id)
 
+    @staticmethod
+    def _get_sample_rate(fn_name: str) -> float:
+        sample_rates = options.get("release-health.duplex.sample-rates")
+        return float(sample_rates.get(fn_name, options.get("release-health.duplex.sample-rate")))
+
     def _dispatch_call_inner(
         self,
         fn_name: str,
@@ -495,13 +555,6 @@ class DuplexReleaseHealthBackend(ReleaseHealthBackend):
         ):
             return ret_val  # cannot check feature without organization
 
-        set_context(
-            "release-health-duplex-sessions",
-            {
-                "sessions": ret_val,
-            },
-        )
-
         try:
             if not isinstance(should_compare, bool):
                 # should compare depends on the session result
@@ -517,31 +570,33 @@ class DuplexReleaseHealthBackend(ReleaseHealthBackend):
             if not should_compare:
                 return ret_val
 
-            copy = deepcopy(ret_val)
-
-            metrics_fn = getattr(self.metrics, fn_name)
-            with timer("releasehealth.metrics.duration", tags=tags, sample_rate=1.0):
-                metrics_val = metrics_fn(*args)
-
-            set_context("release-health-duplex-metrics", {"metrics": metrics_val})
-
-            with timer("releasehealth.results-diff.duration", tags=tags, sample_rate=1.0):
-                errors = compare_results(copy, metrics_val, rollup, None, schema)
+            if random.random() >= self._get_sample_rate(fn_name):
+                incr("releasehealth.duplex.skipped", tags={"reason": "sampled", **tags})
+                return ret_val
 
-            set_context("release-health-duplex-errors", {"errors": errors})
+            if not self.overhead_budget.has_budget():
+                incr("releasehealth.duplex.skipped", tags={"reason": "budget", **tags})
+                return ret_val
 
-            incr(
-                "releasehealth.metrics.compare",
-                tags={"has_errors": str(bool(errors)), **tags},
-                sample_rate=1.0,
+            # The caller may change the result before it's compared.
+            copy = deepcopy(ret_val)
+            future = self.executor.submit(
+                functools.partial(
+                    self._compare,
+                    Hub(Hub.current),
+                    fn_name,
+                    rollup,
+                    schema,
+                    tags,
+                    copy,
+                    *args,
+                ),
+                block=False,
             )
-
-            if errors:
-                # We heavily rely on Sentry's message sanitization to properly deduplicate this
-                capture_message(f"{fn_name} - Release health metrics mismatch: {errors[0]}")
+            if future.done() and isinstance(future.exception(), Full):
+                incr("releasehealth.duplex.skipped", tags={"reason": "queue_full", **tags})
         except Exception:
             capture_exception()
-            should_compare = False
             incr(
                 "releasehealth.metrics.crashed",
                 tags=tags,
@@ -550,6 +605,61 @@ class DuplexReleaseHealthBackend(ReleaseHealthBackend):
 
         return ret_val
 
+    def _compare(
+        self,
+        hub: Hub,
+        fn_name: str,
+        rollup: int,
+        schema: Optional[Schema],
+        tags: Mapping[str, str],
+        sessions_val: ReleaseHealthResult,
+        *args: Any,
+    ) -> None:
+        """
+        Compares `sessions_val` with the result of the metrics backend.
+        """
+        start = time.monotonic()
+        with hub, push_scope():
+            if self.closes_connections:
+                close_old_connections()
+            try:
+                set_context(
+                    "release-health-duplex-sessions",
+                    {
+                        "sessions": sessions_val,
+                    },
+                )
+
+                metrics_fn = getattr(self.metrics, fn_name)
+                with timer("releasehealth.metrics.duration", tags=tags, sample_rate=1.0):
+                    metrics_val = metrics_fn(*args)
+
+                set_context("release-health-duplex-metrics", {"metrics": metrics_val})
+
+                with timer("releasehealth.results-diff.duration", tags=tags, sample_rate=1.0):
+                    errors = compare_results(sessions_val, metrics_val, rollup, None, schema)
+
+                set_context("release-health-duplex-errors", {"errors": errors})
+
+                incr(
+                    "releasehealth.metrics.compare",
+                    tags={"has_errors": str(bool(errors)), **tags},
+                    sample_rate=1.0,
+                )
+
+                if errors:
+                    # We heavily rely on Sentry's message sanitization to properly deduplicate this
+                    capture_message(f"{fn_name} - Release health metrics mismatch: {errors[0]}")
+            except Exception:
+                capture_exception()
+                incr(
+                    "releasehealth.metrics.crashed",
+                    tags=tags,
+                    sample_rate=1.0,
+                )
+            finally:
+                self.overhead_budget.spend(time.monotonic() - start)
+
     if TYPE_CHECKING:
         # Mypy is not smart enough to figure out _dispatch_call is a wrapper
         # around _dispatch_call_inner with the same exact signature, and I am
@@ -1,6 +1,8 @@
 import itertools
 import logging
+import threading
 from collections import defaultdict
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from operator import itemgetter
 from typing import (
@@ -8,6 +10,8 @@ from typing import (
     Callable,
     DefaultDict,
     Dict,
+    Iterable,
+    Iterator,
     List,
     Mapping,
     MutableMapping,
@@ -56,10 +60,26 @@ from sentry.snuba.dataset import Dataset, EntityKey
 from sentry.snuba.sessions import _make_stats, get_rollup_starts_and_buckets, parse_snuba_datetime
 from sentry.snuba.sessions_v2 import QueryDefinition
 from sentry.utils.dates import to_datetime, to_timestamp
-from sentry.utils.snuba import QueryOutsideRetentionError, raw_snql_query
+from sentry.utils.snuba import QueryOutsideRetentionError, bulk_snql_query, raw_snql_query
 
 SMALLEST_METRICS_BUCKET = 10
 
+# Metric names, tag keys and tag values used by the release health overview.
+OVERVIEW_STRINGS = (
+    "session",
+    "session.duration",
+    "session.error",
+    "user",
+    "release",
+    "environment",
+    "session.status",
+    "init",
+    "crashed",
+    "abnormal",
+    "errored_preaggr",
+    "exited",
+)
+
 
 logger = logging.getLogger(__name__)
 
@@ -68,6 +88,12 @@ class MetricIndexNotFound(Exception):
     pass
 
 
+_prefetched = threading.local()
+
+# A query of the release health overview, its referrer and the parser of its
+# result rows.
+OverviewQuery = Tuple[Query, str, Callable[[Sequence[Mapping[str, Any]]], Any]]
+
 _K1 = TypeVar("_K1")
 _K2 = TypeVar("_K2")
 _V = TypeVar("_V")
@@ -77,32 +103,42 @@ def get_tag_values_list(org_id: int, values: Sequence[str]) -> Sequence[int]:
     return [x for x in [try_get_string_index(org_id, x) for x in values] if x is not None]
 
 
+def _resolve(name: str) -> Optional[int]:
+    resolved = getattr(_prefetched, "indexes", None)
+    if resolved is not None and name in resolved:
+        return resolved[name]  # type: ignore
+    return indexer.resolve(name)  # type: ignore
+
+
 def metric_id(org_id: int, name: str) -> int:
-    index = indexer.resolve(name)  # type: ignore
+    index = _resolve(name)
     if index is None:
         raise MetricIndexNotFound(name)
-    return index  # type: ignore
+    return index
 
 
 def tag_key(org_id: int, name: str) -> str:
-    index = indexer.resolve(name)  # type: ignore
+    index = _resolve(name)
     if index is None:
         raise MetricIndexNotFound(name)
     return f"tags[{index}]"
 
 
 def tag_value(org_id: int, name: str) -> int:
-    index = indexer.resolve(name)  # type: ignore
+    index = _resolve(name)
     if index is None:
         raise MetricIndexNotFound(name)
-    return index  # type: ignore
+    return index
 
 
 def try_get_string_index(org_id: int, name: str) -> Optional[int]:
-    return indexer.resolve(name)  # type: ignore
+    return _resolve(name)
 
 
 def reverse_tag_value(org_id: int, index: int) -> str:
+    strings = getattr(_prefetched, "strings", None)
+    if strings is not None and index in strings:
+        return strings[index]  # type: ignore
     str_value = indexer.reverse_resolve(index)  # type: ignore
     # If the value can't be reversed it's very likely a real programming bug
     # instead of something to be caught down: We probably got back a value from
@@ -111,6 +147,57 @@ def reverse_tag_value(org_id: int, index: int) -> str:
     return str_value  # type: ignore
 
 
+@contextmanager
+def prefetched_indexes(org_id: int, strings: Iterable[str]) -> Iterator[None]:
+    """
+    Resolves `strings` with a single indexer lookup, and answers lookups of
+    them from the result within the block, along with those of indexes that
+    are passed to `prefetch_strings`.
+    """
+    strings = set(strings)
+    indexes: Dict[str, Optional[int]] = dict.fromkeys(strings)
+    indexes.update(indexer.bulk_resolve(strings))  # type: ignore
+
+    previous = getattr(_prefetched, "indexes", None), getattr(_prefetched, "strings", None)
+    _prefetched.indexes = indexes
+    _prefetched.strings = {index: string for string, index in indexes.items() if index is not None}
+    try:
+        yield
+    finally:
+        _prefetched.indexes, _prefetched.strings = previous
+
+
+def prefetch_strings(org_id: int, indexes: Iterable[int]) -> None:
+    """
+    Reverse resolves `indexes` with a single indexer lookup, so that
+    `reverse_tag_value` doesn't look them up one by one.
+    """
+    strings = getattr(_prefetched, "strings", None)
+    if strings is None:
+        return
+    missing = set(indexes).difference(strings)
+    if missing:
+        strings.update(indexer.bulk_reverse_resolve(missing))  # type: ignore
+
+
+def run_overview_queries(queries: Sequence[OverviewQuery]) -> List[Sequence[Mapping[str, Any]]]:
+    """
+    Runs the queries of the release health overview and returns their result
+    rows in order. Queries are batched by referrer, so that each keeps its own
+    attribution in Snuba.
+    """
+    by_referrer: DefaultDict[str, List[int]] = defaultdict(list)
+    for index, (_, referrer, _) in enumerate(queries):
+        by_referrer[referrer].append(index)
+
+    rows_list: List[Sequence[Mapping[str, Any]]] = [[] for _ in queries]
+    for referrer, indexes in by_referrer.items():
+        results = bulk_snql_query([queries[index][0] for index in indexes], referrer=referrer)
+        for index, result in zip(indexes, results):
+            rows_list[index] = result["data"]
+    return rows_list
+
+
 def filter_projects_by_project_release(project_releases: Sequence[ProjectRelease]) -> Condition:
     return Condition(Column("project_id"), Op.IN, list(x for x, _ in project_releases))
 
@@ -669,146 +756,154 @@ class MetricsReleaseHealthBackend(ReleaseHealthBackend):
         return {extract_row_info(row) for row in result["data"]}
 
     @staticmethod
-    def _get_session_duration_data_for_overview(
+    def _get_session_duration_query_for_overview(
         where: List[Condition],
         org_id: int,
         rollup: int,
-    ) -> Mapping[Tuple[int, str], Any]:
+    ) -> OverviewQuery:
         """
         Percentiles of session duration
         """
-        rv_durations: Dict[Tuple[int, str], Any] = {}
-
         release_column_name = tag_key(org_id, "release")
         aggregates: List[SelectableExpression] = [
             Column(release_column_name),
             Column("project_id"),
         ]
 
-        for row in raw_snql_query(
-            Query(
-                dataset=Dataset.Metrics.value,
-                match=Entity(EntityKey.MetricsDistributions.value),
-                select=aggregates
-                + [
-                    Function(
-                        alias="percentiles",
-                        function="quantiles(0.5,0.9)",
-                        parameters=[Column("value")],
-                    )
-                ],
-                where=where
-                + [
-                    Condition(Column("metric_id"), Op.EQ, metric_id(org_id, "session.duration")),
-                    Condition(
-                        Column(tag_key(org_id, "session.status")),
-                        Op.EQ,
-                        tag_value(org_id, "exited"),
-                    ),
-                ],
-                groupby=aggregates,
-                granularity=Granularity(rollup),
-            ),
-            referrer="release_health.metrics.get_session_duration_data_for_overview",
-        )["data"]:
-            # See https://github.com/getsentry/snuba/blob/8680523617e06979427bfa18c6b4b4e8bf86130f/snuba/datasets/entities/metrics.py#L184 for quantiles
-            key = (row["project_id"], reverse_tag_value(org_id, row[release_column_name]))
-            rv_durations[key] = {
-                "duration_p50": row["percentiles"][0],
-                "duration_p90": row["percentiles"][1],
-            }
-
-        return rv_durations
-
-    @staticmethod
-    def _get_errored_sessions_for_overview(
-        where: List[Condition],
-        org_id: int,
-        rollup: int,
-    ) -> Mapping[Tuple[int, str], int]:
-        """
-        Count of errored sessions, incl fatal (abnormal, crashed) sessions,
-        excl errored *preaggregated* sessions
-        """
-        rv_errored_sessions: Dict[Tuple[int, str], int] = {}
-
-        release_column_name = tag_key(org_id, "release")
-        aggregates: List[SelectableExpression] = [
-            Column(release_column_name),
-            Column("project_id"),
-        ]
+        query = Query(
+            dataset=Dataset.Metrics.value,
+            match=Entity(EntityKey.MetricsDistributions.value),
+            select=aggregates
+            + [
+                Function(
+                    alias="percentiles",
+                    function="quantiles(0.5,0.9)",
+                    parameters=[Column("value")],
+                )
+            ],
+            where=where
+            + [
+                Condition(Column("metric_id"), Op.EQ, metric_id(org_id, "session.duration")),
+                Condition(
+                    Column(tag_key(org_id, "session.status")),
+                    Op.EQ,
+                    tag_value(org_id, "exited"),
+                ),
+            ],
+            groupby=aggregates,
+            granularity=Granularity(rollup),
+        )
 
-        for row in raw_snql_query(
-            Query(
-                dataset=Dataset.Metrics.value,
-                match=Entity(EntityKey.MetricsSets.value),
-                select=aggregates + [Function("uniq", [Column("value")], "value")],
-                where=where
-                + [
-                    Condition(Column("metric_id"), Op.EQ, metric_id(org_id, "session.error")),
-                ],
-                groupby=aggregates,
-                granularity=Granularity(rollup),
-            ),
-            referrer="release_health.metrics.get_errored_sessions_for_overview",
-        )["data"]:
-            key = row["project_id"], reverse_tag_value(org_id, row[release_column_name])
-            rv_errored_sessions[key] = row["value"]
+        def parse(rows: Sequence[Mapping[str, Any]]) -> Mapping[Tuple[int, str], Any]:
+            rv_durations: Dict[Tuple[int, str], Any] = {}
+            for row in rows:
+                # See https://github.com/getsentry/snuba/blob/8680523617e06979427bfa18c6b4b4e8bf86130f/snuba/datasets/entities/metrics.py#L184 for quantiles
+                key = (row["project_id"], reverse_tag_value(org_id, row[release_column_name]))
+                rv_durations[key] = {
+                    "duration_p50": row["percentiles"][0],
+                    "duration_p90": row["percentiles"][1],
+                }
+            return rv_durations
 
-        return rv_errored_sessions
+        return query, "release_health.metrics.get_session_duration_data_for_overview", parse
 
     @staticmethod
-    def _get_session_by_status_for_overview(
+    def _get_errored_sessions_and_users_query_for_overview(
         where: List[Condition], org_id: int, rollup: int
-    ) -> Mapping[Tuple[int, str, str], int]:
+    ) -> OverviewQuery:
         """
-        Counts of init, abnormal and crashed sessions, purpose-built for overview
+        Count of errored sessions, incl fatal (abnormal, crashed) sessions,
+        excl errored *preaggregated* sessions, along with the count of users
+        and crashed users.
+
+        Both are counted on the sets entity, so they're selected by one query
+        with conditional aggregates.
         """
         release_column_name = tag_key(org_id, "release")
         session_status_column_name = tag_key(org_id, "session.status")
+        session_error_metric_id = metric_id(org_id, "session.error")
+        user_metric_id = metric_id(org_id, "user")
 
         aggregates: List[SelectableExpression] = [
             Column(release_column_name),
             Column("project_id"),
-            Column(session_status_column_name),
         ]
 
-        rv_sessions: Dict[Tuple[int, str, str], int] = {}
-
-        for row in raw_snql_query(
-            Query(
-                dataset=Dataset.Metrics.value,
-                match=Entity(EntityKey.MetricsCounters.value),
-                select=aggregates + [Function("sum", [Column("value")], "value")],
-                where=where
-                + [
-                    Condition(Column("metric_id"), Op.EQ, metric_id(org_id, "session")),
-                    Condition(
-                        Column(session_status_column_name),
-                        Op.IN,
-                        get_tag_values_list(
-                            org_id, ["abnormal", "crashed", "init", "errored_preaggr"]
-                        ),
-                    ),
+        select = aggregates + [
+            Function(
+                "uniqIf",
+                [
+                    Column("value"),
+                    Function("equals", [Column("metric_id"), session_error_metric_id]),
                 ],
-                groupby=aggregates,
-                granularity=Granularity(rollup),
-            ),
-            referrer="release_health.metrics.get_abnormal_and_crashed_sessions_for_overview",
-        )["data"]:
-            key = (
-                row["project_id"],
-                reverse_tag_value(org_id, row[release_column_name]),
-                reverse_tag_value(org_id, row[session_status_column_name]),
+                "errored_sessions",
             )
-            rv_sessions[key] = row["value"]
+        ]
+        # Statuses that were never indexed have no users.
+        user_statuses = [
+            (status, index)
+            for status, index in (
+                ("init", try_get_string_index(org_id, "init")),
+                ("crashed", try_get_string_index(org_id, "crashed")),
+            )
+            if index is not None
+        ]
+        for status, index in user_statuses:
+            select.append(
+                Function(
+                    "uniqIf",
+                    [
+                        Column("value"),
+                        Function(
+                            "and",
+                            [
+                                Function("equals", [Column("metric_id"), user_metric_id]),
+                                Function("equals", [Column(session_status_column_name), index]),
+                            ],
+                        ),
+                    ],
+                    f"users_{status}",
+                )
+            )
+
+        query = Query(
+            dataset=Dataset.Metrics.value,
+            match=Entity(EntityKey.MetricsSets.value),
+            select=select,
+            where=where
+            + [
+                Condition(Column("metric_id"), Op.IN, [session_error_metric_id, user_metric_id]),
+            ],
+            groupby=aggregates,
+            granularity=Granularity(rollup),
+        )
 
-        return rv_sessions
+        def parse(
+            rows: Sequence[Mapping[str, Any]]
+        ) -> Tuple[Mapping[Tuple[int, str], int], Mapping[Tuple[int, str, str], int]]:
+            rv_errored_sessions: Dict[Tuple[int, str], int] = {}
+            rv_users: Dict[Tuple[int, str, str], int] = {}
+            for row in rows:
+                project_id = row["project_id"]
+                release = reverse_tag_value(org_id, row[release_column_name])
+                # Groups without any value of a metric are left out, as if
+                # they had been counted by a query of their own.
+                if row["errored_sessions"]:
+                    rv_errored_sessions[project_id, release] = row["errored_sessions"]
+                for status, _ in user_statuses:
+                    if row[f"users_{status}"]:
+                        rv_users[project_id, release, status] = row[f"users_{status}"]
+            return rv_errored_sessions, rv_users
+
+        return query, "release_health.metrics.get_errored_sessions_and_users_for_overview", parse
 
     @staticmethod
-    def _get_users_and_crashed_users_for_overview(
+    def _get_session_by_status_query_for_overview(
         where: List[Condition], org_id: int, rollup: int
-    ) -> Mapping[Tuple[int, str, str], int]:
+    ) -> OverviewQuery:
+        """
+        Counts of init, abnormal and crashed sessions, purpose-built for overview
+        """
         release_column_name = tag_key(org_id, "release")
         session_status_column_name = tag_key(org_id, "session.status")
 
@@ -818,48 +913,44 @@ class MetricsReleaseHealthBackend(ReleaseHealthBackend):
             Column(session_status_column_name),
         ]
 
-        # Count of users and crashed users
-        rv_users: Dict[Tuple[int, str, str], int] = {}
-
-        # Avoid mutating input parameters here
-        select = aggregates + [Function("uniq", [Column("value")], "value")]
-        where = where + [
-            Condition(Column("metric_id"), Op.EQ, metric_id(org_id, "user")),
-            Condition(
-                Column(session_status_column_name),
-                Op.IN,
-                get_tag_values_list(org_id, ["crashed", "init"]),
-            ),
-        ]
+        query = Query(
+            dataset=Dataset.Metrics.value,
+            match=Entity(EntityKey.MetricsCounters.value),
+            select=aggregates + [Function("sum", [Column("value")], "value")],
+            where=where
+            + [
+                Condition(Column("metric_id"), Op.EQ, metric_id(org_id, "session")),
+                Condition(
+                    Column(session_status_column_name),
+                    Op.IN,
+                    get_tag_values_list(org_id, ["abnormal", "crashed", "init", "errored_preaggr"]),
+                ),
+            ],
+            groupby=aggregates,
+            granularity=Granularity(rollup),
+        )
 
-        for row in raw_snql_query(
-            Query(
-                dataset=Dataset.Metrics.value,
-                match=Entity(EntityKey.MetricsSets.value),
-                select=select,
-                where=where,
-                groupby=aggregates,
-                granularity=Granularity(rollup),
-            ),
-            referrer="release_health.metrics.get_users_and_crashed_users_for_overview",
-        )["data"]:
-            key = (
-                row["project_id"],
-                reverse_tag_value(org_id, row[release_column_name]),
-                reverse_tag_value(org_id, row[session_status_column_name]),
-            )
-            rv_users[key] = row["value"]
+        def parse(rows: Sequence[Mapping[str, Any]]) -> Mapping[Tuple[int, str, str], int]:
+            rv_sessions: Dict[Tuple[int, str, str], int] = {}
+            for row in rows:
+                key = (
+                    row["project_id"],
+                    reverse_tag_value(org_id, row[release_column_name]),
+                    reverse_tag_value(org_id, row[session_status_column_name]),
+                )
+                rv_sessions[key] = row["value"]
+            return rv_sessions
 
-        return rv_users
+        return query, "release_health.metrics.get_abnormal_and_crashed_sessions_for_overview", parse
 
     @staticmethod
-    def _get_health_stats_for_overview(
+    def _get_health_stats_query_for_overview(
         where: List[Condition],
         org_id: int,
         health_stats_period: StatsPeriod,
         stat: OverviewStat,
         now: datetime,
-    ) -> Mapping[ProjectRelease, List[List[int]]]:
+    ) -> OverviewQuery:
         release_column_name = tag_key(org_id, "release")
         session_status_column_name = tag_key(org_id, "session.status")
         session_init_tag_value = tag_value(org_id, "init")
@@ -874,8 +965,6 @@ class MetricsReleaseHealthBackend(ReleaseHealthBackend):
             Column("bucketed_time"),
         ]
 
-        rv: Dict[ProjectRelease, List[List[int]]] = defaultdict(lambda: _make_stats(stats_start, stats_rollup, stats_buckets))  # type: ignore
-
         entity = {
             "users": EntityKey.MetricsSets.value,
             "sessions": EntityKey.MetricsCounters.value,
@@ -888,37 +977,39 @@ class MetricsReleaseHealthBackend(ReleaseHealthBackend):
 
         metric_name = metric_id(org_id, {"sessions": "session", "users": "user"}[stat])
 
-        for row in raw_snql_query(
-            Query(
-                dataset=Dataset.Metrics.value,
-                match=Entity(entity),
-                select=aggregates + [value_column],
-                where=where
-                + [
-                    Condition(Column("metric_id"), Op.EQ, metric_name),
-                    Condition(Column("timestamp"), Op.GTE, stats_start),
-                    Condition(Column("timestamp"), Op.LT, now),
-                    Condition(
-                        Column(session_status_column_name),
-                        Op.EQ,
-                        session_init_tag_value,
-                    ),
-                ],
-                granularity=Granularity(stats_rollup),
-                groupby=aggregates,
-            ),
-            referrer="release_health.metrics.get_health_stats_for_overview",
-        )["data"]:
-            time_bucket = int(
-                (parse_snuba_datetime(row["bucketed_time"]) - stats_start).total_seconds()
-                / stats_rollup
-            )
-            key = row["project_id"], reverse_tag_value(org_id, row[release_column_name])
-            timeseries = rv[key]
-            if time_bucket < len(timeseries):
-                timeseries[time_bucket][1] = row["value"]
+        query = Query(
+            dataset=Dataset.Metrics.value,
+            match=Entity(entity),
+            select=aggregates + [value_column],
+            where=where
+            + [
+                Condition(Column("metric_id"), Op.EQ, metric_name),
+                Condition(Column("timestamp"), Op.GTE, stats_start),
+                Condition(Column("timestamp"), Op.LT, now),
+                Condition(
+                    Column(session_status_column_name),
+                    Op.EQ,
+                    session_init_tag_value,
+                ),
+            ],
+            granularity=Granularity(stats_rollup),
+            groupby=aggregates,
+        )
 
-        return rv
+        def parse(rows: Sequence[Mapping[str, Any]]) -> Mapping[ProjectRelease, List[List[int]]]:
+            rv: Dict[ProjectRelease, List[List[int]]] = defaultdict(lambda: _make_stats(stats_start, stats_rollup, stats_buckets))  # type: ignore
+            for row in rows:
+                time_bucket = int(
+                    (parse_snuba_datetime(row["bucketed_time"]) - stats_start).total_seconds()
+                    / stats_rollup
+                )
+                key = row["project_id"], reverse_tag_value(org_id, row[release_column_name])
+                timeseries = rv[key]
+                if time_bucket < len(timeseries):
+                    timeseries[time_bucket][1] = row["value"]
+            return rv
+
+        return query, "release_health.metrics.get_health_stats_for_overview", parse
 
     def get_release_health_data_overview(
         self,
@@ -931,11 +1022,36 @@ class MetricsReleaseHealthBackend(ReleaseHealthBackend):
         if stat is None:
             stat = "sessions"
         assert stat in ("sessions", "users")
-        now = datetime.now(pytz.utc)
-        rollup, summary_start, _ = get_rollup_starts_and_buckets(summary_stats_period or "24h")
 
         org_id = self._get_org_id([x for x, _ in project_releases])
 
+        # All the strings the overview looks up, releases and environments
+        # included, are resolved at once.
+        strings = set(OVERVIEW_STRINGS)
+        strings.update(release for _, release in project_releases)
+        strings.update(environments or ())
+        with prefetched_indexes(org_id, strings):
+            return self._get_release_health_data_overview_impl(
+                org_id,
+                project_releases,
+                environments,
+                summary_stats_period,
+                health_stats_period,
+                stat,
+            )
+
+    def _get_release_health_data_overview_impl(
+        self,
+        org_id: int,
+        project_releases: Sequence[ProjectRelease],
+        environments: Optional[Sequence[EnvironmentName]],
+        summary_stats_period: Optional[StatsPeriod],
+        health_stats_period: Optional[StatsPeriod],
+        stat: OverviewStat,
+    ) -> Mapping[ProjectRelease, ReleaseHealthOverview]:
+        now = datetime.now(pytz.utc)
+        rollup, summary_start, _ = get_rollup_starts_and_buckets(summary_stats_period or "24h")
+
         where: List[Condition] = [
             Condition(Column("org_id"), Op.EQ, org_id),
             filter_projects_by_project_release(project_releases),
@@ -952,23 +1068,41 @@ class MetricsReleaseHealthBackend(ReleaseHealthBackend):
                 )
             )
 
+        # The queries are independent of each other, so they are planned up
+        # front and sent to Snuba in bulk, see `run_overview_queries`.
+        overview_queries = [
+            self._get_session_duration_query_for_overview(where, org_id, rollup),
+            self._get_errored_sessions_and_users_query_for_overview(where, org_id, rollup),
+            self._get_session_by_status_query_for_overview(where, org_id, rollup),
+        ]
         if health_stats_period:
-            health_stats_data = self._get_health_stats_for_overview(
-                where, org_id, health_stats_period, stat, now
+            overview_queries.append(
+                self._get_health_stats_query_for_overview(
+                    where, org_id, health_stats_period, stat, now
+                )
             )
-        else:
-            health_stats_data = {}
 
-        rv_durations = self._get_session_duration_data_for_overview(where, org_id, rollup)
-        rv_errored_sessions = self._get_errored_sessions_for_overview(where, org_id, rollup)
-        rv_sessions = self._get_session_by_status_for_overview(where, org_id, rollup)
-        rv_users = self._get_users_and_crashed_users_for_overview(where, org_id, rollup)
+        rows_list = run_overview_queries(overview_queries)
+        prefetch_strings(
+            org_id,
+            (
+                value
+                for rows in rows_list
+                for row in rows
+                for key, value in row.items()
+                if key.startswith("tags[")
+            ),
+        )
+        parsed = [parse(rows) for (_, _, parse), rows in zip(overview_queries, rows_list)]
+
+        rv_durations, (rv_errored_sessions, rv_users), rv_sessions = parsed[:3]
+        health_stats_data = parsed[3] if health_stats_period else {}
 
         # XXX: In order to be able to dual-read and compare results from both
         # old and new backend, this should really go back through the
         # release_health service instead of directly calling `self`. For now
         # that makes the entire backend too hard to test though.
-        release_adoption = self.get_release_adoption(project_releases, environments)
+        release_adoption = self.get_release_adoption(project_releases, environments, org_id=org_id)
 
         rv: Dict[ProjectRelease, ReleaseHealthOverview] = {}
 
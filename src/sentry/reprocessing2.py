@@ -20,6 +20,11 @@ How reprocessing works
    preprocess_event. The event payload is taken from a backup that was made on
    first ingestion in preprocess_event.
 
+   The events are split into time slices (`plan_group_reprocessing`) that are
+   iterated through in parallel, one page at a time. After each page, a slice
+   stores the position it reached as its checkpoint in Redis. At most
+   SENTRY_REPROCESSING_MAX_CONCURRENT_SLICES slices run at the same time.
+
 3. wait_group_reprocessed in sentry.tasks.reprocessing2 polls a counter in
    Redis to see if reprocessing is done. When it reaches zero, all associated
    models like assignee and activity are moved into the new group.
@@ -79,10 +84,11 @@ instead of group deletion is:
 
 import hashlib
 import logging
+import time
 import uuid
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Any, Dict, List, Literal, Tuple, Union
+from typing import Any, Dict, List, Literal, Mapping, Optional, Sequence, Tuple, Union
 
 import redis
 import sentry_sdk
@@ -451,6 +457,150 @@ def _get_info_reprocessed_key(group_id):
     return f"re2:info:{group_id}"
 
 
+def _get_pending_reprocessed_key(group_id):
+    return f"re2:pending:{group_id}"
+
+
+def _get_slice_keys(group_id):
+    """
+    Returns the keys of the checkpoints of the slices that are still
+    reprocessing, and of the number of those slices.
+    """
+    return f"re2:slices:{group_id}", f"re2:slice-count:{group_id}"
+
+
+# Sorted set of the slices that are reprocessing right now, across all groups,
+# scored by when their lease expires.
+SLICE_LEASES_KEY = "re2:slice-leases"
+
+# Matches the time limit of `reprocess_group_slice`, after which a lease
+# can't be held anymore.
+SLICE_LEASE_TTL = 120
+
+
+def plan_group_reprocessing(
+    project_id: int, group_id: int, max_events: Optional[int] = None
+) -> Tuple[Sequence[Tuple[int, int]], Optional[Tuple[float, str]]]:
+    """
+    Splits the events of a group into up to SENTRY_REPROCESSING_TIME_SLICES
+    time slices of whole seconds.
+
+    Returns the `(start, end)` timestamps of the slices, and the cutoff
+    `(timestamp, event_id)` of the oldest event to reprocess if only the
+    newest `max_events` events are reprocessed. Older events are handled as
+    remaining events.
+    """
+
+    def get_event(orderby, offset=0):
+        events = eventstore.get_unfetched_events(
+            filter=eventstore.Filter(project_ids=[project_id], group_ids=[group_id]),
+            orderby=orderby,
+            limit=1,
+            offset=offset,
+            referrer="reprocessing2.plan_group_reprocessing",
+        )
+        return events[0] if events else None
+
+    newest = get_event(["-timestamp", "-event_id"])
+    if newest is None:
+        return [], None
+
+    oldest = get_event(["timestamp", "event_id"])
+    start = int(to_timestamp(oldest.datetime))
+    end = int(to_timestamp(newest.datetime)) + 1
+
+    cutoff = None
+    if max_events is not None and max_events <= 0:
+        cutoff = (float(end), "")
+    elif max_events is not None:
+        event = get_event(["-timestamp", "-event_id"], offset=max_events - 1)
+        if event is not None:
+            cutoff = (to_timestamp(event.datetime), event.event_id)
+
+    slice_count = max(1, min(settings.SENTRY_REPROCESSING_TIME_SLICES, end - start))
+    bounds = [start + (end - start) * i // slice_count for i in range(slice_count + 1)]
+    return list(zip(bounds, bounds[1:])), cutoff
+
+
+def start_reprocessing_slices(group_id: int, slices: Sequence[Tuple[int, int]]) -> None:
+    """
+    Stores the initial checkpoint of each slice of a group.
+    """
+    if not slices:
+        return
+
+    client = _get_sync_redis_client()
+    slices_key, count_key = _get_slice_keys(group_id)
+    client.delete(slices_key)
+    client.hmset(
+        slices_key,
+        {
+            slice_index: json.dumps({"start": start, "end": end, "query_state": None})
+            for slice_index, (start, end) in enumerate(slices)
+        },
+    )
+    client.expire(slices_key, settings.SENTRY_REPROCESSING_SYNC_TTL)
+    client.setex(count_key, settings.SENTRY_REPROCESSING_SYNC_TTL, len(slices))
+
+
+def get_slice_checkpoint(group_id: int, slice_index: int) -> Optional[Mapping[str, Any]]:
+    """
+    Returns the checkpoint of a slice, or None if the slice is finished.
+    """
+    slices_key, _ = _get_slice_keys(group_id)
+    checkpoint = _get_sync_redis_client().hget(slices_key, slice_index)
+    return json.loads(checkpoint) if checkpoint is not None else None
+
+
+def save_slice_checkpoint(group_id: int, slice_index: int, checkpoint: Mapping[str, Any]) -> None:
+    slices_key, _ = _get_slice_keys(group_id)
+    _get_sync_redis_client().hset(slices_key, slice_index, json.dumps(checkpoint))
+
+
+def finish_reprocessing_slice(group_id: int, slice_index: int) -> bool:
+    """
+    Removes the checkpoint of a finished slice. Returns True for the last
+    slice of the group to finish.
+    """
+    client = _get_sync_redis_client()
+    slices_key, count_key = _get_slice_keys(group_id)
+    return bool(client.hdel(slices_key, slice_index)) and client.decr(count_key) == 0
+
+
+def acquire_reprocessing_slot(lease: str) -> bool:
+    """
+    Takes one of the SENTRY_REPROCESSING_MAX_CONCURRENT_SLICES slots that are
+    shared by all reprocessing groups. Returns False if all of them are taken.
+    """
+    client = _get_sync_redis_client()
+    now = time.time()
+    # Drop the leases of runs that were killed before releasing them.
+    client.zremrangebyscore(SLICE_LEASES_KEY, "-inf", now)
+    client.zadd(SLICE_LEASES_KEY, {lease: now + SLICE_LEASE_TTL})
+    if client.zcard(SLICE_LEASES_KEY) > settings.SENTRY_REPROCESSING_MAX_CONCURRENT_SLICES:
+        client.zrem(SLICE_LEASES_KEY, lease)
+        return False
+
+    return True
+
+
+def release_reprocessing_slot(lease: str) -> None:
+    _get_sync_redis_client().zrem(SLICE_LEASES_KEY, lease)
+
+
+def decrement_pending_events(group_id: int, num_events: int = 1) -> None:
+    """
+    Counts events that were selected for reprocessing as done, see
+    `get_progress`.
+    """
+    client = _get_sync_redis_client()
+    key = _get_pending_reprocessed_key(group_id)
+    # Groups that started reprocessing before events were counted this way
+    # don't have the key, don't create it without a TTL.
+    if client.exists(key):
+        client.decrby(key, num_events)
+
+
 def buffered_handle_remaining_events(
     project_id: int,
     old_group_id: int,
@@ -465,8 +615,8 @@ def buffered_handle_remaining_events(
     messages and prefers big ones instead.
 
     For optimal performance, the datetimes should be close to each other. This
-    "soft" precondition is fulfilled in `reprocess_group` by iterating through
-    events in timestamp order.
+    "soft" precondition is fulfilled in `reprocess_group_slice` by iterating
+    through the events of time slices in timestamp order.
 
     Ideally we'd have batching implemented via a service like buffers, but for
     more than counters.
@@ -556,6 +706,7 @@ def mark_event_reprocessed(data=None, group_id=None, project_id=None, num_events
             return
 
         project_id = data["project"]
+        decrement_pending_events(group_id)
 
     key = _get_sync_counter_key(group_id)
     if _get_sync_redis_client().decrby(key, num_events) == 0:
@@ -644,6 +795,9 @@ def start_group_reprocessing(
 
     client = _get_sync_redis_client()
     client.setex(_get_sync_counter_key(group_id), settings.SENTRY_REPROCESSING_SYNC_TTL, sync_count)
+    client.setex(
+        _get_pending_reprocessed_key(group_id), settings.SENTRY_REPROCESSING_SYNC_TTL, event_count
+    )
     client.setex(
         _get_info_reprocessed_key(group_id),
         settings.SENTRY_REPROCESSING_SYNC_TTL,
@@ -660,13 +814,15 @@ def is_group_finished(group_id):
     Checks whether a group has finished reprocessing.
     """
 
-    pending, _ = get_progress(group_id)
-    return pending <= 0
+    # Unlike the progress, this also waits for the remaining events.
+    pending = _get_sync_redis_client().get(_get_sync_counter_key(group_id))
+    return pending is None or int(pending) <= 0
 
 
 def get_progress(group_id):
-    pending = _get_sync_redis_client().get(_get_sync_counter_key(group_id))
-    info = _get_sync_redis_client().get(_get_info_reprocessed_key(group_id))
+    client = _get_sync_redis_client()
+    pending = client.get(_get_sync_counter_key(group_id))
+    info = client.get(_get_info_reprocessed_key(group_id))
     if pending is None:
         logger.error("reprocessing2.missing_counter")
         return 0, None
@@ -675,6 +831,12 @@ def get_progress(group_id):
         return 0, None
 
     info = json.loads(info)
+    # The events selected for reprocessing are counted separately from the
+    # remaining events, which are handled in large batches.
+    pending_reprocessed = client.get(_get_pending_reprocessed_key(group_id))
+    if pending_reprocessed is not None:
+        return max(int(pending_reprocessed), 0), info
+
     # Our internal sync counters are counting over *all* events, but the
     # progressbar in the frontend goes until max_events. Advance progressbar
     # proportionally.
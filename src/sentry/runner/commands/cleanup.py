@@ -31,6 +31,9 @@ def get_project(value):
 # and child proc
 _STOP_WORKER = "91650ec271ae4b3e8a67cdc909d80f8c"
 
+# Marks a task that deletes one time window of a `BulkDeleteQuery`.
+_BULK_DELETE_WINDOW = "e1e4d1a6b1b24f8f9d0e3c5a7b2f6c48"
+
 API_TOKEN_TTL_IN_DAYS = 30
 
 
@@ -71,6 +74,20 @@ def multiprocess_worker(task_queue):
 
             configured = True
 
+        if j[0] == _BULK_DELETE_WINDOW:
+            from sentry.db.deletion import BulkDeleteQuery
+
+            _, model, dtfield, project_id, (start, end), chunk_size = j
+            try:
+                BulkDeleteQuery(
+                    model=import_string(model), dtfield=dtfield, project_id=project_id
+                ).execute_window(start, end, chunk_size=chunk_size)
+            except Exception as e:
+                logger.exception(e)
+            finally:
+                task_queue.task_done()
+            continue
+
         model, chunk = j
         model = import_string(model)
 
@@ -106,6 +123,13 @@ def multiprocess_worker(task_queue):
 )
 @click.option("--model", "-m", multiple=True)
 @click.option("--router", "-r", default=None, help="Database router")
+@click.option(
+    "--window-hours",
+    type=int,
+    default=24,
+    show_default=True,
+    help="The size of the time windows that bulk deletions are split into.",
+)
 @click.option(
     "--timed",
     "-t",
@@ -114,7 +138,7 @@ def multiprocess_worker(task_queue):
     help="Send the duration of this command to internal metrics.",
 )
 @log_options()
-def cleanup(days, project, concurrency, silent, model, router, timed):
+def cleanup(days, project, concurrency, silent, model, router, window_hours, timed):
     """Delete a portion of trailing data based on creation date.
 
     All data that is older than `--days` will be deleted.  The default for
@@ -122,11 +146,19 @@ def cleanup(days, project, concurrency, silent, model, router, timed):
     but if you have a specific project you want to limit this to this can be
     done with the `--project` flag which accepts a project ID or a string
     with the form `org/project` where both are slugs.
+
+    Bulk deletions are split into time windows of `--window-hours` that the
+    worker processes delete in parallel. Completed windows are remembered for
+    a day, so an interrupted cleanup resumes where it left off.
     """
     if concurrency < 1:
         click.echo("Error: Minimum concurrency is 1", err=True)
         raise click.Abort()
 
+    if window_hours < 1:
+        click.echo("Error: Minimum window is 1 hour", err=True)
+        raise click.Abort()
+
     os.environ["_SENTRY_CLEANUP"] = "1"
 
     # Make sure we fork off multiprocessing pool
@@ -272,9 +304,25 @@ def cleanup(days, project, concurrency, silent, model, router, timed):
             if not silent:
                 click.echo(">> Skipping %s" % model.__name__)
         else:
-            BulkDeleteQuery(
-                model=model, dtfield=dtfield, days=days, project_id=project_id, order_by=order_by
-            ).execute(chunk_size=chunk_size)
+            imp = ".".join((model.__module__, model.__name__))
+
+            q = BulkDeleteQuery(
+                model=model,
+                dtfield=dtfield,
+                days=days,
+                project_id=project_id,
+                order_by=order_by,
+                window=timedelta(hours=window_hours),
+            )
+
+            windows = q.get_windows()
+            if not silent:
+                click.echo(f">> {len(windows)} window(s) to delete")
+            for window in windows:
+                task_queue.put((_BULK_DELETE_WINDOW, imp, dtfield, project_id, window, chunk_size))
+
+    # Windows of all bulk deletions are deleted in parallel.
+    task_queue.join()
 
     for model, dtfield, order_by in DELETES:
         if not silent:
@@ -385,6 +385,12 @@ def post_process_forwarder(**options):
     type=click.Choice(["earliest", "latest"]),
     help="Force subscriptions to start from a particular offset",
 )
+@click.option(
+    "--max-batch-size",
+    default=1,
+    type=int,
+    help="How many messages to consume and process together.",
+)
 @log_options()
 @configuration
 def query_subscription_consumer(**options):
@@ -397,6 +403,7 @@ def query_subscription_consumer(**options):
         commit_batch_timeout_ms=options["commit_batch_timeout_ms"],
         initial_offset_reset=options["initial_offset_reset"],
         force_offset_reset=options["force_offset_reset"],
+        max_batch_size=options["max_batch_size"],
     )
 
     def handler(signum, frame):
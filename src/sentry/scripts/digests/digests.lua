@@ -84,6 +84,19 @@ local function variadic_argument_parser(argument_parser)
     end
 end
 
+local function counted_argument_parser(argument_parser)
+    -- Parses a count, followed by that many arguments.
+    return function (cursor, arguments)
+        local count = tonumber(arguments[cursor])
+        cursor = cursor + 1
+        local results = {}
+        for i = 1, count do
+            cursor, results[i] = argument_parser(cursor, arguments)
+        end
+        return cursor, results
+    end
+end
+
 local function multiple_argument_parser(...)
     local parsers = {...}
     return function (cursor, arguments)
@@ -309,6 +322,23 @@ local function digest_timeline(configuration, timeline_id, timeline_capacity)
     return results
 end
 
+local function digest_timelines(configuration, timeline_ids, timeline_capacity)
+    -- Timelines that are not in the ready state are returned without
+    -- records, instead of failing the digests of all other timelines.
+    local results = {}
+    for i, timeline_id in ipairs(timeline_ids) do
+        local ok, records = pcall(digest_timeline, configuration, timeline_id, timeline_capacity)
+        if ok then
+            results[i] = {timeline_id, 1, records}
+        elseif string.find(tostring(records), 'err(invalid_state)', 1, true) then
+            results[i] = {timeline_id, 0, {}}
+        else
+            error(records)
+        end
+    end
+    return results
+end
+
 local function close_digest(configuration, timeline_id, delay_minimum, record_ids)
     local timeline_key = configuration:get_timeline_key(timeline_id)
     local digest_key = configuration:get_timeline_digest_key(timeline_id)
@@ -338,6 +368,12 @@ local function close_digest(configuration, timeline_id, delay_minimum, record_id
     end
 end
 
+local function close_digests(configuration, digests)
+    for _, digest in ipairs(digests) do
+        close_digest(configuration, digest.timeline_id, digest.delay_minimum, digest.record_ids)
+    end
+end
+
 local function delete_timeline(configuration, timeline_id)
     truncate_timeline(configuration, timeline_id, 0)
     truncate_digest(configuration, timeline_id, 0)
@@ -439,6 +475,27 @@ local commands = {
         )(cursor, arguments)
         return digest_timeline(configuration, timeline_id, timeline_capacity)
     end,
+    DIGEST_OPEN_MANY = function (cursor, arguments)
+        local cursor, configuration, timeline_capacity, timeline_ids = multiple_argument_parser(
+            configuration_argument_parser,
+            argument_parser(tonumber),
+            variadic_argument_parser(argument_parser())
+        )(cursor, arguments)
+        return digest_timelines(configuration, timeline_ids, timeline_capacity)
+    end,
+    DIGEST_CLOSE_MANY = function (cursor, arguments)
+        local cursor, configuration, digests = multiple_argument_parser(
+            configuration_argument_parser,
+            variadic_argument_parser(
+                object_argument_parser({
+                    {"timeline_id", argument_parser()},
+                    {"delay_minimum", argument_parser(tonumber)},
+                    {"record_ids", counted_argument_parser(argument_parser())},
+                })
+            )
+        )(cursor, arguments)
+        return close_digests(configuration, digests)
+    end,
     DIGEST_CLOSE = function (cursor, arguments)
         local cursor, configuration, timeline_id, delay_minimum, record_ids = multiple_argument_parser(
             configuration_argument_parser,
@@ -4,13 +4,13 @@ import functools
 from abc import ABCMeta, abstractmethod
 from collections import defaultdict
 from datetime import datetime, timedelta
-from typing import Any, Callable, Dict, Mapping, Optional, Sequence
+from typing import Any, Callable, Dict, Mapping, Optional, Sequence, Set
 
 from django.db.models import Q, QuerySet
 from django.utils import timezone
 from django.utils.functional import SimpleLazyObject
 
-from sentry import quotas
+from sentry import options, quotas
 from sentry.api.event_search import SearchFilter
 from sentry.exceptions import InvalidSearchQuery
 from sentry.models import (
@@ -34,6 +34,7 @@ from sentry.models import (
 )
 from sentry.search.base import SearchBackend
 from sentry.search.events.constants import EQUALITY_OPERATORS, OPERATOR_TO_DJANGO
+from sentry.search.snuba.candidates import CACHEABLE_FILTERS, get_candidate_ids
 from sentry.search.snuba.executors import (
     AbstractQueryExecutor,
     CdcPostgresSnubaQueryExecutor,
@@ -434,11 +435,46 @@ class SnubaSearchBackendBase(SearchBackend, metaclass=ABCMeta):
         qs_builder_conditions = self._get_queryset_conditions(
             projects, environments, search_filters
         )
+        candidate_ids, search_filters = self._get_cached_candidates(
+            projects, search_filters, qs_builder_conditions
+        )
         group_queryset = QuerySetBuilder(qs_builder_conditions).build(
             group_queryset, search_filters
         )
+        if candidate_ids is not None:
+            group_queryset = group_queryset.filter(id__in=sorted(candidate_ids))
         return group_queryset
 
+    def _get_cached_candidates(
+        self,
+        projects: Sequence[Project],
+        search_filters: Sequence[SearchFilter],
+        conditions: Mapping[str, Condition],
+    ) -> tuple[Optional[Set[int]], Sequence[SearchFilter]]:
+        """
+        Resolves the search filters that have cached candidate sets, and
+        intersects their sets. Returns the intersection, or None if no filter
+        was resolved, along with the filters that remain to be applied.
+        """
+        if not options.get("snuba.search.candidate-cache-ttl"):
+            return None, search_filters
+
+        candidate_ids = None
+        remaining_filters = []
+        for search_filter in search_filters:
+            name = search_filter.key.name
+            filter_ids = None
+            if name in CACHEABLE_FILTERS and name in conditions:
+                filter_ids = get_candidate_ids(projects, search_filter, conditions[name])
+
+            if filter_ids is None:
+                remaining_filters.append(search_filter)
+            elif candidate_ids is None:
+                candidate_ids = filter_ids
+            else:
+                candidate_ids &= filter_ids
+        return candidate_ids, remaining_filters
+
     def _initialize_group_queryset(
         self,
         projects: Sequence[Project],
@@ -0,0 +1,150 @@
+"""
+Short-lived cache of the groups that match the Postgres-only search filters
+of the issue stream, such as ``is:unresolved`` or ``assigned_or_suggested:me``.
+
+Each entry holds the sorted group ids of one project that match one search
+filter, so that page loads and users that share a filter don't query it again.
+The sets of all cached filters are intersected in memory, and the group
+queryset is restricted to the result instead of evaluating the filters as
+subqueries.
+
+Entries are keyed by a per-project version, which receivers in
+``sentry.receivers.search`` replace whenever the status, assignment, inbox,
+bookmark, subscription or ownership of a group in the project changes. Changes
+that bypass those signals are picked up once entries expire.
+"""
+
+from __future__ import annotations
+
+from array import array
+from typing import TYPE_CHECKING, Any, Iterable, Mapping, Optional, Sequence, Set
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.db.models import Model
+
+from sentry import options
+from sentry.models import Group, Project
+from sentry.utils import metrics
+from sentry.utils.codecs import ZstdCodec
+from sentry.utils.hashlib import md5_text
+
+if TYPE_CHECKING:
+    from sentry.api.event_search import SearchFilter
+    from sentry.search.snuba.backend import Condition
+
+# Filters whose matches only depend on the project and the filter value.
+CACHEABLE_FILTERS = frozenset(
+    (
+        "status",
+        "bookmarked_by",
+        "assigned_to",
+        "unassigned",
+        "assigned_or_suggested",
+        "subscribed_by",
+        "for_review",
+    )
+)
+
+# Cached in place of the ids of filters that match too many groups of a
+# project, so that they are not queried again.
+TOO_MANY = b"-"
+
+# Versions outlive the entries that are keyed by them.
+VERSION_TTL = 24 * 60 * 60
+
+_zstd = ZstdCodec()
+
+
+def encode_ids(ids: Iterable[int]) -> bytes:
+    return _zstd.encode(array("q", sorted(ids)).tobytes())
+
+
+def decode_ids(value: bytes) -> Sequence[int]:
+    return array("q", _zstd.decode(value))
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sorted((_normalize(item) for item in value), key=repr)
+    if isinstance(value, Model):
+        return f"{value._meta.label_lower}:{value.pk}"
+    return value
+
+
+def get_filter_key(search_filter: SearchFilter) -> str:
+    return md5_text(
+        search_filter.key.name,
+        search_filter.operator,
+        repr(_normalize(search_filter.value.raw_value)),
+    ).hexdigest()
+
+
+def _get_version_key(project_id: int) -> str:
+    return f"search:candidates:version:{project_id}"
+
+
+def get_versions(project_ids: Sequence[int]) -> Mapping[int, str]:
+    keys = {project_id: _get_version_key(project_id) for project_id in project_ids}
+    cached = cache.get_many(keys.values())
+    versions = {}
+    for project_id, key in keys.items():
+        version = cached.get(key)
+        if version is None:
+            # Start a new version when there's none, since entries of an
+            # evicted version may be outdated.
+            cache.add(key, uuid4().hex, VERSION_TTL)
+            version = cache.get(key)
+        versions[project_id] = version
+    return versions
+
+
+def invalidate(project_id: int) -> None:
+    """
+    Drops the cached candidates of a project.
+    """
+    cache.set(_get_version_key(project_id), uuid4().hex, VERSION_TTL)
+
+
+def get_candidate_ids(
+    projects: Sequence[Project], search_filter: SearchFilter, condition: Condition
+) -> Optional[Set[int]]:
+    """
+    Returns the ids of the groups in `projects` that pass `search_filter`, or
+    None if they are too many to pass on as ids.
+    """
+    ttl = options.get("snuba.search.candidate-cache-ttl")
+    max_size = options.get("snuba.search.max-cached-candidates")
+    tags = {"filter": search_filter.key.name}
+
+    filter_key = get_filter_key(search_filter)
+    versions = get_versions([project.id for project in projects])
+    keys = {
+        project_id: f"search:candidates:{project_id}:{version}:{filter_key}"
+        for project_id, version in versions.items()
+    }
+    cached = cache.get_many(keys.values())
+
+    candidate_ids: Set[int] = set()
+    for project_id, key in keys.items():
+        value = cached.get(key)
+        if value is None:
+            metrics.incr("snuba.search.candidate_cache.miss", tags=tags)
+            queryset = condition.apply(Group.objects.filter(project_id=project_id), search_filter)
+            ids = list(queryset.values_list("id", flat=True)[: max_size + 1])
+            if len(ids) > max_size:
+                cache.set(key, TOO_MANY, ttl)
+                return None
+            cache.set(key, encode_ids(ids), ttl)
+        elif value == TOO_MANY:
+            metrics.incr("snuba.search.candidate_cache.too_many", tags=tags)
+            return None
+        else:
+            metrics.incr("snuba.search.candidate_cache.hit", tags=tags)
+            ids = decode_ids(value)
+
+        candidate_ids.update(ids)
+        if len(candidate_ids) > max_size:
+            return None
+
+    return candidate_ids
@@ -1,12 +1,14 @@
 from __future__ import annotations
 
+import functools
 import logging
 import time
 from abc import ABCMeta, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import replace
 from datetime import datetime, timedelta
 from hashlib import md5
-from typing import Any, List, Mapping, Sequence, Set, Tuple
+from typing import Any, Callable, List, Mapping, Sequence, Set, Tuple
 
 import sentry_sdk
 from django.db.models import QuerySet
@@ -26,6 +28,11 @@ from sentry.search.events.filter import convert_search_filter_to_snuba_query
 from sentry.search.utils import validate_cdc_search_filters
 from sentry.utils import json, metrics, snuba
 from sentry.utils.cursors import Cursor, CursorResult
+from sentry.utils.query import estimate_row_count
+
+# Sends the Snuba queries of pipelined searches. Everything that is looked up
+# in Postgres is resolved on the request thread, see `build_snuba_search`.
+_search_thread_pool = ThreadPoolExecutor(max_workers=8)
 
 
 def get_search_filter(search_filters: Sequence[SearchFilter], name: str, operator: str) -> Any:
@@ -137,6 +144,46 @@ class AbstractQueryExecutor(metaclass=ABCMeta):
         * a sorted list of (group_id, group_score) tuples sorted descending by score,
         * the count of total results (rows) available for this query.
         """
+        return self.build_snuba_search(
+            start=start,
+            end=end,
+            project_ids=project_ids,
+            environment_ids=environment_ids,
+            sort_field=sort_field,
+            organization_id=organization_id,
+            cursor=cursor,
+            group_ids=group_ids,
+            limit=limit,
+            offset=offset,
+            get_sample=get_sample,
+            search_filters=search_filters,
+        )()
+
+    def build_snuba_search(
+        self,
+        start: datetime,
+        end: datetime,
+        project_ids: Sequence[int],
+        environment_ids: Sequence[int],
+        sort_field: str,
+        organization_id: int,
+        cursor: Optional[Cursor] = None,
+        group_ids: Optional[Sequence[int]] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        get_sample: bool = False,
+        search_filters: Optional[Sequence[SearchFilter]] = None,
+    ) -> Callable[[], Tuple[List[Tuple[int, Any]], int]]:
+        """
+        Resolves the parameters of `snuba_search` that are looked up in
+        Postgres, such as environment names and releases, and returns a
+        function that only runs the Snuba query. That function can be run on
+        a thread of `_search_thread_pool`, which has no database connections.
+
+        The `snuba.options_override` overrides that are active on the calling
+        thread are part of the query that is built here, so they apply
+        wherever and whenever the function runs.
+        """
 
         filters = {"project_id": project_ids}
 
@@ -215,32 +262,39 @@ class AbstractQueryExecutor(metaclass=ABCMeta):
             ]  # ensure stable sort within the same score
             referrer = "search"
 
-        snuba_results = snuba.aliased_query(
-            dataset=self.dataset,
-            start=start,
-            end=end,
-            selected_columns=selected_columns,
-            groupby=["group_id"],
-            conditions=conditions,
-            having=having,
-            filter_keys=filters,
-            aggregations=aggregations,
-            orderby=orderby,
-            referrer=referrer,
-            limit=limit,
-            offset=offset,
-            totals=True,  # Needs to have totals_mode=after_having_exclusive so we get groups matching HAVING only
-            turbo=get_sample,  # Turn off FINAL when in sampling mode
-            sample=1,  # Don't use clickhouse sampling, even when in turbo mode.
-            condition_resolver=snuba.get_snuba_column_name,
+        query_body = snuba.prepare_raw_query(
+            snuba.aliased_query_params(
+                dataset=self.dataset,
+                start=start,
+                end=end,
+                selected_columns=selected_columns,
+                groupby=["group_id"],
+                conditions=conditions,
+                having=having,
+                filter_keys=filters,
+                aggregations=aggregations,
+                orderby=orderby,
+                referrer=referrer,
+                limit=limit,
+                offset=offset,
+                totals=True,  # Needs to have totals_mode=after_having_exclusive so we get groups matching HAVING only
+                turbo=get_sample,  # Turn off FINAL when in sampling mode
+                sample=1,  # Don't use clickhouse sampling, even when in turbo mode.
+                condition_resolver=snuba.get_snuba_column_name,
+            )
         )
-        rows = snuba_results["data"]
-        total = snuba_results["totals"]["total"]
 
-        if not get_sample:
-            metrics.timing("snuba.search.num_result_groups", len(rows))
+        def run() -> Tuple[List[Tuple[int, Any]], int]:
+            snuba_results = snuba.send_prepared_query(query_body, referrer=referrer)
+            rows = snuba_results["data"]
+            total = snuba_results["totals"]["total"]
+
+            if not get_sample:
+                metrics.timing("snuba.search.num_result_groups", len(rows))
 
-        return [(row["group_id"], row[sort_field]) for row in rows], total
+            return [(row["group_id"], row[sort_field]) for row in rows], total
+
+        return run
 
     def _transform_converted_filter(
         self,
@@ -395,8 +449,9 @@ class PostgresSnubaQueryExecutor(AbstractQueryExecutor):
         # to something that we can send down to Snuba in a `group_id IN (...)`
         # clause.
         max_candidates = options.get("snuba.search.max-pre-snuba-candidates")
+        pipelined = options.get("snuba.search.pipelined-chunks")
 
-        with sentry_sdk.start_span(op="snuba_group_query") as span:
+        with sentry_sdk.start_span(op="snuba_group_query") as span, self.phase_timer("candidates"):
             group_ids = list(group_queryset.values_list("id", flat=True)[: max_candidates + 1])
             span.set_data("Max Candidates", max_candidates)
             span.set_data("Result Size", len(group_ids))
@@ -423,28 +478,78 @@ class PostgresSnubaQueryExecutor(AbstractQueryExecutor):
         sort_field = self.sort_strategies[sort_by]
         chunk_growth = options.get("snuba.search.chunk-growth-rate")
         max_chunk_size = options.get("snuba.search.max-chunk-size")
-        chunk_limit = limit
+
+        def grow_chunk_limit(chunk_limit: int) -> int:
+            # grow the chunk size on each iteration to account for huge projects
+            # and weird queries, up to a max size
+            chunk_limit = min(int(chunk_limit * chunk_growth), max_chunk_size)
+            # but if we have group_ids always query for at least that many items
+            return max(chunk_limit, len(group_ids))
+
+        chunk_limit = grow_chunk_limit(limit)
+        if pipelined and too_many_candidates:
+            # Start with a chunk that is expected to hold a page of results
+            # after post-filtering, instead of growing towards it one Snuba
+            # query at a time.
+            with self.phase_timer("selectivity"):
+                selectivity = self.estimate_selectivity(projects, group_queryset)
+            if selectivity:
+                chunk_limit = max(chunk_limit, min(int(limit / selectivity), max_chunk_size))
+
         offset = 0
         num_chunks = 0
-        hits = self.calculate_hits(
-            group_ids,
-            too_many_candidates,
-            sort_field,
-            projects,
-            retention_window_start,
-            group_queryset,
-            environments,
-            sort_by,
-            limit,
-            cursor,
-            count_hits,
-            paginator_options,
-            search_filters,
-            start,
-            end,
+        build_snuba_chunk = functools.partial(
+            self.build_snuba_search,
+            start=start,
+            end=end,
+            project_ids=[p.id for p in projects],
+            environment_ids=environments and [environment.id for environment in environments],
+            organization_id=projects[0].organization_id,
+            sort_field=sort_field,
+            cursor=cursor,
+            group_ids=group_ids,
+            search_filters=search_filters,
         )
-        if count_hits and hits == 0:
-            return self.empty_result
+
+        hits_sample = None
+        if pipelined and count_hits and (too_many_candidates or cursor is not None):
+            # The sample for the hits estimate is queried while the page is.
+            hits_sample = _search_thread_pool.submit(
+                self.build_snuba_search(
+                    **self.get_hits_sample_kwargs(
+                        group_ids,
+                        too_many_candidates,
+                        sort_field,
+                        projects,
+                        environments,
+                        search_filters,
+                        start,
+                        end,
+                    )
+                )
+            )
+            hits = None
+        else:
+            with self.phase_timer("hits"):
+                hits = self.calculate_hits(
+                    group_ids,
+                    too_many_candidates,
+                    sort_field,
+                    projects,
+                    retention_window_start,
+                    group_queryset,
+                    environments,
+                    sort_by,
+                    limit,
+                    cursor,
+                    count_hits,
+                    paginator_options,
+                    search_filters,
+                    start,
+                    end,
+                )
+            if count_hits and hits == 0:
+                return self.empty_result
 
         paginator_results = self.empty_result
         result_groups = []
@@ -453,6 +558,7 @@ class PostgresSnubaQueryExecutor(AbstractQueryExecutor):
         max_time = options.get("snuba.search.max-total-chunk-time-seconds")
         time_start = time.time()
         more_results = False
+        next_chunk = None
 
         # Do smaller searches in chunks until we have enough results
         # to answer the query (or hit the end of possible results). We do
@@ -463,26 +569,13 @@ class PostgresSnubaQueryExecutor(AbstractQueryExecutor):
         while (time.time() - time_start) < max_time:
             num_chunks += 1
 
-            # grow the chunk size on each iteration to account for huge projects
-            # and weird queries, up to a max size
-            chunk_limit = min(int(chunk_limit * chunk_growth), max_chunk_size)
-            # but if we have group_ids always query for at least that many items
-            chunk_limit = max(chunk_limit, len(group_ids))
-
             # {group_id: group_score, ...}
-            snuba_groups, total = self.snuba_search(
-                start=start,
-                end=end,
-                project_ids=[p.id for p in projects],
-                environment_ids=environments and [environment.id for environment in environments],
-                organization_id=projects[0].organization_id,
-                sort_field=sort_field,
-                cursor=cursor,
-                group_ids=group_ids,
-                limit=chunk_limit,
-                offset=offset,
-                search_filters=search_filters,
-            )
+            with self.phase_timer("snuba_chunk"):
+                if next_chunk is not None:
+                    snuba_groups, total = next_chunk.result()
+                    next_chunk = None
+                else:
+                    snuba_groups, total = build_snuba_chunk(limit=chunk_limit, offset=offset)()
             metrics.timing("snuba.search.num_snuba_results", len(snuba_groups))
             count = len(snuba_groups)
             more_results = count >= limit and (offset + limit) < total
@@ -491,6 +584,14 @@ class PostgresSnubaQueryExecutor(AbstractQueryExecutor):
             if not snuba_groups:
                 break
 
+            chunk_limit = grow_chunk_limit(chunk_limit)
+            if pipelined and not group_ids and more_results:
+                # Query the next chunk while this one is post-filtered. It's
+                # thrown away if this chunk turns out to be enough.
+                next_chunk = _search_thread_pool.submit(
+                    build_snuba_chunk(limit=chunk_limit, offset=offset)
+                )
+
             if group_ids:
                 # pre-filtered candidates were passed down to Snuba, so we're
                 # finished with filtering and these are the only results. Note
@@ -498,14 +599,17 @@ class PostgresSnubaQueryExecutor(AbstractQueryExecutor):
                 # the group_ids, we know we got all of them (ie there are
                 # no more chunks after the first)
                 result_groups = snuba_groups
-                if count_hits and hits is None:
+                if count_hits and hits is None and hits_sample is None:
                     hits = len(snuba_groups)
             else:
                 # pre-filtered candidates were *not* passed down to Snuba,
                 # so we need to do post-filtering to verify Sentry DB predicates
-                filtered_group_ids = group_queryset.filter(
-                    id__in=[gid for gid, _ in snuba_groups]
-                ).values_list("id", flat=True)
+                with self.phase_timer("post_filter"):
+                    filtered_group_ids = list(
+                        group_queryset.filter(id__in=[gid for gid, _ in snuba_groups]).values_list(
+                            "id", flat=True
+                        )
+                    )
 
                 group_to_score = dict(snuba_groups)
                 for group_id in filtered_group_ids:
@@ -533,6 +637,18 @@ class PostgresSnubaQueryExecutor(AbstractQueryExecutor):
             if group_ids or len(paginator_results.results) >= limit or not more_results:
                 break
 
+        if next_chunk is not None:
+            next_chunk.cancel()
+
+        if hits_sample is not None:
+            with self.phase_timer("hits"):
+                hits = self.estimate_hits_from_sample(group_queryset, *hits_sample.result())
+            if hits == 0:
+                return self.empty_result
+            paginator_results = SequencePaginator(
+                [(score, id) for (id, score) in result_groups], reverse=True, **paginator_options
+            ).get_result(limit, cursor, known_hits=hits, max_hits=max_hits)
+
         # HACK: We're using the SequencePaginator to mask the complexities of going
         # back and forth between two databases. This causes a problem with pagination
         # because we're 'lying' to the SequencePaginator (it thinks it has the entire
@@ -617,38 +733,86 @@ class PostgresSnubaQueryExecutor(AbstractQueryExecutor):
             # requires the most samples) we would need 96 samples to achieve
             # +/-10% @ 95% confidence.
 
-            sample_size = options.get("snuba.search.hits-sample-size")
-            kwargs = dict(
-                start=start,
-                end=end,
-                project_ids=[p.id for p in projects],
-                environment_ids=environments and [environment.id for environment in environments],
-                organization_id=projects[0].organization_id,
-                sort_field=sort_field,
-                limit=sample_size,
-                offset=0,
-                get_sample=True,
-                search_filters=search_filters,
+            snuba_groups, snuba_total = self.snuba_search(
+                **self.get_hits_sample_kwargs(
+                    group_ids,
+                    too_many_candidates,
+                    sort_field,
+                    projects,
+                    environments,
+                    search_filters,
+                    start,
+                    end,
+                )
             )
-            if not too_many_candidates:
-                kwargs["group_ids"] = group_ids
-
-            snuba_groups, snuba_total = self.snuba_search(**kwargs)
-            snuba_count = len(snuba_groups)
-            if snuba_count == 0:
-                # Maybe check for 0 hits and return EMPTY_RESULT in ::query? self.empty_result
-                return 0
-            else:
-                filtered_count = group_queryset.filter(
-                    id__in=[gid for gid, _ in snuba_groups]
-                ).count()
-
-                hit_ratio = filtered_count / float(snuba_count)
-                hits = int(hit_ratio * snuba_total)
-                return hits
+            return self.estimate_hits_from_sample(group_queryset, snuba_groups, snuba_total)
 
         return None
 
+    def get_hits_sample_kwargs(
+        self,
+        group_ids: Sequence[int],
+        too_many_candidates: bool,
+        sort_field: str,
+        projects: Sequence[Project],
+        environments: Sequence[Environment],
+        search_filters: Sequence[SearchFilter],
+        start: datetime,
+        end: datetime,
+    ) -> Mapping[str, Any]:
+        """
+        Returns the arguments of the `snuba_search` that samples the groups
+        used to estimate hits.
+        """
+        kwargs = dict(
+            start=start,
+            end=end,
+            project_ids=[p.id for p in projects],
+            environment_ids=environments and [environment.id for environment in environments],
+            organization_id=projects[0].organization_id,
+            sort_field=sort_field,
+            limit=options.get("snuba.search.hits-sample-size"),
+            offset=0,
+            get_sample=True,
+            search_filters=search_filters,
+        )
+        if not too_many_candidates:
+            kwargs["group_ids"] = group_ids
+        return kwargs
+
+    def estimate_hits_from_sample(
+        self, group_queryset: QuerySet, snuba_groups: Sequence[Tuple[int, Any]], snuba_total: int
+    ) -> int:
+        snuba_count = len(snuba_groups)
+        if snuba_count == 0:
+            # Maybe check for 0 hits and return EMPTY_RESULT in ::query? self.empty_result
+            return 0
+
+        filtered_count = group_queryset.filter(id__in=[gid for gid, _ in snuba_groups]).count()
+        hit_ratio = filtered_count / float(snuba_count)
+        return int(hit_ratio * snuba_total)
+
+    def estimate_selectivity(
+        self, projects: Sequence[Project], group_queryset: QuerySet
+    ) -> Optional[float]:
+        """
+        Estimates the share of the projects' groups that pass the Postgres
+        filters of `group_queryset`, from the planner's row estimates. Returns
+        None if the planner has no estimate.
+        """
+        total = estimate_row_count(Group.objects.filter(project__in=projects))
+        filtered = estimate_row_count(group_queryset)
+        if not total or filtered is None:
+            return None
+        selectivity = min(max(filtered, 1) / total, 1.0)
+        metrics.timing("snuba.search.selectivity", selectivity)
+        return selectivity
+
+    def phase_timer(self, phase: str) -> Any:
+        return metrics.timer(
+            "snuba.search.phase", tags={"phase": phase, "executor": self.__class__.__name__}
+        )
+
 
 class InvalidQueryForExecutor(Exception):
     pass
@@ -1,4 +1,4 @@
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Mapping, Optional
 
 from sentry.utils.services import Service
 
@@ -9,7 +9,14 @@ class StringIndexer(Service):  # type: ignore
     and the corresponding reverse lookup.
     """
 
-    __all__ = ("record", "resolve", "reverse_resolve", "bulk_record")
+    __all__ = (
+        "record",
+        "resolve",
+        "reverse_resolve",
+        "bulk_record",
+        "bulk_resolve",
+        "bulk_reverse_resolve",
+    )
 
     def bulk_record(self, strings: List[str]) -> Dict[str, int]:
         raise NotImplementedError()
@@ -31,9 +38,23 @@ class StringIndexer(Service):  # type: ignore
         """
         raise NotImplementedError()
 
+    def bulk_resolve(self, strings: Iterable[str]) -> Mapping[str, int]:
+        """Lookup the integer IDs for the given strings.
+
+        Strings that cannot be found are omitted from the result.
+        """
+        raise NotImplementedError()
+
     def reverse_resolve(self, id: int) -> Optional[str]:
         """Lookup the stored string for a given integer ID.
 
         Returns None if the entry cannot be found.
         """
         raise NotImplementedError()
+
+    def bulk_reverse_resolve(self, ids: Iterable[int]) -> Mapping[int, str]:
+        """Lookup the stored strings for the given integer IDs.
+
+        IDs that cannot be found are omitted from the result.
+        """
+        raise NotImplementedError()
@@ -0,0 +1,61 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Mapping
+
+from sentry.utils import metrics
+
+
+class StringIndexerCache:
+    """
+    Bounded in-process LRU of string <-> id mappings.
+
+    This sits in front of the shared cache used by `get_many_from_cache`.
+    Indexed ids never change once assigned, so entries don't need to expire,
+    only to be evicted when the cache is full.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self.__lock = threading.Lock()
+        self.__ids: "OrderedDict[str, int]" = OrderedDict()
+        self.__strings: "OrderedDict[int, str]" = OrderedDict()
+
+    def get_many(self, strings: Iterable[str]) -> Dict[str, int]:
+        return self.__get_many(self.__ids, strings, "string")
+
+    def get_many_reverse(self, ids: Iterable[int]) -> Dict[int, str]:
+        return self.__get_many(self.__strings, ids, "id")
+
+    def set_many(self, mapping: Mapping[str, int]) -> None:
+        with self.__lock:
+            for string, id in mapping.items():
+                self.__set(self.__ids, string, id)
+                self.__set(self.__strings, id, string)
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__ids.clear()
+            self.__strings.clear()
+
+    def __get_many(self, entries, keys, lookup):
+        results = {}
+        with self.__lock:
+            for key in keys:
+                value = entries.get(key)
+                if value is not None:
+                    entries.move_to_end(key)
+                    results[key] = value
+
+        if results:
+            metrics.incr(
+                "sentry_metrics.indexer.local_cache.hit",
+                amount=len(results),
+                tags={"lookup": lookup},
+            )
+        return results
+
+    def __set(self, entries, key, value) -> None:
+        entries[key] = value
+        entries.move_to_end(key)
+        while len(entries) > self.max_size:
+            entries.popitem(last=False)
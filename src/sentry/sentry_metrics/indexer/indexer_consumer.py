@@ -1,5 +1,6 @@
+import functools
 import logging
-from typing import Any, Dict, MutableMapping, Optional, Sequence
+from typing import Any, Dict, List, Mapping, MutableMapping, Optional, Sequence, Tuple
 
 from confluent_kafka import Producer
 from django.conf import settings
@@ -7,7 +8,12 @@ from django.conf import settings
 from sentry.sentry_metrics import indexer
 from sentry.sentry_metrics.indexer.tasks import process_indexed_metrics
 from sentry.utils import json, kafka_config, metrics
-from sentry.utils.batching_kafka_consumer import AbstractBatchWorker, BatchingKafkaConsumer
+from sentry.utils.batching_kafka_consumer import (
+    AbstractBatchWorker,
+    BatchingKafkaConsumer,
+    DeliveryTracker,
+    SourceOffset,
+)
 from sentry.utils.kafka import create_batching_kafka_consumer
 
 logger = logging.getLogger(__name__)
@@ -20,9 +26,11 @@ def get_metrics_consumer(
     snuba_metrics_producer = Producer(
         kafka_config.get_kafka_producer_cluster_options(snuba_metrics["cluster"]),
     )
+    worker = MetricsIndexerWorker(producer=snuba_metrics_producer)
     return create_batching_kafka_consumer(
         {topic},
-        worker=MetricsIndexerWorker(producer=snuba_metrics_producer),
+        worker=worker,
+        delivery_tracker=worker.delivery_tracker,
         **options,
     )
 
@@ -33,67 +41,77 @@ class MetricsIndexerWorker(AbstractBatchWorker):  # type: ignore
         self.__producer_topic = settings.KAFKA_TOPICS[settings.KAFKA_SNUBA_METRICS].get(
             "topic", "snuba-metrics"
         )
+        self.delivery_tracker = DeliveryTracker(producer)
 
-    def process_message(self, message: Any) -> MutableMapping[str, Any]:
+    def process_message(self, message: Any) -> Tuple[SourceOffset, MutableMapping[str, Any]]:
+        # Strings are indexed for the whole batch at once in `flush_batch`.
         parsed_message: MutableMapping[str, Any] = json.loads(message.value(), use_rapid_json=True)
+        return SourceOffset.from_message(message), parsed_message
 
-        metric_name = parsed_message["name"]
-        tags = parsed_message.get("tags", {})
-
-        strings = {
-            metric_name,
-            *tags.keys(),
-            *tags.values(),
-        }
+    def index_batch(
+        self, batch: Sequence[MutableMapping[str, Any]]
+    ) -> Sequence[MutableMapping[str, Any]]:
+        strings = set()
+        for message in batch:
+            tags = message.get("tags", {})
+            strings.add(message["name"])
+            strings.update(tags.keys())
+            strings.update(tags.values())
 
         with metrics.timer("metrics_consumer.bulk_record"):
             mapping = indexer.bulk_record(list(strings))  # type: ignore
+        metrics.timing("metrics_consumer.bulk_record.strings", len(strings))
 
-        new_tags = {mapping[k]: mapping[v] for k, v in tags.items()}
+        indexed_batch = []
+        for message in batch:
+            tags = message.get("tags", {})
+            indexed_batch.append(
+                {
+                    **message,
+                    "tags": {mapping[k]: mapping[v] for k, v in tags.items()},
+                    "metric_id": mapping[message["name"]],
+                    "retention_days": 90,
+                }
+            )
+        return indexed_batch
 
-        parsed_message["tags"] = new_tags
-        parsed_message["metric_id"] = mapping[metric_name]
-        parsed_message["retention_days"] = 90
-        return parsed_message
+    def flush_batch(self, batch: Sequence[Tuple[SourceOffset, MutableMapping[str, Any]]]) -> None:
+        indexed_batch = self.index_batch([message for _, message in batch])
 
-    def flush_batch(self, batch: Sequence[MutableMapping[str, Any]]) -> None:
-        # produce the translated message to snuba-metrics topic
-        for message in batch:
-            self.__producer.produce(
+        # enque task to send a slimmed down payload to the product metrics data model.
+        # TODO(meredith): once we know more about what the product data model needs
+        # adjust payload to send the necessary data
+        # The task is only enqueued once the batch has been delivered to the
+        # snuba-metrics topic, so it never sees metrics that Snuba won't have.
+        # Messages that failed to deliver are consumed and enqueued again.
+        outstanding = len(indexed_batch)
+        delivered: List[Mapping[str, Any]] = []
+
+        def on_delivery(message: Mapping[str, Any], error: Any, _: Any) -> None:
+            nonlocal outstanding
+            outstanding -= 1
+            if error is None:
+                delivered.append(
+                    {"tags": message["tags"], "name": message["name"], "org_id": message["org_id"]}
+                )
+            if outstanding == 0 and delivered:
+                process_indexed_metrics.apply_async(kwargs={"messages": delivered})
+
+        # produce the translated message to snuba-metrics topic. Delivery is
+        # not waited for here, the consumer commits the offsets of delivered
+        # messages as the delivery reports come in.
+        for (source, _), message in zip(batch, indexed_batch):
+            self.delivery_tracker.produce(
+                source,
                 topic=self.__producer_topic,
                 key=None,
                 value=json.dumps(message).encode(),
-                on_delivery=self.callback,
+                callback=functools.partial(on_delivery, message),
             )
             message_type = message.get("type", "unknown")
             metrics.incr(
                 "metrics_consumer.producer.messages_seen", tags={"metric_type": message_type}
             )
-        with metrics.timer("metrics_consumer.producer.flush"):
-            messages_left = self.__producer.flush(5.0)
-
-        if messages_left != 0:
-            # TODO(meredith): We are not currently keeping track of
-            # which callbacks failed. This means could potentially
-            # be duplicating messages since we don't commit offsets
-            # unless all the callbacks are successful.
-            #
-            # In the future if we know which callback failed, we can
-            # commit only up to that point and retry on the remaining
-            # messages.
-            metrics.incr("metrics_consumer.producer.messages_left")
-            raise Exception(f"didn't get all the callbacks: {messages_left} left")
-
-        # if we have successfully produced messages to the snuba-metrics topic
-        # then enque task to send a slimmed down payload to the product metrics data model.
-        # TODO(meredith): once we know more about what the product data model needs
-        # adjust payload to send the necessary data
-        messages = [{"tags": m["tags"], "name": m["name"], "org_id": m["org_id"]} for m in batch]
-        process_indexed_metrics.apply_async(kwargs={"messages": messages})
 
     def shutdown(self) -> None:
         return
-
-    def callback(self, error: Any, message: Any) -> None:
-        if error is not None:
-            raise Exception(error.str())
@@ -1,6 +1,6 @@
 import itertools
 from collections import defaultdict
-from typing import DefaultDict, Dict, Optional
+from typing import DefaultDict, Dict, Iterable, List, Mapping, Optional
 
 from .base import StringIndexer
 
@@ -31,15 +31,24 @@ class SimpleIndexer(StringIndexer):
         self._strings: DefaultDict[str, int] = defaultdict(self._counter.__next__)
         self._reverse: Dict[int, str] = {}
 
+    def bulk_record(self, strings: List[str]) -> Dict[str, int]:
+        return {string: self._record(string) for string in strings}
+
     def record(self, string: str) -> int:
         return self._record(string)
 
     def resolve(self, string: str) -> Optional[int]:
         return self._strings.get(string)
 
+    def bulk_resolve(self, strings: Iterable[str]) -> Mapping[str, int]:
+        return {string: self._strings[string] for string in strings if string in self._strings}
+
     def reverse_resolve(self, id: int) -> Optional[str]:
         return self._reverse.get(id)
 
+    def bulk_reverse_resolve(self, ids: Iterable[int]) -> Mapping[int, str]:
+        return {id: self._reverse[id] for id in ids if id in self._reverse}
+
     def _record(self, string: str) -> int:
         index = self._strings[string]
         self._reverse[index] = string
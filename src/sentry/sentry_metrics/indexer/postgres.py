@@ -1,5 +1,6 @@
-from typing import Any, List, Mapping, MutableMapping, Optional, Sequence, Set
+from typing import Any, Iterable, List, Mapping, MutableMapping, Optional, Sequence, Set
 
+from sentry.sentry_metrics.indexer.cache import StringIndexerCache
 from sentry.sentry_metrics.indexer.models import MetricsKeyIndexer
 from sentry.utils.services import Service
 
@@ -10,7 +11,20 @@ class PGStringIndexer(Service):  # type: ignore
     and the corresponding reverse lookup.
     """
 
-    __all__ = ("record", "resolve", "reverse_resolve", "bulk_record")
+    __all__ = (
+        "record",
+        "resolve",
+        "reverse_resolve",
+        "bulk_record",
+        "bulk_resolve",
+        "bulk_reverse_resolve",
+    )
+
+    def __init__(self, local_cache_size: int = 10000) -> None:
+        self.local_cache = StringIndexerCache(local_cache_size)
+
+    def clear_local_cache(self) -> None:
+        self.local_cache.clear()
 
     def _bulk_record(self, unmapped_strings: Set[str]) -> Any:
         records = [MetricsKeyIndexer(string=string) for string in unmapped_strings]
@@ -26,19 +40,23 @@ class PGStringIndexer(Service):  # type: ignore
         return MetricsKeyIndexer.objects.get_many_from_cache(list(unmapped_strings), key="string")
 
     def bulk_record(self, strings: List[str]) -> Mapping[str, int]:
+        mapped_result: MutableMapping[str, int] = self.local_cache.get_many(strings)
+        unmapped = set(strings).difference(mapped_result.keys())
+        if not unmapped:
+            return mapped_result
 
         cache_results: Sequence[Any] = MetricsKeyIndexer.objects.get_many_from_cache(
-            strings, key="string"
+            list(unmapped), key="string"
         )
+        new_mapped = {r.string: r.id for r in cache_results}
 
-        mapped_result: MutableMapping[str, int] = {r.string: r.id for r in cache_results}
-
-        unmapped = set(strings).difference(mapped_result.keys())
-        new_mapped = self._bulk_record(unmapped)
-
-        for new in new_mapped:
-            mapped_result[new.string] = new.id
+        unmapped.difference_update(new_mapped.keys())
+        if unmapped:
+            for new in self._bulk_record(unmapped):
+                new_mapped[new.string] = new.id
 
+        self.local_cache.set_many(new_mapped)
+        mapped_result.update(new_mapped)
         return mapped_result
 
     def record(self, string: str) -> int:
@@ -51,21 +69,54 @@ class PGStringIndexer(Service):  # type: ignore
 
         Returns None if the entry cannot be found.
         """
+        cached = self.local_cache.get_many([string])
+        if cached:
+            return cached[string]
+
         try:
             id: int = MetricsKeyIndexer.objects.get_from_cache(string=string).id
         except MetricsKeyIndexer.DoesNotExist:
             return None
 
+        self.local_cache.set_many({string: id})
         return id
 
+    def bulk_resolve(self, strings: Iterable[str]) -> Mapping[str, int]:
+        """Lookup the integer IDs for the given strings.
+
+        Strings that cannot be found are omitted from the result.
+        """
+        strings = list(strings)
+        result: MutableMapping[str, int] = self.local_cache.get_many(strings)
+        missing = set(strings).difference(result.keys())
+        if not missing:
+            return result
+
+        records = MetricsKeyIndexer.objects.get_many_from_cache(list(missing), key="string")
+        new_mapped = {r.string: r.id for r in records}
+        self.local_cache.set_many(new_mapped)
+        result.update(new_mapped)
+        return result
+
     def reverse_resolve(self, id: int) -> Optional[str]:
         """Lookup the stored string for a given integer ID.
 
         Returns None if the entry cannot be found.
         """
-        try:
-            string: str = MetricsKeyIndexer.objects.get_from_cache(pk=id).string
-        except MetricsKeyIndexer.DoesNotExist:
-            return None
+        return self.bulk_reverse_resolve([id]).get(id)
+
+    def bulk_reverse_resolve(self, ids: Iterable[int]) -> Mapping[int, str]:
+        """Lookup the stored strings for the given integer IDs.
 
-        return string
+        IDs that cannot be found are omitted from the result.
+        """
+        ids = list(ids)
+        result: MutableMapping[int, str] = self.local_cache.get_many_reverse(ids)
+        missing = set(ids).difference(result.keys())
+        if not missing:
+            return result
+
+        records = MetricsKeyIndexer.objects.get_many_from_cache(list(missing))
+        self.local_cache.set_many({r.string: r.id for r in records})
+        result.update((r.id, r.string) for r in records)
+        return result
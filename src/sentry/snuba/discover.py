@@ -7,6 +7,7 @@ from typing import Dict, Optional, Sequence
 
 import sentry_sdk
 from dateutil.parser import parse as parse_datetime
+from django.conf import settings
 
 from sentry import options
 from sentry.discover.arithmetic import categorize_columns, resolve_equation_list
@@ -41,6 +42,7 @@ from sentry.utils.snuba import (
     SnubaTSResult,
     bulk_raw_query,
     bulk_snql_query,
+    concurrent_bulk_snql_query,
     get_array_column_alias,
     get_array_column_field,
     get_measurement_name,
@@ -127,7 +129,7 @@ def zerofill(data, start, end, rollup, orderby):
 
     for key in range(start, end, rollup):
         if key in data_by_time and len(data_by_time[key]) > 0:
-            rv = rv + data_by_time[key]
+            rv.extend(data_by_time[key])
             data_by_time[key] = []
         else:
             rv.append({"time": key})
@@ -159,6 +161,21 @@ def transform_meta(results, function_alias_map):
     return meta
 
 
+def transform_row(row, translated_columns):
+    transformed = {}
+    for key, value in row.items():
+        if isinstance(value, float):
+            # 0 for nan, and none for inf were chosen arbitrarily, nan and inf are invalid json
+            # so needed to pick something valid to use instead
+            if math.isnan(value):
+                value = 0
+            elif math.isinf(value):
+                value = None
+        transformed[translated_columns.get(key, key)] = value
+
+    return transformed
+
+
 def transform_data(result, translated_columns, snuba_filter):
     """
     Transform internal names back to the public schema ones.
@@ -170,21 +187,7 @@ def transform_data(result, translated_columns, snuba_filter):
         # Translate back column names that were converted to snuba format
         col["name"] = translated_columns.get(col["name"], col["name"])
 
-    def get_row(row):
-        transformed = {}
-        for key, value in row.items():
-            if isinstance(value, float):
-                # 0 for nan, and none for inf were chosen arbitrarily, nan and inf are invalid json
-                # so needed to pick something valid to use instead
-                if math.isnan(value):
-                    value = 0
-                elif math.isinf(value):
-                    value = None
-            transformed[translated_columns.get(key, key)] = value
-
-        return transformed
-
-    result["data"] = [get_row(row) for row in result["data"]]
+    result["data"] = [transform_row(row, translated_columns) for row in result["data"]]
 
     if snuba_filter and snuba_filter.rollup and snuba_filter.rollup > 0:
         rollup = snuba_filter.rollup
@@ -214,6 +217,7 @@ def query(
     conditions=None,
     functions_acl=None,
     use_snql=False,
+    stream=False,
 ):
     """
     High-level API for doing arbitrary user queries against events.
@@ -241,6 +245,8 @@ def query(
                     any additional processing.
     use_snql (bool) Whether to directly build the query in snql, instead of using the older
                     json construction
+    stream (bool) Decode rows lazily from the snuba response. The result's "data" is then an
+                    iterator of transformed rows and no "meta" is computed.
     """
     if not selected_columns:
         raise InvalidSearchQuery("No columns selected")
@@ -265,6 +271,10 @@ def query(
         )
         snql_query = builder.get_snql_query()
 
+        if stream:
+            result = raw_snql_query(snql_query, referrer, stream=True)
+            return stream_transformed_results(result, {})
+
         result = raw_snql_query(snql_query, referrer)
         with sentry_sdk.start_span(
             op="discover.discover", description="query.transform_results"
@@ -305,8 +315,12 @@ def query(
             limit=limit,
             offset=offset,
             referrer=referrer,
+            stream=stream,
         )
 
+    if stream:
+        return stream_transformed_results(result, snuba_query.columns)
+
     with sentry_sdk.start_span(
         op="discover.discover", description="query.transform_results"
     ) as span:
@@ -319,6 +333,14 @@ def query(
         )
 
 
+def stream_transformed_results(result, translated_columns):
+    """
+    Lazily applies the row transformations of `transform_data` to a streamed
+    snuba result.
+    """
+    return {"data": (transform_row(row, translated_columns) for row in result["data"])}
+
+
 def prepare_discover_query(
     selected_columns,
     query,
@@ -1088,29 +1110,6 @@ def get_facets(
                 top_tags.pop()
             fetch_projects = True
 
-        results = []
-        if fetch_projects:
-            with sentry_sdk.start_span(op="discover.discover", description="facets.projects"):
-                project_value_builder = QueryBuilder(
-                    Dataset.Discover,
-                    params,
-                    query=query,
-                    selected_columns=["count()", "project_id"],
-                    orderby=["-count()"],
-                    # Ensures Snuba will not apply FINAL
-                    turbo=sample_rate is not None,
-                    sample_rate=sample_rate,
-                )
-                project_values = raw_snql_query(
-                    project_value_builder.get_snql_query(), referrer=referrer
-                )
-                results.extend(
-                    [
-                        FacetResult("project", r["project_id"], int(r["count"]) * multiplier)
-                        for r in project_values["data"]
-                    ]
-                )
-
         # Get tag counts for our top tags. Fetching them individually
         # allows snuba to leverage promoted tags better and enables us to get
         # the value count we want.
@@ -1125,54 +1124,83 @@ def get_facets(
             else:
                 individual_tags.append(tag)
 
-        with sentry_sdk.start_span(
-            op="discover.discover", description="facets.individual_tags"
-        ) as span:
-            span.set_data("tag_count", len(individual_tags))
-            for tag_name in individual_tags:
-                tag = f"tags[{tag_name}]"
-                tag_value_builder = QueryBuilder(
-                    Dataset.Discover,
-                    params,
-                    query=query,
-                    selected_columns=["count()", tag],
-                    orderby=["-count()"],
-                    limit=TOP_VALUES_DEFAULT_LIMIT,
-                    # Ensures Snuba will not apply FINAL
-                    turbo=sample_rate is not None,
-                    sample_rate=sample_rate,
+        # The remaining queries are independent of each other, so build them all
+        # up front and run them concurrently. Each entry maps a query to the
+        # function turning its rows into facet results.
+        facet_queries = []
+        if fetch_projects:
+            project_value_builder = QueryBuilder(
+                Dataset.Discover,
+                params,
+                query=query,
+                selected_columns=["count()", "project_id"],
+                orderby=["-count()"],
+                # Ensures Snuba will not apply FINAL
+                turbo=sample_rate is not None,
+                sample_rate=sample_rate,
+            )
+            facet_queries.append(
+                (
+                    project_value_builder.get_snql_query(),
+                    lambda r: FacetResult("project", r["project_id"], int(r["count"]) * multiplier),
                 )
-                tag_values = raw_snql_query(tag_value_builder.get_snql_query(), referrer=referrer)
-                results.extend(
-                    [
-                        FacetResult(tag_name, r[tag], int(r["count"]) * multiplier)
-                        for r in tag_values["data"]
-                    ]
+            )
+
+        for tag_name in individual_tags:
+            tag = f"tags[{tag_name}]"
+            tag_value_builder = QueryBuilder(
+                Dataset.Discover,
+                params,
+                query=query,
+                selected_columns=["count()", tag],
+                orderby=["-count()"],
+                limit=TOP_VALUES_DEFAULT_LIMIT,
+                # Ensures Snuba will not apply FINAL
+                turbo=sample_rate is not None,
+                sample_rate=sample_rate,
+            )
+            facet_queries.append(
+                (
+                    tag_value_builder.get_snql_query(),
+                    lambda r, tag_name=tag_name, tag=tag: FacetResult(
+                        tag_name, r[tag], int(r["count"]) * multiplier
+                    ),
                 )
+            )
 
         if aggregate_tags:
-            with sentry_sdk.start_span(op="discover.discover", description="facets.aggregate_tags"):
-                aggregate_value_builder = QueryBuilder(
-                    Dataset.Discover,
-                    params,
-                    query=(query if query is not None else "")
-                    + f" tags_key:[{','.join(aggregate_tags)}]",
-                    selected_columns=["count()", "tags_key", "tags_value"],
-                    orderby=["tags_key", "-count()"],
-                    limitby=("tags_key", TOP_VALUES_DEFAULT_LIMIT),
-                    # Ensures Snuba will not apply FINAL
-                    turbo=sample_rate is not None,
-                    sample_rate=sample_rate,
-                )
-                aggregate_values = raw_snql_query(
-                    aggregate_value_builder.get_snql_query(), referrer=referrer
-                )
-                results.extend(
-                    [
-                        FacetResult(r["tags_key"], r["tags_value"], int(r["count"]) * multiplier)
-                        for r in aggregate_values["data"]
-                    ]
+            aggregate_value_builder = QueryBuilder(
+                Dataset.Discover,
+                params,
+                query=(query if query is not None else "")
+                + f" tags_key:[{','.join(aggregate_tags)}]",
+                selected_columns=["count()", "tags_key", "tags_value"],
+                orderby=["tags_key", "-count()"],
+                limitby=("tags_key", TOP_VALUES_DEFAULT_LIMIT),
+                # Ensures Snuba will not apply FINAL
+                turbo=sample_rate is not None,
+                sample_rate=sample_rate,
+            )
+            facet_queries.append(
+                (
+                    aggregate_value_builder.get_snql_query(),
+                    lambda r: FacetResult(
+                        r["tags_key"], r["tags_value"], int(r["count"]) * multiplier
+                    ),
                 )
+            )
+
+        with sentry_sdk.start_span(op="discover.discover", description="facets.values") as span:
+            span.set_data("query_count", len(facet_queries))
+            facet_results = concurrent_bulk_snql_query(
+                [snql_query for snql_query, _ in facet_queries],
+                referrer=referrer,
+                hedge=referrer in settings.SENTRY_SNUBA_HEDGED_REFERRERS,
+            )
+
+        results = []
+        for (_, to_facet), facet_result in zip(facet_queries, facet_results):
+            results.extend([to_facet(r) for r in facet_result["data"]])
 
         return results
 
@@ -11,6 +11,7 @@ from operator import itemgetter
 from typing import (
     Any,
     Collection,
+    Iterable,
     List,
     Literal,
     Mapping,
@@ -78,6 +79,15 @@ def reverse_resolve(index: int) -> str:
     return resolved
 
 
+def bulk_reverse_resolve(indexes: Iterable[int]) -> Mapping[int, str]:
+    indexes = set(indexes)
+    resolved = indexer.bulk_reverse_resolve(indexes)
+    # The indexer should never return None for integers > 0:
+    assert len(resolved) == len(indexes)
+
+    return resolved
+
+
 def reverse_resolve_groupby(index: int) -> Optional[str]:
     if index == 0:
         # When a groupBy is requested with a tag that does not exist for the given
@@ -961,16 +971,17 @@ class MetaFromSnuba:
         )
 
     def get_metrics(self) -> Sequence[MetricMeta]:
-        metric_names = (
+        metric_names = [
             (metric_type, row)
             for metric_type in ("counter", "set", "distribution")
             for row in self._get_metrics_for_entity(METRIC_TYPE_TO_ENTITY[metric_type])
-        )
+        ]
+        names = bulk_reverse_resolve(row["metric_id"] for _, row in metric_names)
 
         return sorted(
             (
                 MetricMeta(
-                    name=reverse_resolve(row["metric_id"]),
+                    name=names[row["metric_id"]],
                     type=metric_type,
                     operations=_AVAILABLE_OPERATIONS[METRIC_TYPE_TO_ENTITY[metric_type].value],
                     unit=None,  # snuba does not know the unit
@@ -998,12 +1009,13 @@ class MetaFromSnuba:
             )
             if data:
                 tag_ids = {tag_id for row in data for tag_id in row["tags.key"]}
+                tag_names = bulk_reverse_resolve(tag_ids)
                 return {
                     "name": metric_name,
                     "type": metric_type,
                     "operations": _AVAILABLE_OPERATIONS[entity_key.value],
                     "tags": sorted(
-                        ({"key": reverse_resolve(tag_id)} for tag_id in tag_ids),
+                        ({"key": tag_name} for tag_name in tag_names.values()),
                         key=itemgetter("key"),
                     ),
                     "unit": None,
@@ -1057,7 +1069,7 @@ class MetaFromSnuba:
         else:
             tag_ids = {tag_id for ids in tag_id_lists for tag_id in ids}
 
-        tags = [{"key": reverse_resolve(tag_id)} for tag_id in tag_ids]
+        tags = [{"key": tag_name} for tag_name in bulk_reverse_resolve(tag_ids).values()]
         tags.sort(key=itemgetter("key"))
 
         return tags
@@ -1100,7 +1112,9 @@ class MetaFromSnuba:
         else:
             value_ids = {value_id for ids in value_id_lists for value_id in ids}
 
-        tags = [{"key": tag_name, "value": reverse_resolve(value_id)} for value_id in value_ids]
+        tags = [
+            {"key": tag_name, "value": value} for value in bulk_reverse_resolve(value_ids).values()
+        ]
         tags.sort(key=itemgetter("key"))
 
         return tags
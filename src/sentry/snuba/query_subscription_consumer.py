@@ -1,7 +1,8 @@
 import logging
 import time
+from collections import defaultdict
 from random import random
-from typing import Any, Callable, Dict, Iterable, List, Optional, cast
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, cast
 
 import jsonschema
 import pytz
@@ -21,8 +22,10 @@ from sentry.utils.batching_kafka_consumer import wait_for_topics
 logger = logging.getLogger(__name__)
 
 TQuerySubscriptionCallable = Callable[[Dict[str, Any], QuerySubscription], None]
+TQuerySubscriptionBatchCallable = Callable[[List[Tuple[Dict[str, Any], QuerySubscription]]], None]
 
 subscriber_registry: Dict[str, TQuerySubscriptionCallable] = {}
+batch_subscriber_registry: Dict[str, TQuerySubscriptionBatchCallable] = {}
 
 
 def register_subscriber(
@@ -37,6 +40,25 @@ def register_subscriber(
     return inner
 
 
+def register_batch_subscriber(
+    subscriber_key: str,
+) -> Callable[[TQuerySubscriptionBatchCallable], TQuerySubscriptionBatchCallable]:
+    """
+    Registers a callback that receives all updates for `subscriber_key` in a poll
+    batch at once, as a list of `(payload, subscription)` tuples in the order they
+    were consumed. Only used when the consumer runs with `max_batch_size` > 1, so a
+    regular subscriber must be registered for the same key as well.
+    """
+
+    def inner(func: TQuerySubscriptionBatchCallable) -> TQuerySubscriptionBatchCallable:
+        if subscriber_key in batch_subscriber_registry:
+            raise Exception("Batch handler already registered for %s" % subscriber_key)
+        batch_subscriber_registry[subscriber_key] = func
+        return func
+
+    return inner
+
+
 class InvalidMessageError(Exception):
     pass
 
@@ -67,6 +89,7 @@ class QuerySubscriptionConsumer:
         commit_batch_timeout_ms: int = 5000,
         initial_offset_reset: str = "earliest",
         force_offset_reset: Optional[str] = None,
+        max_batch_size: int = 1,
     ):
         self.group_id = group_id
         if not topic:
@@ -76,6 +99,9 @@ class QuerySubscriptionConsumer:
         self.topic = topic
         cluster_name: str = settings.KAFKA_TOPICS[topic]["cluster"]
         self.commit_batch_size = commit_batch_size
+        # How many messages to consume and process together. Subscription types with a
+        # batch subscriber registered get all of their updates in one call.
+        self.max_batch_size = max_batch_size
 
         # Adding time based commit behaviour
         self.commit_batch_timeout_ms: int = commit_batch_timeout_ms
@@ -171,27 +197,43 @@ class QuerySubscriptionConsumer:
 
         i = 0
         while not self.__shutdown_requested:
-            message = self.consumer.poll(0.1)
-            if message is None:
+            if self.max_batch_size > 1:
+                messages = self.consumer.consume(self.max_batch_size, 0.1)
+            else:
+                message = self.consumer.poll(0.1)
+                messages = [message] if message is not None else []
+            if not messages:
                 continue
 
-            error = message.error()
-            if error is not None:
-                raise KafkaException(error)
-
-            i = i + 1
-
-            with sentry_sdk.start_transaction(
-                op="handle_message",
-                name="query_subscription_consumer_process_message",
-                sampled=random() <= options.get("subscriptions-query.sample-rate"),
-            ), metrics.timer("snuba_query_subscriber.handle_message"):
-                self.handle_message(message)
-
-            # Track latest completed message here, for use in `shutdown` handler.
-            self.offsets[message.partition()] = message.offset() + 1
-
-            batch_by_size: bool = i % self.commit_batch_size == 0
+            for message in messages:
+                error = message.error()
+                if error is not None:
+                    raise KafkaException(error)
+
+            if len(messages) == 1:
+                with sentry_sdk.start_transaction(
+                    op="handle_message",
+                    name="query_subscription_consumer_process_message",
+                    sampled=random() <= options.get("subscriptions-query.sample-rate"),
+                ), metrics.timer("snuba_query_subscriber.handle_message"):
+                    self.handle_message(messages[0])
+            else:
+                with sentry_sdk.start_transaction(
+                    op="handle_messages",
+                    name="query_subscription_consumer_process_messages",
+                    sampled=random() <= options.get("subscriptions-query.sample-rate"),
+                ), metrics.timer("snuba_query_subscriber.handle_messages"):
+                    self.handle_messages(messages)
+
+            for message in messages:
+                # Track latest completed message here, for use in `shutdown` handler.
+                self.offsets[message.partition()] = message.offset() + 1
+
+            # Commit whenever the batch crosses a multiple of `commit_batch_size`
+            batch_by_size: bool = (i + len(messages)) // self.commit_batch_size > (
+                i // self.commit_batch_size
+            )
+            i = i + len(messages)
             batch_by_time: bool = (
                 self.__batch_deadline is not None and time.time() > self.__batch_deadline
             )
@@ -239,25 +281,11 @@ class QuerySubscriptionConsumer:
         :param message:
         :return:
         """
-        # set a commit time deadline only after the first message for this batch is seen
-        if not self.__batch_deadline:
-            self.__batch_deadline = self.commit_batch_timeout_ms / 1000.0 + time.time()
+        self._start_batch()
 
         with sentry_sdk.push_scope() as scope:
-            try:
-                with metrics.timer("snuba_query_subscriber.parse_message_value"):
-                    contents = self.parse_message_value(message.value())
-            except InvalidMessageError:
-                # If the message is in an invalid format, just log the error
-                # and continue
-                logger.exception(
-                    "Subscription update could not be parsed",
-                    extra={
-                        "offset": message.offset(),
-                        "partition": message.partition(),
-                        "value": message.value(),
-                    },
-                )
+            contents = self._parse_message(message)
+            if contents is None:
                 return
             scope.set_tag("query_subscription_id", contents["subscription_id"])
 
@@ -266,57 +294,150 @@ class QuerySubscriptionConsumer:
                     subscription: QuerySubscription = QuerySubscription.objects.get_from_cache(
                         subscription_id=contents["subscription_id"]
                     )
-                    if subscription.status != QuerySubscription.Status.ACTIVE.value:
-                        metrics.incr("snuba_query_subscriber.subscription_inactive")
-                        return
             except QuerySubscription.DoesNotExist:
-                metrics.incr("snuba_query_subscriber.subscription_doesnt_exist")
-                logger.error(
-                    "Received subscription update, but subscription does not exist",
-                    extra={
-                        "offset": message.offset(),
-                        "partition": message.partition(),
-                        "value": message.value(),
-                    },
-                )
-                try:
-                    _delete_from_snuba(
-                        self.topic_to_dataset[message.topic()], contents["subscription_id"]
-                    )
-                except Exception:
-                    logger.exception("Failed to delete unused subscription from snuba.")
+                self._handle_missing_subscription(message, contents)
                 return
 
-            if subscription.type not in subscriber_registry:
-                metrics.incr("snuba_query_subscriber.subscription_type_not_registered")
-                logger.error(
-                    "Received subscription update, but no subscription handler registered",
-                    extra={
-                        "offset": message.offset(),
-                        "partition": message.partition(),
-                        "value": message.value(),
-                    },
-                )
+            if not self._check_subscription(message, subscription):
                 return
 
             sentry_sdk.set_tag("project_id", subscription.project_id)
             sentry_sdk.set_tag("query_subscription_id", contents["subscription_id"])
+            self._run_callback(message, contents, subscription)
 
-            callback = subscriber_registry[subscription.type]
-            with sentry_sdk.start_span(op="process_message") as span, metrics.timer(
-                "snuba_query_subscriber.callback.duration", instance=subscription.type
+    def handle_messages(self, messages: Sequence[Message]) -> None:
+        """
+        Batch version of `handle_message`. Subscriptions for all messages are fetched
+        at once, and updates for subscription types that have a batch subscriber
+        registered are passed to it in a single call. Everything else is handled one
+        message at a time, like `handle_message` does.
+        """
+        self._start_batch()
+
+        updates = []
+        for message in messages:
+            contents = self._parse_message(message)
+            if contents is not None:
+                updates.append((message, contents))
+        if not updates:
+            return
+
+        with metrics.timer("snuba_query_subscriber.fetch_subscriptions"):
+            subscriptions = {
+                subscription.subscription_id: subscription
+                for subscription in QuerySubscription.objects.get_many_from_cache(
+                    list({contents["subscription_id"] for _, contents in updates}),
+                    key="subscription_id",
+                )
+            }
+
+        batches: Dict[str, List[Tuple[Dict[str, Any], QuerySubscription]]] = defaultdict(list)
+        for message, contents in updates:
+            subscription = subscriptions.get(contents["subscription_id"])
+            if subscription is None:
+                self._handle_missing_subscription(message, contents)
+                continue
+
+            if not self._check_subscription(message, subscription):
+                continue
+
+            if subscription.type in batch_subscriber_registry:
+                batches[subscription.type].append((contents, subscription))
+            else:
+                with sentry_sdk.push_scope() as scope:
+                    scope.set_tag("project_id", subscription.project_id)
+                    scope.set_tag("query_subscription_id", contents["subscription_id"])
+                    self._run_callback(message, contents, subscription)
+
+        for subscription_type, batch in batches.items():
+            callback = batch_subscriber_registry[subscription_type]
+            with sentry_sdk.start_span(op="process_messages") as span, metrics.timer(
+                "snuba_query_subscriber.batch_callback.duration", instance=subscription_type
             ):
-                span.set_data("payload", contents)
-                span.set_data("subscription_dataset", subscription.snuba_query.dataset)
-                span.set_data("subscription_query", subscription.snuba_query.query)
-                span.set_data("subscription_aggregation", subscription.snuba_query.aggregate)
-                span.set_data("subscription_time_window", subscription.snuba_query.time_window)
-                span.set_data("subscription_resolution", subscription.snuba_query.resolution)
-                span.set_data("message_offset", message.offset())
-                span.set_data("message_partition", message.partition())
-                span.set_data("message_value", message.value())
-
-                callback(contents, subscription)
+                span.set_data("batch_size", len(batch))
+                metrics.timing(
+                    "snuba_query_subscriber.batch_callback.size",
+                    len(batch),
+                    tags={"instance": subscription_type},
+                )
+                callback(batch)
+
+    def _start_batch(self) -> None:
+        # set a commit time deadline only after the first message for this batch is seen
+        if not self.__batch_deadline:
+            self.__batch_deadline = self.commit_batch_timeout_ms / 1000.0 + time.time()
+
+    def _parse_message(self, message: Message) -> Optional[Dict[str, Any]]:
+        try:
+            with metrics.timer("snuba_query_subscriber.parse_message_value"):
+                return self.parse_message_value(message.value())
+        except InvalidMessageError:
+            # If the message is in an invalid format, just log the error
+            # and continue
+            logger.exception(
+                "Subscription update could not be parsed",
+                extra={
+                    "offset": message.offset(),
+                    "partition": message.partition(),
+                    "value": message.value(),
+                },
+            )
+            return None
+
+    def _handle_missing_subscription(self, message: Message, contents: Dict[str, Any]) -> None:
+        metrics.incr("snuba_query_subscriber.subscription_doesnt_exist")
+        logger.error(
+            "Received subscription update, but subscription does not exist",
+            extra={
+                "offset": message.offset(),
+                "partition": message.partition(),
+                "value": message.value(),
+            },
+        )
+        try:
+            _delete_from_snuba(self.topic_to_dataset[message.topic()], contents["subscription_id"])
+        except Exception:
+            logger.exception("Failed to delete unused subscription from snuba.")
+
+    def _check_subscription(self, message: Message, subscription: QuerySubscription) -> bool:
+        """
+        Checks whether updates for `subscription` should be passed on to a subscriber.
+        """
+        if subscription.status != QuerySubscription.Status.ACTIVE.value:
+            metrics.incr("snuba_query_subscriber.subscription_inactive")
+            return False
+
+        if subscription.type not in subscriber_registry:
+            metrics.incr("snuba_query_subscriber.subscription_type_not_registered")
+            logger.error(
+                "Received subscription update, but no subscription handler registered",
+                extra={
+                    "offset": message.offset(),
+                    "partition": message.partition(),
+                    "value": message.value(),
+                },
+            )
+            return False
+        return True
+
+    def _run_callback(
+        self, message: Message, contents: Dict[str, Any], subscription: QuerySubscription
+    ) -> None:
+        callback = subscriber_registry[subscription.type]
+        with sentry_sdk.start_span(op="process_message") as span, metrics.timer(
+            "snuba_query_subscriber.callback.duration", instance=subscription.type
+        ):
+            span.set_data("payload", contents)
+            span.set_data("subscription_dataset", subscription.snuba_query.dataset)
+            span.set_data("subscription_query", subscription.snuba_query.query)
+            span.set_data("subscription_aggregation", subscription.snuba_query.aggregate)
+            span.set_data("subscription_time_window", subscription.snuba_query.time_window)
+            span.set_data("subscription_resolution", subscription.snuba_query.resolution)
+            span.set_data("message_offset", message.offset())
+            span.set_data("message_partition", message.partition())
+            span.set_data("message_value", message.value())
+
+            callback(contents, subscription)
 
     def parse_message_value(self, value: str) -> Dict[str, Any]:
         """
@@ -36,6 +36,7 @@ from sentry.tagstore.exceptions import (
     TagKeyNotFound,
     TagValueNotFound,
 )
+from sentry.tagstore.snuba.planner import TagQuery, get_planner
 from sentry.tagstore.types import GroupTagKey, GroupTagValue, TagKey, TagValue
 from sentry.utils import metrics, snuba
 from sentry.utils.dates import to_timestamp
@@ -123,18 +124,19 @@ class SnubaTagStorage(TagStorage):
             ["max", SEEN_COLUMN, "last_seen"],
         ]
 
-        result, totals = snuba.query(
-            dataset=Dataset.Events,
-            start=kwargs.get("start"),
-            end=kwargs.get("end"),
-            groupby=[tag],
-            conditions=conditions,
-            filter_keys=filters,
-            aggregations=aggregations,
-            orderby="-count",
-            limit=limit,
-            totals=True,
-            referrer="tagstore.__get_tag_key_and_top_values",
+        result, totals = get_planner().query(
+            TagQuery(
+                start=kwargs.get("start"),
+                end=kwargs.get("end"),
+                groupby=[tag],
+                conditions=conditions,
+                filter_keys=filters,
+                aggregations=aggregations,
+                orderby="-count",
+                limit=limit,
+                totals=True,
+                referrer="tagstore.__get_tag_key_and_top_values",
+            )
         )
 
         if raise_on_empty and (not result or totals.get("count", 0) == 0):
@@ -216,47 +218,36 @@ class SnubaTagStorage(TagStorage):
         This is done by changing the rounding of the end key to a random offset. See snuba.quantize_time for
         further explanation of how that is done.
         """
-        default_start, default_end = default_start_end_dates()
-        if start is None:
-            start = default_start
-        if end is None:
-            end = default_end
-
-        filters = {"project_id": sorted(projects)}
-        if environments:
-            filters["environment"] = sorted(environments)
-        if group_id is not None:
-            filters["group_id"] = [group_id]
-        if keys is not None:
-            filters["tags_key"] = sorted(keys)
-        aggregations = [["count()", "", "count"]]
-
-        if include_values_seen:
-            aggregations.append(["uniq", "tags_value", "values_seen"])
-        conditions = [DEFAULT_TYPE_CONDITION]
-        conditions = []
+        query = self.__get_tag_keys_query(
+            projects,
+            group_id,
+            environments,
+            start,
+            end,
+            limit,
+            keys,
+            include_values_seen=include_values_seen,
+            include_transactions=include_transactions,
+            **kwargs,
+        )
 
         should_cache = use_cache and group_id is None
         result = None
 
-        dataset = Dataset.Events
-        if include_transactions:
-            dataset = Dataset.Discover
-
         cache_key = None
         if should_cache:
-            filtering_strings = [f"{key}={value}" for key, value in filters.items()]
-            filtering_strings.append(f"dataset={dataset.name}")
+            filtering_strings = [f"{key}={value}" for key, value in query.filter_keys.items()]
+            filtering_strings.append(f"dataset={query.dataset.name}")
             cache_key = "tagstore.__get_tag_keys:{}".format(
                 md5_text(*filtering_strings).hexdigest()
             )
             key_hash = hash(cache_key)
 
             # Needs to happen before creating the cache suffix otherwise rounding will cause different durations
-            duration = (end - start).total_seconds()
+            duration = (query.end - query.start).total_seconds()
             # Cause there's rounding to create this cache suffix, we want to update the query end so results match
-            end = snuba.quantize_time(end, key_hash)
-            cache_key += f":{duration}@{end.isoformat()}"
+            query.end = snuba.quantize_time(query.end, key_hash)
+            cache_key += f":{duration}@{query.end.isoformat()}"
             result = cache.get(cache_key, None)
             if result is not None:
                 metrics.incr("testing.tagstore.cache_tag_key.hit")
@@ -265,22 +256,76 @@ class SnubaTagStorage(TagStorage):
 
         if result is None:
             result = snuba.query(
-                dataset=dataset,
-                start=start,
-                end=end,
-                groupby=["tags_key"],
-                conditions=conditions,
-                filter_keys=filters,
-                aggregations=aggregations,
-                limit=limit,
-                orderby="-count",
-                referrer="tagstore.__get_tag_keys",
-                **kwargs,
+                dataset=query.dataset,
+                start=query.start,
+                end=query.end,
+                groupby=query.groupby,
+                conditions=query.conditions,
+                filter_keys=query.filter_keys,
+                aggregations=query.aggregations,
+                limit=query.limit,
+                orderby=query.orderby,
+                referrer=query.referrer,
+                **query.extra,
             )
             if should_cache:
                 cache.set(cache_key, result, 300)
                 metrics.incr("testing.tagstore.cache_tag_key.len", amount=len(result))
 
+        return self.__make_tag_keys(result, group_id, include_values_seen)
+
+    def __get_tag_keys_query(
+        self,
+        projects,
+        group_id,
+        environments,
+        start,
+        end,
+        limit=1000,
+        keys=None,
+        include_values_seen=True,
+        include_transactions=False,
+        **kwargs,
+    ):
+        default_start, default_end = default_start_end_dates()
+        if start is None:
+            start = default_start
+        if end is None:
+            end = default_end
+
+        filters = {"project_id": sorted(projects)}
+        if environments:
+            filters["environment"] = sorted(environments)
+        if group_id is not None:
+            filters["group_id"] = [group_id]
+        if keys is not None:
+            filters["tags_key"] = sorted(keys)
+        aggregations = [["count()", "", "count"]]
+
+        if include_values_seen:
+            aggregations.append(["uniq", "tags_value", "values_seen"])
+        conditions = [DEFAULT_TYPE_CONDITION]
+        conditions = []
+
+        dataset = Dataset.Events
+        if include_transactions:
+            dataset = Dataset.Discover
+
+        return TagQuery(
+            dataset=dataset,
+            start=start,
+            end=end,
+            groupby=["tags_key"],
+            conditions=conditions,
+            filter_keys=filters,
+            aggregations=aggregations,
+            limit=limit,
+            orderby="-count",
+            referrer="tagstore.__get_tag_keys",
+            extra=kwargs,
+        )
+
+    def __make_tag_keys(self, result, group_id, include_values_seen):
         if group_id is None:
             ctor = TagKey
         else:
@@ -472,12 +517,13 @@ class SnubaTagStorage(TagStorage):
         conditions = [[tag, "!=", ""]]
         aggregations = [["count()", "", "count"]]
 
-        return snuba.query(
-            dataset=Dataset.Events,
-            conditions=conditions,
-            filter_keys=filters,
-            aggregations=aggregations,
-            referrer="tagstore.get_group_tag_value_count",
+        return get_planner().query(
+            TagQuery(
+                conditions=conditions,
+                filter_keys=filters,
+                aggregations=aggregations,
+                referrer="tagstore.get_group_tag_value_count",
+            )
         )
 
     def get_top_group_tag_values(
@@ -501,10 +547,21 @@ class SnubaTagStorage(TagStorage):
         # of top values for each key, so the total rows returned should be
         # num_keys * limit.
 
-        # First get totals and unique counts by key.
-        keys_with_counts = self.get_group_tag_keys(project_id, group_id, environment_ids, keys=keys)
+        # Get totals and unique counts by key, along with the top values with
+        # first_seen/last_seen/count for each.
+        # Like `get_group_tag_keys`, the keys are counted over the default
+        # window rather than the one of the values.
+        keys_query = self.__get_tag_keys_query(
+            get_project_list(project_id),
+            group_id,
+            environment_ids,
+            None,
+            None,
+            limit=None,
+            keys=keys,
+            include_values_seen=False,
+        )
 
-        # Then get the top values with first_seen/last_seen/count for each
         filters = {"project_id": get_project_list(project_id)}
         if environment_ids:
             filters["environment"] = environment_ids
@@ -521,8 +578,7 @@ class SnubaTagStorage(TagStorage):
             ["max", SEEN_COLUMN, "last_seen"],
         ]
 
-        values_by_key = snuba.query(
-            dataset=Dataset.Events,
+        values_query = TagQuery(
             start=kwargs.get("start"),
             end=kwargs.get("end"),
             groupby=["tags_key", "tags_value"],
@@ -534,6 +590,9 @@ class SnubaTagStorage(TagStorage):
             referrer="tagstore.__get_tag_keys_and_top_values",
         )
 
+        keys_result, values_by_key = get_planner().query_many([keys_query, values_query])
+        keys_with_counts = self.__make_tag_keys(keys_result, group_id, include_values_seen=False)
+
         # Then supplement the key objects with the top values for each.
         if group_id is None:
             value_ctor = TagValue
@@ -664,16 +723,16 @@ class SnubaTagStorage(TagStorage):
             filters["environment"] = environment_ids
         aggregations = [["uniq", "tags[sentry:user]", "count"]]
 
-        result = snuba.query(
-            dataset=Dataset.Events,
-            start=start,
-            end=end,
-            groupby=["group_id"],
-            conditions=None,
-            filter_keys=filters,
-            aggregations=aggregations,
-            orderby="-count",
-            referrer="tagstore.get_groups_user_counts",
+        result = get_planner().query(
+            TagQuery(
+                start=start,
+                end=end,
+                groupby=["group_id"],
+                filter_keys=filters,
+                aggregations=aggregations,
+                orderby="-count",
+                referrer="tagstore.get_groups_user_counts",
+            )
         )
 
         return defaultdict(int, {k: v for k, v in result.items() if v})
@@ -0,0 +1,217 @@
+"""
+Coalesces the Snuba queries of the tag storage.
+
+Tag lookups for the same issue are often answered by queries that only differ
+in their aggregations or their limit. Queries that are planned together are
+fused when they share their referrer, dataset, filters, conditions, grouping,
+ordering and time window: the fused query selects the aggregations of all of
+them with the largest of their limits, and its rows are split back into the
+result of each query. The fused queries of each referrer are then sent to
+Snuba in a single batch, so queries stay attributed to their referrer.
+
+While a request is handled, the results of fused queries are remembered, so
+lookups that are repeated, or that are covered by an earlier lookup, don't
+query Snuba again.
+"""
+
+import threading
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, List, Mapping, Optional, Sequence
+
+from celery.signals import task_failure, task_success
+from django.core.signals import request_finished
+
+from sentry import app
+from sentry.snuba.dataset import Dataset
+from sentry.utils import metrics, snuba
+
+_memo = threading.local()
+
+
+@dataclass
+class TagQuery:
+    referrer: str
+    filter_keys: Mapping[str, Sequence[Any]]
+    aggregations: Sequence[Sequence[Any]]
+    dataset: Dataset = Dataset.Events
+    conditions: Sequence[Any] = field(default_factory=list)
+    groupby: Sequence[str] = field(default_factory=list)
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+    orderby: Optional[str] = None
+    limit: Optional[int] = None
+    limitby: Optional[Sequence[Any]] = None
+    totals: bool = False
+    extra: Mapping[str, Any] = field(default_factory=dict)
+
+    @property
+    def scope(self) -> str:
+        """
+        Identifies the queries that can be fused with this one.
+        """
+        return repr(
+            (
+                self.referrer,
+                self.dataset,
+                sorted(self.filter_keys.items()),
+                self.conditions,
+                self.groupby,
+                self.start,
+                self.end,
+                self.orderby,
+                self.limitby,
+                self.totals,
+                sorted(self.extra.items()),
+                # Only the rows of the outermost group can be truncated.
+                self.limit if len(self.groupby) > 1 else None,
+            )
+        )
+
+    @property
+    def aliases(self) -> Sequence[str]:
+        return [aggregation[2] for aggregation in self.aggregations]
+
+
+class FusedQuery:
+    def __init__(self, query: TagQuery) -> None:
+        self.query = query
+        self.scope = query.scope
+        self.aggregations: Mapping[str, Sequence[Any]] = OrderedDict()
+        self.limit = query.limit
+        self.body = None
+
+    def can_fuse(self, query: TagQuery) -> bool:
+        return query.scope == self.scope and all(
+            list(self.aggregations.get(aggregation[2], aggregation)) == list(aggregation)
+            for aggregation in query.aggregations
+        )
+
+    def covers(self, query: TagQuery) -> bool:
+        return (
+            self.can_fuse(query)
+            and all(alias in self.aggregations for alias in query.aliases)
+            and (self.limit is None or (query.limit is not None and query.limit <= self.limit))
+        )
+
+    def add(self, query: TagQuery) -> None:
+        for aggregation in query.aggregations:
+            self.aggregations.setdefault(aggregation[2], aggregation)
+        if self.limit is not None:
+            self.limit = None if query.limit is None else max(self.limit, query.limit)
+
+    def get_kwargs(self) -> Mapping[str, Any]:
+        query = self.query
+        return dict(
+            dataset=query.dataset,
+            start=query.start,
+            end=query.end,
+            groupby=list(query.groupby),
+            conditions=list(query.conditions),
+            filter_keys=dict(query.filter_keys),
+            aggregations=[list(aggregation) for aggregation in self.aggregations.values()],
+            orderby=query.orderby,
+            limit=self.limit,
+            limitby=query.limitby,
+            totals=query.totals or None,
+            **query.extra,
+        )
+
+    def get_result(self, query: TagQuery) -> Any:
+        """
+        Returns the result of `query` in the shape of ``snuba.query``.
+        """
+        if self.body is None:
+            return (OrderedDict(), {}) if query.totals else OrderedDict()
+
+        rows = self.body["data"]
+        if query.limit is not None:
+            rows = rows[: query.limit]
+        result = snuba.nest_groups(rows, list(query.groupby), query.aliases)
+        if query.totals:
+            totals = self.body.get("totals", {})
+            return result, {alias: totals[alias] for alias in query.aliases if alias in totals}
+        return result
+
+
+class TagQueryPlanner:
+    def __init__(self, memo: Optional[Mapping[str, List[FusedQuery]]] = None) -> None:
+        self.memo = memo if memo is not None else defaultdict(list)
+
+    def query(self, query: TagQuery) -> Any:
+        return self.query_many([query])[0]
+
+    def query_many(self, queries: Sequence[TagQuery]) -> Sequence[Any]:
+        """
+        Runs `queries` with as few Snuba queries as possible, and returns
+        their results in order.
+        """
+        pending: List[FusedQuery] = []
+        plan = []
+        for query in queries:
+            fused = next((f for f in self.memo[query.scope] if f.covers(query)), None)
+            if fused is None:
+                fused = next((f for f in pending if f.can_fuse(query)), None)
+                if fused is None:
+                    fused = FusedQuery(query)
+                    pending.append(fused)
+                fused.add(query)
+            plan.append(fused)
+
+        metrics.incr("tagstore.planner.queries", amount=len(queries))
+        if pending:
+            metrics.incr("tagstore.planner.snuba_queries", amount=len(pending))
+            self.execute(pending)
+            for fused in pending:
+                self.memo[fused.scope].append(fused)
+
+        return [fused.get_result(query) for fused, query in zip(plan, queries)]
+
+    def execute(self, pending: Sequence[FusedQuery]) -> None:
+        by_referrer = defaultdict(list)
+        for fused in pending:
+            by_referrer[fused.query.referrer].append(fused)
+
+        for referrer, batch in by_referrer.items():
+            try:
+                bodies = list(
+                    snuba.bulk_raw_query(
+                        [snuba.SnubaQueryParams(**fused.get_kwargs()) for fused in batch],
+                        referrer=referrer,
+                    )
+                )
+            except (snuba.QueryOutsideRetentionError, snuba.QueryOutsideGroupActivityError):
+                # Queries outside of the retention or of the activity of their
+                # groups have no results, but fail the batch they're part of.
+                bodies = [self.execute_one(fused) for fused in batch]
+
+            for fused, body in zip(batch, bodies):
+                fused.body = body
+
+    def execute_one(self, fused: FusedQuery) -> Optional[Mapping[str, Any]]:
+        try:
+            return snuba.raw_query(referrer=fused.query.referrer, **fused.get_kwargs())
+        except (snuba.QueryOutsideRetentionError, snuba.QueryOutsideGroupActivityError):
+            return None
+
+
+def get_planner() -> TagQueryPlanner:
+    """
+    Returns a planner that remembers results for the current request.
+    """
+    if app.env.request is None:
+        return TagQueryPlanner()
+
+    if not hasattr(_memo, "queries"):
+        _memo.queries = defaultdict(list)
+    return TagQueryPlanner(_memo.queries)
+
+
+def clear_memo(**kwargs):
+    _memo.queries = defaultdict(list)
+
+
+request_finished.connect(clear_memo)
+task_failure.connect(clear_memo)
+task_success.connect(clear_memo)
@@ -244,7 +244,8 @@ def assemble_artifacts(org_id, version, checksum, chunks, **kwargs):
 
         archive_filename = f"release-artifacts-{uuid.uuid4().hex}.zip"
 
-        # Assemble the chunks into a temporary file
+        # Assemble the chunks. The bundle is only read through the zip index,
+        # so there is no need for a temporary copy of the whole file.
         rv = assemble_file(
             AssembleTask.ARTIFACTS,
             organization,
@@ -252,6 +253,7 @@ def assemble_artifacts(org_id, version, checksum, chunks, **kwargs):
             checksum,
             chunks,
             file_type="release.bundle",
+            as_stream=True,
         )
 
         # If not file has been created this means that the file failed to
@@ -328,13 +330,15 @@ def assemble_artifacts(org_id, version, checksum, chunks, **kwargs):
         set_assemble_status(AssembleTask.ARTIFACTS, org_id, checksum, ChunkFileState.OK)
 
 
-def assemble_file(task, org_or_project, name, checksum, chunks, file_type):
+def assemble_file(task, org_or_project, name, checksum, chunks, file_type, as_stream=False):
     """
     Verifies and assembles a file model from chunks.
 
     This downloads all chunks from blob store to verify their integrity and
     associates them with a created file model. Additionally, it assembles the
     full file in a temporary location and verifies the complete content hash.
+    With ``as_stream`` no temporary file is written and a reader over the
+    assembled file is returned in its place.
 
     Returns a tuple ``(File, TempFile)`` on success, or ``None`` on error.
     """
@@ -381,7 +385,7 @@ def assemble_file(task, org_or_project, name, checksum, chunks, file_type):
 
     file = File.objects.create(name=name, checksum=checksum, type=file_type)
     try:
-        temp_file = file.assemble_from_file_blob_ids(file_blob_ids, checksum)
+        temp_file = file.assemble_from_file_blob_ids(file_blob_ids, checksum, as_stream=as_stream)
     except AssembleChecksumMismatch:
         file.delete()
         set_assemble_status(
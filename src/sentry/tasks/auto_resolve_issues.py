@@ -14,6 +14,7 @@ from sentry.models import (
     remove_group_from_inbox,
 )
 from sentry.models.grouphistory import GroupHistoryStatus, record_group_history
+from sentry.search.snuba import candidates as search_candidates
 from sentry.tasks.base import instrumented_task
 from sentry.tasks.integrations import kick_off_status_syncs
 
@@ -85,6 +86,9 @@ def auto_resolve_project_issues(project_id, cutoff=None, chunk_size=1000, **kwar
                 kwargs={"project_id": group.project_id, "group_id": group.id}
             )
 
+    if queryset:
+        search_candidates.invalidate(project.id)
+
     if might_have_more:
         auto_resolve_project_issues.delay(
             project_id=project_id, cutoff=int(cutoff.strftime("%s")), chunk_size=chunk_size
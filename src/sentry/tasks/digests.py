@@ -1,12 +1,14 @@
 import logging
 import time
 
+from sentry import options
 from sentry.digests import get_option_key
 from sentry.digests.backends.base import InvalidState
-from sentry.digests.notifications import build_digest, split_key
+from sentry.digests.notifications import build_digest, fetch_states, parse_key, split_key
 from sentry.models import Project, ProjectOption
 from sentry.tasks.base import instrumented_task
 from sentry.utils import snuba
+from sentry.utils.iterators import chunked
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +30,12 @@ def schedule_digests():
     timeout = 300
     digests.maintenance(deadline - timeout)
 
+    batch_size = options.get("digests.delivery-batch-size")
+    if batch_size > 1:
+        for entries in chunked(digests.schedule(deadline), batch_size):
+            deliver_digests.delay([entry.key for entry in entries])
+        return
+
     for entry in digests.schedule(deadline):
         deliver_digest.delay(entry.key, entry.timestamp)
 
@@ -68,3 +76,58 @@ def deliver_digest(key, schedule_timestamp=None):
                     "build_digest_logs": logs,
                 },
             )
+
+
+@instrumented_task(name="sentry.tasks.digests.deliver_digests", queue="digests.delivery")
+def deliver_digests(keys):
+    """
+    Delivers the digests of many timelines. The timelines are opened together,
+    and the groups and rules of all of their records are fetched at once.
+    """
+    from sentry import digests
+    from sentry.mail import mail_adapter
+
+    targets = {key: parse_key(key) for key in keys}
+    projects = Project.objects.in_bulk({project_id for project_id, _, _ in targets.values()})
+    for key, (project_id, _, _) in list(targets.items()):
+        if project_id not in projects:
+            logger.info(f"Cannot deliver digest {key} due to missing project {project_id}")
+            digests.delete(key)
+            del targets[key]
+
+    minimum_delays = {}
+    for project in projects.values():
+        minimum_delays[project.id] = ProjectOption.objects.get_value(
+            project, get_option_key("mail", "minimum_delay")
+        )
+
+    with snuba.options_override({"consistent": True}):
+        with digests.digest_many(
+            list(targets),
+            minimum_delays={key: minimum_delays[target[0]] for key, target in targets.items()},
+        ) as records_by_key:
+            keys = [key for key in targets if key in records_by_key]
+            states = fetch_states(
+                [(projects[targets[key][0]], records_by_key[key]) for key in keys]
+            )
+            built = [
+                (key, build_digest(projects[targets[key][0]], records_by_key[key], state))
+                for key, state in zip(keys, states)
+            ]
+
+        for key, (digest, logs) in built:
+            project_id, target_type, target_identifier = targets[key]
+            if digest:
+                mail_adapter.notify_digest(
+                    projects[project_id], digest, target_type, target_identifier
+                )
+            else:
+                logger.info(
+                    "Skipped digest delivery due to empty digest",
+                    extra={
+                        "project": project_id,
+                        "target_type": target_type.value,
+                        "target_identifier": target_identifier,
+                        "build_digest_logs": logs,
+                    },
+                )
@@ -6,6 +6,7 @@ from django.db.models import F
 from sentry import eventstream, similarity
 from sentry.app import tsdb
 from sentry.tasks.base import instrumented_task, track_group_async_operation
+from sentry.utils import metrics
 
 logger = logging.getLogger("sentry.merge")
 delete_logger = logging.getLogger("sentry.deletions.async")
@@ -13,6 +14,9 @@ delete_logger = logging.getLogger("sentry.deletions.async")
 
 EXTRA_MERGE_MODELS = []
 
+# How many chunks of rows `merge_groups` moves before it recurses.
+MERGE_CHUNKS_PER_TASK = 10
+
 
 @instrumented_task(
     name="sentry.tasks.merge.merge_groups",
@@ -102,7 +106,12 @@ def merge_groups(
         )
 
         has_more = merge_objects(
-            model_list, group, new_group, logger=logger, transaction_id=transaction_id
+            model_list,
+            group,
+            new_group,
+            logger=logger,
+            transaction_id=transaction_id,
+            max_chunks=MERGE_CHUNKS_PER_TASK,
         )
 
         if not has_more:
@@ -215,8 +224,18 @@ def _get_event_environment(event, project, cache):
     return cache[environment_name]
 
 
-def merge_objects(models, group, new_group, limit=1000, logger=None, transaction_id=None):
-    has_more = False
+def merge_objects(
+    models, group, new_group, limit=1000, logger=None, transaction_id=None, max_chunks=1
+):
+    """
+    Moves the rows of `models` from `group` to `new_group`, up to `limit` rows
+    at a time and up to `max_chunks` times. Returns whether rows are left.
+
+    Each chunk is moved with a single update. If a row of the chunk conflicts
+    with a row of `new_group`, the chunk is moved row by row instead, and the
+    conflicting rows are merged into `new_group` and deleted.
+    """
+    chunks = 0
     for model in models:
         all_fields = [f.name for f in model._meta.get_fields()]
 
@@ -235,40 +254,65 @@ def merge_objects(models, group, new_group, limit=1000, logger=None, transaction
         has_group = "group" in all_fields
         if has_group:
             queryset = project_qs.filter(group=group)
+            values = {"group": new_group}
         else:
             queryset = project_qs.filter(group_id=group.id)
+            values = {"group_id": new_group.id}
+
+        while True:
+            if chunks >= max_chunks:
+                return True
+
+            ids = list(queryset.values_list("id", flat=True)[:limit])
+            if not ids:
+                break
+            chunks += 1
 
-        for obj in queryset[:limit]:
             try:
                 with transaction.atomic(using=router.db_for_write(model)):
-                    if has_group:
-                        project_qs.filter(id=obj.id).update(group=new_group)
-                    else:
-                        project_qs.filter(id=obj.id).update(group_id=new_group.id)
+                    project_qs.filter(id__in=ids).update(**values)
             except IntegrityError:
-                delete = True
-            else:
-                delete = False
-
-            if delete:
-                # Before deleting, we want to merge in counts
-                if hasattr(model, "merge_counts"):
-                    obj.merge_counts(new_group)
-
-                obj_id = obj.id
-                obj.delete()
-
-                if logger is not None:
-                    delete_logger.debug(
-                        "object.delete.executed",
-                        extra={
-                            "object_id": obj_id,
-                            "transaction_id": transaction_id,
-                            "model": model.__name__,
-                        },
-                    )
-            has_more = True
-
-        if has_more:
-            return True
-    return has_more
+                merge_objects_by_row(
+                    model, project_qs, ids, values, new_group, logger, transaction_id
+                )
+
+            metrics.incr(
+                "merge.objects_migrated",
+                amount=len(ids),
+                tags={"model": model.__name__},
+                sample_rate=1.0,
+            )
+
+            if len(ids) < limit:
+                break
+
+    return False
+
+
+def merge_objects_by_row(model, project_qs, ids, values, new_group, logger, transaction_id):
+    for obj in project_qs.filter(id__in=ids):
+        try:
+            with transaction.atomic(using=router.db_for_write(model)):
+                project_qs.filter(id=obj.id).update(**values)
+        except IntegrityError:
+            delete = True
+        else:
+            delete = False
+
+        if delete:
+            # Before deleting, we want to merge in counts
+            if hasattr(model, "merge_counts"):
+                obj.merge_counts(new_group)
+
+            obj_id = obj.id
+            obj.delete()
+
+            if logger is not None:
+                delete_logger.debug(
+                    "object.delete.executed",
+                    extra={
+                        "object_id": obj_id,
+                        "transaction_id": transaction_id,
+                        "model": model.__name__,
+                    },
+                )
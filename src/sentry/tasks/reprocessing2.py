@@ -9,8 +9,12 @@ from sentry.eventstore.models import Event
 from sentry.reprocessing2 import buffered_delete_old_primary_hash
 from sentry.tasks.base import instrumented_task, retry
 from sentry.utils import metrics
+from sentry.utils.dates import to_datetime, to_timestamp
 from sentry.utils.query import celery_run_batch_query
 
+# How long a slice waits for one of the concurrent slots to become free.
+SLICE_THROTTLE_DELAY = 10
+
 
 @instrumented_task(
     name="sentry.tasks.reprocessing2.reprocess_group",
@@ -35,8 +39,10 @@ def reprocess_group(
         CannotReprocess,
         buffered_handle_remaining_events,
         logger,
+        plan_group_reprocessing,
         reprocess_event,
         start_group_reprocessing,
+        start_reprocessing_slices,
     )
 
     sentry_sdk.set_tag("is_start", "false")
@@ -55,6 +61,25 @@ def reprocess_group(
             remaining_events=remaining_events,
         )
 
+        slices, cutoff = plan_group_reprocessing(project_id, group_id, max_events=max_events)
+        metrics.timing("events.reprocessing.slices", len(slices), sample_rate=1.0)
+        start_reprocessing_slices(group_id, slices)
+
+        for slice_index in range(len(slices)):
+            reprocess_group_slice.delay(
+                project_id=project_id,
+                group_id=group_id,
+                new_group_id=new_group_id,
+                slice_index=slice_index,
+                start_time=start_time,
+                cutoff=cutoff,
+                remaining_events=remaining_events,
+            )
+
+        return
+
+    # Pages through the group on its own, which only reprocessing that was
+    # started before groups were split into slices still does.
     assert new_group_id is not None
 
     query_state, events = celery_run_batch_query(
@@ -124,6 +149,158 @@ def reprocess_group(
     )
 
 
+@instrumented_task(
+    name="sentry.tasks.reprocessing2.reprocess_group_slice",
+    queue="events.reprocessing.process_event",
+    time_limit=120,
+    soft_time_limit=110,
+    acks_late=True,
+)
+def reprocess_group_slice(
+    project_id,
+    group_id,
+    new_group_id,
+    slice_index,
+    start_time,
+    cutoff=None,
+    remaining_events="delete",
+):
+    """
+    Reprocesses one time slice of a group, see `plan_group_reprocessing`.
+
+    Each run reprocesses a page of events and reschedules itself. The slice
+    stores its checkpoint after every event it hands off, so a run that is
+    retried or redelivered, for example after hitting the time limit,
+    continues after the last event that was handled. Only that event can be
+    handled twice. Events older than `cutoff` are handled as remaining
+    events.
+    """
+    sentry_sdk.set_tag("project", project_id)
+    sentry_sdk.set_tag("group_id", group_id)
+
+    from sentry.reprocessing2 import (
+        CannotReprocess,
+        acquire_reprocessing_slot,
+        buffered_handle_remaining_events,
+        decrement_pending_events,
+        finish_reprocessing_slice,
+        get_slice_checkpoint,
+        logger,
+        release_reprocessing_slot,
+        reprocess_event,
+        save_slice_checkpoint,
+    )
+
+    task_kwargs = dict(
+        project_id=project_id,
+        group_id=group_id,
+        new_group_id=new_group_id,
+        slice_index=slice_index,
+        start_time=start_time,
+        cutoff=cutoff,
+        remaining_events=remaining_events,
+    )
+
+    checkpoint = get_slice_checkpoint(group_id, slice_index)
+    if checkpoint is None:
+        # The slice was completed by a previous attempt.
+        return
+
+    lease = f"{group_id}:{slice_index}"
+    if not acquire_reprocessing_slot(lease):
+        metrics.incr("events.reprocessing.slice_throttled", sample_rate=1.0)
+        reprocess_group_slice.apply_async(kwargs=task_kwargs, countdown=SLICE_THROTTLE_DELAY)
+        return
+
+    try:
+        _, events = celery_run_batch_query(
+            filter=eventstore.Filter(
+                project_ids=[project_id],
+                group_ids=[group_id],
+                start=to_datetime(checkpoint["start"]),
+                end=to_datetime(checkpoint["end"]),
+            ),
+            batch_size=settings.SENTRY_REPROCESSING_PAGE_SIZE,
+            state=checkpoint["query_state"],
+            referrer="reprocessing2.reprocess_group_slice",
+        )
+
+        past_cutoff = checkpoint.get("past_cutoff", False)
+
+        for event in events:
+            if cutoff is None:
+                reprocess = True
+            else:
+                # Events come in Snuba's order, newest first, and events of the
+                # same second never span two slices. Within the cutoff second,
+                # events are newer than the cutoff event until the cutoff event
+                # itself is seen. Comparing event IDs here would not match
+                # Snuba's order of UUIDs.
+                timestamp = to_timestamp(event.datetime)
+                reprocess = timestamp > cutoff[0] or timestamp == cutoff[0] and not past_cutoff
+                past_cutoff = past_cutoff or timestamp < cutoff[0] or event.event_id == cutoff[1]
+
+            reprocessed = False
+            if reprocess:
+                with sentry_sdk.start_span(op="reprocess_event"):
+                    try:
+                        reprocess_event(
+                            project_id=project_id,
+                            event_id=event.event_id,
+                            start_time=start_time,
+                        )
+                    except CannotReprocess as e:
+                        logger.error(f"reprocessing2.{e}")
+                    except Exception:
+                        sentry_sdk.capture_exception()
+                    else:
+                        reprocessed = True
+
+                if not reprocessed:
+                    # The event won't be reprocessed, so it can't be counted
+                    # once it's done, see `get_progress`.
+                    decrement_pending_events(group_id)
+
+            if not reprocessed:
+                # In case of errors while kicking off reprocessing or if the
+                # event is older than the cutoff, do the default action.
+                buffered_handle_remaining_events(
+                    project_id=project_id,
+                    old_group_id=group_id,
+                    new_group_id=new_group_id,
+                    datetime_to_event=[(event.datetime, event.event_id)],
+                    remaining_events=remaining_events,
+                )
+
+            # The task is acked late, so a redelivered run must not hand off
+            # or count any event that was already handled.
+            save_slice_checkpoint(
+                group_id,
+                slice_index,
+                {
+                    **checkpoint,
+                    "query_state": {"timestamp": event.timestamp, "event_id": event.event_id},
+                    "past_cutoff": past_cutoff,
+                },
+            )
+    finally:
+        release_reprocessing_slot(lease)
+
+    if events:
+        reprocess_group_slice.delay(**task_kwargs)
+    elif finish_reprocessing_slice(group_id, slice_index):
+        # The last slice to finish migrates the remaining events of all slices
+        # that are still buffered.
+        buffered_handle_remaining_events(
+            project_id=project_id,
+            old_group_id=group_id,
+            new_group_id=new_group_id,
+            datetime_to_event=[],
+            remaining_events=remaining_events,
+            force_flush_batch=True,
+        )
+
+
 @instrumented_task(
     name="sentry.tasks.reprocessing2.handle_remaining_events",
     queue="events.reprocessing.process_event",
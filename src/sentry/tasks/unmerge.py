@@ -24,6 +24,7 @@ from sentry.models import (
 )
 from sentry.tasks.base import instrumented_task
 from sentry.unmerge import InitialUnmergeArgs, SuccessiveUnmergeArgs, UnmergeArgs, UnmergeArgsBase
+from sentry.utils import metrics
 from sentry.utils.query import celery_run_batch_query
 from sentry.utils.safe import get_path
 
@@ -412,16 +413,27 @@ def collect_tsdb_data(caches, project, events):
 def repair_tsdb_data(caches, project, events):
     counters, sets, frequencies = collect_tsdb_data(caches, project, events)
 
+    # The counters of all timestamps are incremented with one call per
+    # environment, and the sets with one call per timestamp and environment.
+    counter_items = defaultdict(list)
     for timestamp, data in counters.items():
         for model, keys in data.items():
             for (key, environment_id), value in keys.items():
-                tsdb.incr(model, key, timestamp, value, environment_id=environment_id)
+                counter_items[environment_id].append(
+                    (model, key, {"timestamp": timestamp, "count": value})
+                )
+
+    for environment_id, items in counter_items.items():
+        tsdb.incr_multi(items, environment_id=environment_id)
 
     for timestamp, data in sets.items():
+        set_items = defaultdict(list)
         for model, keys in data.items():
             for (key, environment_id), values in keys.items():
-                # TODO: This should use `record_multi` rather than `record`.
-                tsdb.record(model, key, values, timestamp, environment_id=environment_id)
+                set_items[environment_id].append((model, key, values))
+
+        for environment_id, items in set_items.items():
+            tsdb.record_multi(items, timestamp, environment_id=environment_id)
 
     for timestamp, data in frequencies.items():
         tsdb.record_frequency_multi(data.items(), timestamp)
@@ -542,6 +554,13 @@ def unmerge(*posargs, **kwargs):
 
     repair_denormalizations(caches, project, events)
 
+    metrics.incr("unmerge.events", amount=len(events), sample_rate=1.0)
+    metrics.incr(
+        "unmerge.events_migrated",
+        amount=sum(len(_destination_events) for _destination_events in destination_events.values()),
+        sample_rate=1.0,
+    )
+
     new_args = SuccessiveUnmergeArgs(
         project_id=args.project_id,
         source_id=args.source_id,
@@ -1,7 +1,8 @@
 import abc
 import logging
 import time
-from typing import List
+from collections import deque
+from typing import Any, Callable, Deque, List, Mapping, MutableMapping, NamedTuple, Optional, Tuple
 
 from confluent_kafka import (
     OFFSET_BEGINNING,
@@ -11,6 +12,7 @@ from confluent_kafka import (
     Consumer,
     KafkaError,
     KafkaException,
+    TopicPartition,
 )
 from confluent_kafka.admin import AdminClient
 from django.conf import settings
@@ -21,6 +23,10 @@ logger = logging.getLogger("batching-kafka-consumer")
 
 DEFAULT_QUEUED_MAX_MESSAGE_KBYTES = 50000
 DEFAULT_QUEUED_MIN_MESSAGES = 10000
+DEFAULT_MAX_PENDING_DELIVERIES = 100000
+# Minimum number of seconds between two commits of delivered offsets made
+# while the consumer is idling between batches.
+DELIVERY_COMMIT_INTERVAL = 1.0
 
 
 def wait_for_topics(admin_client: AdminClient, topics: List[str], timeout: int = 10) -> None:
@@ -95,6 +101,158 @@ class KafkaConsumerFacade(abc.ABC):
         raise NotImplementedError
 
 
+class SourceOffset(NamedTuple):
+    """Position of a consumed message that asynchronous work was started for."""
+
+    topic: str
+    partition: int
+    offset: int
+
+    @classmethod
+    def from_message(cls, message: Any) -> "SourceOffset":
+        return cls(message.topic(), message.partition(), message.offset())
+
+
+class DeliveryError(Exception):
+    pass
+
+
+class DeliveryTracker:
+    """
+    Tracks asynchronous work, usually messages produced to another topic,
+    started on behalf of consumed messages. It works out how far each
+    consumed partition can be committed: up to, but excluding, the first
+    message with outstanding or failed work.
+
+    This lets a worker produce without waiting for delivery in
+    `flush_batch`. The `BatchingKafkaConsumer` keeps consuming the next batch
+    while the previous one is being delivered, and commits offsets as
+    delivery reports come in. A failed delivery stops the commits at the
+    message it belongs to, so only messages from that point on are
+    consumed again after a restart.
+    """
+
+    def __init__(
+        self, producer: Any = None, max_pending: int = DEFAULT_MAX_PENDING_DELIVERIES
+    ) -> None:
+        self.producer = producer
+        self.max_pending = max_pending
+        self.pending_count = 0
+        # (topic, partition) -> [offset, outstanding work, first error] in offset order
+        self.__pending: MutableMapping[Tuple[str, int], Deque[List[Any]]] = {}
+        # (topic, partition) -> highest offset that all work has been started for
+        self.__sealed: MutableMapping[Tuple[str, int], int] = {}
+        self.__committed: MutableMapping[Tuple[str, int], int] = {}
+
+    def track(self, source: SourceOffset) -> Callable[[Optional[Any]], None]:
+        """
+        Register a unit of work for `source`. Returns the function to call,
+        with an error or None, once the work has completed.
+        """
+        entries = self.__pending.setdefault((source.topic, source.partition), deque())
+        if entries and entries[-1][0] == source.offset:
+            entry = entries[-1]
+        else:
+            entry = [source.offset, 0, None]
+            entries.append(entry)
+        entry[1] += 1
+        self.pending_count += 1
+
+        def done(error: Optional[Any] = None) -> None:
+            entry[1] -= 1
+            self.pending_count -= 1
+            if error is not None and entry[2] is None:
+                entry[2] = error
+
+        return done
+
+    def produce(
+        self,
+        source: SourceOffset,
+        topic: str,
+        value: bytes,
+        key: Optional[bytes] = None,
+        headers: Optional[Mapping[str, Any]] = None,
+        callback: Optional[Callable[[Any, Any], None]] = None,
+    ) -> None:
+        """
+        Produce a message for `source` without waiting for it to be delivered.
+        `callback` is called with the delivery report once it comes in.
+        """
+        done = self.track(source)
+
+        def on_delivery(error: Any, message: Any) -> None:
+            done(error)
+            if callback is not None:
+                callback(error, message)
+
+        kwargs = {"key": key, "value": value, "on_delivery": on_delivery}
+        if headers is not None:
+            kwargs["headers"] = headers
+
+        while True:
+            try:
+                self.producer.produce(topic, **kwargs)
+                break
+            except BufferError:
+                # The local producer queue is full, serve delivery reports to
+                # make room.
+                self.producer.poll(1.0)
+
+        while self.pending_count >= self.max_pending:
+            self.producer.poll(1.0)
+
+    def seal(self, offsets: Mapping[Tuple[str, int], List[int]]) -> None:
+        """
+        Mark all work for a flushed batch as started. `offsets` maps each
+        partition of the batch to its lowest and highest consumed offset.
+        """
+        for key, (low, high) in offsets.items():
+            self.__sealed[key] = max(high, self.__sealed.get(key, high))
+            # Committing the start of the first batch would be a no-op.
+            self.__committed.setdefault(key, low)
+
+    def poll(self, timeout: float = 0.0) -> None:
+        if self.producer is not None:
+            self.producer.poll(timeout)
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Wait for all outstanding deliveries."""
+        if self.producer is not None:
+            self.producer.flush(*(() if timeout is None else (timeout,)))
+
+    def get_commit_offsets(self) -> Tuple[List[TopicPartition], Optional[Any]]:
+        """
+        Returns the offsets that can be committed since the last call, and
+        the first delivery error found, if any. Offsets before a failed
+        message are still returned, so they can be committed before
+        raising.
+        """
+        offsets = []
+        error = None
+        for key, sealed in self.__sealed.items():
+            commit_offset = sealed + 1
+            entries = self.__pending.get(key)
+            while entries and entries[0][1] == 0 and entries[0][2] is None:
+                entries.popleft()
+            if entries and entries[0][0] <= sealed:
+                commit_offset = entries[0][0]
+                if entries[0][1] == 0 and error is None:
+                    error = entries[0][2]
+
+            if commit_offset > self.__committed.get(key, -1):
+                offsets.append(TopicPartition(key[0], key[1], commit_offset))
+                self.__committed[key] = commit_offset
+
+        return offsets, error
+
+    def reset(self) -> None:
+        self.__pending.clear()
+        self.__sealed.clear()
+        self.__committed.clear()
+        self.pending_count = 0
+
+
 class AbstractBatchWorker(metaclass=abc.ABCMeta):
     """The `BatchingKafkaConsumer` requires an instance of this class to
     handle user provided work such as processing raw messages and flushing
@@ -145,6 +303,9 @@ class BatchingKafkaConsumer:
       when messages are sent to an external datastore right before the consumer process dies
     * Instead, when a batch of items is flushed they are written to the external datastore and
       then Kafka offsets are immediately committed (in the same thread/loop)
+    * Alternatively, workers that write asynchronously can hand their in-flight work to a
+      `DeliveryTracker`. Offsets are then committed as that work completes, while the next batch
+      is already being consumed.
     * Users need only provide an implementation of what it means to process a raw message
       and flush a batch of events
     * Supports an optional "dead letter topic" where messages that raise an exception during
@@ -200,9 +361,12 @@ class BatchingKafkaConsumer:
         metrics_sample_rates=None,
         metrics_default_tags=None,
         commit_on_shutdown: bool = False,
+        delivery_tracker: Optional[DeliveryTracker] = None,
     ):
         assert isinstance(worker, AbstractBatchWorker)
         self.worker = worker
+        self.delivery_tracker = delivery_tracker
+        self.__last_delivery_commit = 0.0
 
         self.max_batch_size = max_batch_size
         self.max_batch_time = max_batch_time  # in milliseconds
@@ -256,6 +420,8 @@ class BatchingKafkaConsumer:
             "Reset the current in-memory batch, letting the next consumer take over where we left off."
             logger.info("Partitions revoked: %r", partitions)
             self._flush(force=True)
+            if self.delivery_tracker:
+                self._drain_deliveries()
 
         self.consumer.subscribe(
             topics, on_assign=on_partitions_assigned, on_revoke=on_partitions_revoked
@@ -322,6 +488,11 @@ class BatchingKafkaConsumer:
         if self.producer:
             self.producer.poll(0.0)
 
+        if self.delivery_tracker:
+            self.delivery_tracker.poll(0.0)
+            if time.time() - self.__last_delivery_commit >= DELIVERY_COMMIT_INTERVAL:
+                self._commit_delivered()
+
         msg = self.consumer.poll(timeout=1.0)
 
         if msg is None:
@@ -390,6 +561,11 @@ class BatchingKafkaConsumer:
             # drop in-memory events, letting the next consumer take over where we left off
             self._reset_batch()
 
+        if self.delivery_tracker:
+            # Work that was already started is finished and committed, so it
+            # isn't done a second time by the next consumer.
+            self._drain_deliveries()
+
         # tell the consumer to shutdown, and close the consumer
         logger.debug("Stopping worker")
         self.worker.shutdown()
@@ -447,23 +623,51 @@ class BatchingKafkaConsumer:
                 "batching_consumer.batch.flush.normalized", flush_duration / batch_results_length
             )
 
-        logger.debug("Committing Kafka offsets")
-        commit_start = time.time()
-        self._commit()
-        commit_duration = (time.time() - commit_start) * 1000
-        logger.debug("Kafka offset commit took %dms", commit_duration)
+        if self.delivery_tracker:
+            self.delivery_tracker.seal(self.__batch_offsets)
+            self._commit_delivered()
+        else:
+            logger.debug("Committing Kafka offsets")
+            commit_start = time.time()
+            self._commit()
+            commit_duration = (time.time() - commit_start) * 1000
+            logger.debug("Kafka offset commit took %dms", commit_duration)
 
         self._reset_batch()
 
+    def _commit_delivered(self):
+        """Commit the offsets of all messages whose asynchronous work has completed."""
+        self.__last_delivery_commit = time.time()
+        offsets, error = self.delivery_tracker.get_commit_offsets()
+        if offsets:
+            logger.debug("Committing delivered Kafka offsets: %r", offsets)
+            self._commit(offsets)
+        self.__record_timing(
+            "batching_consumer.delivery.pending", self.delivery_tracker.pending_count
+        )
+        if error is not None:
+            raise DeliveryError(f"Failed to deliver message: {error}")
+
+    def _drain_deliveries(self):
+        logger.debug("Waiting for outstanding deliveries")
+        self.delivery_tracker.flush()
+        try:
+            self._commit_delivered()
+        finally:
+            self.delivery_tracker.reset()
+
     def _commit_message_delivery_callback(self, error, message):
         if error is not None:
             raise Exception(error.str())
 
-    def _commit(self):
+    def _commit(self, offsets=None):
         retries = 3
         while True:
             try:
-                offsets = self.consumer.commit(asynchronous=False)
+                if offsets is None:
+                    offsets = self.consumer.commit(asynchronous=False)
+                else:
+                    offsets = self.consumer.commit(offsets=offsets, asynchronous=False)
                 logger.debug("Committed offsets: %s", offsets)
                 break  # success
             except KafkaException as e:
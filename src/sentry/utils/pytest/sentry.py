@@ -259,6 +259,11 @@ def pytest_runtest_teardown(item):
     for model in (OrganizationOption, ProjectOption, UserOption):
         model.objects.clear_local_cache()
 
+    from sentry.sentry_metrics import indexer
+
+    if hasattr(indexer.backend, "clear_local_cache"):
+        indexer.backend.clear_local_cache()
+
     Hub.main.bind_client(None)
 
 
@@ -2,8 +2,10 @@ import re
 
 import progressbar
 from django.db import connections, router
+from django.db.models.sql.datastructures import EmptyResultSet
 
 from sentry import eventstore
+from sentry.utils import json
 
 _leaf_re = re.compile(r"^(UserReport|Event|Group)(.+)")
 
@@ -12,6 +14,27 @@ class InvalidQuerySetError(ValueError):
     pass
 
 
+def estimate_row_count(queryset):
+    """
+    Returns the Postgres planner's row estimate for the queryset, or None if
+    it couldn't be determined. This only plans the query, so it's cheap
+    regardless of how many rows match.
+    """
+    try:
+        sql, params = queryset.query.sql_with_params()
+    except EmptyResultSet:
+        return 0
+    cursor = connections[queryset.db].cursor()
+    cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+    plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    try:
+        return int(plan[0]["Plan"]["Plan Rows"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
 def celery_run_batch_query(filter, batch_size, referrer, state=None, fetch_events=True):  # noqa
     """
     A tool for batched queries similar in purpose to RangeQuerySetWrapper that
@@ -209,10 +232,15 @@ class WithProgressBar:
 def bulk_delete_objects(
     model, limit=10000, transaction_id=None, logger=None, partition_key=None, **filters
 ):
-    connection = connections[router.db_for_write(model)]
+    """
+    Deletes up to `limit` rows of `model` matching `filters` in one statement.
+    The filters are Django lookups, so rows can also be selected through their
+    parents, e.g. ``group__project=project_id``.
+    """
+    using = router.db_for_write(model)
+    connection = connections[using]
     quote_name = connection.ops.quote_name
 
-    query = []
     params = []
     partition_query = []
 
@@ -221,23 +249,19 @@ def bulk_delete_objects(
             partition_query.append(f"{quote_name(column)} = %s")
             params.append(value)
 
-    for column, value in filters.items():
-        query.append(f"{quote_name(column)} = %s")
-        params.append(value)
+    queryset = (
+        model._base_manager.using(using).filter(**filters).order_by().values_list("id", flat=True)
+    )
+    select_query, select_params = queryset[:limit].query.get_compiler(using=using).as_sql()
+    params.extend(select_params)
 
     query = """
         delete from %(table)s
-        where %(partition_query)s id = any(array(
-            select id
-            from %(table)s
-            where (%(query)s)
-            limit %(limit)d
-        ))
+        where %(partition_query)s id = any(array(%(select_query)s))
     """ % dict(
         partition_query=(" AND ".join(partition_query)) + (" AND " if partition_query else ""),
-        query=" AND ".join(query),
+        select_query=select_query,
         table=model._meta.db_table,
-        limit=limit,
     )
 
     cursor = connection.cursor()
@@ -1,8 +1,11 @@
+import asyncio
+import codecs
 import functools
 import logging
 import os
 import random
 import re
+import threading
 import time
 from collections import OrderedDict, namedtuple
 from concurrent.futures import ThreadPoolExecutor
@@ -11,7 +14,18 @@ from copy import deepcopy
 from datetime import datetime, timedelta
 from hashlib import sha1
 from operator import itemgetter
-from typing import Any, Callable, List, Mapping, MutableMapping, Optional, Sequence, Tuple, Union
+from typing import (
+    Any,
+    Callable,
+    Iterator,
+    List,
+    Mapping,
+    MutableMapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 from urllib.parse import urlparse
 
 import pytz
@@ -19,7 +33,6 @@ import sentry_sdk
 import urllib3
 from dateutil.parser import parse as parse_datetime
 from django.conf import settings
-from django.core.cache import cache
 from sentry_sdk import Hub
 from snuba_sdk.legacy import json_to_snql
 from snuba_sdk.query import Query
@@ -40,6 +53,8 @@ from sentry.snuba.events import Columns
 from sentry.utils import json, metrics
 from sentry.utils.compat import map
 from sentry.utils.dates import outside_retention_with_modified_start, to_timestamp
+from sentry.utils.locking.lock import Lock
+from sentry.utils.snuba_query_cache import SnubaQueryCache
 
 logger = logging.getLogger(__name__)
 
@@ -328,9 +343,14 @@ _snuba_pool = connection_from_url(
         method_whitelist={"GET", "POST", "DELETE"},
     ),
     timeout=settings.SENTRY_SNUBA_TIMEOUT,
-    maxsize=10,
+    maxsize=max(10, settings.SENTRY_SNUBA_ASYNC_MAX_CONCURRENCY),
 )
 _query_thread_pool = ThreadPoolExecutor(max_workers=10)
+# Used by the async client. Kept separate from `_query_thread_pool` so that
+# hedged requests can't starve regular bulk queries.
+_async_query_thread_pool = ThreadPoolExecutor(
+    max_workers=settings.SENTRY_SNUBA_ASYNC_MAX_CONCURRENCY
+)
 
 
 epoch_naive = datetime(1970, 1, 1, tzinfo=None)
@@ -635,11 +655,15 @@ def raw_query(
     referrer=None,
     is_grouprelease=False,
     use_cache=False,
+    stream=False,
     **kwargs,
 ) -> Mapping[str, Any]:
     """
     Sends a query to snuba.  See `SnubaQueryParams` docstring for param
     descriptions.
+
+    With `stream=True` the rows are decoded lazily from the response instead
+    of all at once, see `_stream_snuba_query`. Streamed results are not cached.
     """
     snuba_params = SnubaQueryParams(
         dataset=dataset,
@@ -654,6 +678,10 @@ def raw_query(
         **kwargs,
     )
 
+    if stream:
+        headers = {"referer": referrer} if referrer else {}
+        return _stream_snuba_query(_prepare_query_params(snuba_params), headers)
+
     return bulk_raw_query([snuba_params], referrer=referrer, use_cache=use_cache)[0]
 
 
@@ -667,12 +695,15 @@ def raw_snql_query(
     query: Query,
     referrer: Optional[str] = None,
     use_cache: bool = False,
+    stream: bool = False,
 ) -> Mapping[str, Any]:
     # XXX (evanh): This function does none of the extra processing that the
     # other functions do here. It does not add any automatic conditions, format
     # results, nothing. Use at your own risk.
     metrics.incr("snql.sdk.api", tags={"referrer": referrer or "unknown"})
     params: SnubaQueryBody = (query, lambda x: x, lambda x: x)
+    if stream:
+        return _stream_snuba_query(params, {"referer": referrer} if referrer else {})
     return _apply_cache_and_build_results([params], referrer=referrer, use_cache=use_cache)[0]
 
 
@@ -689,6 +720,153 @@ def bulk_snql_query(
     return _apply_cache_and_build_results(params, referrer=referrer, use_cache=use_cache)
 
 
+def get_referrer_timeout(referrer: Optional[str]) -> float:
+    """
+    Read timeout for queries from `referrer`, in seconds. Interactive
+    referrers can be given a tighter budget than the global snuba timeout
+    through `SENTRY_SNUBA_REFERRER_TIMEOUTS`.
+    """
+    return settings.SENTRY_SNUBA_REFERRER_TIMEOUTS.get(referrer, settings.SENTRY_SNUBA_TIMEOUT)
+
+
+class _HedgeCounter:
+    """
+    Counts the hedged copies of queries that are in flight. A copy keeps
+    running until Snuba responds, even once the original query won.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.count = 0
+
+    def acquire(self) -> bool:
+        with self.lock:
+            if self.count >= settings.SENTRY_SNUBA_MAX_HEDGES_IN_FLIGHT:
+                return False
+            self.count += 1
+            return True
+
+    def release(self) -> None:
+        with self.lock:
+            self.count -= 1
+
+
+_hedges_in_flight = _HedgeCounter()
+
+
+async def async_snql_query(
+    query: Query,
+    referrer: Optional[str] = None,
+    hedge: bool = False,
+) -> Mapping[str, Any]:
+    return (await async_bulk_snql_query([query], referrer=referrer, hedge=hedge))[0]
+
+
+async def async_bulk_snql_query(
+    queries: Sequence[Query],
+    referrer: Optional[str] = None,
+    concurrency: Optional[int] = None,
+    hedge: bool = False,
+) -> List[Mapping[str, Any]]:
+    """
+    Run SnQL queries concurrently, with at most `concurrency` of them in
+    flight at a time. Results are returned in the order of `queries`.
+
+    With `hedge`, a query that hasn't returned after
+    `SENTRY_SNUBA_HEDGE_DELAY` seconds is sent a second time and whichever
+    response arrives first is used. Only use this for read queries.
+    """
+    metrics.incr("snql.sdk.api", tags={"referrer": referrer or "unknown"})
+    headers = {"referer": referrer} if referrer else {}
+    timeout = get_referrer_timeout(referrer)
+    semaphore = asyncio.Semaphore(concurrency or settings.SENTRY_SNUBA_ASYNC_MAX_CONCURRENCY)
+    hub = Hub.current
+
+    async def run(query: Query) -> Mapping[str, Any]:
+        async with semaphore:
+            response = await _async_raw_snql_query(query, hub, headers, timeout, hedge)
+        return _parse_snuba_response(response, lambda x: x, headers)
+
+    return list(await asyncio.gather(*(run(query) for query in queries)))
+
+
+def concurrent_bulk_snql_query(
+    queries: Sequence[Query],
+    referrer: Optional[str] = None,
+    concurrency: Optional[int] = None,
+    hedge: bool = False,
+) -> List[Mapping[str, Any]]:
+    """
+    Synchronous entry point to `async_bulk_snql_query` for callers that
+    aren't running in an event loop. Callers inside a running event loop,
+    which `asyncio.run` can't be nested in, get the queries run through
+    `bulk_snql_query` instead, without hedging.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        pass
+    else:
+        metrics.incr("snuba.client.running_loop_fallback")
+        return list(bulk_snql_query(list(queries), referrer=referrer))
+
+    with sentry_sdk.start_span(
+        op="start_snuba_query",
+        description=f"running {len(queries)} concurrent snuba queries",
+    ) as span:
+        span.set_tag("query.referrer", referrer or "<unknown>")
+        return asyncio.run(
+            async_bulk_snql_query(queries, referrer=referrer, concurrency=concurrency, hedge=hedge)
+        )
+
+
+async def _async_raw_snql_query(
+    query: Query,
+    hub: Hub,
+    headers: Mapping[str, str],
+    timeout: float,
+    hedge: bool,
+) -> urllib3.response.HTTPResponse:
+    loop = asyncio.get_running_loop()
+
+    def send() -> urllib3.response.HTTPResponse:
+        try:
+            return _raw_snql_query(query, Hub(hub), headers, timeout=timeout)
+        except urllib3.exceptions.HTTPError as err:
+            raise SnubaError(err)
+
+    attempts = {loop.run_in_executor(_async_query_thread_pool, send)}
+    if hedge:
+        done, _ = await asyncio.wait(attempts, timeout=settings.SENTRY_SNUBA_HEDGE_DELAY)
+        if not done:
+            tags = {"referrer": headers.get("referer", "<unknown>")}
+            if _hedges_in_flight.acquire():
+                metrics.incr("snuba.client.hedged", tags=tags)
+                hedged = _async_query_thread_pool.submit(send)
+                # Done callbacks also run when the hedge is cancelled while it
+                # is still queued, in which case `send` never runs.
+                hedged.add_done_callback(lambda _: _hedges_in_flight.release())
+                attempts.add(asyncio.wrap_future(hedged, loop=loop))
+            else:
+                metrics.incr("snuba.client.hedge_skipped", tags=tags)
+
+    error: Optional[BaseException] = None
+    pending = attempts
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for attempt in done:
+                if attempt.exception() is None:
+                    return attempt.result()
+                error = error or attempt.exception()
+        raise error
+    finally:
+        # The losing request can't be interrupted once it has been sent, but
+        # its response is discarded.
+        for attempt in pending:
+            attempt.cancel()
+
+
 def get_cache_key(query: SnubaQuery) -> str:
     if isinstance(query, Query):
         hashable = str(query)
@@ -699,6 +877,23 @@ def get_cache_key(query: SnubaQuery) -> str:
     return f"sqc:{sha1(hashable.encode('utf-8')).hexdigest()}"
 
 
+def prepare_raw_query(snuba_params: SnubaQueryParams) -> SnubaQueryBody:
+    """
+    Resolves the parts of a query that are looked up in Postgres, such as the
+    retention of its projects and the names of its environments. The result
+    can be sent with `send_prepared_query` from threads that must not use
+    the database connections of the request. The `options_override`
+    overrides that are active are applied to the query here.
+    """
+    return _prepare_query_params(snuba_params)
+
+
+def send_prepared_query(
+    query_body: SnubaQueryBody, referrer: Optional[str] = None
+) -> Mapping[str, Any]:
+    return _apply_cache_and_build_results([query_body], referrer=referrer)[0]
+
+
 def bulk_raw_query(
     snuba_param_list: Sequence[SnubaQueryParams],
     referrer: Optional[str] = None,
@@ -723,27 +918,63 @@ def _apply_cache_and_build_results(
     results = []
 
     if use_cache:
+        query_cache = SnubaQueryCache(referrer)
         cache_keys = [get_cache_key(query_params[0]) for _, query_params in query_param_list]
-        cache_data = cache.get_many(cache_keys)
+        cache_data = query_cache.get_many(cache_keys)
         to_query: List[Tuple[int, SnubaQueryBody, Optional[str]]] = []
+        to_wait: List[Tuple[int, SnubaQueryBody, str]] = []
+        locks: List[Lock] = []
         for (query_pos, query_params), cache_key in zip(query_param_list, cache_keys):
-            cached_result = cache_data.get(cache_key)
-            metric_tags = {"referrer": referrer} if referrer else None
-            if cached_result is None:
-                metrics.incr("snuba.query_cache.miss", tags=metric_tags)
-                to_query.append((query_pos, query_params, cache_key))
+            cached = cache_data.get(cache_key)
+            if cached is not None:
+                results.append((query_pos, cached.result))
+                if cached.is_stale:
+                    query_cache.revalidate(
+                        cache_key, functools.partial(_bulk_snuba_query_one, query_params, headers)
+                    )
+                continue
+
+            metrics.incr("snuba.query_cache.miss", tags=query_cache.metric_tags)
+            lock = query_cache.try_lock(cache_key)
+            if lock is None:
+                # Somebody else is already running this query, wait for their result
+                # instead of sending a duplicate query to snuba.
+                to_wait.append((query_pos, query_params, cache_key))
             else:
-                metrics.incr("snuba.query_cache.hit", tags=metric_tags)
-                results.append((query_pos, json.loads(cached_result)))
+                locks.append(lock)
+                to_query.append((query_pos, query_params, cache_key))
     else:
+        query_cache = None
         to_query = [(query_pos, query_params, None) for query_pos, query_params in query_param_list]
+        to_wait = []
+        locks = []
 
-    if to_query:
-        query_results = _bulk_snuba_query(map(itemgetter(1), to_query), headers)
-        for result, (query_pos, _, cache_key) in zip(query_results, to_query):
-            if cache_key:
-                cache.set(cache_key, json.dumps(result), settings.SENTRY_SNUBA_CACHE_TTL_SECONDS)
-            results.append((query_pos, result))
+    try:
+        if to_query:
+            query_results = _bulk_snuba_query(map(itemgetter(1), to_query), headers)
+            for result, (query_pos, _, cache_key) in zip(query_results, to_query):
+                if cache_key:
+                    query_cache.set(cache_key, result)
+                results.append((query_pos, result))
+    finally:
+        for lock in locks:
+            lock.release()
+
+    if to_wait:
+        timed_out = []
+        waited = query_cache.wait_for_many([cache_key for _, _, cache_key in to_wait])
+        for query_pos, query_params, cache_key in to_wait:
+            result = waited.get(cache_key)
+            if result is None:
+                timed_out.append((query_pos, query_params, cache_key))
+            else:
+                results.append((query_pos, result))
+
+        if timed_out:
+            query_results = _bulk_snuba_query(map(itemgetter(1), timed_out), headers)
+            for result, (query_pos, _, cache_key) in zip(query_results, timed_out):
+                query_cache.set(cache_key, result)
+                results.append((query_pos, result))
 
     # Sort so that we get the results back in the original param list order
     results.sort()
@@ -803,46 +1034,195 @@ def _bulk_snuba_query(
             # No need to submit to the thread pool if we're just performing a single query
             query_results = [query_fn((snuba_param_list[0], Hub(Hub.current), headers))]
 
-    results = []
-    for response, _, reverse in query_results:
+    return [
+        _parse_snuba_response(response, reverse, headers) for response, _, reverse in query_results
+    ]
+
+
+def _parse_snuba_response(
+    response: urllib3.response.HTTPResponse, reverse: Translator, headers: Mapping[str, str]
+) -> Mapping[str, Any]:
+    try:
+        body = json.loads(response.data)
+        if SNUBA_INFO:
+            if "sql" in body:
+                logger.info("{}.sql: {}".format(headers.get("referer", "<unknown>"), body["sql"]))
+            if "error" in body:
+                logger.info("{}.err: {}".format(headers.get("referer", "<unknown>"), body["error"]))
+    except ValueError:
+        if response.status != 200:
+            logger.error("snuba.query.invalid-json")
+            raise SnubaError("Failed to parse snuba error response")
+        raise UnexpectedResponseError(f"Could not decode JSON response: {response.data}")
+
+    if response.status != 200:
+        _raise_for_error_body(response, body)
+
+    # Forward and reverse translation maps from model ids to snuba keys, per column
+    body["data"] = [reverse(d) for d in body["data"]]
+    return body
+
+
+def _raise_for_error_body(response: urllib3.response.HTTPResponse, body: Mapping[str, Any]) -> None:
+    if body.get("error"):
+        error = body["error"]
+        if response.status == 429:
+            raise RateLimitExceeded(error["message"])
+        elif error["type"] == "schema":
+            raise SchemaValidationError(error["message"])
+        elif error["type"] == "clickhouse":
+            raise clickhouse_error_codes_map.get(error["code"], QueryExecutionError)(
+                error["message"]
+            )
+        else:
+            raise SnubaError(error["message"])
+    else:
+        raise SnubaError(f"HTTP {response.status}")
+
+
+STREAM_CHUNK_SIZE = 64 * 1024
+_JSON_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+def _iter_json_object(
+    chunks: Iterator[bytes], body: MutableMapping[str, Any], stream_key: str = "data"
+) -> Iterator[Any]:
+    """
+    Incrementally decode a JSON object from an iterator of byte chunks.
+
+    The items of the array under `stream_key` are yielded one at a time as
+    soon as they have been read, every other top level key is decoded
+    normally and stored in `body`. Only the row currently being decoded, and
+    not the whole response, has to be held in memory.
+    """
+    decode_utf8 = codecs.getincrementaldecoder("utf-8")()
+    decoder = json._default_decoder
+    buf = ""
+    pos = 0
+    eof = False
+
+    def fill() -> bool:
+        nonlocal buf, pos, eof
+        if eof:
+            return False
+        chunk = next(chunks, None)
+        if chunk is None:
+            eof = True
+            data = decode_utf8.decode(b"", final=True)
+        else:
+            data = decode_utf8.decode(chunk)
+        buf = buf[pos:] + data
+        pos = 0
+        return not eof or bool(data)
+
+    def next_char() -> str:
+        nonlocal pos
+        while True:
+            pos = _JSON_WHITESPACE.match(buf, pos).end()
+            if pos < len(buf):
+                pos += 1
+                return buf[pos - 1]
+            if not fill():
+                raise UnexpectedResponseError("Truncated JSON response from snuba")
+
+    def expect(char: str) -> None:
+        found = next_char()
+        if found != char:
+            raise UnexpectedResponseError(f"Expected {char!r} in snuba response, got {found!r}")
+
+    def decode_value() -> Any:
+        nonlocal pos
+        while True:
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if not fill():
+                    raise UnexpectedResponseError("Could not decode JSON response from snuba")
+                continue
+            # Numbers and literals may continue in the next chunk, so only trust
+            # a value once we've seen what follows it.
+            if end >= len(buf) and fill():
+                continue
+            pos = end
+            return value
+
+    expect("{")
+    if next_char() == "}":
+        return
+    pos -= 1
+
+    while True:
+        key = decode_value()
+        expect(":")
+        if key == stream_key:
+            expect("[")
+            if next_char() != "]":
+                pos -= 1
+                while True:
+                    yield decode_value()
+                    char = next_char()
+                    if char == "]":
+                        break
+                    if char != ",":
+                        raise UnexpectedResponseError(f"Unexpected {char!r} in snuba response")
+        else:
+            body[key] = decode_value()
+
+        char = next_char()
+        if char == "}":
+            return
+        if char != ",":
+            raise UnexpectedResponseError(f"Unexpected {char!r} in snuba response")
+
+
+def _stream_snuba_query(
+    snuba_params: SnubaQueryBody, headers: Mapping[str, str]
+) -> MutableMapping[str, Any]:
+    """
+    Runs a single query without loading the whole response into memory.
+
+    Returns a result mapping whose "data" is an iterator that decodes and
+    translates rows as they are read off the connection. The other keys of
+    the response (meta, timing, ...) are added to the mapping as they are
+    encountered, so they are only guaranteed to be present once the rows
+    have been consumed.
+    """
+    query, _, reverse = snuba_params
+    if not isinstance(query, Query):
+        query = json_to_snql(query, query["dataset"])
+
+    try:
+        response = _raw_snql_query(query, Hub(Hub.current), headers, preload_content=False)
+    except urllib3.exceptions.HTTPError as err:
+        raise SnubaError(err)
+
+    if response.status != 200:
         try:
             body = json.loads(response.data)
-            if SNUBA_INFO:
-                if "sql" in body:
-                    logger.info(
-                        "{}.sql: {}".format(headers.get("referer", "<unknown>"), body["sql"])
-                    )
-                if "error" in body:
-                    logger.info(
-                        "{}.err: {}".format(headers.get("referer", "<unknown>"), body["error"])
-                    )
         except ValueError:
-            if response.status != 200:
-                logger.error("snuba.query.invalid-json")
-                raise SnubaError("Failed to parse snuba error response")
-            raise UnexpectedResponseError(f"Could not decode JSON response: {response.data}")
+            logger.error("snuba.query.invalid-json")
+            raise SnubaError("Failed to parse snuba error response")
+        finally:
+            response.release_conn()
+        _raise_for_error_body(response, body)
 
-        if response.status != 200:
-            if body.get("error"):
-                error = body["error"]
-                if response.status == 429:
-                    raise RateLimitExceeded(error["message"])
-                elif error["type"] == "schema":
-                    raise SchemaValidationError(error["message"])
-                elif error["type"] == "clickhouse":
-                    raise clickhouse_error_codes_map.get(error["code"], QueryExecutionError)(
-                        error["message"]
-                    )
-                else:
-                    raise SnubaError(error["message"])
-            else:
-                raise SnubaError(f"HTTP {response.status}")
+    result: MutableMapping[str, Any] = {}
 
-        # Forward and reverse translation maps from model ids to snuba keys, per column
-        body["data"] = [reverse(d) for d in body["data"]]
-        results.append(body)
+    def iter_rows() -> Iterator[Any]:
+        try:
+            for row in _iter_json_object(response.stream(STREAM_CHUNK_SIZE), result):
+                yield reverse(row)
+        finally:
+            response.release_conn()
 
-    return results
+    result["data"] = iter_rows()
+    return result
+
+
+def _bulk_snuba_query_one(
+    snuba_params: SnubaQueryBody, headers: Mapping[str, str]
+) -> Mapping[str, Any]:
+    return _bulk_snuba_query([snuba_params], headers)[0]
 
 
 RawResult = Tuple[urllib3.response.HTTPResponse, Callable[[Any], Any], Callable[[Any], Any]]
@@ -876,7 +1256,11 @@ def _legacy_snql_query(params: Tuple[SnubaQuery, Hub, Mapping[str, str]]) -> Raw
 
 
 def _raw_snql_query(
-    query: Query, thread_hub: Hub, headers: Mapping[str, str]
+    query: Query,
+    thread_hub: Hub,
+    headers: Mapping[str, str],
+    preload_content: bool = True,
+    timeout: Optional[float] = None,
 ) -> urllib3.response.HTTPResponse:
     with timer("snql_query"):
         referrer = headers.get("referer", "<unknown>")
@@ -905,7 +1289,14 @@ def _raw_snql_query(
         with thread_hub.start_span(op="snuba_snql", description=f"query {referrer}") as span:
             span.set_tag("referrer", referrer)
             span.set_data("snql", str(query))
-            return _snuba_pool.urlopen("POST", f"/{query.dataset}/snql", body=body, headers=headers)
+            return _snuba_pool.urlopen(
+                "POST",
+                f"/{query.dataset}/snql",
+                body=body,
+                headers=headers,
+                preload_content=preload_content,
+                **({"timeout": timeout} if timeout is not None else {}),
+            )
 
 
 def query(
@@ -1095,7 +1486,17 @@ def aliased_query(**kwargs):
     sentry.tagstore, or sentry.snuba.discover instead when reading data.
     """
     with sentry_sdk.start_span(op="sentry.snuba.aliased_query"):
-        return _aliased_query_impl(**kwargs)
+        return raw_query(**_aliased_query_impl(**kwargs))
+
+
+def aliased_query_params(**kwargs) -> SnubaQueryParams:
+    """
+    Same as `aliased_query`, but returns the resolved `SnubaQueryParams`
+    instead of running them. Callers that need several independent aliased
+    queries can pass the results to `bulk_raw_query` so that they are
+    dispatched concurrently.
+    """
+    return SnubaQueryParams(**_aliased_query_impl(**kwargs))
 
 
 def _aliased_query_impl(
@@ -1151,7 +1552,7 @@ def _aliased_query_impl(
             updated_order.append("{}{}".format("-" if order.startswith("-") else "", order_field))
         orderby = updated_order
 
-    return raw_query(
+    return dict(
         start=start,
         end=end,
         groupby=groupby,
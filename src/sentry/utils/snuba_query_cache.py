@@ -0,0 +1,209 @@
+"""
+Result cache for snuba queries made with ``use_cache=True``.
+
+On top of a plain get/set this provides:
+
+- Coalescing: when several processes miss on the same query at once, only the
+  one holding the redis lock for the cache key queries snuba. The others wait
+  for its result to appear in the cache.
+- Stale-while-revalidate: entries stay in the cache for a grace period after
+  they expire. Expired entries are served as-is while a single background
+  refresh replaces them.
+- Per-referrer TTLs via ``SENTRY_SNUBA_CACHE_POLICIES``.
+- Compression of large payloads.
+"""
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Mapping, MutableMapping, NamedTuple, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from sentry.utils import json, metrics
+from sentry.utils.codecs import ZstdCodec
+from sentry.utils.locking import UnableToAcquireLock
+from sentry.utils.locking.lock import Lock
+
+logger = logging.getLogger(__name__)
+
+# Leading byte of an encoded cache entry, used to tell plain and compressed
+# entries apart. Entries written before this format existed are JSON strings.
+FORMAT_JSON = b"j"
+FORMAT_ZSTD = b"z"
+
+_zstd = ZstdCodec()
+
+_revalidate_thread_pool = ThreadPoolExecutor(max_workers=4)
+
+
+class CachePolicy(NamedTuple):
+    # Seconds a result is considered fresh.
+    ttl: int
+    # Seconds past `ttl` an expired result may still be served while it is
+    # being refreshed. Zero disables stale-while-revalidate.
+    stale_ttl: int
+
+
+class CachedResult(NamedTuple):
+    result: Mapping[str, Any]
+    is_stale: bool
+
+
+def get_cache_policy(referrer: Optional[str]) -> CachePolicy:
+    policy = settings.SENTRY_SNUBA_CACHE_POLICIES.get(referrer) if referrer else None
+    if policy is None:
+        return CachePolicy(settings.SENTRY_SNUBA_CACHE_TTL_SECONDS, 0)
+    return CachePolicy(
+        policy.get("ttl", settings.SENTRY_SNUBA_CACHE_TTL_SECONDS), policy.get("stale_ttl", 0)
+    )
+
+
+def encode_entry(result: Mapping[str, Any], fresh_until: float) -> bytes:
+    payload = json.dumps({"result": result, "fresh_until": fresh_until}).encode("utf-8")
+    if len(payload) >= settings.SENTRY_SNUBA_CACHE_COMPRESSION_THRESHOLD:
+        return FORMAT_ZSTD + _zstd.encode(payload)
+    return FORMAT_JSON + payload
+
+
+def decode_entry(value: Any) -> Tuple[Mapping[str, Any], Optional[float]]:
+    """
+    Returns the cached result and the time until which it is fresh. Legacy
+    entries have no expiry information and are always considered fresh.
+    """
+    if isinstance(value, str):
+        return json.loads(value), None
+
+    prefix, payload = value[:1], value[1:]
+    if prefix == FORMAT_ZSTD:
+        payload = _zstd.decode(payload)
+    elif prefix != FORMAT_JSON:
+        raise ValueError(f"Unknown snuba cache entry format: {prefix!r}")
+
+    entry = json.loads(payload)
+    return entry["result"], entry["fresh_until"]
+
+
+class SnubaQueryCache:
+    def __init__(self, referrer: Optional[str] = None) -> None:
+        self.referrer = referrer
+        self.policy = get_cache_policy(referrer)
+        self.metric_tags = {"referrer": referrer} if referrer else None
+
+    def _get_lock(self, cache_key: str) -> Lock:
+        from sentry.app import locks
+
+        return locks.get(f"{cache_key}:lock", duration=settings.SENTRY_SNUBA_TIMEOUT)
+
+    def try_lock(self, cache_key: str) -> Optional[Lock]:
+        """
+        Try to become the process responsible for filling `cache_key`. Returns
+        the held lock, or None if another process is already filling it.
+
+        If the lock backend is unavailable the lock is returned without being
+        held, so the caller queries snuba without coordinating with others.
+        Releasing a lock that isn't held does nothing.
+        """
+        lock = self._get_lock(cache_key)
+        try:
+            lock.acquire()
+        except UnableToAcquireLock:
+            if self._is_locked(cache_key):
+                return None
+            metrics.incr("snuba.query_cache.lock_unavailable", tags=self.metric_tags)
+        return lock
+
+    def _is_locked(self, cache_key: str) -> bool:
+        """
+        Check whether another process holds the lock on `cache_key`. Errors of
+        the lock backend count as the lock not being held.
+        """
+        try:
+            return bool(self._get_lock(cache_key).locked())
+        except Exception:
+            logger.warning("snuba.query_cache.lock-error", exc_info=True)
+            return False
+
+    def get_many(self, cache_keys: Sequence[str]) -> MutableMapping[str, CachedResult]:
+        now = time.time()
+        results = {}
+        for cache_key, value in cache.get_many(cache_keys).items():
+            try:
+                result, fresh_until = decode_entry(value)
+            except Exception:
+                logger.exception("snuba.query_cache.decode-error")
+                continue
+
+            is_stale = fresh_until is not None and fresh_until < now
+            metrics.incr(
+                "snuba.query_cache.stale" if is_stale else "snuba.query_cache.hit",
+                tags=self.metric_tags,
+            )
+            results[cache_key] = CachedResult(result, is_stale)
+        return results
+
+    def set(self, cache_key: str, result: Mapping[str, Any]) -> None:
+        ttl, stale_ttl = self.policy
+        cache.set(cache_key, encode_entry(result, time.time() + ttl), ttl + stale_ttl)
+
+    def wait_for_many(self, cache_keys: Sequence[str]) -> MutableMapping[str, Mapping[str, Any]]:
+        """
+        Wait for other processes holding the locks on `cache_keys` to fill
+        them. All keys share a single deadline. A key is given up on as soon
+        as its lock is released without a result being stored, or when the
+        deadline passes. Keys missing from the returned mapping should be
+        queried by the caller.
+        """
+        metrics.incr("snuba.query_cache.coalesce", amount=len(cache_keys), tags=self.metric_tags)
+        deadline = time.monotonic() + settings.SENTRY_SNUBA_CACHE_COALESCE_TIMEOUT
+        delay = 0.05
+        pending = set(cache_keys)
+        results: MutableMapping[str, Mapping[str, Any]] = {}
+        while pending:
+            time.sleep(max(min(delay, deadline - time.monotonic()), 0))
+            for cache_key, entry in self.get_many(list(pending)).items():
+                results[cache_key] = entry.result
+                pending.discard(cache_key)
+
+            # The lock holder finished without filling the key, most likely
+            # because its query failed, or the lock backend went away. Nothing
+            # is coming, stop waiting.
+            abandoned = {cache_key for cache_key in pending if not self._is_locked(cache_key)}
+            if abandoned:
+                metrics.incr(
+                    "snuba.query_cache.coalesce_abandoned",
+                    amount=len(abandoned),
+                    tags=self.metric_tags,
+                )
+                pending -= abandoned
+
+            if pending and time.monotonic() >= deadline:
+                metrics.incr(
+                    "snuba.query_cache.coalesce_timeout",
+                    amount=len(pending),
+                    tags=self.metric_tags,
+                )
+                break
+            delay = min(delay * 2, 1.0)
+
+        return results
+
+    def revalidate(self, cache_key: str, fetch: Callable[[], Mapping[str, Any]]) -> None:
+        """
+        Refresh a stale entry in the background. Only one process refreshes a
+        given key at a time, everybody else keeps serving the stale result.
+        """
+        lock = self.try_lock(cache_key)
+        if lock is None:
+            return
+
+        def refresh() -> None:
+            try:
+                self.set(cache_key, fetch())
+            except Exception:
+                logger.exception("snuba.query_cache.revalidate-error")
+            finally:
+                lock.release()
+
+        _revalidate_thread_pool.submit(refresh)
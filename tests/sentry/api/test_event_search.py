@@ -1,6 +1,7 @@
 import datetime
 import os
 from datetime import timedelta
+from unittest import mock
 
 import pytest
 from django.test import SimpleTestCase
@@ -13,7 +14,12 @@ from sentry.api.event_search import (
     SearchFilter,
     SearchKey,
     SearchValue,
+    SearchVisitor,
+    _parse_search_query,
+    default_config,
+    parse_cache,
     parse_search_query,
+    parse_simple_query,
 )
 from sentry.constants import MODULE_ROOT
 from sentry.exceptions import InvalidSearchQuery
@@ -451,6 +457,94 @@ class ParseSearchQueryBackendTest(SimpleTestCase):
         assert search_filter.value.value == 'a"b'
 
 
+def fixture_queries():
+    for file in sorted(os.listdir(abs_fixtures_path)):
+        with open(os.path.join(abs_fixtures_path, file)) as fp:
+            for case in json.load(fp):
+                yield case["query"]
+
+
+class ParseSimpleQueryTest(SimpleTestCase):
+    def test_matches_grammar(self):
+        def parse(parser, query):
+            try:
+                return parser(query, SearchVisitor(default_config))
+            except InvalidSearchQuery:
+                return InvalidSearchQuery
+
+        simple_queries = 0
+        for query in fixture_queries():
+            result = parse(parse_simple_query, query)
+            if result is not None:
+                simple_queries += 1
+                assert result == parse(_parse_search_query, query), query
+
+        assert simple_queries > 0
+
+    def test_fallback(self):
+        visitor = SearchVisitor(default_config)
+        assert parse_simple_query("", visitor) is None
+        assert parse_simple_query("free text", visitor) is None
+        assert parse_simple_query("has:user", visitor) is None
+        assert parse_simple_query("error.handled:true", visitor) is None
+        assert parse_simple_query("user.email:1", visitor) is None
+        assert parse_simple_query('user.email:"foo bar"', visitor) is None
+        assert parse_simple_query("count():>1", visitor) is None
+        assert parse_simple_query("a:b OR c:d", visitor) is None
+        assert parse_simple_query("!a:b  c:d", visitor) == [
+            SearchFilter(SearchKey("a"), "!=", SearchValue("b")),
+            SearchFilter(SearchKey("c"), "=", SearchValue("d")),
+        ]
+
+
+class ParseCacheTest(SimpleTestCase):
+    def setUp(self):
+        parse_cache.clear()
+
+    def test_cached(self):
+        query = "user.email:foo@example.com release:[a, b]"
+        result = parse_search_query(query)
+        with mock.patch("sentry.api.event_search._parse_search_query") as parse:
+            assert parse_search_query(query) == result
+            assert parse.call_count == 0
+
+            parse_search_query(query, config=SearchConfig())
+            assert parse.call_count == 1
+
+    def test_result_is_copied(self):
+        query = "release:[a, b] (user.email:foo OR user.email:bar)"
+        result = parse_search_query(query)
+        expected = parse_search_query(query)
+        result[0].value.raw_value.append("c")
+        result[1].children.pop()
+        result.pop()
+        assert parse_search_query(query) == expected
+
+    def test_params(self):
+        query = "p95():>1s"
+        with mock.patch(
+            "sentry.api.event_search._parse_search_query", wraps=_parse_search_query
+        ) as parse:
+            parse_search_query(query, params={"project_id": [1]})
+            parse_search_query(query, params={"project_id": [1]})
+            assert parse.call_count == 1
+            parse_search_query(query, params={"project_id": [2]})
+            assert parse.call_count == 2
+
+    def test_rel_time_filter_not_cached(self):
+        now = timezone.now()
+        with freeze_time(now):
+            parse_search_query("first_seen:+7d")
+        with freeze_time(now + timedelta(days=1)):
+            assert parse_search_query("first_seen:+7d") == [
+                SearchFilter(
+                    key=SearchKey(name="first_seen"),
+                    operator="<=",
+                    value=SearchValue(raw_value=now + timedelta(days=1) - timedelta(days=7)),
+                )
+            ]
+
+
 @pytest.mark.parametrize(
     "raw,result",
     [
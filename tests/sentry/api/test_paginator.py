@@ -1,5 +1,6 @@
 from datetime import timedelta
 from unittest import TestCase as SimpleTestCase
+from unittest.mock import patch
 
 from django.utils import timezone
 
@@ -8,8 +9,10 @@ from sentry.api.paginator import (
     ChainPaginator,
     CombinedQuerysetIntermediary,
     CombinedQuerysetPaginator,
+    DateTimeKeysetPaginator,
     DateTimePaginator,
     GenericOffsetPaginator,
+    KeysetPaginator,
     OffsetPaginator,
     Paginator,
     SequencePaginator,
@@ -359,6 +362,145 @@ class DateTimePaginatorTest(TestCase):
         assert result7[0] == res4
 
 
+class KeysetPaginatorTest(TestCase):
+    def test_ascending(self):
+        res1 = self.create_user("foo@example.com")
+        res2 = self.create_user("bar@example.com")
+        res3 = self.create_user("baz@example.com")
+
+        paginator = KeysetPaginator(User.objects.all(), "id")
+        result1 = paginator.get_result(limit=2, cursor=None)
+        assert list(result1) == [res1, res2]
+        assert result1.next
+        assert not result1.prev
+
+        result2 = paginator.get_result(limit=2, cursor=result1.next)
+        assert list(result2) == [res3]
+        assert not result2.next
+        assert result2.prev
+
+        result3 = paginator.get_result(limit=2, cursor=result2.prev)
+        assert list(result3) == [res1, res2]
+        assert result3.next
+        assert not result3.prev
+
+    @patch.object(KeysetPaginator, "estimate_hits", return_value=1)
+    def test_count_hits(self, estimate_hits):
+        self.create_user("foo@example.com")
+        self.create_user("bar@example.com")
+
+        paginator = KeysetPaginator(User.objects.filter(email="foo@example.com"), "id")
+        assert paginator.count_hits(1000) == 1
+
+        paginator = KeysetPaginator(User.objects.none(), "id")
+        assert paginator.count_hits(1000) == 0
+
+        paginator = KeysetPaginator(User.objects.all(), "id")
+        assert paginator.count_hits(1) == 1
+
+        result = paginator.get_result(limit=1, count_hits=True, max_hits=10)
+        assert result.hits == 2
+        assert result.max_hits == 10
+
+    @patch.object(KeysetPaginator, "estimate_hits", return_value=5000)
+    def test_count_hits_from_estimate(self, estimate_hits):
+        self.create_user("foo@example.com")
+
+        paginator = KeysetPaginator(User.objects.all(), "id")
+        assert paginator.count_hits(1000) == 1000
+
+    def test_estimate_hits(self):
+        paginator = KeysetPaginator(User.objects.all(), "id")
+        assert paginator.estimate_hits() >= 0
+
+        paginator = KeysetPaginator(User.objects.none(), "id")
+        assert paginator.estimate_hits() == 0
+
+
+class DateTimeKeysetPaginatorTest(TestCase):
+    def test_descending_with_duplicate_keys(self):
+        joined = timezone.now()
+
+        # Rows sharing a key are ordered by id, so no offset is needed to
+        # page through them.
+        res1 = self.create_user("foo@example.com", date_joined=joined)
+        res2 = self.create_user("bar@example.com", date_joined=joined)
+        res3 = self.create_user("baz@example.com", date_joined=joined)
+        res4 = self.create_user("qux@example.com", date_joined=joined - timedelta(microseconds=1))
+
+        paginator = DateTimeKeysetPaginator(User.objects.all(), "-date_joined")
+        result1 = paginator.get_result(limit=2, cursor=None)
+        assert list(result1) == [res3, res2]
+        assert result1.next
+
+        result2 = paginator.get_result(limit=2, cursor=result1.next)
+        assert list(result2) == [res1, res4]
+        assert not result2.next
+        assert result2.prev
+
+        result3 = paginator.get_result(limit=1, cursor=result2.prev)
+        assert list(result3) == [res2]
+        assert result3.prev
+
+        result4 = paginator.get_result(limit=10, cursor=result3.prev)
+        assert list(result4) == [res3]
+        assert not result4.prev
+
+    def test_prev_descending_with_new(self):
+        joined = timezone.now()
+
+        res1 = self.create_user("foo@example.com", date_joined=joined)
+        res2 = self.create_user("bar@example.com", date_joined=joined + timedelta(seconds=1))
+
+        paginator = DateTimeKeysetPaginator(User.objects.all(), "-date_joined")
+        result1 = paginator.get_result(limit=10, cursor=None)
+        assert list(result1) == [res2, res1]
+
+        res3 = self.create_user("baz@example.com", date_joined=joined + timedelta(seconds=2))
+        res4 = self.create_user("qux@example.com", date_joined=joined + timedelta(seconds=3))
+
+        result2 = paginator.get_result(limit=10, cursor=result1.prev)
+        assert list(result2) == [res4, res3]
+
+        result3 = paginator.get_result(limit=10, cursor=result2.prev)
+        assert len(result3) == 0, result3
+
+        result4 = paginator.get_result(limit=10, cursor=result1.next)
+        assert len(result4) == 0, result4
+
+    def test_cursor_round_trip(self):
+        joined = timezone.now().replace(microsecond=123456)
+        user = self.create_user("foo@example.com", date_joined=joined)
+
+        paginator = DateTimeKeysetPaginator(User.objects.all(), "-date_joined")
+        cursor = Cursor.from_string(str(paginator.get_result(limit=1).next))
+        assert cursor.offset == user.id
+        assert paginator.value_from_cursor(cursor) == joined
+
+    def test_legacy_cursor(self):
+        joined = timezone.now()
+        res1 = self.create_user("foo@example.com", date_joined=joined)
+        res2 = self.create_user("bar@example.com", date_joined=joined + timedelta(seconds=1))
+        res3 = self.create_user("baz@example.com", date_joined=joined + timedelta(seconds=2))
+
+        # A cursor handed out by `DateTimePaginator` before the endpoints
+        # switched paginators: milliseconds and a row offset.
+        legacy_paginator = DateTimePaginator(User.objects.all(), "-date_joined")
+        legacy_cursor = Cursor.from_string(str(legacy_paginator.get_result(limit=1).next))
+
+        paginator = DateTimeKeysetPaginator(User.objects.all(), "-date_joined")
+        assert paginator.is_legacy_cursor(legacy_cursor)
+        result = paginator.get_result(limit=1, cursor=legacy_cursor)
+        assert list(result) == [res2]
+
+        result = paginator.get_result(limit=1, cursor=result.next)
+        assert list(result) == [res1]
+        assert not result.next
+
+        assert list(paginator.get_result(limit=10)) == [res3, res2, res1]
+        assert not paginator.is_legacy_cursor(paginator.get_result(limit=1).next)
+
+
 def test_reverse_bisect_left():
     assert reverse_bisect_left([], 0) == 0
 
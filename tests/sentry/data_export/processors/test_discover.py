@@ -1,5 +1,9 @@
 from sentry.data_export.base import ExportError
-from sentry.data_export.processors.discover import DiscoverProcessor
+from sentry.data_export.processors.discover import (
+    DiscoverProcessor,
+    advance_slice_cursor,
+    split_time_range,
+)
 from sentry.testutils import SnubaTestCase, TestCase
 
 
@@ -58,3 +62,69 @@ class DiscoverProcessorTest(TestCase, SnubaTestCase):
         assert new_result_list[0] != result_list
         assert new_result_list[0]["count(id) / fake(field)"] == 5
         assert new_result_list[0]["count(id) / 2"] == 8
+
+    def test_supports_time_slices(self):
+        processor = DiscoverProcessor(
+            organization_id=self.org.id, discover_query=self.discover_query
+        )
+        assert not processor.supports_time_slices
+
+        self.discover_query["field"] = ["title", "timestamp"]
+        for sort in [None, "timestamp", "-timestamp"]:
+            self.discover_query["sort"] = sort
+            processor = DiscoverProcessor(
+                organization_id=self.org.id, discover_query=self.discover_query
+            )
+            assert processor.supports_time_slices
+            assert processor.slice_descending == (sort == "-timestamp")
+
+        self.discover_query["sort"] = "title"
+        processor = DiscoverProcessor(
+            organization_id=self.org.id, discover_query=self.discover_query
+        )
+        assert not processor.supports_time_slices
+
+
+def test_split_time_range():
+    buckets = [(0, 4), (10, 1), (20, 3), (40, 4)]
+    assert split_time_range(0, 50, 10, buckets, 3, 100) == [
+        {"start": 0, "end": 10, "offset": 0, "limit": 100},
+        {"start": 10, "end": 30, "offset": 0, "limit": 100},
+        {"start": 30, "end": 50, "offset": 0, "limit": 100},
+    ]
+    assert split_time_range(0, 50, 10, buckets, 3, 100, descending=True) == [
+        {"start": 40, "end": 50, "offset": 0, "limit": 100},
+        {"start": 10, "end": 40, "offset": 0, "limit": 100},
+        {"start": 0, "end": 10, "offset": 0, "limit": 100},
+    ]
+    assert split_time_range(0, 50, 10, [], 3, 100) == []
+
+
+def test_split_time_range_limit():
+    buckets = [(0, 4), (10, 1), (20, 3), (40, 4)]
+    # Slices are capped at their rows so that only the first 6 rows are exported.
+    assert split_time_range(0, 50, 10, buckets, 3, 6) == [
+        {"start": 0, "end": 10, "offset": 0, "limit": 4},
+        {"start": 10, "end": 30, "offset": 0, "limit": 2},
+    ]
+
+
+def test_advance_slice_cursor():
+    cursor = {"start": 0.5, "end": 100.5, "offset": 0, "limit": 10}
+    rows = [
+        {"timestamp": "1970-01-01T00:00:10+00:00"},
+        {"timestamp": "1970-01-01T00:00:20+00:00"},
+        {"timestamp": "1970-01-01T00:00:20+00:00"},
+    ]
+    cursor = advance_slice_cursor(cursor, rows)
+    assert cursor == {"start": 20, "end": 100.5, "offset": 2, "limit": 7}
+
+    # A page within the same second keeps skipping ahead.
+    cursor = advance_slice_cursor(cursor, rows[1:])
+    assert cursor == {"start": 20, "end": 100.5, "offset": 4, "limit": 5}
+
+    cursor = {"start": 0.5, "end": 100.5, "offset": 0, "limit": 10}
+    cursor = advance_slice_cursor(cursor, rows[::-1], descending=True)
+    assert cursor == {"start": 0.5, "end": 11, "offset": 1, "limit": 7}
+
+    assert advance_slice_cursor(cursor, []) is cursor
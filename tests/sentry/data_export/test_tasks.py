@@ -4,12 +4,17 @@ from django.db import IntegrityError
 
 from sentry.data_export.base import ExportQueryType
 from sentry.data_export.models import ExportedData
-from sentry.data_export.tasks import assemble_download, merge_export_blobs
+from sentry.data_export.tasks import (
+    assemble_download,
+    assemble_download_slice,
+    merge_export_blobs,
+)
 from sentry.exceptions import InvalidSearchQuery
 from sentry.models import File
 from sentry.search.events.constants import TIMEOUT_ERROR_MESSAGE
 from sentry.testutils import SnubaTestCase, TestCase
 from sentry.testutils.helpers.datetime import before_now, iso_format
+from sentry.testutils.helpers.options import override_options
 from sentry.utils.samples import load_data
 from sentry.utils.snuba import (
     DatasetSelectionError,
@@ -644,6 +649,125 @@ class AssembleDownloadLargeTest(TestCase, SnubaTestCase):
         assert emailer.called
 
 
+class AssembleDownloadSlicedTest(TestCase, SnubaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user()
+        self.org = self.create_organization()
+        self.project = self.create_project(organization=self.org)
+        for i in range(20):
+            self.store_event(
+                data={
+                    "message": f"event {i:02d}",
+                    "timestamp": iso_format(before_now(minutes=1, seconds=i)),
+                },
+                project_id=self.project.id,
+            )
+
+    def export(self, query_info, **kwargs):
+        de = ExportedData.objects.create(
+            user=self.user,
+            organization=self.org,
+            query_type=ExportQueryType.DISCOVER,
+            query_info=query_info,
+        )
+        with override_options({"data-export.time-slices": 3}), self.tasks():
+            assemble_download(de.id, **kwargs)
+        de = ExportedData.objects.get(id=de.id)
+        assert de.date_finished is not None
+        return de._get_file().getfile().read().strip().split(b"\r\n")
+
+    @patch("sentry.data_export.tasks.assemble_download_slice.delay")
+    @patch("sentry.data_export.models.ExportedData.email_success")
+    def test_not_sliced(self, emailer, assemble_download_slice):
+        header, *rows = self.export(
+            {"project": [self.project.id], "field": ["count()"], "query": ""}
+        )
+        assert header == b"count"
+        assert rows == [b"20"]
+        assert not assemble_download_slice.called
+
+    @patch("sentry.data_export.models.ExportedData.email_success")
+    def test_discover_sliced(self, emailer):
+        header, *rows = self.export(
+            {
+                "project": [self.project.id],
+                "field": ["title"],
+                "sort": "-timestamp",
+                "query": "",
+            },
+            batch_size=3,
+        )
+        assert header == b"title"
+        assert rows == [f"event {i:02d}".encode() for i in range(20)]
+        assert emailer.called
+
+    @patch("sentry.data_export.tasks.MAX_BATCH_SIZE", 1)
+    @patch("sentry.data_export.models.ExportedData.email_success")
+    def test_discover_sliced_checkpoints(self, emailer):
+        # Every page is stored and checkpointed by its own task run.
+        header, *rows = self.export(
+            {"project": [self.project.id], "field": ["title"], "sort": "timestamp", "query": ""},
+            batch_size=2,
+        )
+        assert header == b"title"
+        assert rows == [f"event {i:02d}".encode() for i in reversed(range(20))]
+
+    @patch("sentry.data_export.models.ExportedData.email_success")
+    def test_discover_sliced_too_many_rows(self, emailer):
+        header, *rows = self.export(
+            {"project": [self.project.id], "field": ["title"], "sort": "timestamp", "query": ""},
+            export_limit=5,
+        )
+        assert header == b"title"
+        assert rows == [f"event {i:02d}".encode() for i in range(19, 14, -1)]
+
+    @patch("sentry.data_export.tasks.MAX_FILE_SIZE", 110)
+    @patch("sentry.data_export.tasks.MAX_BATCH_SIZE", 1)
+    @patch("sentry.data_export.models.ExportedData.email_success")
+    def test_discover_sliced_file_too_big(self, emailer):
+        de = ExportedData.objects.create(
+            user=self.user,
+            organization=self.org,
+            query_type=ExportQueryType.DISCOVER,
+            query_info={
+                "project": [self.project.id],
+                "field": ["title"],
+                "sort": "-timestamp",
+                "query": "",
+            },
+        )
+        with override_options({"data-export.time-slices": 3}), patch(
+            "sentry.data_export.tasks.assemble_download_slice.delay"
+        ) as delay:
+            assemble_download(de.id, batch_size=2)
+        slices = [call[0] for call in delay.call_args_list]
+        assert len(slices) == 3
+
+        # The first slice fits, the last one hits the limit after storing some
+        # of its rows and the middle one hits it right away. The file must end
+        # with the first slice rather than have the stored rows of the last.
+        with self.tasks():
+            for slice_index in (0, 2, 1):
+                assemble_download_slice(*slices[slice_index], batch_size=2)
+
+        de = ExportedData.objects.get(id=de.id)
+        assert de.date_finished is not None
+        header, *rows = de._get_file().getfile().read().strip().split(b"\r\n")
+        assert header == b"title"
+        expected = [f"event {i:02d}".encode() for i in range(20)]
+        assert 0 < len(rows) < len(expected)
+        assert rows == expected[: len(rows)]
+
+    @patch("sentry.snuba.discover.timeseries_query")
+    @patch("sentry.data_export.models.ExportedData.email_success")
+    def test_discover_sliced_no_rows(self, emailer, timeseries_query):
+        timeseries_query.return_value.data = {"data": []}
+        header, *rows = self.export({"project": [self.project.id], "field": ["title"], "query": ""})
+        assert header == b"title"
+        assert rows == []
+
+
 class MergeExportBlobsTest(TestCase, SnubaTestCase):
     def test_task_persistent_name(self):
         assert merge_export_blobs.name == "sentry.data_export.tasks.merge_blobs"
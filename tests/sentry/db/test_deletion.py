@@ -1,5 +1,8 @@
 from datetime import timedelta
+from unittest.mock import patch
 
+from django.core.cache import cache
+from django.test import override_settings
 from django.utils import timezone
 
 from sentry.db.deletion import BulkDeleteQuery
@@ -35,6 +38,55 @@ class BulkDeleteQueryTest(TestCase):
         assert Group.objects.filter(id=group1_3.id).exists()
 
 
+class BulkDeleteQueryWindowTest(TestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def test_windows(self):
+        now = timezone.now()
+        old = self.create_group(self.project, last_seen=now - timedelta(days=10))
+        recent = self.create_group(self.project, last_seen=now - timedelta(days=3))
+        current = self.create_group(self.project, last_seen=now)
+
+        q = BulkDeleteQuery(model=Group, project_id=self.project.id, dtfield="last_seen", days=2)
+        windows = q.get_windows()
+        assert windows[0][0] <= old.last_seen < windows[0][1]
+        assert windows[0][0].timestamp() % 86400 == 0
+        assert all(a[1] == b[0] for a, b in zip(windows, windows[1:]))
+        assert windows[-1][1] > recent.last_seen
+        assert windows[-1][1] < current.last_seen
+        assert len(windows) == 9
+
+        q.execute(chunk_size=1)
+        assert not Group.objects.filter(id__in=[old.id, recent.id]).exists()
+        assert Group.objects.filter(id=current.id).exists()
+
+    def test_resume(self):
+        now = timezone.now()
+        self.create_group(self.project, last_seen=now - timedelta(days=10))
+        self.create_group(self.project, last_seen=now - timedelta(days=3))
+
+        q = BulkDeleteQuery(model=Group, project_id=self.project.id, dtfield="last_seen", days=2)
+        windows = q.get_windows()
+        assert q.execute_window(*windows[0]) == 1
+
+        # The completed window is skipped when the cleanup runs again.
+        assert q.get_windows() == windows[1:]
+
+    @override_settings(SENTRY_CLEANUP_MAX_REPLICA_LAG=5)
+    @patch("sentry.db.deletion.time.sleep")
+    @patch("sentry.db.deletion.get_replica_lag", side_effect=[30, 1, 1])
+    def test_replica_lag(self, get_replica_lag, sleep):
+        now = timezone.now()
+        group = self.create_group(self.project, last_seen=now - timedelta(days=3))
+
+        q = BulkDeleteQuery(model=Group, project_id=self.project.id, dtfield="last_seen", days=2)
+        assert q.execute_window(now - timedelta(days=4), now - timedelta(days=2)) == 1
+        assert not Group.objects.filter(id=group.id).exists()
+        sleep.assert_called_once_with(10)
+
+
 class BulkDeleteQueryIteratorTestCase(TransactionTestCase):
     def test_iteration(self):
         target_project = self.project
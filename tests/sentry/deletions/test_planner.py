@@ -0,0 +1,101 @@
+from django.test import override_settings
+
+from sentry import deletions
+from sentry.deletions.base import BulkModelDeletionTask, ModelDeletionTask, ModelRelation
+from sentry.deletions.planner import get_stages
+from sentry.models import (
+    Group,
+    GroupMeta,
+    GroupSeen,
+    Project,
+    ProjectCodeOwners,
+    ProjectKey,
+    RepositoryProjectPathConfig,
+)
+from sentry.testutils import TestCase, TransactionTestCase
+
+
+class GetStagesTest(TestCase):
+    def test_stages(self):
+        relations = [
+            ModelRelation(ProjectKey, {"project_id": 1}),
+            ModelRelation(GroupSeen, {"project_id": 1}, BulkModelDeletionTask),
+            ModelRelation(ProjectCodeOwners, {"project_id": 1}, BulkModelDeletionTask),
+            # references ProjectCodeOwners, so has to wait for it
+            ModelRelation(RepositoryProjectPathConfig, {"project_id": 1}, BulkModelDeletionTask),
+            ModelRelation(GroupMeta, {"group__project": 1}, BulkModelDeletionTask),
+            ModelRelation(Group, {"project_id": 1}, ModelDeletionTask),
+            ModelRelation(ProjectKey, {"project_id": 1}),
+        ]
+        stages = get_stages(deletions.default_manager, relations)
+        assert [[relation.params["model"] for relation in stage] for stage in stages] == [
+            [ProjectKey, GroupSeen, ProjectCodeOwners],
+            [RepositoryProjectPathConfig, GroupMeta],
+            [Group],
+            [ProjectKey],
+        ]
+
+
+class BulkModelDeletionTaskTest(TestCase):
+    @override_settings(SENTRY_DELETIONS_BATCH_TIME_BUDGET=1.0)
+    def test_resize_chunk(self):
+        task = deletions.get(model=GroupMeta, query={})
+        assert task.chunk_size == BulkModelDeletionTask.DEFAULT_CHUNK_SIZE
+
+        task.resize_chunk(0.1)
+        assert task.chunk_size == 20000
+        task.resize_chunk(1.0)
+        assert task.chunk_size == 20000
+        task.resize_chunk(10.0)
+        assert task.chunk_size == 10000
+
+        for _ in range(10):
+            task.resize_chunk(0)
+        assert task.chunk_size == BulkModelDeletionTask.MAX_CHUNK_SIZE
+
+    @override_settings(SENTRY_DELETIONS_BATCH_TIME_BUDGET=0)
+    def test_fixed_chunk(self):
+        task = deletions.get(model=GroupMeta, query={})
+        task.resize_chunk(0.1)
+        assert task.chunk_size == BulkModelDeletionTask.DEFAULT_CHUNK_SIZE
+
+
+class EstimateTest(TestCase):
+    @override_settings(SENTRY_DELETIONS_BATCH_TIME_BUDGET=1.0)
+    def test_estimate(self):
+        project = self.create_project()
+        for i in range(3):
+            group = self.create_group(project=project)
+            GroupMeta.objects.create(group=group, key="foo", value="bar")
+
+        task = deletions.get(model=Project, query={"id": project.id})
+        estimates = {(e.name, e.depth): e for e in task.estimate()}
+
+        assert estimates[("Project", 0)].rows == 1
+        assert estimates[("Group", 1)].rows == 3
+        assert estimates[("GroupMeta", 1)].rows == 3
+        assert estimates[("GroupMeta", 1)].batches == 1
+        assert estimates[("GroupMeta", 1)].seconds == 1.0
+        # GroupMeta of the sampled group, scaled to all groups
+        assert estimates[("GroupMeta", 2)].rows == 3
+        assert estimates[("EventDataDeletionTask", 2)].rows is None
+
+        assert Group.objects.filter(project=project).count() == 3
+
+
+class ConcurrentDeletionTest(TransactionTestCase):
+    @override_settings(SENTRY_DELETIONS_CONCURRENCY=4)
+    def test_concurrent(self):
+        project = self.create_project()
+        group = self.create_group(project=project)
+        GroupMeta.objects.create(group=group, key="foo", value="bar")
+        GroupSeen.objects.create(group=group, project=project, user=self.user)
+
+        task = deletions.get(model=Project, query={"id": project.id})
+        while task.chunk():
+            pass
+
+        assert not Project.objects.filter(id=project.id).exists()
+        assert not Group.objects.filter(id=group.id).exists()
+        assert not GroupMeta.objects.filter(group_id=group.id).exists()
+        assert not GroupSeen.objects.filter(group_id=group.id).exists()
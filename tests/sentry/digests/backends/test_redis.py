@@ -151,3 +151,42 @@ class RedisBackendTestCase(TestCase):
 
         with backend.digest("timeline", 0) as records:
             assert len(set(records)) == n
+
+    def test_digest_many(self):
+        backend = RedisBackend()
+
+        record_1 = Record("record:1", "value", time.time())
+        record_2 = Record("record:2", "value", time.time())
+        backend.add("timeline:1", record_1)
+        backend.add("timeline:2", record_2)
+
+        # Digesting moves the third timeline to the waiting state.
+        backend.add("timeline:3", Record("record:3", "value", time.time()))
+        with backend.digest("timeline:3", 0):
+            pass
+        backend.add("timeline:3", Record("record:4", "value", time.time()))
+
+        with backend.digest_many(
+            ["timeline:1", "timeline:2", "timeline:3"], minimum_delays={"timeline:1": 0}
+        ) as digests:
+            assert digests == {"timeline:1": [record_1], "timeline:2": [record_2]}
+
+        # Only the first timeline is ready again, the second one waits for
+        # the default minimum delay.
+        assert {entry.key for entry in backend.schedule(time.time())} == {"timeline:1"}
+
+        with backend.digest("timeline:1", 0) as records:
+            assert records == []
+
+    def test_digest_many_failure(self):
+        backend = RedisBackend()
+
+        record = Record("record:1", "value", time.time())
+        backend.add("timeline", record)
+
+        with pytest.raises(Exception):
+            with backend.digest_many(["timeline"]):
+                raise Exception("This causes the digests to not be closed.")
+
+        with backend.digest("timeline", 0) as records:
+            assert records == [record]
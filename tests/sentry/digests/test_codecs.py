@@ -0,0 +1,48 @@
+from sentry.digests.codecs import CompressedPickleCodec, NotificationCodec
+from sentry.digests.notifications import Notification
+from sentry.testutils import TestCase
+from sentry.testutils.helpers.datetime import before_now, iso_format
+
+
+class NotificationCodecTest(TestCase):
+    def test_round_trip(self):
+        event = self.store_event(
+            data={"timestamp": iso_format(before_now(minutes=1)), "message": "hello"},
+            project_id=self.project.id,
+        )
+        codec = NotificationCodec()
+        with self.options({"digests.notification-codec-encode": True}):
+            encoded = codec.encode(Notification(event, [1, 2]))
+        assert encoded[:1] == NotificationCodec.FORMAT_V1
+
+        notification = codec.decode(encoded)
+        assert notification.rules == [1, 2]
+        assert notification.event.event_id == event.event_id
+        assert notification.event.project_id == event.project_id
+        assert notification.event.group_id == event.group_id
+        assert notification.event.data["message"] == "hello"
+
+    def test_legacy_records(self):
+        event = self.store_event(
+            data={"timestamp": iso_format(before_now(minutes=1))}, project_id=self.project.id
+        )
+        encoded = CompressedPickleCodec().encode(Notification(event, [1]))
+
+        notification = NotificationCodec().decode(encoded)
+        assert notification.event.event_id == event.event_id
+        assert notification.rules == [1]
+
+    def test_legacy_encoding_by_default(self):
+        event = self.store_event(
+            data={"timestamp": iso_format(before_now(minutes=1))}, project_id=self.project.id
+        )
+        encoded = NotificationCodec().encode(Notification(event, [1]))
+
+        # Workers that only know the pickle codec can still read the record.
+        notification = CompressedPickleCodec().decode(encoded)
+        assert notification.event.event_id == event.event_id
+        assert notification.rules == [1]
+
+    def test_other_values(self):
+        codec = NotificationCodec()
+        assert codec.decode(codec.encode("value")) == "value"
@@ -0,0 +1,57 @@
+from sentry.eventstore.processing.base import EventProcessingStore
+from sentry.eventstore.processing.redis import CompressedPayloadCodec
+from sentry.utils import json
+from sentry.utils.kvstore.memory import MemoryKVStorage
+
+
+def make_event(event_id, **data):
+    return {"project": 1, "event_id": event_id, **data}
+
+
+def test_store_many():
+    store = EventProcessingStore(MemoryKVStorage())
+    events = [make_event("a" * 32), make_event("b" * 32)]
+
+    keys = store.store_many(events)
+    assert keys == [store.store(event) for event in events]
+    assert store.get_many(keys + ["missing"]) == dict(zip(keys, events))
+    assert store.get_many(keys, unprocessed=True) == {}
+
+    unprocessed = store.store_many([make_event("a" * 32, unprocessed=True)], unprocessed=True)
+    assert unprocessed == keys[:1]
+    assert store.get_many(keys, unprocessed=True) == {
+        keys[0]: make_event("a" * 32, unprocessed=True)
+    }
+
+    store.delete_many(keys)
+    assert store.get_many(keys) == {}
+    assert store.get_many(keys, unprocessed=True) == {}
+
+
+def test_delete_by_key():
+    store = EventProcessingStore(MemoryKVStorage())
+    event = make_event("a" * 32)
+    key = store.store(event)
+    store.store(event, unprocessed=True)
+
+    store.delete_by_key(key)
+    assert store.get(key) is None
+    assert store.get(key, unprocessed=True) is None
+
+
+def test_compressed_payload_codec():
+    codec = CompressedPayloadCodec(threshold=1024)
+
+    small = make_event("a" * 32, message="hello")
+    encoded = codec.encode(small)
+    assert json.loads(encoded) == small
+    assert codec.decode(encoded) == small
+
+    large = make_event("a" * 32, breadcrumbs=[{"message": f"crumb {i}"} for i in range(100)])
+    encoded = codec.encode(large)
+    assert encoded.startswith(CompressedPayloadCodec.FORMAT_V1)
+    assert len(encoded) < len(json.dumps(large))
+    assert codec.decode(encoded) == large
+
+    # Payloads that were stored as JSON are still read
+    assert codec.decode(json.dumps(large)) == large
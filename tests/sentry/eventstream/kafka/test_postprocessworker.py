@@ -1,15 +1,21 @@
+import threading
 from unittest.mock import MagicMock, Mock, patch
 
 import pytest
+from confluent_kafka import TIMESTAMP_CREATE_TIME
 
 from sentry import options
 from sentry.eventstream.kafka.postprocessworker import (
+    _ADAPTIVE_CONCURRENCY_OPTION,
     _CONCURRENCY_OPTION,
+    ConcurrencyController,
+    DispatchTracker,
     ErrorsPostProcessForwarderWorker,
     PostProcessForwarderWorker,
     TransactionsPostProcessForwarderWorker,
 )
 from sentry.eventstream.kafka.protocol import InvalidVersion
+from sentry.testutils.helpers import override_options
 from sentry.utils import json
 
 
@@ -286,3 +292,181 @@ def test_transactions_post_process_forwarder_true_headers(
     )
 
     forwarder.shutdown()
+
+
+def _get_message(payload, offset, timestamp=1000000):
+    message = Mock()
+    message.headers = MagicMock(return_value=[])
+    message.value = MagicMock(return_value=json.dumps(payload))
+    message.topic = MagicMock(return_value="events")
+    message.partition = MagicMock(return_value=0)
+    message.offset = MagicMock(return_value=offset)
+    message.timestamp = MagicMock(return_value=(TIMESTAMP_CREATE_TIME, timestamp))
+    return message
+
+
+@pytest.mark.django_db
+@patch("sentry.eventstream.kafka.postprocessworker.dispatch_post_process_group_task")
+def test_post_process_forwarder_tracked_dispatches(
+    dispatch_post_process_group_task, kafka_message_payload
+):
+    """
+    Tests that tracked dispatches don't block the batch, and that offsets are only
+    released once all earlier dispatches of the partition are done.
+    """
+    release = threading.Event()
+    dispatch_post_process_group_task.side_effect = lambda **kwargs: (
+        release.wait(5) if dispatch_post_process_group_task.call_count == 1 else None
+    )
+
+    tracker = DispatchTracker()
+    forwarder = PostProcessForwarderWorker(concurrency=2, tracker=tracker)
+    batch = [forwarder.process_message(_get_message(kafka_message_payload, i)) for i in range(2)]
+
+    forwarder.flush_batch(batch)
+    tracker.seal({("events", 0): [0, 1]})
+    batch[1].result(timeout=5)
+    tracker.poll()
+    assert not batch[0].done()
+    assert tracker.pending_count == 1
+    assert tracker.get_commit_offsets() == ([], None)
+
+    release.set()
+    tracker.flush()
+    assert tracker.pending_count == 0
+    offsets, error = tracker.get_commit_offsets()
+    assert [(tp.topic, tp.partition, tp.offset) for tp in offsets] == [("events", 0, 2)]
+    assert error is None
+    assert dispatch_post_process_group_task.call_count == 2
+
+    forwarder.shutdown()
+
+
+@pytest.mark.django_db
+def test_post_process_forwarder_tracked_dispatch_error(kafka_message_payload):
+    """
+    Tests that a failed dispatch stops the offsets at its message.
+    """
+    tracker = DispatchTracker()
+    forwarder = PostProcessForwarderWorker(concurrency=1, tracker=tracker)
+
+    kafka_message_payload[0] = 100
+    future = forwarder.process_message(_get_message(kafka_message_payload, 5))
+    forwarder.flush_batch([future])
+    tracker.seal({("events", 0): [5, 5]})
+    tracker.flush()
+
+    offsets, error = tracker.get_commit_offsets()
+    assert offsets == []
+    assert isinstance(error, InvalidVersion)
+
+    forwarder.shutdown()
+
+
+@pytest.mark.django_db
+def test_concurrency_controller():
+    now = 1000.0
+    controller = ConcurrencyController(clock=lambda: now)
+    message = Mock()
+
+    with override_options(
+        {
+            "post-process-forwarder:min-concurrency": 2,
+            "post-process-forwarder:max-concurrency": 4,
+            "post-process-forwarder:target-lag": 10.0,
+            "post-process-forwarder:max-dispatch-latency": 0.5,
+        }
+    ):
+        # Lagging behind
+        message.timestamp = MagicMock(return_value=(TIMESTAMP_CREATE_TIME, 980000))
+        controller.observe(message)
+        assert controller.lag == 20.0
+        controller.record_latency(0.1)
+        assert controller.adjust(2) == 3
+        assert controller.adjust(4) == 4
+
+        # Dispatches are too slow
+        controller.record_latency(0.6)
+        controller.record_latency(0.8)
+        assert controller.adjust(4) == 2
+
+        # Caught up
+        message.timestamp = MagicMock(return_value=(TIMESTAMP_CREATE_TIME, 999000))
+        controller.observe(message)
+        assert controller.adjust(4) == 3
+        assert controller.adjust(2) == 2
+
+        # Within target
+        message.timestamp = MagicMock(return_value=(TIMESTAMP_CREATE_TIME, 993000))
+        controller.observe(message)
+        assert controller.adjust(3) == 3
+
+
+@pytest.mark.django_db
+def test_post_process_forwarder_adaptive_concurrency(kafka_message_payload):
+    """
+    Tests that the concurrency follows the lag when it is adaptive.
+    """
+    forwarder = PostProcessForwarderWorker(concurrency=1)
+
+    with override_options(
+        {
+            _ADAPTIVE_CONCURRENCY_OPTION: True,
+            "post-process-forwarder:max-concurrency": 2,
+            "post-process-forwarder:target-lag": 10.0,
+        }
+    ):
+        forwarder.flush_batch(None)
+        message = _get_message(kafka_message_payload, 0, timestamp=1)
+        with patch("sentry.eventstream.kafka.postprocessworker.dispatch_post_process_group_task"):
+            forwarder.flush_batch([forwarder.process_message(message)])
+            forwarder.flush_batch([forwarder.process_message(message)])
+        assert forwarder._PostProcessForwarderWorker__current_concurrency == 2
+
+    forwarder.shutdown()
+
+
+@pytest.mark.django_db
+@patch("sentry.eventstream.kafka.postprocessworker.dispatch_post_process_group_task")
+def test_post_process_forwarder_task_headers(dispatch_post_process_group_task):
+    """
+    Tests that the body of messages with task headers is never decoded.
+    """
+    forwarder = PostProcessForwarderWorker(concurrency=1)
+
+    mock_message = Mock()
+    mock_message.headers = MagicMock(
+        return_value=[
+            ("Received-Timestamp", b"1626301534.910839"),
+            ("event_id", b"fe0ee9a2bc3b415497bad68aaf70dc7f"),
+            ("project_id", b"1"),
+            ("group_id", b"43"),
+            ("primary_hash", b"311ee66a5b8e697929804ceb1c456ffe"),
+            ("is_new", b"0"),
+            ("is_new_group_environment", b"0"),
+            ("is_regression", b"0"),
+            ("skip_consume", b"0"),
+            ("transaction_forwarder", b"0"),
+            ("operation", b"insert"),
+            ("version", b"2"),
+            ("task_headers_version", b"1"),
+        ]
+    )
+    mock_message.value = MagicMock(side_effect=AssertionError("body was decoded"))
+    mock_message.partition = MagicMock("1")
+
+    future = forwarder.process_message(mock_message)
+    forwarder.flush_batch([future])
+
+    dispatch_post_process_group_task.assert_called_once_with(
+        event_id="fe0ee9a2bc3b415497bad68aaf70dc7f",
+        project_id=1,
+        group_id=43,
+        primary_hash="311ee66a5b8e697929804ceb1c456ffe",
+        is_new=False,
+        is_regression=False,
+        is_new_group_environment=False,
+    )
+    mock_message.value.assert_not_called()
+
+    forwarder.shutdown()
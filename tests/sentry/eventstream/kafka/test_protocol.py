@@ -6,6 +6,7 @@ from sentry.eventstream.kafka.protocol import (
     UnexpectedOperation,
     get_task_kwargs_for_message,
     get_task_kwargs_for_message_from_headers,
+    has_task_headers,
 )
 from sentry.testutils.helpers import override_options
 from sentry.utils import json
@@ -96,3 +97,13 @@ def test_get_task_kwargs_for_message_version_1_kafka_headers():
     assert kwargs["is_new"] is True
     assert kwargs["is_regression"] is False
     assert kwargs["is_new_group_environment"] is True
+
+
+def test_has_task_headers():
+    assert has_task_headers([("operation", b"insert"), ("task_headers_version", b"1")])
+    # Messages produced before the version was introduced, or by a newer producer
+    assert not has_task_headers([("operation", b"insert"), ("version", b"2")])
+    assert not has_task_headers([("task_headers_version", b"2")])
+    assert not has_task_headers([("task_headers_version", None)])
+    assert not has_task_headers("this does not work")
+    assert not has_task_headers(None)
@@ -34,8 +34,10 @@ from sentry.incidents.subscription_processor import (
     build_alert_rule_trigger_stat_key,
     build_trigger_stat_keys,
     get_alert_rule_stats,
+    get_many_alert_rule_stats,
     get_redis_client,
     partition,
+    process_subscription_updates,
     update_alert_rule_stats,
 )
 from sentry.models import Integration
@@ -45,7 +47,7 @@ from sentry.testutils import SnubaTestCase, TestCase
 from sentry.testutils.cases import SessionMetricsTestCase
 from sentry.testutils.helpers.datetime import iso_format
 from sentry.utils import json
-from sentry.utils.dates import to_timestamp
+from sentry.utils.dates import to_datetime, to_timestamp
 
 EMPTY = object()
 
@@ -1322,6 +1324,69 @@ class ProcessUpdateTest(ProcessUpdateBaseClass):
         self.assert_actions_resolved_for_incident(incident, [self.action])
 
 
+@freeze_time()
+class ProcessSubscriptionUpdatesTest(ProcessUpdateTest):
+    """
+    Runs all of the `ProcessUpdateTest` cases through the batch processor.
+    """
+
+    def send_update(self, rule, value, time_delta=None, subscription=None):
+        self.email_action_handler.reset_mock()
+        if time_delta is None:
+            time_delta = timedelta()
+        if subscription is None:
+            subscription = self.sub
+        message = self.build_subscription_update(subscription, value=value, time_delta=time_delta)
+        with self.feature(
+            ["organizations:incidents", "organizations:performance-view"]
+        ), self.capture_on_commit_callbacks(execute=True):
+            processors = process_subscription_updates([(message, subscription)])
+        return processors[subscription.id]
+
+    def test_multiple_subscriptions(self):
+        rule = self.rule
+        trigger = self.trigger
+        updates = [
+            (
+                self.build_subscription_update(self.sub, value=trigger.alert_threshold + 1),
+                self.sub,
+            ),
+            (
+                self.build_subscription_update(self.other_sub, value=trigger.alert_threshold + 1),
+                self.other_sub,
+            ),
+            (
+                self.build_subscription_update(
+                    self.sub,
+                    value=rule.resolve_threshold - 1,
+                    time_delta=timedelta(minutes=1),
+                ),
+                self.sub,
+            ),
+        ]
+        with self.feature(
+            ["organizations:incidents", "organizations:performance-view"]
+        ), self.capture_on_commit_callbacks(execute=True):
+            processors = process_subscription_updates(updates)
+
+        assert set(processors) == {self.sub.id, self.other_sub.id}
+        # The first subscription fired and then resolved within the batch
+        self.assert_no_active_incident(rule, self.sub)
+        incident = self.assert_active_incident(rule, self.other_sub)
+        self.assert_trigger_exists_with_status(incident, trigger, TriggerStatus.ACTIVE)
+        assert get_alert_rule_stats(rule, self.sub, [trigger])[0] == updates[2][0]["timestamp"]
+        assert (
+            get_alert_rule_stats(rule, self.other_sub, [trigger])[0] == updates[1][0]["timestamp"]
+        )
+
+    def test_no_transaction_below_threshold(self):
+        with patch("sentry.incidents.subscription_processor.transaction") as transaction:
+            processor = self.send_update(self.rule, self.trigger.alert_threshold - 1)
+        assert transaction.atomic.call_count == 0
+        self.assert_trigger_counts(processor, self.trigger, 0, 0)
+        self.assert_no_active_incident(self.rule)
+
+
 class CrashRateAlertProcessUpdateTest(ProcessUpdateBaseClass):
     def setUp(self):
         super().setUp()
@@ -1761,6 +1826,23 @@ class TestGetAlertRuleStats(TestCase):
         assert resolve_counts == {3: 2, 4: 4}
 
 
+class TestGetManyAlertRuleStats(TestCase):
+    def test(self):
+        alert_rule = AlertRule(id=1)
+        sub = QuerySubscription(project_id=2)
+        other_sub = QuerySubscription(project_id=3)
+        triggers = [AlertRuleTrigger(id=3)]
+        timestamp = datetime.now().replace(tzinfo=pytz.utc, microsecond=0)
+        update_alert_rule_stats(alert_rule, sub, timestamp, {3: 1}, {3: 2})
+
+        assert get_many_alert_rule_stats(
+            [(alert_rule, sub, triggers), (alert_rule, other_sub, triggers)]
+        ) == [
+            (timestamp, {3: 1}, {3: 2}),
+            (to_datetime(0), {3: 0}, {3: 0}),
+        ]
+
+
 class TestUpdateAlertRuleStats(TestCase):
     def test(self):
         alert_rule = AlertRule(id=1)
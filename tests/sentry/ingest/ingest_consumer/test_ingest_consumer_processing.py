@@ -9,6 +9,7 @@ from sentry.event_manager import EventManager
 from sentry.ingest.ingest_consumer import (
     process_attachment_chunk,
     process_event,
+    process_events,
     process_individual_attachment,
     process_userreport,
 )
@@ -69,6 +70,38 @@ def test_deduplication_works(default_project, task_runner, preprocess_event):
     }
 
 
+@pytest.mark.django_db
+def test_process_events(default_project, task_runner, preprocess_event, monkeypatch):
+    store_many = Mock(side_effect=lambda events: [f"key:{event['event_id']}" for event in events])
+    monkeypatch.setattr(
+        "sentry.ingest.ingest_consumer.event_processing_store.store_many", store_many
+    )
+
+    payloads = [
+        get_normalized_event({"message": f"hello world {i}"}, default_project) for i in range(3)
+    ]
+    start_time = time.time() - 3600
+    messages = [
+        {
+            "payload": json.dumps(payload),
+            "start_time": start_time,
+            "event_id": payload["event_id"],
+            "project_id": default_project.id,
+            "remote_addr": "127.0.0.1",
+        }
+        for payload in payloads
+    ]
+
+    # The duplicate of the first event is only processed once
+    process_events(messages + messages[:1], projects={default_project.id: default_project})
+
+    ((args, _),) = store_many.call_args_list
+    assert args == (payloads,)
+    assert [kwargs["cache_key"] for kwargs in preprocess_event] == [
+        f"key:{payload['event_id']}" for payload in payloads
+    ]
+
+
 @pytest.mark.django_db
 def test_transactions_spawn_save_event_transaction(
     default_project,
@@ -25,6 +25,11 @@ class FileBlobTest(TestCase):
         assert my_file1.checksum == my_file2.checksum
         assert my_file1.path == my_file2.path
 
+    def test_read_range(self):
+        blob = FileBlob.from_file(ContentFile(b"foo bar baz"))
+        assert blob.read_range(4, 3) == b"bar"
+        assert blob.read_range(8, 100) == b"baz"
+
     def test_generate_unique_path(self):
         path = FileBlob.generate_unique_path()
         assert path
@@ -154,6 +159,33 @@ class FileTest(TestCase):
             with self.assertRaises(ValueError):
                 fp.seek(0, 666)
 
+    def test_random_access(self):
+        random_data = os.urandom(1 << 20)
+        file = File.objects.create(name="test.bin", type="default", size=len(random_data))
+        file.putfile(ContentFile(random_data), blob_size=300 * 1024)
+
+        with patch.object(
+            FileBlob, "read_range", autospec=True, side_effect=FileBlob.read_range
+        ) as read_range, file.getfile() as fp:
+            # Read across a blob boundary
+            fp.seek(300 * 1024 - 10)
+            assert fp.read(20) == random_data[300 * 1024 - 10 : 300 * 1024 + 10]
+            assert read_range.call_count == 2
+
+            # Reading the same region again is served from cached pages
+            fp.seek(300 * 1024 - 5)
+            assert fp.read(10) == random_data[300 * 1024 - 5 : 300 * 1024 + 5]
+            assert read_range.call_count == 2
+
+            # Reading the tail only fetches the last page
+            fp.seek(-22, 2)
+            assert fp.read() == random_data[-22:]
+            assert read_range.call_count == 3
+            assert read_range.call_args[0][2] <= 64 * 1024
+
+            fp.seek(0)
+            assert fp.read() == random_data
+
     def test_multi_chunk_prefetch(self):
         random_data = os.urandom(1 << 25)
 
@@ -1,4 +1,5 @@
 from datetime import timedelta
+from unittest.mock import patch
 
 import pytest
 from django.core.cache import cache
@@ -16,6 +17,7 @@ from sentry.models import (
 )
 from sentry.testutils import SnubaTestCase, TestCase
 from sentry.testutils.helpers.datetime import before_now, iso_format
+from sentry.types.activity import ActivityType
 
 
 class GroupTest(TestCase, SnubaTestCase):
@@ -316,3 +318,15 @@ class GroupTest(TestCase, SnubaTestCase):
         assert group.get_last_release() == "100"
 
         assert group2.get_last_release() is None
+
+    @patch("sentry.models.group.record_group_history_from_activity_type")
+    def test_update_group_status_records_history_per_group(self, record_group_history):
+        groups = [self.create_group(status=GroupStatus.UNRESOLVED) for _ in range(3)]
+
+        Group.objects.update_group_status(groups, GroupStatus.RESOLVED, ActivityType.SET_RESOLVED)
+
+        assert [call.args[0] for call in record_group_history.call_args_list] == groups
+        assert all(
+            group.status == GroupStatus.RESOLVED
+            for group in Group.objects.filter(id__in=[group.id for group in groups])
+        )
@@ -1,11 +1,15 @@
 from datetime import datetime
-from unittest.mock import MagicMock
+from queue import Full
+from unittest.mock import MagicMock, patch
 
 import pytest
+import pytz
 
 from sentry.release_health import duplex
 from sentry.release_health.duplex import ComparatorType as Ct
 from sentry.release_health.duplex import DuplexReleaseHealthBackend, ListSet
+from sentry.testutils import TestCase
+from sentry.utils.concurrent import TimedFuture
 
 
 @pytest.mark.parametrize(
@@ -489,3 +493,60 @@ def test_function_dispatch_is_working():
     duplex.sessions.get_current_and_previous_crash_free_rates.assert_called_with(*call_params)
     # check metrics backend were not called again (only one original call)
     assert duplex.metrics.get_current_and_previous_crash_free_rates.call_count == 1
+
+
+class DuplexDispatchTest(TestCase):
+    def setUp(self):
+        self.duplex = DuplexReleaseHealthBackend(
+            datetime(2021, 10, 4, 12, 0, tzinfo=pytz.utc),
+            executor={"path": "sentry.utils.concurrent.SynchronousExecutor"},
+        )
+        self.duplex.sessions = MagicMock()
+        self.duplex.metrics = MagicMock()
+        self.duplex.sessions.check_has_health_data.return_value = {1}
+        self.duplex.metrics.check_has_health_data.return_value = {2}
+
+    def dispatch(self):
+        with self.feature("organizations:release-health-check-metrics"):
+            return self.duplex._dispatch_call(
+                "check_has_health_data", True, None, self.organization, None, [1, 2]
+            )
+
+    @patch("sentry.release_health.duplex.capture_message")
+    def test_compared(self, capture_message):
+        assert self.dispatch() == {1}
+        self.duplex.metrics.check_has_health_data.assert_called_once_with([1, 2])
+        assert capture_message.call_count == 1
+
+    def test_sampled(self):
+        with self.options({"release-health.duplex.sample-rates": {"check_has_health_data": 0}}):
+            assert self.dispatch() == {1}
+        assert self.duplex.metrics.check_has_health_data.call_count == 0
+
+        with self.options({"release-health.duplex.sample-rate": 0}):
+            assert self.dispatch() == {1}
+        assert self.duplex.metrics.check_has_health_data.call_count == 0
+
+    def test_overhead_budget(self):
+        with self.options({"release-health.duplex.overhead-budget": 0.0}):
+            assert self.dispatch() == {1}
+        assert self.duplex.metrics.check_has_health_data.call_count == 0
+
+        self.duplex.overhead_budget.spend(60)
+        assert self.dispatch() == {1}
+        assert self.duplex.metrics.check_has_health_data.call_count == 0
+
+    @patch("sentry.release_health.duplex.incr")
+    def test_queue_full(self, incr):
+        future = TimedFuture()
+        future.set_running_or_notify_cancel()
+        future.set_exception(Full())
+        self.duplex.executor = MagicMock()
+        self.duplex.executor.submit.return_value = future
+
+        assert self.dispatch() == {1}
+        assert self.duplex.metrics.check_has_health_data.call_count == 0
+        incr.assert_any_call(
+            "releasehealth.duplex.skipped",
+            tags={"reason": "queue_full", "method": "check_has_health_data", "rollup": "0"},
+        )
@@ -0,0 +1,68 @@
+from unittest import mock
+
+import pytest
+
+from sentry.release_health import metrics
+from sentry.sentry_metrics.indexer.mock import MockIndexer
+
+
+@pytest.fixture
+def indexer():
+    indexer = MockIndexer()
+    with mock.patch.object(metrics, "indexer", indexer):
+        yield indexer
+
+
+def test_prefetched_indexes(indexer):
+    release = indexer.record("1.0")
+    release_key = indexer.resolve("release")
+    with mock.patch.object(indexer, "bulk_resolve", wraps=indexer.bulk_resolve) as bulk_resolve:
+        with metrics.prefetched_indexes(1, ["release", "1.0", "2.0", "session"]):
+            with mock.patch.object(indexer, "resolve") as resolve:
+                assert metrics.tag_key(1, "release") == f"tags[{release_key}]"
+                assert metrics.tag_value(1, "1.0") == release
+                assert metrics.try_get_string_index(1, "2.0") is None
+                with pytest.raises(metrics.MetricIndexNotFound):
+                    metrics.metric_id(1, "2.0")
+            assert resolve.call_count == 0
+
+            # Strings that weren't prefetched are looked up as usual.
+            assert metrics.metric_id(1, "user") == indexer.resolve("user")
+
+    assert bulk_resolve.call_count == 1
+
+
+def test_prefetch_strings(indexer):
+    release = indexer.record("1.0")
+    with metrics.prefetched_indexes(1, ["session"]):
+        with mock.patch.object(
+            indexer, "bulk_reverse_resolve", wraps=indexer.bulk_reverse_resolve
+        ) as bulk_reverse_resolve:
+            metrics.prefetch_strings(1, [release, indexer.resolve("session")])
+        assert bulk_reverse_resolve.call_args[0][0] == {release}
+
+        with mock.patch.object(indexer, "reverse_resolve") as reverse_resolve:
+            assert metrics.reverse_tag_value(1, release) == "1.0"
+        assert reverse_resolve.call_count == 0
+
+
+def test_run_overview_queries():
+    queries = [
+        (mock.sentinel.durations, "durations", None),
+        (mock.sentinel.sessions, "sessions", None),
+        (mock.sentinel.more_durations, "durations", None),
+    ]
+
+    def bulk_snql_query(queries, referrer):
+        return [{"data": [{"query": query, "referrer": referrer}]} for query in queries]
+
+    with mock.patch.object(metrics, "bulk_snql_query", side_effect=bulk_snql_query) as bulk_query:
+        rows_list = metrics.run_overview_queries(queries)
+
+    # One request per referrer, with the rows in the order of the queries.
+    assert bulk_query.call_count == 2
+    assert rows_list == [
+        [{"query": mock.sentinel.durations, "referrer": "durations"}],
+        [{"query": mock.sentinel.sessions, "referrer": "sessions"}],
+        [{"query": mock.sentinel.more_durations, "referrer": "durations"}],
+    ]
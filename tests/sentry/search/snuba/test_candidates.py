@@ -0,0 +1,68 @@
+from django.core.cache import cache
+from django.db.models import Q
+
+from sentry.api.event_search import SearchFilter, SearchKey, SearchValue
+from sentry.models import Group, GroupStatus
+from sentry.search.snuba import candidates
+from sentry.search.snuba.backend import QCallbackCondition
+from sentry.testutils import TestCase
+
+
+class CandidatesTest(TestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.unresolved = self.create_group(status=GroupStatus.UNRESOLVED)
+        self.resolved = self.create_group(status=GroupStatus.RESOLVED)
+        self.search_filter = SearchFilter(
+            SearchKey("status"), "=", SearchValue([GroupStatus.UNRESOLVED])
+        )
+        self.condition = QCallbackCondition(lambda statuses: Q(status__in=statuses))
+
+    def get_candidate_ids(self):
+        return candidates.get_candidate_ids([self.project], self.search_filter, self.condition)
+
+    def test_encode_ids(self):
+        ids = [5, 1, 2 ** 40, 3]
+        assert list(candidates.decode_ids(candidates.encode_ids(ids))) == sorted(ids)
+        assert list(candidates.decode_ids(candidates.encode_ids([]))) == []
+
+    def test_get_filter_key(self):
+        other = SearchFilter(
+            SearchKey("status"), "=", SearchValue([GroupStatus.RESOLVED, GroupStatus.UNRESOLVED])
+        )
+        reordered = SearchFilter(
+            SearchKey("status"), "=", SearchValue([GroupStatus.UNRESOLVED, GroupStatus.RESOLVED])
+        )
+        assert candidates.get_filter_key(other) == candidates.get_filter_key(reordered)
+        assert candidates.get_filter_key(other) != candidates.get_filter_key(self.search_filter)
+
+    def test_cached(self):
+        with self.options({"snuba.search.candidate-cache-ttl": 60}):
+            assert self.get_candidate_ids() == {self.unresolved.id}
+
+            # Not seen, as queryset updates don't send signals.
+            Group.objects.filter(id=self.resolved.id).update(status=GroupStatus.UNRESOLVED)
+            with self.assertNumQueries(0):
+                assert self.get_candidate_ids() == {self.unresolved.id}
+
+    def test_invalidate(self):
+        with self.options({"snuba.search.candidate-cache-ttl": 60}):
+            assert self.get_candidate_ids() == {self.unresolved.id}
+
+            self.resolved.status = GroupStatus.UNRESOLVED
+            self.resolved.save()
+            assert self.get_candidate_ids() == {self.unresolved.id, self.resolved.id}
+
+            candidates.invalidate(self.project.id)
+            other = self.create_group(status=GroupStatus.UNRESOLVED)
+            assert self.get_candidate_ids() == {self.unresolved.id, self.resolved.id, other.id}
+
+    def test_too_many(self):
+        self.create_group(status=GroupStatus.UNRESOLVED)
+        with self.options(
+            {"snuba.search.candidate-cache-ttl": 60, "snuba.search.max-cached-candidates": 1}
+        ):
+            assert self.get_candidate_ids() is None
+            with self.assertNumQueries(0):
+                assert self.get_candidate_ids() is None
@@ -0,0 +1,21 @@
+from sentry.sentry_metrics.indexer.cache import StringIndexerCache
+
+
+def test_lookups():
+    cache = StringIndexerCache(max_size=10)
+    cache.set_many({"a": 1, "b": 2})
+    assert cache.get_many(["a", "b", "c"]) == {"a": 1, "b": 2}
+    assert cache.get_many_reverse([1, 2, 3]) == {1: "a", 2: "b"}
+
+    cache.clear()
+    assert cache.get_many(["a"]) == {}
+    assert cache.get_many_reverse([1]) == {}
+
+
+def test_eviction():
+    cache = StringIndexerCache(max_size=2)
+    cache.set_many({"a": 1, "b": 2})
+    # Touch "a" so that "b" is the least recently used entry
+    assert cache.get_many(["a"]) == {"a": 1}
+    cache.set_many({"c": 3})
+    assert cache.get_many(["a", "b", "c"]) == {"a": 1, "c": 3}
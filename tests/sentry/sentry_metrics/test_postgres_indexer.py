@@ -28,3 +28,29 @@ class PostgresIndexerTest(TestCase):
         # test invalid values
         assert PGStringIndexer().resolve("beep") is None
         assert PGStringIndexer().reverse_resolve(1234) is None
+
+    def test_bulk_resolve(self):
+        results = self.indexer.bulk_record(strings=["hello", "hey"])
+        self.indexer.clear_local_cache()
+        assert self.indexer.bulk_resolve(["hello", "hey", "beep"]) == {
+            "hello": results["hello"],
+            "hey": results["hey"],
+        }
+
+    def test_bulk_reverse_resolve(self):
+        results = self.indexer.bulk_record(strings=["hello", "hey"])
+        assert self.indexer.bulk_reverse_resolve([results["hello"], results["hey"], 1234]) == {
+            results["hello"]: "hello",
+            results["hey"]: "hey",
+        }
+
+    def test_local_cache(self):
+        results = self.indexer.bulk_record(strings=["hello", "hey"])
+        with self.assertNumQueries(0):
+            assert self.indexer.bulk_record(strings=["hello", "hey"]) == results
+            assert self.indexer.resolve("hello") == results["hello"]
+            assert self.indexer.reverse_resolve(results["hey"]) == "hey"
+
+        self.indexer.clear_local_cache()
+        assert self.indexer.local_cache.get_many(["hello"]) == {}
+        assert self.indexer.bulk_record(strings=["hello", "hey"]) == results
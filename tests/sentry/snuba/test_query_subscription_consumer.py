@@ -13,6 +13,8 @@ from sentry.snuba.query_subscription_consumer import (
     InvalidMessageError,
     InvalidSchemaError,
     QuerySubscriptionConsumer,
+    batch_subscriber_registry,
+    register_batch_subscriber,
     register_subscriber,
     subscriber_registry,
 )
@@ -114,6 +116,101 @@ class HandleMessageTest(BaseQuerySubscriptionTest, TestCase):
         mock_callback.assert_called_once_with(data["payload"], sub)
 
 
+class HandleMessagesTest(BaseQuerySubscriptionTest, TestCase):
+    metrics = patcher("sentry.snuba.query_subscription_consumer.metrics")
+
+    def setUp(self):
+        super().setUp()
+        self.orig_registry = deepcopy(subscriber_registry)
+        self.orig_batch_registry = deepcopy(batch_subscriber_registry)
+
+    def tearDown(self):
+        super().tearDown()
+        subscriber_registry.clear()
+        subscriber_registry.update(self.orig_registry)
+        batch_subscriber_registry.clear()
+        batch_subscriber_registry.update(self.orig_batch_registry)
+
+    def create_subscription(self, registration_key):
+        with self.tasks():
+            snuba_query = create_snuba_query(
+                QueryDatasets.EVENTS,
+                "hello",
+                "count()",
+                timedelta(minutes=10),
+                timedelta(minutes=1),
+                None,
+            )
+            sub = create_snuba_subscription(self.project, registration_key, snuba_query)
+        sub.refresh_from_db()
+        return sub
+
+    def build_subscription_message(self, sub, value):
+        data = deepcopy(self.valid_wrapper)
+        data["payload"]["subscription_id"] = sub.subscription_id
+        data["payload"]["result"] = {"data": [{"hello": value}]}
+        return self.build_mock_message(data, topic=settings.KAFKA_EVENTS_SUBSCRIPTIONS_RESULTS)
+
+    def test_batch(self):
+        mock_callback = mock.Mock()
+        mock_batch_callback = mock.Mock()
+        register_subscriber("batched_test")(mock_callback)
+        register_batch_subscriber("batched_test")(mock_batch_callback)
+        sub = self.create_subscription("batched_test")
+        other_sub = self.create_subscription("batched_test")
+
+        self.consumer.handle_messages(
+            [
+                self.build_subscription_message(sub, 1),
+                self.build_subscription_message(other_sub, 2),
+                self.build_subscription_message(sub, 3),
+            ]
+        )
+        assert mock_callback.call_count == 0
+        assert mock_batch_callback.call_count == 1
+        (updates,) = mock_batch_callback.call_args[0]
+        assert [
+            (update["values"]["data"][0]["hello"], subscription) for update, subscription in updates
+        ] == [(1, sub), (2, other_sub), (3, sub)]
+
+    def test_no_batch_subscriber(self):
+        mock_callback = mock.Mock()
+        register_subscriber("unbatched_test")(mock_callback)
+        sub = self.create_subscription("unbatched_test")
+
+        self.consumer.handle_messages(
+            [self.build_subscription_message(sub, 1), self.build_subscription_message(sub, 2)]
+        )
+        assert [
+            (call[0][0]["values"]["data"][0]["hello"], call[0][1])
+            for call in mock_callback.call_args_list
+        ] == [(1, sub), (2, sub)]
+
+    def test_no_subscription(self):
+        mock_batch_callback = mock.Mock()
+        register_subscriber("batched_test")(mock.Mock())
+        register_batch_subscriber("batched_test")(mock_batch_callback)
+        sub = self.create_subscription("batched_test")
+        missing = QuerySubscription(subscription_id="missing")
+
+        with mock.patch("sentry.snuba.tasks._snuba_pool") as pool:
+            pool.urlopen.return_value.status = 202
+            self.consumer.handle_messages(
+                [
+                    self.build_subscription_message(missing, 1),
+                    self.build_subscription_message(sub, 2),
+                ]
+            )
+            pool.urlopen.assert_called_once_with(
+                "DELETE", f"/{QueryDatasets.EVENTS.value}/subscriptions/missing"
+            )
+        self.metrics.incr.assert_called_once_with(
+            "snuba_query_subscriber.subscription_doesnt_exist"
+        )
+        (updates,) = mock_batch_callback.call_args[0]
+        assert [subscription for _, subscription in updates] == [sub]
+
+
 class ParseMessageValueTest(BaseQuerySubscriptionTest, unittest.TestCase):
     def run_test(self, message):
         self.consumer.parse_message_value(json.dumps(message))
@@ -186,3 +283,20 @@ class RegisterSubscriberTest(unittest.TestCase):
         with self.assertRaises(Exception) as cm:
             register_subscriber("hello")(other_callback)
         assert str(cm.exception) == "Handler already registered for hello"
+
+
+class RegisterBatchSubscriberTest(unittest.TestCase):
+    def setUp(self):
+        self.orig_registry = deepcopy(batch_subscriber_registry)
+
+    def tearDown(self):
+        batch_subscriber_registry.clear()
+        batch_subscriber_registry.update(self.orig_registry)
+
+    def test_register(self):
+        callback = object()
+        register_batch_subscriber("hello")(callback)
+        assert batch_subscriber_registry["hello"] == callback
+        with self.assertRaises(Exception) as cm:
+            register_batch_subscriber("hello")(object())
+        assert str(cm.exception) == "Batch handler already registered for hello"
@@ -5,7 +5,7 @@ from unittest.mock import patch
 
 from django.core.files.base import ContentFile
 
-from sentry.models import FileBlob, FileBlobOwner, ReleaseFile
+from sentry.models import File, FileBlob, FileBlobIndex, FileBlobOwner, ReleaseFile
 from sentry.models.debugfile import ProjectDebugFile
 from sentry.models.releasefile import read_artifact_index
 from sentry.tasks.assemble import (
@@ -158,6 +158,68 @@ class AssembleDifTest(BaseAssembleTest):
         assert f.checksum == file_checksum.hexdigest()
         assert f.type == "dummy.type"
 
+    def test_assemble_as_stream(self):
+        contents = [os.urandom(1024 * 64) for _ in range(4)]
+        files = [(io.BytesIO(content), sha1(content).hexdigest()) for content in contents]
+        FileBlob.from_files(files, organization=self.organization)
+        total_checksum = sha1(b"".join(contents)).hexdigest()
+
+        rv = assemble_file(
+            AssembleTask.ARTIFACTS,
+            self.organization,
+            "testfile",
+            total_checksum,
+            [x[1] for x in files],
+            "dummy.type",
+            as_stream=True,
+        )
+
+        assert rv is not None
+        f, reader = rv
+        assert f.size == len(contents) * 1024 * 64
+        with reader:
+            reader.seek(1024 * 64 * 2)
+            assert reader.read(1024 * 64) == contents[2]
+        assert list(
+            FileBlobIndex.objects.filter(file=f).order_by("offset").values_list("offset", flat=True)
+        ) == [0, 1024 * 64, 1024 * 64 * 2, 1024 * 64 * 3]
+
+    def test_assemble_checksum_mismatch(self):
+        content = b"foo"
+        blob = FileBlob.from_file(ContentFile(content))
+
+        rv = assemble_file(
+            AssembleTask.DIF,
+            self.project,
+            "testfile",
+            sha1(b"bar").hexdigest(),
+            [blob.checksum],
+            "dummy.type",
+        )
+
+        assert rv is None
+        status, detail = get_assemble_status(
+            AssembleTask.DIF, self.project.id, sha1(b"bar").hexdigest()
+        )
+        assert status == ChunkFileState.ERROR
+        assert detail == "Reported checksum mismatch"
+        assert not File.objects.filter(name="testfile").exists()
+        assert not FileBlobIndex.objects.filter(blob=blob).exists()
+
+    def test_from_files_checksum_mismatch(self):
+        content = b"foo"
+        existing = FileBlob.from_file(ContentFile(content))
+
+        # Neither new nor existing blobs may be claimed with the wrong content
+        for checksum in (sha1(b"bar").hexdigest(), existing.checksum):
+            with self.assertRaises(OSError):
+                FileBlob.from_files(
+                    [(io.BytesIO(b"baz"), checksum)], organization=self.organization
+                )
+
+        assert not FileBlob.objects.filter(checksum=sha1(b"bar").hexdigest()).exists()
+        assert not FileBlobOwner.objects.filter(organization_id=self.organization.id).exists()
+
     def test_assemble_debug_id_override(self):
         sym_file = self.load_fixture("crash.sym")
         blob1 = FileBlob.from_file(ContentFile(sym_file))
@@ -3,7 +3,7 @@ from unittest.mock import patch
 from sentry import eventstore, eventstream
 from sentry.models import Group, GroupEnvironment, GroupMeta, GroupRedirect, UserReport
 from sentry.similarity import _make_index_backend
-from sentry.tasks.merge import merge_groups
+from sentry.tasks.merge import merge_groups, merge_objects
 from sentry.testutils import TestCase
 from sentry.testutils.helpers.datetime import before_now, iso_format
 from sentry.utils import redis
@@ -186,3 +186,18 @@ class MergeGroupTest(TestCase):
         assert not Group.objects.filter(id=group1.id).exists()
 
         assert UserReport.objects.get(id=ur.id).group_id == group2.id
+
+    def test_merge_objects_in_chunks(self):
+        group1 = self.create_group(self.project)
+        group2 = self.create_group(self.project)
+        for i in range(5):
+            UserReport.objects.create(
+                project_id=self.project.id, group_id=group1.id, event_id=f"{i:032x}"
+            )
+
+        assert merge_objects([UserReport], group1, group2, limit=2, max_chunks=2)
+        assert UserReport.objects.filter(group_id=group2.id).count() == 4
+
+        assert not merge_objects([UserReport], group1, group2, limit=2, max_chunks=2)
+        assert UserReport.objects.filter(group_id=group2.id).count() == 5
+        assert not UserReport.objects.filter(group_id=group1.id).exists()
@@ -18,8 +18,14 @@ from sentry.models import (
     UserReport,
 )
 from sentry.plugins.base.v2 import Plugin2
-from sentry.reprocessing2 import is_group_finished
-from sentry.tasks.reprocessing2 import reprocess_group
+from sentry.reprocessing2 import (
+    acquire_reprocessing_slot,
+    get_progress,
+    is_group_finished,
+    plan_group_reprocessing,
+    release_reprocessing_slot,
+)
+from sentry.tasks.reprocessing2 import reprocess_group, reprocess_group_slice
 from sentry.tasks.store import preprocess_event
 from sentry.testutils.helpers import Feature
 from sentry.testutils.helpers.datetime import before_now, iso_format
@@ -295,8 +301,12 @@ def test_max_events(
             remaining_events=remaining_events,
         )
 
+    assert get_progress(group_id)[0] == (max_events or 5)
+
     burst(max_jobs=100)
 
+    assert get_progress(group_id)[0] == 0
+
     event = None
     for i, event_id in enumerate(event_ids):
         event = eventstore.get_event_by_id(default_project.id, event_id)
@@ -329,6 +339,126 @@ def test_max_events(
     assert is_group_finished(group_id)
 
 
+@pytest.mark.django_db
+@pytest.mark.snuba
+def test_plan_slices(default_project, reset_snuba, process_and_save, settings):
+    settings.SENTRY_REPROCESSING_TIME_SLICES = 3
+
+    event_ids = [
+        process_and_save({"message": "hello world"}, seconds_ago=i + 1) for i in reversed(range(5))
+    ]
+    events = [eventstore.get_event_by_id(default_project.id, event_id) for event_id in event_ids]
+    (group_id,) = {event.group_id for event in events}
+
+    slices, cutoff = plan_group_reprocessing(default_project.id, group_id, max_events=2)
+
+    assert len(slices) == 3
+    assert all(end == next_start for (_, end), (next_start, _) in zip(slices, slices[1:]))
+    for event in events:
+        timestamp = int(event.datetime.timestamp())
+        assert sum(start <= timestamp < end for start, end in slices) == 1
+
+    # The newest two events are reprocessed.
+    assert cutoff[1] == events[-2].event_id
+
+
+@pytest.mark.django_db
+@pytest.mark.snuba
+def test_max_events_same_second(
+    default_project,
+    reset_snuba,
+    process_and_save,
+    burst_task_runner,
+):
+    timestamp = iso_format(before_now(seconds=5))
+    event_ids = [
+        process_and_save({"message": "hello world", "timestamp": timestamp}) for _ in range(5)
+    ]
+    (group_id,) = {
+        eventstore.get_event_by_id(default_project.id, event_id).group_id for event_id in event_ids
+    }
+
+    with burst_task_runner() as burst:
+        reprocess_group(default_project.id, group_id, max_events=2, remaining_events="keep")
+
+    burst(max_jobs=100)
+
+    events = [eventstore.get_event_by_id(default_project.id, event_id) for event_id in event_ids]
+    reprocessed = [event for event in events if "reprocessing" in event.data["contexts"]]
+    assert len(reprocessed) == 2
+    assert get_progress(group_id)[0] == 0
+    assert is_group_finished(group_id)
+
+
+class WorkerKilled(BaseException):
+    pass
+
+
+@pytest.mark.django_db
+@pytest.mark.snuba
+def test_slice_redelivered(
+    default_project,
+    reset_snuba,
+    process_and_save,
+    burst_task_runner,
+    monkeypatch,
+    settings,
+):
+    settings.SENTRY_REPROCESSING_PAGE_SIZE = 5
+    settings.SENTRY_REPROCESSING_TIME_SLICES = 1
+
+    event_ids = [
+        process_and_save({"message": "hello world"}, seconds_ago=i + 1) for i in reversed(range(3))
+    ]
+    (group_id,) = {
+        eventstore.get_event_by_id(default_project.id, event_id).group_id for event_id in event_ids
+    }
+
+    from sentry import reprocessing2
+
+    original_reprocess_event = reprocessing2.reprocess_event
+    handed_off = []
+    killed = []
+
+    def reprocess_event(**kwargs):
+        if not killed and len(handed_off) == 1:
+            # The worker dies in the middle of the page and the task is
+            # redelivered with the same arguments.
+            killed.append(reprocess_group_slice.request.kwargs)
+            raise WorkerKilled()
+
+        original_reprocess_event(**kwargs)
+        handed_off.append(kwargs["event_id"])
+
+    monkeypatch.setattr(reprocessing2, "reprocess_event", reprocess_event)
+
+    with burst_task_runner() as burst:
+        reprocess_group(default_project.id, group_id)
+
+        with pytest.raises(WorkerKilled):
+            burst(max_jobs=100)
+
+        reprocess_group_slice.delay(**killed[0])
+        burst(max_jobs=100)
+
+    assert sorted(handed_off) == sorted(event_ids)
+    assert get_progress(group_id)[0] == 0
+    assert is_group_finished(group_id)
+    for event_id in event_ids:
+        event = eventstore.get_event_by_id(default_project.id, event_id)
+        assert event.group_id != group_id
+
+
+def test_reprocessing_slots(settings):
+    settings.SENTRY_REPROCESSING_MAX_CONCURRENT_SLICES = 1
+
+    assert acquire_reprocessing_slot("1:0")
+    assert not acquire_reprocessing_slot("2:0")
+    release_reprocessing_slot("1:0")
+    assert acquire_reprocessing_slot("2:0")
+    release_reprocessing_slot("2:0")
+
+
 @pytest.mark.django_db
 @pytest.mark.snuba
 def test_attachments_and_userfeedback(
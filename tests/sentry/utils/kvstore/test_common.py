@@ -125,3 +125,18 @@ def test_multiple_key_operations(properties: Properties) -> None:
     store.delete_many(all_keys)
 
     assert dict(store.get_many(all_keys)) == {}
+
+
+def test_set_many(properties: Properties) -> None:
+    store = properties.store
+
+    items = dict(itertools.islice(properties.items, 10))
+    store.set_many(list(items.items()), ttl=timedelta(seconds=30))
+    assert dict(store.get_many(list(items.keys()))) == items
+
+    # Test overwriting keys with prior values.
+    new_items = dict(zip(items.keys(), properties.values))
+    store.set_many(list(new_items.items()))
+    assert dict(store.get_many(list(items.keys()))) == new_items
+
+    store.delete_many(list(items.keys()))
@@ -1,6 +1,6 @@
-from sentry.models import User
+from sentry.models import GroupMeta, User
 from sentry.testutils import TestCase
-from sentry.utils.query import RangeQuerySetWrapper
+from sentry.utils.query import RangeQuerySetWrapper, bulk_delete_objects
 
 
 class RangeQuerySetWrapperTest(TestCase):
@@ -26,3 +26,28 @@ class RangeQuerySetWrapperTest(TestCase):
             user.delete()
 
         assert User.objects.all().count() == 0
+
+
+class BulkDeleteObjectsTest(TestCase):
+    def test_basic(self):
+        users = [self.create_user() for _ in range(3)]
+
+        assert bulk_delete_objects(User, id=users[0].id)
+        assert not bulk_delete_objects(User, id=users[0].id)
+        assert list(User.objects.values_list("id", flat=True).order_by("id")) == [
+            users[1].id,
+            users[2].id,
+        ]
+
+    def test_limit_and_lookups(self):
+        group = self.create_group()
+        other_group = self.create_group(project=self.create_project())
+        for i in range(3):
+            GroupMeta.objects.create(group=group, key=f"foo{i}", value="bar")
+        GroupMeta.objects.create(group=other_group, key="foo", value="bar")
+
+        assert bulk_delete_objects(GroupMeta, limit=2, group__project=group.project_id)
+        assert GroupMeta.objects.filter(group=group).count() == 1
+        assert bulk_delete_objects(GroupMeta, limit=2, group__project=group.project_id)
+        assert not bulk_delete_objects(GroupMeta, limit=2, group__project=group.project_id)
+        assert list(GroupMeta.objects.values_list("group_id", flat=True)) == [other_group.id]
@@ -0,0 +1,125 @@
+from unittest import TestCase
+from unittest.mock import Mock
+
+import pytest
+
+from sentry.utils.batching_kafka_consumer import (
+    AbstractBatchWorker,
+    BatchingKafkaConsumer,
+    DeliveryError,
+    DeliveryTracker,
+    KafkaConsumerFacade,
+    SourceOffset,
+)
+
+
+def commit_offsets(tracker):
+    offsets, error = tracker.get_commit_offsets()
+    return [(tp.topic, tp.partition, tp.offset) for tp in offsets], error
+
+
+class DeliveryTrackerTest(TestCase):
+    def test_contiguous_commits(self):
+        tracker = DeliveryTracker(Mock())
+        done = [tracker.track(SourceOffset("topic", 0, offset)) for offset in range(3)]
+        tracker.seal({("topic", 0): [0, 2]})
+        assert commit_offsets(tracker) == ([], None)
+
+        # Out of order delivery doesn't move the commit past the first
+        # undelivered message.
+        done[1](None)
+        assert commit_offsets(tracker) == ([], None)
+
+        done[0](None)
+        assert commit_offsets(tracker) == ([("topic", 0, 2)], None)
+
+        done[2](None)
+        assert commit_offsets(tracker) == ([("topic", 0, 3)], None)
+        assert tracker.pending_count == 0
+
+    def test_unsealed_offsets_are_not_committed(self):
+        tracker = DeliveryTracker(Mock())
+        tracker.track(SourceOffset("topic", 0, 0))(None)
+        assert commit_offsets(tracker) == ([], None)
+
+        # Messages that didn't start any work are committed once sealed.
+        tracker.seal({("topic", 0): [0, 5], ("topic", 1): [3, 4]})
+        assert commit_offsets(tracker) == ([("topic", 0, 6), ("topic", 1, 5)], None)
+
+    def test_failed_delivery(self):
+        tracker = DeliveryTracker(Mock())
+        done = [tracker.track(SourceOffset("topic", 0, offset)) for offset in range(3)]
+        tracker.seal({("topic", 0): [0, 2]})
+
+        error = Mock()
+        done[0](None)
+        done[1](error)
+        done[2](None)
+        assert commit_offsets(tracker) == ([("topic", 0, 1)], error)
+
+    def test_produce(self):
+        producer = Mock()
+        producer.produce.side_effect = [BufferError, None]
+        tracker = DeliveryTracker(producer)
+        tracker.produce(SourceOffset("topic", 0, 0), "other-topic", b"value")
+
+        assert producer.produce.call_count == 2
+        assert producer.poll.call_count == 1
+        assert tracker.pending_count == 1
+
+        producer.produce.call_args[1]["on_delivery"](None, Mock())
+        assert tracker.pending_count == 0
+
+
+class ProducingWorker(AbstractBatchWorker):
+    def __init__(self, tracker):
+        self.tracker = tracker
+        self.delivered = []
+
+    def process_message(self, message):
+        return SourceOffset.from_message(message)
+
+    def flush_batch(self, batch):
+        for source in batch:
+            self.delivered.append(self.tracker.track(source))
+
+    def shutdown(self):
+        pass
+
+
+def message(offset):
+    msg = Mock()
+    msg.topic.return_value = "topic"
+    msg.partition.return_value = 0
+    msg.offset.return_value = offset
+    return msg
+
+
+def test_consumer_commits_delivered_offsets():
+    tracker = DeliveryTracker()
+    worker = ProducingWorker(tracker)
+    kafka_consumer = Mock(spec=KafkaConsumerFacade)
+    consumer = BatchingKafkaConsumer(
+        "topic",
+        worker=worker,
+        max_batch_size=2,
+        max_batch_time=1000,
+        consumer=kafka_consumer,
+        delivery_tracker=tracker,
+    )
+
+    consumer._handle_message(message(0))
+    consumer._handle_message(message(1))
+    consumer._flush()
+    # The batch was flushed without waiting for delivery.
+    assert kafka_consumer.commit.call_count == 0
+
+    worker.delivered[0](None)
+    consumer._commit_delivered()
+    (commit,) = kafka_consumer.commit.call_args_list
+    assert [(tp.topic, tp.partition, tp.offset) for tp in commit[1]["offsets"]] == [("topic", 0, 1)]
+
+    worker.delivered[1](Mock())
+    with pytest.raises(DeliveryError):
+        consumer._commit_delivered()
+    assert kafka_consumer.commit.call_count == 1
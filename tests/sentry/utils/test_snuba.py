@@ -1,19 +1,31 @@
+import asyncio
+import threading
+import time
 import unittest
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta
 from unittest import mock
 
 import pytest
 import pytz
+from django.test import override_settings
 from django.utils import timezone
 
 from sentry.models import GroupRelease, Project, Release
 from sentry.testutils import TestCase
+from sentry.utils import json
 from sentry.utils.snuba import (
     Dataset,
+    QueryExecutionError,
     SnubaQueryParams,
+    UnexpectedResponseError,
     UnqualifiedQueryError,
+    _hedges_in_flight,
+    _iter_json_object,
     _prepare_query_params,
+    concurrent_bulk_snql_query,
     get_json_type,
+    get_referrer_timeout,
     get_query_params_to_update_for_projects,
     get_snuba_column_name,
     get_snuba_translators,
@@ -354,3 +366,160 @@ class QuantizeTimeTest(unittest.TestCase):
                 break
 
         assert i != j
+
+
+class IterJsonObjectTest(unittest.TestCase):
+    def chunked(self, value, size):
+        raw = json.dumps(value).encode("utf-8")
+        return iter([raw[i : i + size] for i in range(0, len(raw), size)])
+
+    def test_streams_rows(self):
+        response = {
+            "meta": [{"name": "count", "type": "UInt64"}],
+            "data": [{"count": i, "title": "\u2603" * (i % 3)} for i in range(100)],
+            "timing": 12345,
+            "totals": None,
+        }
+        for size in (1, 7, 1024, 1024 * 1024):
+            body = {}
+            rows = _iter_json_object(self.chunked(response, size), body)
+            assert list(rows) == response["data"]
+            assert body == {"meta": response["meta"], "timing": 12345, "totals": None}
+
+    def test_rows_are_lazy(self):
+        body = {}
+        rows = _iter_json_object(self.chunked({"data": [1, 2], "meta": []}, 1), body)
+        assert next(rows) == 1
+        assert body == {}
+        assert list(rows) == [2]
+        assert body == {"meta": []}
+
+    def test_empty(self):
+        assert list(_iter_json_object(self.chunked({}, 1), {})) == []
+        assert list(_iter_json_object(self.chunked({"data": []}, 1), {})) == []
+
+    def test_truncated(self):
+        with pytest.raises(UnexpectedResponseError):
+            list(_iter_json_object(iter([b'{"data": [{"count": 1}']), {}))
+
+
+def snuba_response(data, status=200):
+    return mock.Mock(status=status, data=json.dumps(data).encode("utf-8"))
+
+
+class ConcurrentBulkSnqlQueryTest(unittest.TestCase):
+    @mock.patch("sentry.utils.snuba._raw_snql_query")
+    def test_results_in_order(self, raw_snql_query):
+        raw_snql_query.side_effect = lambda query, *args, **kwargs: snuba_response(
+            {"data": [{"query": query}]}
+        )
+        results = concurrent_bulk_snql_query(["a", "b", "c"], referrer="test", concurrency=2)
+        assert [result["data"] for result in results] == [
+            [{"query": "a"}],
+            [{"query": "b"}],
+            [{"query": "c"}],
+        ]
+
+    @override_settings(SENTRY_SNUBA_REFERRER_TIMEOUTS={"test": 5})
+    @mock.patch("sentry.utils.snuba._raw_snql_query")
+    def test_referrer_timeout(self, raw_snql_query):
+        assert get_referrer_timeout("test") == 5
+        assert get_referrer_timeout("other") == 30
+
+        raw_snql_query.return_value = snuba_response({"data": []})
+        concurrent_bulk_snql_query(["a"], referrer="test")
+        assert raw_snql_query.call_args[1]["timeout"] == 5
+
+    @mock.patch("sentry.utils.snuba._raw_snql_query")
+    def test_error(self, raw_snql_query):
+        raw_snql_query.return_value = snuba_response(
+            {"error": {"type": "clickhouse", "code": 0, "message": "boom"}}, status=500
+        )
+        with pytest.raises(QueryExecutionError):
+            concurrent_bulk_snql_query(["a"], referrer="test")
+
+    @override_settings(SENTRY_SNUBA_HEDGE_DELAY=0.01)
+    @mock.patch("sentry.utils.snuba._raw_snql_query")
+    def test_hedge(self, raw_snql_query):
+        release_first = threading.Event()
+        calls = []
+
+        def query(*args, **kwargs):
+            calls.append(args)
+            if len(calls) == 1:
+                # The first request hangs until the test is done.
+                release_first.wait(5)
+                return snuba_response({"data": [{"attempt": 1}]})
+            return snuba_response({"data": [{"attempt": 2}]})
+
+        raw_snql_query.side_effect = query
+        try:
+            results = concurrent_bulk_snql_query(["a"], referrer="test", hedge=True)
+        finally:
+            release_first.set()
+        assert results[0]["data"] == [{"attempt": 2}]
+        assert len(calls) == 2
+
+    @override_settings(SENTRY_SNUBA_HEDGE_DELAY=0.01, SENTRY_SNUBA_MAX_HEDGES_IN_FLIGHT=0)
+    @mock.patch("sentry.utils.snuba._raw_snql_query")
+    def test_hedge_capped(self, raw_snql_query):
+        calls = []
+
+        def query(*args, **kwargs):
+            calls.append(args)
+            time.sleep(0.05)
+            return snuba_response({"data": [{"attempt": len(calls)}]})
+
+        raw_snql_query.side_effect = query
+        results = concurrent_bulk_snql_query(["a"], referrer="test", hedge=True)
+        assert results[0]["data"] == [{"attempt": 1}]
+        assert len(calls) == 1
+
+    @override_settings(SENTRY_SNUBA_HEDGE_DELAY=0.01, SENTRY_SNUBA_MAX_HEDGES_IN_FLIGHT=1)
+    @mock.patch("sentry.utils.snuba._raw_snql_query")
+    def test_hedge_queued_behind_full_pool(self, raw_snql_query):
+        def query(*args, **kwargs):
+            time.sleep(0.05)
+            return snuba_response({"data": []})
+
+        raw_snql_query.side_effect = query
+
+        class FullPool:
+            """Runs each original query, and leaves its hedge queued forever."""
+
+            def __init__(self):
+                self.pool = ThreadPoolExecutor(max_workers=1)
+                self.submissions = 0
+                self.hedges = []
+
+            def submit(self, fn, *args):
+                # Every query submits its original request, then its hedge.
+                self.submissions += 1
+                if self.submissions % 2:
+                    return self.pool.submit(fn, *args)
+                hedge = Future()
+                self.hedges.append(hedge)
+                return hedge
+
+        pool = FullPool()
+        try:
+            with mock.patch("sentry.utils.snuba._async_query_thread_pool", pool):
+                for i in range(3):
+                    concurrent_bulk_snql_query(["a"], referrer="test", hedge=True)
+                    # The queued hedge was cancelled once the original query
+                    # returned, which must free its slot for the next query.
+                    assert len(pool.hedges) == i + 1
+                    assert pool.hedges[-1].cancelled()
+                    assert _hedges_in_flight.count == 0
+        finally:
+            pool.pool.shutdown()
+
+    @mock.patch("sentry.utils.snuba.bulk_snql_query")
+    def test_running_event_loop(self, bulk_snql_query):
+        bulk_snql_query.return_value = [{"data": []}]
+
+        async def run():
+            return concurrent_bulk_snql_query(["a"], referrer="test", hedge=True)
+
+        assert asyncio.run(run()) == [{"data": []}]
+        bulk_snql_query.assert_called_once_with(["a"], referrer="test")
@@ -0,0 +1,176 @@
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import override_settings
+
+from sentry.testutils import TestCase
+from sentry.utils import json
+from sentry.utils.locking import UnableToAcquireLock
+from sentry.utils.snuba import _apply_cache_and_build_results, get_cache_key
+from sentry.utils.snuba_query_cache import (
+    FORMAT_JSON,
+    FORMAT_ZSTD,
+    CachePolicy,
+    SnubaQueryCache,
+    decode_entry,
+    encode_entry,
+    get_cache_policy,
+)
+
+RESULT = {"data": [{"count": 1}], "meta": [{"name": "count", "type": "UInt64"}]}
+
+
+def identity(x):
+    return x
+
+
+class EncodingTest(TestCase):
+    def test_round_trip(self):
+        encoded = encode_entry(RESULT, 100.0)
+        assert encoded[:1] == FORMAT_JSON
+        assert decode_entry(encoded) == (RESULT, 100.0)
+
+    @override_settings(SENTRY_SNUBA_CACHE_COMPRESSION_THRESHOLD=10)
+    def test_compressed_round_trip(self):
+        encoded = encode_entry(RESULT, 100.0)
+        assert encoded[:1] == FORMAT_ZSTD
+        assert decode_entry(encoded) == (RESULT, 100.0)
+
+    def test_legacy_entry(self):
+        assert decode_entry(json.dumps(RESULT)) == (RESULT, None)
+
+
+class CachePolicyTest(TestCase):
+    @override_settings(
+        SENTRY_SNUBA_CACHE_TTL_SECONDS=60,
+        SENTRY_SNUBA_CACHE_POLICIES={"dashboards": {"ttl": 30, "stale_ttl": 300}},
+    )
+    def test_policies(self):
+        assert get_cache_policy(None) == CachePolicy(60, 0)
+        assert get_cache_policy("other") == CachePolicy(60, 0)
+        assert get_cache_policy("dashboards") == CachePolicy(30, 300)
+
+
+class SnubaQueryCacheTest(TestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def test_stale(self):
+        query_cache = SnubaQueryCache("referrer")
+        cache.set("fresh", encode_entry(RESULT, time.time() + 60))
+        cache.set("stale", encode_entry(RESULT, time.time() - 1))
+
+        results = query_cache.get_many(["fresh", "stale", "missing"])
+        assert set(results) == {"fresh", "stale"}
+        assert not results["fresh"].is_stale
+        assert results["stale"].is_stale
+
+    def test_try_lock(self):
+        query_cache = SnubaQueryCache("referrer")
+        lock = query_cache.try_lock("key")
+        assert lock is not None
+        assert query_cache.try_lock("key") is None
+        lock.release()
+        query_cache.try_lock("key").release()
+
+    @override_settings(SENTRY_SNUBA_CACHE_COALESCE_TIMEOUT=0.2)
+    def test_wait_for_many(self):
+        query_cache = SnubaQueryCache("referrer")
+        locks = [query_cache.try_lock("a"), query_cache.try_lock("b")]
+        try:
+            query_cache.set("a", RESULT)
+            start = time.monotonic()
+            assert query_cache.wait_for_many(["a", "b"]) == {"a": RESULT}
+            # Both keys share a single deadline.
+            assert time.monotonic() - start < 0.4
+        finally:
+            for lock in locks:
+                lock.release()
+
+    @override_settings(SENTRY_SNUBA_CACHE_COALESCE_TIMEOUT=5)
+    def test_wait_for_many_released_without_result(self):
+        # Nobody holds the lock on the key and it is empty, so there is no
+        # point waiting for the rest of the timeout.
+        query_cache = SnubaQueryCache("referrer")
+        start = time.monotonic()
+        assert query_cache.wait_for_many(["key"]) == {}
+        assert time.monotonic() - start < 1
+
+    @mock.patch("sentry.utils.locking.lock.Lock.locked", side_effect=Exception("down"))
+    @mock.patch("sentry.utils.locking.lock.Lock.acquire", side_effect=UnableToAcquireLock)
+    def test_lock_backend_unavailable(self, acquire, locked):
+        query_cache = SnubaQueryCache("referrer")
+        # We can't tell whether anybody else is filling the key, so we fill it
+        # ourselves.
+        lock = query_cache.try_lock("key")
+        assert lock is not None
+        lock.release()
+
+        # The key is given up on instead of raising.
+        assert query_cache.wait_for_many(["key"]) == {}
+
+
+class ApplyCacheTest(TestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.query = ({"selected_columns": ["count"]}, identity, identity)
+
+    @mock.patch("sentry.utils.snuba._bulk_snuba_query", return_value=[RESULT])
+    def test_miss_then_hit(self, bulk_query):
+        assert list(_apply_cache_and_build_results([self.query], "test", True)) == [RESULT]
+        assert list(_apply_cache_and_build_results([self.query], "test", True)) == [RESULT]
+        assert bulk_query.call_count == 1
+
+    @override_settings(SENTRY_SNUBA_CACHE_COALESCE_TIMEOUT=0.2)
+    @mock.patch("sentry.utils.snuba._bulk_snuba_query", return_value=[RESULT])
+    def test_coalesce(self, bulk_query):
+        cache_key = get_cache_key(self.query[0])
+        query_cache = SnubaQueryCache("test")
+        lock = query_cache.try_lock(cache_key)
+        try:
+            # Another process is filling the key, so we pick up its result.
+            with mock.patch.object(
+                SnubaQueryCache,
+                "wait_for_many",
+                return_value={cache_key: {"data": [{"count": 2}]}},
+            ) as wait_for_many:
+                results = list(_apply_cache_and_build_results([self.query], "test", True))
+            assert results == [{"data": [{"count": 2}]}]
+            assert wait_for_many.call_count == 1
+            assert bulk_query.call_count == 0
+
+            # If it never shows up, we run the query ourselves.
+            results = list(_apply_cache_and_build_results([self.query], "test", True))
+            assert results == [RESULT]
+            assert bulk_query.call_count == 1
+        finally:
+            lock.release()
+
+    @mock.patch("sentry.utils.locking.lock.Lock.locked", side_effect=Exception("down"))
+    @mock.patch("sentry.utils.locking.lock.Lock.acquire", side_effect=UnableToAcquireLock)
+    @mock.patch("sentry.utils.snuba._bulk_snuba_query", return_value=[RESULT])
+    def test_lock_backend_unavailable(self, bulk_query, acquire, locked):
+        results = list(_apply_cache_and_build_results([self.query], "test", True))
+        assert results == [RESULT]
+        assert bulk_query.call_count == 1
+
+    @override_settings(SENTRY_SNUBA_CACHE_POLICIES={"test": {"ttl": 60, "stale_ttl": 60}})
+    @mock.patch("sentry.utils.snuba_query_cache._revalidate_thread_pool")
+    @mock.patch("sentry.utils.snuba._bulk_snuba_query", return_value=[RESULT])
+    def test_stale_while_revalidate(self, bulk_query, thread_pool):
+        cache_key = get_cache_key(self.query[0])
+        stale_result = {"data": [{"count": 2}]}
+        cache.set(cache_key, encode_entry(stale_result, time.time() - 1))
+
+        results = list(_apply_cache_and_build_results([self.query], "test", True))
+        assert results == [stale_result]
+        assert thread_pool.submit.call_count == 1
+
+        # Run the background refresh
+        thread_pool.submit.call_args[0][0]()
+        assert bulk_query.call_count == 1
+        results = list(_apply_cache_and_build_results([self.query], "test", True))
+        assert results == [RESULT]
@@ -6,6 +6,7 @@ from unittest.mock import patch
 import pytz
 from django.utils import timezone
 
+from sentry.api.event_search import SearchFilter, SearchKey, SearchValue
 from sentry.api.serializers import serialize
 from sentry.api.serializers.models.group import (
     GroupSerializerSnuba,
@@ -30,6 +31,7 @@ from sentry.testutils.helpers.datetime import before_now, iso_format
 from sentry.types.integrations import ExternalProviders
 from sentry.utils.cache import cache
 from sentry.utils.hashlib import hash_values
+from sentry.utils.snuba import bulk_raw_query
 
 
 class GroupSerializerSnubaTest(APITestCase, SnubaTestCase):
@@ -445,6 +447,31 @@ class StreamGroupSerializerTestCase(APITestCase, SnubaTestCase):
             for args, kwargs in get_range.call_args_list:
                 assert kwargs["environment_ids"] is None
 
+    def test_seen_stats_queries_are_batched(self):
+        group = self.group
+        search_filters = [
+            SearchFilter(SearchKey("level"), "=", SearchValue("error")),
+        ]
+
+        with mock.patch(
+            "sentry.api.serializers.models.group.bulk_raw_query",
+            side_effect=bulk_raw_query,
+        ) as bulk_query:
+            result = serialize(
+                [group],
+                serializer=StreamGroupSerializerSnuba(
+                    start=before_now(days=1),
+                    end=before_now(seconds=1),
+                    search_filters=search_filters,
+                ),
+            )
+            # time range, filtered and lifetime stats go out in a single request
+            assert bulk_query.call_count == 1
+            assert len(bulk_query.call_args[0][0]) == 3
+
+        assert result[0]["lifetime"] is not None
+        assert result[0]["filtered"] is not None
+
     def test_session_count(self):
         group = self.group
 
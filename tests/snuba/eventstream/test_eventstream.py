@@ -5,6 +5,11 @@ from unittest.mock import Mock, patch
 
 from sentry.event_manager import EventManager
 from sentry.eventstream.kafka import KafkaEventStream
+from sentry.eventstream.kafka.protocol import (
+    get_task_kwargs_for_message,
+    get_task_kwargs_for_message_from_headers,
+    has_task_headers,
+)
 from sentry.eventstream.snuba import SnubaEventStream
 from sentry.testutils import SnubaTestCase, TestCase
 from sentry.utils import json, snuba
@@ -49,6 +54,13 @@ class SnubaEventStreamTest(TestCase, SnubaTestCase):
         assert version == 2
         assert type_ == "insert"
 
+        # the headers alone are enough to dispatch post-processing
+        headers = produce_kwargs["headers"]
+        assert has_task_headers(headers)
+        assert get_task_kwargs_for_message_from_headers(headers) == get_task_kwargs_for_message(
+            produce_kwargs["value"]
+        )
+
         # insert what would have been the Kafka payload directly
         # into Snuba, expect an HTTP 200 and for the event to now exist
         snuba_eventstream = SnubaEventStream()
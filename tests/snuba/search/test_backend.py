@@ -27,9 +27,14 @@ from sentry.search.snuba.backend import (
     CdcEventsDatasetSnubaSearchBackend,
     EventsDatasetSnubaSearchBackend,
 )
-from sentry.search.snuba.executors import InvalidQueryForExecutor
+from sentry.search.snuba.executors import (
+    InvalidQueryForExecutor,
+    PostgresSnubaQueryExecutor,
+    _search_thread_pool,
+)
 from sentry.testutils import SnubaTestCase, TestCase, xfail_if_not_postgres
 from sentry.testutils.helpers.datetime import before_now, iso_format
+from sentry.utils import snuba
 from sentry.utils.snuba import SENTRY_SNUBA_MAP, Dataset, SnubaError
 
 
@@ -1395,6 +1400,99 @@ class EventsSnubaSearchTest(TestCase, SnubaTestCase):
             assert third_results.hits > 10
             assert third_results.results != second_results.results
 
+    def test_pipelined_chunks(self):
+        for i in range(30):
+            event = self.store_event(
+                data={
+                    "fingerprint": [f"put-me-in-group{i}"],
+                    "timestamp": iso_format(self.base_datetime - timedelta(days=21, minutes=i)),
+                    "tags": {"match": f"{i % 2}"},
+                },
+                project_id=self.project.id,
+            )
+            group = event.group
+            group.status = GroupStatus.UNRESOLVED if i % 3 == 0 else GroupStatus.RESOLVED
+            group.save()
+            self.store_group(group)
+
+        with self.options({"snuba.search.max-pre-snuba-candidates": 5}):
+            expected = self.make_query(
+                search_filter_query="is:unresolved match:0", limit=2, count_hits=True
+            )
+            with self.options({"snuba.search.pipelined-chunks": True}):
+                results = self.make_query(
+                    search_filter_query="is:unresolved match:0", limit=2, count_hits=True
+                )
+
+        assert len(expected.results) == 2
+        assert results.results == expected.results
+        assert results.hits == expected.hits == 5
+        assert results.next.has_results
+
+    def test_built_snuba_search_runs_without_postgres(self):
+        production = self.environments["production"]
+        search = PostgresSnubaQueryExecutor().build_snuba_search(
+            start=self.base_datetime - timedelta(days=30),
+            end=self.base_datetime + timedelta(days=30),
+            project_ids=[self.project.id],
+            environment_ids=[production.id],
+            sort_field="last_seen",
+            organization_id=self.project.organization_id,
+            limit=10,
+            search_filters=self.build_search_filter("foo"),
+        )
+
+        # Safe to run on threads without a database connection.
+        with self.assertNumQueries(0):
+            groups, total = search()
+
+        assert [group_id for group_id, _ in groups] == [self.group1.id]
+        assert total == 1
+
+    def test_built_snuba_search_keeps_options_override(self):
+        with snuba.options_override({"consistent": True}):
+            search = PostgresSnubaQueryExecutor().build_snuba_search(
+                start=self.base_datetime - timedelta(days=30),
+                end=self.base_datetime + timedelta(days=30),
+                project_ids=[self.project.id],
+                environment_ids=None,
+                sort_field="last_seen",
+                organization_id=self.project.organization_id,
+                limit=10,
+                search_filters=self.build_search_filter("foo"),
+            )
+
+        # The overrides of the request thread apply to the query, even though
+        # it's sent from another thread once they've been reset.
+        with mock.patch.object(
+            snuba, "_apply_cache_and_build_results", wraps=snuba._apply_cache_and_build_results
+        ) as apply_cache:
+            _search_thread_pool.submit(search).result()
+
+        (query_body,) = apply_cache.call_args[0][0]
+        assert query_body[0]["consistent"] is True
+
+    def test_candidate_cache(self):
+        with self.options({"snuba.search.candidate-cache-ttl": 60}):
+            for _ in range(2):
+                results = self.make_query(search_filter_query="is:unresolved")
+                assert set(results) == {self.group1}
+
+                results = self.make_query(
+                    search_filter_query="is:resolved assigned:%s" % self.user.username
+                )
+                assert set(results) == {self.group2}
+
+            self.group1.update(status=GroupStatus.RESOLVED)
+            results = self.make_query(search_filter_query="is:unresolved")
+            assert set(results) == set()
+
+            GroupAssignee.objects.assign(self.group1, self.user)
+            results = self.make_query(
+                search_filter_query="is:resolved assigned:%s" % self.user.username
+            )
+            assert set(results) == {self.group1, self.group2}
+
     def test_regressed_in_release(self):
         # expect no groups within the results since there are no releases
         results = self.make_query(search_filter_query="regressed_in_release:fake")
@@ -18,7 +18,7 @@ from sentry.sentry_metrics.indexer.postgres import PGStringIndexer
 from sentry.testutils.cases import TestCase
 from sentry.testutils.helpers.task_runner import TaskRunner
 from sentry.utils import json, kafka_config
-from sentry.utils.batching_kafka_consumer import wait_for_topics
+from sentry.utils.batching_kafka_consumer import SourceOffset, wait_for_topics
 
 logger = logging.getLogger(__name__)
 
@@ -62,39 +62,101 @@ class MetricsIndexerWorkerTest(TestCase):
         self.assert_metrics_indexer_worker()
 
     def test_with_exception(self):
-        self.assert_metrics_indexer_worker(flush_return_value=1, with_exception=True)
+        self.assert_metrics_indexer_worker(delivery_error=Mock())
 
     @pytest.mark.django_db
     @patch("confluent_kafka.Producer")
-    def assert_metrics_indexer_worker(
-        self, producer, metrics_payload=payload, flush_return_value=0, with_exception=False
-    ):
+    def assert_metrics_indexer_worker(self, producer, metrics_payload=payload, delivery_error=None):
         producer.produce = MagicMock()
-        producer.flush = MagicMock(return_value=flush_return_value)
 
         metrics_worker = MetricsIndexerWorker(producer=producer)
 
         mock_message = Mock()
         mock_message.value = MagicMock(return_value=json.dumps(metrics_payload))
+        mock_message.topic.return_value = "ingest-metrics"
+        mock_message.partition.return_value = 0
+        mock_message.offset.return_value = 10
+
+        source, parsed = metrics_worker.process_message(mock_message)
+        assert source == SourceOffset("ingest-metrics", 0, 10)
+        assert parsed == metrics_payload
+
+        metrics_worker.flush_batch([(source, parsed)])
+        (topic,), kwargs = producer.produce.call_args
+        assert topic == "snuba-metrics"
+        assert kwargs["key"] is None
+        assert kwargs["value"] == json.dumps(translate_payload()).encode()
+
+        # Nothing can be committed until the message has been delivered
+        tracker = metrics_worker.delivery_tracker
+        tracker.seal({("ingest-metrics", 0): [10, 10]})
+        assert tracker.get_commit_offsets() == ([], None)
+
+        kwargs["on_delivery"](delivery_error, None)
+        offsets, error = tracker.get_commit_offsets()
+        if delivery_error is not None:
+            assert offsets == []
+            assert error is delivery_error
+        else:
+            assert [(tp.topic, tp.partition, tp.offset) for tp in offsets] == [
+                ("ingest-metrics", 0, 11)
+            ]
+            assert error is None
+
+    @pytest.mark.django_db
+    @patch("sentry.sentry_metrics.indexer.indexer_consumer.process_indexed_metrics")
+    @patch("sentry.sentry_metrics.indexer.indexer_consumer.indexer")
+    def test_batch_is_indexed_at_once(self, indexer, mock_task):
+        indexer.bulk_record.side_effect = PGStringIndexer().bulk_record
+        producer = Mock()
+        producer.flush.return_value = 0
+        metrics_worker = MetricsIndexerWorker(producer=producer)
 
-        parsed = metrics_worker.process_message(mock_message)
-        assert parsed["tags"] == {
-            PGStringIndexer().resolve(string=k): PGStringIndexer().resolve(string=str(v))
-            for k, v in payload["tags"].items()
+        other_payload = {**payload, "name": "user", "tags": {"environment": "staging"}}
+        batch = [
+            metrics_worker.process_message(Mock(value=Mock(return_value=json.dumps(message))))
+            for message in (payload, other_payload)
+        ]
+        metrics_worker.flush_batch(batch)
+
+        assert indexer.bulk_record.call_count == 1
+        assert sorted(indexer.bulk_record.call_args[0][0]) == sorted(
+            {"session", "user", "staging", *payload["tags"].keys(), *payload["tags"].values()}
+        )
+        assert producer.produce.call_count == 2
+        produced = json.loads(producer.produce.call_args_list[1][1]["value"])
+        assert produced["metric_id"] == PGStringIndexer().resolve("user")
+        assert produced["tags"] == {
+            str(PGStringIndexer().resolve("environment")): PGStringIndexer().resolve("staging")
         }
-        assert parsed["metric_id"] == PGStringIndexer().resolve(string=payload["name"])
 
-        if with_exception:
-            with pytest.raises(Exception, match="didn't get all the callbacks: 1 left"):
-                metrics_worker.flush_batch([parsed])
-        else:
-            metrics_worker.flush_batch([parsed])
-            producer.produce.assert_called_with(
-                topic="snuba-metrics",
-                key=None,
-                value=json.dumps(parsed).encode(),
-                on_delivery=metrics_worker.callback,
-            )
+    @pytest.mark.django_db
+    @patch("sentry.sentry_metrics.indexer.indexer_consumer.process_indexed_metrics")
+    def test_task_enqueued_after_delivery(self, mock_task):
+        producer = Mock()
+        metrics_worker = MetricsIndexerWorker(producer=producer)
+
+        other_payload = {**payload, "name": "user"}
+        batch = [
+            metrics_worker.process_message(Mock(value=Mock(return_value=json.dumps(message))))
+            for message in (payload, other_payload)
+        ]
+        metrics_worker.flush_batch(batch)
+        assert not mock_task.apply_async.called
+
+        first_delivery, second_delivery = (
+            call[1]["on_delivery"] for call in producer.produce.call_args_list
+        )
+        first_delivery(None, Mock())
+        assert not mock_task.apply_async.called
+
+        # The second message failed to deliver and will be consumed again,
+        # so only the first one is handed to the task.
+        second_delivery(Mock(), Mock())
+        translated_msg = translate_payload()
+        mock_task.apply_async.assert_called_once_with(
+            kwargs={"messages": [{k: translated_msg[k] for k in ["tags", "name", "org_id"]}]}
+        )
 
 
 class MetricsIndexerConsumerTest(TestCase):
@@ -209,5 +271,16 @@ class MetricsIndexerConsumerTest(TestCase):
             def value(self):
                 return json.dumps(payload_without_tags)
 
-        translated = MetricsIndexerWorker(None).process_message(MockMessage())
-        assert translated["tags"] == {}
+            def topic(self):
+                return "ingest-metrics"
+
+            def partition(self):
+                return 0
+
+            def offset(self):
+                return 0
+
+        worker = MetricsIndexerWorker(None)
+        _, parsed = worker.process_message(MockMessage())
+        translated = worker.index_batch([parsed])
+        assert translated[0]["tags"] == {}
@@ -0,0 +1,139 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.utils import timezone
+
+from sentry import app
+from sentry.tagstore.snuba.backend import SnubaTagStorage
+from sentry.tagstore.snuba.planner import TagQuery, TagQueryPlanner, clear_memo
+from sentry.testutils import SnubaTestCase, TestCase
+from sentry.testutils.helpers.datetime import iso_format
+from sentry.utils import snuba
+
+
+class TagQueryPlannerTest(TestCase, SnubaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.now = timezone.now().replace(microsecond=0)
+        for i, (release, user) in enumerate([("100", "1"), ("100", "2"), ("200", "1")]):
+            self.group = self.store_event(
+                data={
+                    "fingerprint": ["group-1"],
+                    "timestamp": iso_format(self.now - timedelta(seconds=i + 1)),
+                    "tags": {"sentry:release": release},
+                    "user": {"id": user},
+                },
+                project_id=self.project.id,
+            ).group
+
+    def get_query(self, aggregations, limit=None):
+        return TagQuery(
+            groupby=["tags[sentry:release]"],
+            filter_keys={"project_id": [self.project.id], "group_id": [self.group.id]},
+            aggregations=aggregations,
+            orderby="-count",
+            limit=limit,
+            referrer="tagstore.test",
+        )
+
+    def test_fused(self):
+        count = self.get_query([["count()", "", "count"]], limit=1)
+        users = self.get_query(
+            [["count()", "", "count"], ["uniq", "tags[sentry:user]", "users"]], limit=2
+        )
+        seen = self.get_query([["count()", "", "count"], ["max", "timestamp", "last_seen"]])
+
+        with mock.patch.object(snuba, "bulk_raw_query", wraps=snuba.bulk_raw_query) as query:
+            results = TagQueryPlanner().query_many([count, users, seen])
+
+        assert query.call_count == 1
+        assert len(query.call_args[0][0]) == 1
+        assert results[0] == {"100": 2}
+        assert results[1] == {"100": {"count": 2, "users": 2}, "200": {"count": 1, "users": 1}}
+        assert list(results[2]) == ["100", "200"]
+
+    def test_batched(self):
+        count = self.get_query([["count()", "", "count"]])
+        total = TagQuery(
+            filter_keys={"project_id": [self.project.id], "group_id": [self.group.id]},
+            aggregations=[["count()", "", "count"]],
+            referrer="tagstore.test",
+        )
+
+        with mock.patch.object(snuba, "bulk_raw_query", wraps=snuba.bulk_raw_query) as query:
+            results = TagQueryPlanner().query_many([count, total])
+
+        assert query.call_count == 1
+        assert len(query.call_args[0][0]) == 2
+        assert results == [{"100": 2, "200": 1}, 3]
+
+    def test_batched_per_referrer(self):
+        count = self.get_query([["count()", "", "count"]])
+        users = self.get_query([["uniq", "tags[sentry:user]", "users"]])
+        users.referrer = "tagstore.other"
+
+        with mock.patch.object(snuba, "bulk_raw_query", wraps=snuba.bulk_raw_query) as query:
+            results = TagQueryPlanner().query_many([count, users])
+
+        assert sorted(call.kwargs["referrer"] for call in query.call_args_list) == [
+            "tagstore.other",
+            "tagstore.test",
+        ]
+        assert results == [{"100": 2, "200": 1}, {"100": 2, "200": 1}]
+
+    def test_keys_and_top_values_window(self):
+        start = self.now - timedelta(seconds=2)
+        end = self.now
+
+        with mock.patch.object(snuba, "bulk_raw_query", wraps=snuba.bulk_raw_query) as query:
+            keys = SnubaTagStorage().get_group_tag_keys_and_top_values(
+                self.project.id, self.group.id, None, keys=["sentry:release"], start=start, end=end
+            )
+
+        params = {call.kwargs["referrer"]: call.args[0][0] for call in query.call_args_list}
+        assert set(params) == {
+            "tagstore.__get_tag_keys",
+            "tagstore.__get_tag_keys_and_top_values",
+        }
+        # The keys are counted over the default window, the values over the
+        # requested one.
+        assert params["tagstore.__get_tag_keys"].start != start
+        assert params["tagstore.__get_tag_keys_and_top_values"].start == start
+
+        (key,) = keys
+        assert key.count == 3
+
+    def test_memo(self):
+        planner = TagQueryPlanner()
+        assert planner.query(self.get_query([["count()", "", "count"]])) == {"100": 2, "200": 1}
+
+        with mock.patch.object(snuba, "bulk_raw_query") as query:
+            assert planner.query(self.get_query([["count()", "", "count"]], limit=1)) == {"100": 2}
+        assert query.call_count == 0
+
+    def test_outside_retention(self):
+        query = self.get_query([["count()", "", "count"]])
+        query.start = self.now - timedelta(days=365)
+        query.end = self.now - timedelta(days=364)
+        assert TagQueryPlanner().query_many(
+            [query, self.get_query([["count()", "", "count"]])]
+        ) == [
+            {},
+            {"100": 2, "200": 1},
+        ]
+
+    def test_request_memo(self):
+        ts = SnubaTagStorage()
+        with mock.patch.object(app.env, "request", mock.Mock()):
+            try:
+                key = ts.get_group_tag_key(self.project.id, self.group.id, None, "sentry:release")
+                with mock.patch.object(snuba, "bulk_raw_query") as query:
+                    top_values = ts.get_top_group_tag_values(
+                        self.project.id, self.group.id, None, "sentry:release", limit=1
+                    )
+                assert query.call_count == 0
+            finally:
+                clear_memo()
+
+        assert [value.value for value in top_values] == ["100"]
+        assert key.top_values[:1] == top_values
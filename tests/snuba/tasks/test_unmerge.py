@@ -5,7 +5,7 @@ import logging
 import uuid
 from collections import OrderedDict
 from datetime import datetime, timedelta
-from unittest.mock import patch
+from unittest.mock import Mock, call, patch
 
 import pytz
 from django.utils import timezone
@@ -21,6 +21,7 @@ from sentry.tasks.unmerge import (
     get_fingerprint,
     get_group_backfill_attributes,
     get_group_creation_attributes,
+    repair_tsdb_data,
     unmerge,
 )
 from sentry.testutils import SnubaTestCase, TestCase
@@ -166,6 +167,76 @@ class UnmergeTestCase(TestCase, SnubaTestCase):
         }
 
     @with_feature("projects:similarity-indexing")
+    @patch("sentry.tasks.unmerge.tsdb")
+    def test_repair_tsdb_data(self, tsdb):
+        production = self.create_environment(name="production")
+        staging = self.create_environment(name="staging")
+        now = before_now(minutes=5).replace(microsecond=0)
+        later = now + timedelta(seconds=1)
+
+        def make_event(environment, timestamp, user_id):
+            return Mock(
+                group_id=self.group.id,
+                datetime=timestamp,
+                data={"user": {"id": user_id}},
+                get_tag={"environment": environment}.get,
+            )
+
+        repair_tsdb_data(
+            get_caches(),
+            self.project,
+            [
+                make_event("production", now, "a"),
+                make_event("production", now, "b"),
+                make_event("production", later, "a"),
+                make_event("staging", now, "a"),
+            ],
+        )
+
+        def tag_value(user_id):
+            return get_event_user_from_interface({"id": user_id}).tag_value
+
+        # Counters are incremented with one call per environment, and sets are
+        # recorded with one call per timestamp and environment.
+        assert not tsdb.incr.called
+        assert not tsdb.record.called
+        assert tsdb.incr_multi.call_args_list == [
+            call(
+                [
+                    (tsdb.models.group, self.group.id, {"timestamp": now, "count": 2}),
+                    (tsdb.models.group, self.group.id, {"timestamp": later, "count": 1}),
+                ],
+                environment_id=production.id,
+            ),
+            call(
+                [(tsdb.models.group, self.group.id, {"timestamp": now, "count": 1})],
+                environment_id=staging.id,
+            ),
+        ]
+        assert tsdb.record_multi.call_args_list == [
+            call(
+                [
+                    (
+                        tsdb.models.users_affected_by_group,
+                        self.group.id,
+                        {tag_value("a"), tag_value("b")},
+                    )
+                ],
+                now,
+                environment_id=production.id,
+            ),
+            call(
+                [(tsdb.models.users_affected_by_group, self.group.id, {tag_value("a")})],
+                now,
+                environment_id=staging.id,
+            ),
+            call(
+                [(tsdb.models.users_affected_by_group, self.group.id, {tag_value("a")})],
+                later,
+                environment_id=production.id,
+            ),
+        ]
+
     def test_unmerge(self):
         now = before_now(minutes=5).replace(microsecond=0, tzinfo=pytz.utc)
 